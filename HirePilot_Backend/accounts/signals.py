@@ -7,14 +7,16 @@ from .models import UserProfile
 User = get_user_model()
 
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_or_update_user_profile(sender, instance, created, update_fields=None, **kwargs):
     """
     Se ejecuta automáticamente cada vez que se guarda un Usuario.
     Maneja tanto la creación como la actualización en una sola función.
     """
     if created:
         UserProfile.objects.create(user=instance)
-    else:
-        # Si el usuario ya existía y se actualizó, guardamos el perfil por si acaso
+    elif update_fields is None:
+        # Si el usuario ya existía y se actualizó, guardamos el perfil por si acaso.
+        # Los guardados parciales (last_login en cada login, plan...) no tocan el perfil
+        # y resguardarlo invalidaría el snapshot del generador de CVs.
         if hasattr(instance, 'profile'):
             instance.profile.save()
\ No newline at end of file
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CvGeneratorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cv_generator'
+
+    def ready(self):
+        """
+        Registramos las signals que invalidan el caché de snapshots del perfil,
+        los checks de configuración y, si está activado, precalentamos la conexión con la IA.
+        """
+        import cv_generator.checks  # noqa: F401
+        import cv_generator.signals  # noqa: F401
+
+        from .client import start_warm_up
+
+        if settings.AI_WARMUP:
+            start_warm_up()
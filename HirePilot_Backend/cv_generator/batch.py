@@ -0,0 +1,60 @@
+"""
+Generación por lotes: un mismo perfil contra muchas ofertas en una sola petición.
+
+El snapshot del perfil se carga una vez para todo el lote y las llamadas a la IA se lanzan
+en paralelo (async, un solo hilo) con un máximo de CV_BATCH_CONCURRENCY en vuelo.
+"""
+
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+
+from .services import CVGeneratorService, format_cv_response
+from .snapshot import get_profile_snapshot
+
+logger = logging.getLogger(__name__)
+
+ITEM_ERROR = 'Hubo un problema procesando la solicitud con la IA.'
+
+
+async def agenerate_batch(user, items, concurrency=None, user_data=None):
+    """
+    Genera un CV por cada {'job_description', 'language'} de items.
+    Devuelve un resultado por elemento, en el mismo orden: un fallo en uno no tumba el lote.
+    """
+    if user_data is None:
+        user_data = await sync_to_async(get_profile_snapshot)(user)
+    semaphore = asyncio.Semaphore(concurrency or settings.CV_BATCH_CONCURRENCY)
+
+    async def generate(index, item):
+        async with semaphore:
+            generator = CVGeneratorService(
+                user=user,
+                job_description=item['job_description'],
+                language=item['language'],
+                user_data=user_data,
+            )
+            try:
+                ai_result_json = await generator.agenerate_cv()
+            except Exception:
+                logger.exception(f'Error generando el CV {index} del lote')
+                return {'index': index, 'status': 'error', 'error': ITEM_ERROR}
+
+        return {
+            'index': index,
+            'status': 'ok',
+            'language': item['language'],
+            'cache': generator.cache_status,
+            **format_cv_response(ai_result_json, generator.history_id),
+        }
+
+    return await asyncio.gather(*(generate(index, item) for index, item in enumerate(items)))
+
+
+def generate_batch(user, items, concurrency=None):
+    """Versión para vistas síncronas (DRF): corre el lote en su propio event loop."""
+    results = async_to_sync(agenerate_batch)(user, items, concurrency)
+    failed = sum(1 for result in results if result['status'] == 'error')
+    return {'results': results, 'succeeded': len(results) - failed, 'failed': failed}
@@ -0,0 +1,662 @@
+"""
+Micro-benchmarks del generador de CVs.
+Se ejecutan con: python manage.py benchmark_cv <nombre>
+Cada benchmark devuelve un diccionario de métricas (tiempos en milisegundos).
+"""
+
+import asyncio
+import copy
+import itertools
+import json
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.test import override_settings
+
+from . import pdf, prompts, resilience
+from .batch import agenerate_batch
+from .client import build_openai_client
+from .json_stream import IncrementalJSONParser
+from .multilang import estimate_costs
+from .preprocessing import clean_job_description, estimate_tokens
+from .ranking import prune_profile
+from .services import CVGeneratorService
+from .tailoring import tailor_cv
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Registra una función como benchmark disponible en el comando benchmark_cv."""
+
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def _timed(func, repeat):
+    """Ejecuta func `repeat` veces y devuelve la mediana en ms y el último resultado."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def _peak_memory_kb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def large_cv_output(experiences=300, skills=200, projects=100):
+    """Un structured_cv_data exagerado, como el de un perfil senior muy largo."""
+    return {
+        'job_title_target': 'Senior Backend Engineer',
+        'profile_summary': 'Ingeniero con 15 años de experiencia en sistemas distribuidos. ' * 4,
+        'selected_skills': [f'Skill {i}' for i in range(skills)],
+        'selected_languages': [{'name': 'Inglés', 'level': 'C1'}],
+        'experience': [
+            {
+                'company': f'Empresa {i}',
+                'position': 'Backend Developer',
+                'date_range': '2015-01-01 - 2018-01-01',
+                'location': 'Madrid',
+                'enhanced_description': [
+                    f'Diseñé la API "{i}" reduciendo la latencia un {i % 90}% con caché.'
+                    for _ in range(5)
+                ],
+            }
+            for i in range(experiences)
+        ],
+        'education': [{'institution': 'UPM', 'degree': 'Ingeniería', 'date_range': '2010'}],
+        'projects': [
+            {
+                'title': f'Proyecto {i}',
+                'role': 'Lead',
+                'description': 'Plataforma SaaS con Django, React y PostgreSQL.',
+                'tech_stack': ['Django', 'React'],
+                'url': f'https://example.com/{i}',
+            }
+            for i in range(projects)
+        ],
+        'certificates': [{'name': 'AWS SAA', 'issuer': 'AWS', 'date': '2022-01-01'}],
+    }
+
+
+def small_cv_output(**overrides):
+    """Una respuesta de la IA pequeña que cumple el esquema (schema.py)."""
+    return {**large_cv_output(experiences=1, skills=3, projects=1), **overrides}
+
+
+@benchmark('json_stream')
+def bench_json_stream(repeat=5, chunk_size=16):
+    """
+    Parser incremental vs json.loads sobre el texto completo.
+    chunk_size imita el tamaño de los deltas que manda el proveedor en streaming.
+    """
+    text = json.dumps(large_cv_output(), ensure_ascii=False)
+    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def full_buffer():
+        return json.loads(''.join(chunks))
+
+    def incremental():
+        parser = IncrementalJSONParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.result
+
+    def incremental_first_event():
+        parser = IncrementalJSONParser()
+        for chunk in chunks:
+            if parser.feed(chunk):
+                return
+
+    full_ms, full_result = _timed(full_buffer, repeat)
+    incremental_ms, incremental_result = _timed(incremental, repeat)
+    first_event_ms, _ = _timed(incremental_first_event, repeat)
+    assert incremental_result == full_result
+
+    return {
+        'output_kb': round(len(text.encode('utf-8')) / 1024, 1),
+        'chunks': len(chunks),
+        'full_buffer_ms': round(full_ms, 2),
+        'incremental_ms': round(incremental_ms, 2),
+        'incremental_first_event_ms': round(first_event_ms, 3),
+        'full_buffer_peak_kb': round(_peak_memory_kb(full_buffer), 1),
+        'incremental_peak_kb': round(_peak_memory_kb(incremental), 1),
+    }
+
+
+# --- Endpoint falso compatible con OpenAI ---
+
+FAKE_COMPLETION = {
+    'id': 'chatcmpl-bench',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'bench',
+    'choices': [
+        {
+            'index': 0,
+            'finish_reason': 'stop',
+            'message': {'role': 'assistant', 'content': '{"job_title_target": "Dev"}'},
+        }
+    ],
+    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+}
+
+
+class _FakeChatHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, como el proveedor real
+    disable_nagle_algorithm = True  # Si no, el ACK retardado de TCP añade ~40 ms
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or '{}')
+        if self.server.respond is None:
+            time.sleep(self.server.latency)  # Simula lo que tarda el LLM
+            completion = FAKE_COMPLETION
+        else:
+            delay, content = self.server.respond(request)
+            time.sleep(delay)
+            completion = copy.deepcopy(FAKE_COMPLETION)
+            completion['choices'][0]['message']['content'] = content
+        body = json.dumps(completion).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed_cert(directory):
+    """Certificado autofirmado para localhost (requiere el binario openssl)."""
+    cert, key = Path(directory) / 'cert.pem', Path(directory) / 'key.pem'
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1']
+        + ['-keyout', str(key), '-out', str(cert), '-subj', '/CN=localhost']
+        + ['-addext', 'subjectAltName=DNS:localhost'],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+class _FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Aguanta ráfagas de conexiones concurrentes
+
+    def handle_error(self, request, client_address):
+        # El cliente cerró antes de la respuesta (ej: el perdedor de un hedge): no es un error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+@contextmanager
+def fake_openai_endpoint(tls=True, latency=0.0, respond=None):
+    """
+    Levanta un servidor local que responde como /chat/completions
+    tras `latency` segundos. Devuelve (base_url, verify) para construir el cliente.
+    respond(request) -> (segundos, contenido) permite simular respuestas a medida.
+    """
+    server = _FakeServer(('localhost', 0), _FakeChatHandler)
+    server.latency = latency
+    server.respond = respond
+    with tempfile.TemporaryDirectory() as directory:
+        verify = True
+        scheme = 'http'
+        if tls:
+            cert, key = _self_signed_cert(directory)
+            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            context.load_cert_chain(cert, key)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+            verify = ssl.create_default_context(cafile=str(cert))
+            scheme = 'https'
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f'{scheme}://localhost:{server.server_address[1]}/v1', verify
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+@benchmark('openai_client')
+def bench_openai_client(requests=50):
+    """
+    Un cliente nuevo por petición (antes) vs el cliente compartido del proceso (ahora)
+    contra un endpoint local. La diferencia es el coste de conexión + TLS + setup del SDK.
+    """
+    tls = shutil.which('openssl') is not None
+    messages = [{'role': 'user', 'content': 'hola'}]
+
+    with fake_openai_endpoint(tls=tls) as (base_url, verify):
+
+        def per_request():
+            client = build_openai_client(base_url=base_url, verify=verify)
+            client.chat.completions.create(model='bench', messages=messages)
+            client.close()
+
+        shared_client = build_openai_client(base_url=base_url, verify=verify)
+
+        def shared():
+            shared_client.chat.completions.create(model='bench', messages=messages)
+
+        shared()  # La primera petición abre la conexión que luego se reutiliza
+        per_request_ms, _ = _timed(per_request, requests)
+        shared_ms, _ = _timed(shared, requests)
+        shared_client.close()
+
+    return {
+        'tls': tls,
+        'requests': requests,
+        'per_request_client_ms': round(per_request_ms, 2),
+        'shared_client_ms': round(shared_ms, 2),
+        'saved_per_request_ms': round(per_request_ms - shared_ms, 2),
+    }
+
+
+class _BenchCVGeneratorService(CVGeneratorService):
+    """Servicio real salvo el perfil y la oferta, que no pasan por la DB."""
+
+    profile = None
+
+    def _gather_user_data(self):
+        return self.profile
+
+    def _job_prompt_text(self, clean_job_description):
+        return clean_job_description
+
+
+def bench_profile():
+    """Perfil maestro (formato snapshot) de tamaño realista."""
+    return {
+        'personal_info': {'firstName': 'Ana', 'lastName': 'García', 'email': 'ana@example.com'},
+        'experience': [
+            {
+                'company': f'Empresa {i}',
+                'role': 'Backend Developer',
+                'start_date': '2018-01-01',
+                'end_date': '2020-01-01',
+                'current_job': False,
+                'description': 'APIs REST con Django y PostgreSQL, colas y caché.',
+                'location': 'Madrid',
+                'achievements': [],
+            }
+            for i in range(8)
+        ],
+        'education': [],
+        'skills': ['Python', 'Django', 'PostgreSQL', 'Docker', 'React'],
+        'projects': [],
+        'languages': [],
+        'certificates': [],
+    }
+
+
+@benchmark('asgi_vs_sync')
+def bench_asgi_vs_sync(requests=64, latency=0.2, sync_threads=8):
+    """
+    Misma carga concurrente contra un LLM simulado (latencia fija):
+    generate_cv en un pool de `sync_threads` hilos (como un worker WSGI con hilos)
+    vs agenerate_cv con todas las peticiones en un único event loop (worker ASGI).
+    """
+    _BenchCVGeneratorService.profile = bench_profile()
+
+    def check(result):
+        assert result['job_title_target'] == 'Dev', 'La IA simulada no respondió (fallback)'
+
+    with fake_openai_endpoint(tls=False, latency=latency) as (base_url, _):
+        with override_settings(
+            OPENAI_API_KEY='sk-bench',
+            AI_BASE_URL=base_url,
+            AI_MAX_RETRIES=0,
+            AI_HTTP_MAX_CONNECTIONS=requests,
+            AI_HTTP_MAX_KEEPALIVE=requests,
+        ):
+
+            def run_sync(index):
+                check(_BenchCVGeneratorService(None, f'Oferta sync {index}', 'es').generate_cv())
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=sync_threads) as pool:
+                list(pool.map(run_sync, range(requests)))
+            sync_seconds = time.perf_counter() - start
+
+            async def run_async():
+                results = await asyncio.gather(
+                    *(
+                        _BenchCVGeneratorService(None, f'Oferta async {i}', 'es').agenerate_cv()
+                        for i in range(requests)
+                    )
+                )
+                for result in results:
+                    check(result)
+
+            start = time.perf_counter()
+            asyncio.run(run_async())
+            async_seconds = time.perf_counter() - start
+
+    return {
+        'requests': requests,
+        'llm_latency_ms': latency * 1000,
+        'sync_threads': sync_threads,
+        'sync_total_s': round(sync_seconds, 2),
+        'sync_req_per_s': round(requests / sync_seconds, 1),
+        'async_total_s': round(async_seconds, 2),
+        'async_req_per_s': round(requests / async_seconds, 1),
+    }
+
+
+@benchmark('batch')
+def bench_batch(items=24, latency=0.2, levels=(1, 2, 4, 8)):
+    """
+    Un lote de `items` ofertas contra un LLM simulado con latencia fija, para varios
+    niveles de concurrencia. Con la IA como cuello de botella, el speedup debería
+    acercarse a la concurrencia.
+    """
+    profile = bench_profile()
+    results = {}
+    with fake_openai_endpoint(tls=False, latency=latency) as (base_url, _):
+        with override_settings(
+            OPENAI_API_KEY='sk-bench',
+            AI_BASE_URL=base_url,
+            AI_MAX_RETRIES=0,
+            JOB_POSTING_STORE_ENABLED=False,
+        ):
+            for concurrency in levels:
+                # Ofertas distintas en cada nivel para no acertar en el caché de CVs
+                batch = [
+                    {'job_description': f'Oferta {concurrency}-{i}', 'language': 'es'}
+                    for i in range(items)
+                ]
+                start = time.perf_counter()
+                outcome = asyncio.run(
+                    agenerate_batch(None, batch, concurrency=concurrency, user_data=profile)
+                )
+                seconds = time.perf_counter() - start
+                assert all(r['job_title_extracted'] == 'Dev' for r in outcome), 'Fallback'
+                results[f'concurrency_{concurrency}'] = {
+                    'total_s': round(seconds, 2),
+                    'req_per_s': round(items / seconds, 1),
+                }
+
+    base = results[f'concurrency_{levels[0]}']['total_s']
+    for concurrency in levels:
+        entry = results[f'concurrency_{concurrency}']
+        entry['speedup'] = round(base / entry['total_s'], 2)
+    return results
+
+
+BENCH_JOB_DESCRIPTION = (
+    'Buscamos Senior Backend Engineer para nuestra plataforma de pagos. Requisitos: Python, '
+    'Django, PostgreSQL, Redis, Docker, Kubernetes, AWS y experiencia diseñando APIs REST de '
+    'alta disponibilidad. Valorable Kafka, observabilidad (Prometheus, Grafana) y liderazgo '
+    'técnico de equipos pequeños. Ofrecemos trabajo remoto y formación continua. '
+) * 3
+
+
+def ranking_profile(experiences=80, projects=60, skills=60):
+    """Perfil de 200 elementos (experiencias + proyectos + skills) con logros."""
+    stack = ['Python', 'Django', 'Java', 'Spring', 'React', 'Kafka', 'Excel', 'SAP', 'Docker']
+    return {
+        'experience': [
+            {
+                'company': f'Empresa {i}',
+                'role': 'Backend Developer' if i % 3 else 'Consultor',
+                'description': f'Desarrollo de servicios con {stack[i % 9]} y {stack[(i + 4) % 9]}'
+                ' para clientes del sector financiero, con foco en rendimiento y calidad.',
+                'achievements': [
+                    {'description': f'Reduje la latencia de la API {j} un 30%', 'keywords': []}
+                    for j in range(4)
+                ],
+            }
+            for i in range(experiences)
+        ],
+        'projects': [
+            {
+                'title': f'Proyecto {i}',
+                'role': 'Lead',
+                'description': f'Plataforma construida con {stack[i % 9]} y PostgreSQL.',
+                'technologies': [stack[i % 9], stack[(i + 2) % 9]],
+            }
+            for i in range(projects)
+        ],
+        'skills': [f'{stack[i % 9]} {i}' if i >= 9 else stack[i] for i in range(skills)],
+    }
+
+
+@benchmark('ranking')
+def bench_ranking(repeat=50):
+    """Tiempo de prune_profile para un perfil de 200 elementos (objetivo: < 10 ms)."""
+    profile = ranking_profile()
+    median_ms, pruned = _timed(lambda: prune_profile(profile, BENCH_JOB_DESCRIPTION), repeat)
+
+    return {
+        'items': len(profile['experience']) + len(profile['projects']) + len(profile['skills']),
+        'median_ms': round(median_ms, 2),
+        'prompt_chars_before': len(json.dumps(profile, ensure_ascii=False)),
+        'prompt_chars_after': len(json.dumps(pruned, ensure_ascii=False)),
+    }
+
+
+@benchmark('tailoring')
+def bench_tailoring(repeat=50):
+    """Tiempo del motor local (respaldo sin IA) para un perfil de 200 elementos."""
+    profile = ranking_profile()
+    job = clean_job_description(BENCH_JOB_DESCRIPTION)
+    median_ms, cv = _timed(lambda: tailor_cv(profile, job, 'es'), repeat)
+
+    return {
+        'median_ms': round(median_ms, 2),
+        'experiences': len(cv['experience']),
+        'projects': len(cv['projects']),
+        'skills': len(cv['selected_skills']),
+    }
+
+
+JOB_POSTINGS_DIR = Path(__file__).resolve().parent / 'benchmark_data' / 'job_postings'
+
+
+@benchmark('preprocessing')
+def bench_preprocessing(repeat=50):
+    """Limpieza de ofertas reales copiadas de portales y PDFs (benchmark_data/job_postings)."""
+    results = {}
+    for path in sorted(JOB_POSTINGS_DIR.glob('*.txt')):
+        raw = path.read_text(encoding='utf-8')
+        median_ms, clean = _timed(lambda: clean_job_description(raw), repeat)
+        results[path.stem] = {
+            'median_ms': round(median_ms, 3),
+            'tokens_before': estimate_tokens(raw),
+            'tokens_after': estimate_tokens(clean),
+        }
+    return results
+
+
+def bench_generated_cv(profile):
+    """CV generado (salida de la IA) de tamaño realista para el perfil de bench_profile."""
+    return {
+        'job_title_target': 'Senior Backend Engineer',
+        'profile_summary': 'Ingeniero backend con 8 años diseñando APIs REST de alta '
+        'disponibilidad con Django y PostgreSQL, colas, caché y despliegues en Kubernetes.',
+        'selected_skills': profile['skills'],
+        'selected_languages': [{'name': 'Inglés', 'level': 'C1'}],
+        'experience': [
+            {
+                'company': exp['company'],
+                'position': exp['role'],
+                'date_range': f'{exp["start_date"]} - {exp["end_date"]}',
+                'location': exp['location'],
+                'enhanced_description': [
+                    'Diseñé y mantuve APIs REST con Django y PostgreSQL para pagos.',
+                    'Reduje un 40% la latencia introduciendo caché y colas de tareas.',
+                    'Lideré la migración a contenedores y despliegue continuo.',
+                ],
+            }
+            for exp in profile['experience'][:6]
+        ],
+        'education': [],
+        'projects': [],
+        'certificates': [],
+    }
+
+
+@benchmark('multilang')
+def bench_multilang():
+    """
+    Tokens estimados de una variante extra en otro idioma: generación completa
+    (system prompt + perfil + oferta + respuesta) frente a traducir solo los textos libres.
+    """
+    profile = bench_profile()
+    source_cv = {'profile': profile['personal_info'], **bench_generated_cv(profile)}
+    results = {}
+    for language in ('en', 'fr'):
+        generator = _BenchCVGeneratorService(None, BENCH_JOB_DESCRIPTION, language)
+        generation, translation = estimate_costs(generator, profile, source_cv)
+        results[language] = {
+            'generation_tokens': generation,
+            'translation_tokens': translation,
+            'saved_pct': round(100 * (1 - translation / generation), 1),
+        }
+    return results
+
+
+@benchmark('sections')
+def bench_sections(first_token_s=0.3, tokens_per_s=200):
+    """
+    Llamada única vs una llamada por grupo de secciones en paralelo, contra un LLM simulado
+    cuya latencia crece con la longitud de la respuesta (primer token + tokens / velocidad).
+    """
+    profile = bench_profile()
+    generated = bench_generated_cv(profile)
+
+    def respond(request):
+        prompt = request['messages'][1]['content']
+        keys = prompts.OUTPUT_KEYS
+        if 'GENERA SOLO estas claves del JSON: ' in prompt:
+            requested = prompt.rsplit('GENERA SOLO estas claves del JSON: ', 1)[1]
+            keys = requested.split('.')[0].split(', ')
+        content = json.dumps({key: generated[key] for key in keys}, ensure_ascii=False)
+        return first_token_s + estimate_tokens(content) / tokens_per_s, content
+
+    _BenchCVGeneratorService.profile = profile
+    results = {}
+    with fake_openai_endpoint(tls=False, respond=respond) as (base_url, _):
+        for mode, parallel in (('single_call', False), ('section_parallel', True)):
+            with override_settings(
+                OPENAI_API_KEY='sk-bench',
+                AI_BASE_URL=base_url,
+                AI_MAX_RETRIES=0,
+                CV_SECTION_PARALLEL=parallel,
+            ):
+                generator = _BenchCVGeneratorService(None, f'Oferta {mode}', 'es')
+                start = time.perf_counter()
+                result = generator.generate_cv()
+                seconds = time.perf_counter() - start
+                assert generator.from_ai, 'La IA simulada no respondió (fallback)'
+                assert list(result)[1:] == list(prompts.OUTPUT_KEYS)
+                results[f'{mode}_s'] = round(seconds, 2)
+
+    results['speedup'] = round(results['single_call_s'] / results['section_parallel_s'], 2)
+    return results
+
+
+@benchmark('hedging')
+def bench_hedging(requests=100, latency=0.05, slow_every=25, slow_latency=2.0):
+    """
+    Latencias con y sin hedging contra un LLM simulado en el que una de cada `slow_every`
+    respuestas se queda colgada `slow_latency` segundos (cola larga del proveedor).
+    """
+    counter = itertools.count()
+
+    def respond(request):
+        slow = next(counter) % slow_every == slow_every - 1
+        return (slow_latency if slow else latency), json.dumps(small_cv_output())
+
+    messages = [{'role': 'user', 'content': 'hola'}]
+    results = {}
+    with fake_openai_endpoint(tls=False, respond=respond) as (base_url, _):
+        for mode, hedge in (('plain', False), ('hedged', True)):
+            resilience.breaker.reset()
+            with override_settings(
+                OPENAI_API_KEY='sk-bench',
+                AI_BASE_URL=base_url,
+                AI_HEDGE_ENABLED=hedge,
+                AI_HEDGE_MIN_DELAY=latency * 2,
+                AI_HEDGE_MIN_SAMPLES=1,
+            ):
+                client = build_openai_client()
+                timings = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    resilience.call_llm(
+                        client.chat.completions.create,
+                        resilience.Deadline(30),
+                        model='bench',
+                        messages=messages,
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+                client.close()
+            timings.sort()
+            results[mode] = {
+                'p50_ms': round(statistics.median(timings), 1),
+                'p99_ms': round(timings[int(len(timings) * 0.99) - 1], 1),
+                'total_s': round(sum(timings) / 1000, 2),
+            }
+    results['llm_calls'] = resilience.llm_call_stats()
+    return results
+
+
+@benchmark('pdf')
+def bench_pdf(repeat=50):
+    """
+    PDF en el servidor por plantilla: carga en frío (fuentes y plantilla), ms por página,
+    páginas por segundo por núcleo (con tiempo de CPU) y descarga repetida desde el caché.
+    """
+    profile = bench_profile()
+    cv_data = {'profile': profile['personal_info'], **bench_generated_cv(profile)}
+    results = {}
+    for name in pdf.TEMPLATES:
+        pdf.load_font.cache_clear()
+        pdf.compile_template.cache_clear()
+        start = time.perf_counter()
+        pdf.compile_template(name)
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        cpu_start = time.process_time()
+        median_ms, document = _timed(lambda: pdf.render_cv_pdf(cv_data, name), repeat)
+        cpu_s = time.process_time() - cpu_start
+        pages = pdf.page_count(document)
+
+        pdf.cached_cv_pdf(cv_data, name)
+        cached_ms, _ = _timed(lambda: pdf.cached_cv_pdf(cv_data, name), repeat)
+        results[name] = {
+            'cold_load_ms': round(cold_ms, 1),
+            'pages': pages,
+            'ms_per_page': round(median_ms / pages, 2),
+            'pages_per_second_per_core': round(pages * repeat / cpu_s, 1),
+            'cache_hit_ms': round(cached_ms, 3),
+            'pdf_kb': round(len(document) / 1024, 1),
+        }
+    return results
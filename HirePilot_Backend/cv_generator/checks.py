@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+def is_local_memory(alias):
+    """True si el alias de CACHES es LocMemCache: un caché distinto en cada proceso."""
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    return backend.endswith('LocMemCache')
+
+
+@register(Tags.caches)
+def check_profile_snapshot_cache(app_configs, **kwargs):
+    """
+    Las signals solo invalidan el snapshot en el caché del proceso que guarda el perfil.
+    Con LocMem el resto de workers (y run_cv_workers) sirven el perfil viejo hasta que caduca
+    (PROFILE_SNAPSHOT_LOCAL_TTL).
+    """
+    if settings.DEBUG or not is_local_memory(settings.PROFILE_SNAPSHOT_CACHE):
+        return []
+    return [
+        Warning(
+            f"PROFILE_SNAPSHOT_CACHE ('{settings.PROFILE_SNAPSHOT_CACHE}') usa LocMemCache.",
+            hint=(
+                'Cada proceso tiene su propio snapshot del perfil: los demás workers no ven los '
+                'cambios hasta que caduca (PROFILE_SNAPSHOT_LOCAL_TTL). Apúntalo a un caché '
+                'compartido (CACHE_BACKEND).'
+            ),
+            id='cv_generator.W003',
+        )
+    ]
+
+
+@register(Tags.caches)
+def check_rate_limit_cache(app_configs, **kwargs):
+    """Con LocMem cada proceso lleva su propio bucket: el límite real se multiplica."""
+    if settings.DEBUG or not is_local_memory(settings.CV_RATE_LIMIT_CACHE):
+        return []
+    return [
+        Warning(
+            f"CV_RATE_LIMIT_CACHE ('{settings.CV_RATE_LIMIT_CACHE}') usa LocMemCache.",
+            hint=(
+                'Cada worker aplicaría los límites por plan por separado, así que un usuario '
+                'podría generar N veces más CVs. Apúntalo a un caché compartido.'
+            ),
+            id='cv_generator.W001',
+        )
+    ]
+
+
+@register(Tags.caches)
+def check_single_flight_cache(app_configs, **kwargs):
+    """Con LocMem los locks solo agrupan peticiones que caen en el mismo proceso."""
+    if settings.DEBUG or not is_local_memory(settings.CV_SINGLE_FLIGHT_CACHE):
+        return []
+    return [
+        Warning(
+            f"CV_SINGLE_FLIGHT_CACHE ('{settings.CV_SINGLE_FLIGHT_CACHE}') usa LocMemCache.",
+            hint=(
+                'Peticiones idénticas en workers distintos llamarían cada una a la IA. '
+                'Apúntalo a un caché compartido.'
+            ),
+            id='cv_generator.W002',
+        )
+    ]
+
+
+@register()
+def check_pdf_fonts(app_configs, **kwargs):
+    """Sin las fuentes de las plantillas cada descarga del PDF falla (FontError, 500)."""
+    from .pdf import TEMPLATES
+
+    font_dir = Path(settings.CV_PDF_FONT_DIR)
+    paths = {path for spec in TEMPLATES.values() for path in spec.fonts.values()}
+    missing = sorted(
+        path
+        for path in {*paths, *settings.CV_PDF_FALLBACK_FONTS}
+        if not (font_dir / path).is_file()
+    )
+    if not missing:
+        return []
+    return [
+        Warning(
+            f'Faltan fuentes del PDF en CV_PDF_FONT_DIR ({font_dir}): {", ".join(missing)}.',
+            hint='Las plantillas usan las de cv_generator/fonts; apunta CV_PDF_FONT_DIR allí.',
+            id='cv_generator.W004',
+        )
+    ]
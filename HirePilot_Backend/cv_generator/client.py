@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import threading
+
+import httpx
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+# Cliente único por proceso: reutiliza el pool de conexiones (y el TLS) entre peticiones.
+# httpx.Client y OpenAI son thread-safe, así que lo comparten todos los hilos del worker.
+_client = None
+_client_lock = threading.Lock()
+
+# Versión async: un único cliente por proceso que vive en su propio event loop (un hilo de
+# fondo). Sus conexiones pertenecen a ese loop, y las vistas síncronas (async_to_sync) crean
+# un loop nuevo en cada petición: con un cliente por loop no se reutilizaría ninguna conexión
+# y cada petición dejaría un httpx.AsyncClient sin cerrar
+_async_client = None
+_async_loop = None
+_async_loop_pid = None
+
+# Ajustes que obligan a reconstruir el cliente si cambian (ej: override_settings en tests)
+CLIENT_SETTINGS = {
+    'OPENAI_API_KEY',
+    'AI_BASE_URL',
+    'AI_HTTP_MAX_CONNECTIONS',
+    'AI_HTTP_MAX_KEEPALIVE',
+    'AI_HTTP_KEEPALIVE_EXPIRY',
+    'AI_CONNECT_TIMEOUT',
+    'AI_READ_TIMEOUT',
+}
+
+
+def _http_options(verify):
+    timeout = httpx.Timeout(settings.AI_READ_TIMEOUT, connect=settings.AI_CONNECT_TIMEOUT)
+    return {
+        'timeout': timeout,
+        'verify': verify,
+        'limits': httpx.Limits(
+            max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def build_openai_client(base_url=None, verify=True):
+    """
+    Crea un cliente OpenAI con pool de conexiones, keep-alive y timeouts explícitos.
+    """
+    options = _http_options(verify)
+    return OpenAI(
+        base_url=base_url or settings.AI_BASE_URL,
+        api_key=settings.OPENAI_API_KEY,
+        timeout=options['timeout'],
+        # Los reintentos los hace resilience.py, dentro del deadline de la petición
+        max_retries=0,
+        http_client=httpx.Client(**options),
+    )
+
+
+def build_async_openai_client(base_url=None, verify=True):
+    """Igual que build_openai_client pero con AsyncOpenAI (ruta ASGI)."""
+    options = _http_options(verify)
+    return AsyncOpenAI(
+        base_url=base_url or settings.AI_BASE_URL,
+        api_key=settings.OPENAI_API_KEY,
+        timeout=options['timeout'],
+        # Los reintentos los hace resilience.py, dentro del deadline de la petición
+        max_retries=0,
+        http_client=httpx.AsyncClient(**options),
+    )
+
+
+def get_openai_client():
+    """Devuelve el cliente compartido del proceso (se crea la primera vez que se usa)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_openai_client()
+    return _client
+
+
+def _client_loop():
+    """Event loop del cliente async (se arranca la primera vez y otra vez tras un fork)."""
+    global _async_loop, _async_loop_pid
+    if _async_loop_pid != os.getpid():
+        with _client_lock:
+            if _async_loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='ai-async', daemon=True)
+                thread.start()
+                _async_loop, _async_loop_pid = loop, os.getpid()
+    return _async_loop
+
+
+def get_async_openai_client():
+    """
+    Devuelve el cliente async compartido del proceso. Solo se puede usar dentro de su loop:
+    desde fuera, con acreate_completion.
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = build_async_openai_client()
+    return _async_client
+
+
+async def acreate_completion(**kwargs):
+    """
+    chat.completions.create del cliente async compartido, ejecutado en su loop. Se puede
+    esperar desde cualquier loop; si se cancela (hedging, deadline) se cancela la llamada.
+    """
+    loop = _client_loop()
+    client = get_async_openai_client()
+    future = asyncio.run_coroutine_threadsafe(client.chat.completions.create(**kwargs), loop)
+    return await asyncio.wrap_future(future)
+
+
+async def _aclose(client):
+    await client.close()
+
+
+def reset_openai_client():
+    """Cierra los clientes compartidos; el siguiente get_*_openai_client crea uno nuevo."""
+    global _client, _async_client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        if _async_client is not None and _async_loop_pid == os.getpid():
+            # Se cierra en su loop; no esperamos a que termine
+            asyncio.run_coroutine_threadsafe(_aclose(_async_client), _async_loop)
+        _async_client = None
+
+
+def warm_up_openai_client():
+    """
+    Abre la conexión (DNS + TCP + TLS) antes de la primera generación real.
+    Se lanza en segundo plano al arrancar el worker si AI_WARMUP está activo.
+    """
+    if not settings.OPENAI_API_KEY:
+        return
+    try:
+        get_openai_client().models.list()
+    except Exception as e:
+        logger.warning(f'No se pudo precalentar el cliente de IA: {e}')
+
+
+def start_warm_up():
+    thread = threading.Thread(target=warm_up_openai_client, name='ai-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+@receiver(setting_changed)
+def reset_client_on_setting_change(setting, **kwargs):
+    if setting in CLIENT_SETTINGS:
+        reset_openai_client()
@@ -0,0 +1,173 @@
+"""
+Historial de CVs generados (modelos CVGeneration y CVPayload).
+
+Cada CV que recibe un usuario queda en su historial para volver a descargarlo sin pagar
+otra llamada a la IA. El contenido se guarda aparte y una sola vez:
+
+- Deduplicado: CVPayload se direcciona por el sha256 del JSON canónico. Las respuestas
+  del caché de CVs, las coalescidas y el mismo CV pedido dos veces apuntan a la misma fila;
+  una entrada del historial son unos pocos bytes de metadatos.
+- Comprimido: zlib (stdlib) o zstd si está instalado zstandard (CV_HISTORY_CODEC). El
+  códec se guarda en cada fila, así que cambiarlo no rompe lo ya guardado.
+
+La poda (manage.py prune_cv_history) borra entradas antiguas por lotes y después los
+contenidos que quedan sin ninguna entrada.
+"""
+
+import hashlib
+import json
+import logging
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from .models import CVGeneration, CVPayload
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: sin ella solo hay zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZLIB_LEVEL = 6  # A partir de aquí apenas gana tamaño y cuesta bastante más CPU
+ZSTD_LEVEL = 10
+PRUNE_BATCH_SIZE = 500
+
+
+def available_codecs():
+    return ('zlib', 'zstd') if zstandard is not None else ('zlib',)
+
+
+def _codec():
+    codec = settings.CV_HISTORY_CODEC
+    if codec not in available_codecs():
+        logger.warning(f'Códec de historial {codec!r} no disponible. Usando zlib.')
+        return 'zlib'
+    return codec
+
+
+def compress(raw, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress(data, codec):
+    data = bytes(data)  # BinaryField devuelve memoryview en algunos backends
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('Este CV se guardó con zstd y zstandard no está instalado.')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def canonical_json(cv_data):
+    """JSON estable (claves ordenadas, sin espacios): misma salida, mismos bytes y mismo hash."""
+    return json.dumps(
+        cv_data, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def store_payload(cv_data):
+    """
+    Devuelve el CVPayload de este contenido, creándolo si no existía. Si ya existe solo
+    cuesta un SELECT por índice único: no se comprime nada.
+    """
+    raw = canonical_json(cv_data)
+    content_hash = hashlib.sha256(raw).hexdigest()
+    payload = CVPayload.objects.filter(content_hash=content_hash).only('pk').first()
+    if payload is not None:
+        return payload
+
+    codec = _codec()
+    try:
+        with transaction.atomic():
+            return CVPayload.objects.create(
+                content_hash=content_hash,
+                codec=codec,
+                data=compress(raw, codec),
+                raw_size=len(raw),
+            )
+    except IntegrityError:
+        # Otra petición guardó el mismo contenido a la vez
+        return CVPayload.objects.only('pk').get(content_hash=content_hash)
+
+
+def record(user, cv_data, language, outcome, model=None):
+    """
+    Añade el CV al historial del usuario y devuelve el id de la entrada. El historial no
+    puede tumbar una generación: si la DB falla se registra y se devuelve None.
+    """
+    try:
+        for attempt in range(2):
+            payload = store_payload(cv_data)
+            try:
+                with transaction.atomic():
+                    return CVGeneration.objects.create(
+                        user=user,
+                        payload=payload,
+                        job_title=str(cv_data.get('job_title_target') or '')[:255],
+                        language=language,
+                        outcome=outcome,
+                        model=(model or '')[:100],
+                    ).pk
+            except IntegrityError:
+                # La poda borró el contenido entre el SELECT y el INSERT: se vuelve a guardar
+                if attempt:
+                    raise
+    except DatabaseError:
+        logger.exception(f'No se pudo guardar el CV en el historial del usuario {user.pk}')
+    return None
+
+
+def load(entry):
+    """structured_cv_data de una entrada (con select_related('payload') es una consulta)."""
+    payload = entry.payload
+    return json.loads(decompress(payload.data, payload.codec))
+
+
+def prune(days=None, batch_size=PRUNE_BATCH_SIZE, dry_run=False):
+    """
+    Borra las entradas con más de `days` días (CV_HISTORY_RETENTION_DAYS por defecto) y
+    los contenidos huérfanos, en lotes de `batch_size` para no bloquear las tablas con un
+    único DELETE enorme. Devuelve (entradas, contenidos) borrados (o que se borrarían).
+    """
+    days = settings.CV_HISTORY_RETENTION_DAYS if days is None else days
+    entries = 0
+    if days > 0:
+        expired = CVGeneration.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+        if dry_run:
+            entries = expired.count()
+        else:
+            entries = _delete_in_batches(expired, batch_size)
+
+    orphans = CVPayload.objects.filter(generations__isnull=True)
+    if dry_run:
+        # Los que quedarían huérfanos tras borrar las entradas caducadas
+        if days > 0:
+            orphans = CVPayload.objects.exclude(
+                generations__created_at__gte=timezone.now() - timedelta(days=days)
+            )
+        return entries, orphans.count()
+    return entries, _delete_in_batches(orphans, batch_size)
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    skipped = set()
+    while True:
+        ids = list(queryset.exclude(pk__in=skipped).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        try:
+            count, _ = queryset.model.objects.filter(pk__in=ids).delete()
+        except ProtectedError as e:
+            # Algún contenido del lote se volvió a usar mientras tanto: se queda
+            skipped.update(obj.payload_id for obj in e.protected_objects)
+            continue
+        deleted += count
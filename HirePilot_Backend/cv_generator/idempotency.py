@@ -0,0 +1,137 @@
+"""
+Cabecera Idempotency-Key en los endpoints de generación.
+
+Si el cliente reintenta una petición (timeout, red caída) con la misma clave, devolvemos
+la respuesta que ya dimos en vez de generar otra vez (y sin gastar límites del plan).
+Las respuestas se guardan por usuario y clave durante CV_IDEMPOTENCY_TTL segundos, junto a
+una huella del cuerpo: reutilizar la clave con otro cuerpo es un error del cliente (422).
+Solo se guardan las respuestas 2xx; un error se puede reintentar con la misma clave.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .result_cache import CACHE_HEADER
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# Cabeceras de la respuesta original que también se repiten
+REPLAYED_HEADERS = ('Location', CACHE_HEADER)
+
+INVALID_KEY_ERROR = f'La cabecera {HEADER} no puede superar {MAX_KEY_LENGTH} caracteres.'
+MISMATCH_ERROR = f'Esta {HEADER} ya se usó con otra petición distinta.'
+
+
+def _cache():
+    return caches[settings.CV_IDEMPOTENCY_CACHE]
+
+
+def _cache_key(user_id, key):
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return f'cv:idempotency:{user_id}:{digest}'
+
+
+def fingerprint(path, data):
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f'{path}\n{payload}'.encode('utf-8')).hexdigest()
+
+
+def lookup(user_id, key, request_fingerprint):
+    """
+    (status, data, headers) de la respuesta que hay que dar sin ejecutar la vista: la ya
+    guardada para esta clave, o un error si la clave no es válida o se usó con otro cuerpo.
+    None si hay que ejecutar la vista.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        return status.HTTP_400_BAD_REQUEST, {'error': INVALID_KEY_ERROR}, {}
+    stored = _cache().get(_cache_key(user_id, key))
+    if stored is None:
+        return None
+    if stored['fingerprint'] != request_fingerprint:
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {'error': MISMATCH_ERROR}, {}
+    return stored['status'], stored['data'], {**stored['headers'], REPLAYED_HEADER: 'true'}
+
+
+def store(user_id, key, request_fingerprint, status_code, data, headers):
+    if not 200 <= status_code < 300:
+        return
+    _cache().set(
+        _cache_key(user_id, key),
+        {
+            'fingerprint': request_fingerprint,
+            'status': status_code,
+            'data': data,
+            'headers': {name: headers[name] for name in REPLAYED_HEADERS if name in headers},
+        },
+        timeout=settings.CV_IDEMPOTENCY_TTL,
+    )
+
+
+def idempotent(view_method):
+    """Decorador para el post() de una APIView de DRF."""
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(view, request, *args, **kwargs)
+
+        request_fingerprint = fingerprint(request.path, request.data)
+        found = lookup(request.user.pk, key, request_fingerprint)
+        if found is not None:
+            status_code, data, headers = found
+            return Response(data, status=status_code, headers=headers)
+
+        response = view_method(view, request, *args, **kwargs)
+        store(
+            request.user.pk,
+            key,
+            request_fingerprint,
+            response.status_code,
+            getattr(response, 'data', None),
+            response,
+        )
+        return response
+
+    return wrapper
+
+
+def async_idempotent(handler):
+    """
+    Lo mismo que idempotent para las vistas async que no son de DRF: el handler recibe el
+    usuario ya autenticado y el cuerpo ya parseado, y devuelve una JsonResponse.
+    """
+
+    @wraps(handler)
+    async def wrapper(view, request, user, data):
+        key = request.headers.get(HEADER)
+        if not key:
+            return await handler(view, request, user, data)
+
+        request_fingerprint = fingerprint(request.path, data)
+        found = await sync_to_async(lookup)(user.pk, key, request_fingerprint)
+        if found is not None:
+            status_code, stored_data, headers = found
+            return JsonResponse(stored_data, status=status_code, headers=headers)
+
+        response = await handler(view, request, user, data)
+        await sync_to_async(store)(
+            user.pk,
+            key,
+            request_fingerprint,
+            response.status_code,
+            json.loads(response.content),
+            response,
+        )
+        return response
+
+    return wrapper
@@ -0,0 +1,140 @@
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+
+from .models import GenerationJob
+from .services import CVGeneratorService, format_cv_response
+
+logger = logging.getLogger(__name__)
+
+# Cuántos candidatos miramos por intento de reclamar un trabajo
+CLAIM_BATCH_SIZE = 10
+
+
+def enqueue_job(user, job_description, language):
+    """Crea un trabajo PENDING que recogerá el primer worker libre."""
+    return GenerationJob.objects.create(
+        user=user,
+        job_description=job_description,
+        language=language,
+        expires_at=timezone.now() + timedelta(seconds=settings.CV_JOB_TTL),
+    )
+
+
+def claim_next_job(worker_name):
+    """
+    Reclama el trabajo pendiente más antiguo.
+    El UPDATE condicional (status=PENDING) garantiza que solo un worker lo gana,
+    sin depender de SELECT ... FOR UPDATE SKIP LOCKED (funciona en cualquier DB).
+    """
+    now = timezone.now()
+    candidates = GenerationJob.objects.filter(
+        status=GenerationJob.Status.PENDING, expires_at__gt=now
+    ).values_list('pk', flat=True)[:CLAIM_BATCH_SIZE]
+
+    for pk in candidates:
+        claimed = GenerationJob.objects.filter(pk=pk, status=GenerationJob.Status.PENDING).update(
+            status=GenerationJob.Status.RUNNING, worker=worker_name, started_at=now
+        )
+        if claimed:
+            return GenerationJob.objects.select_related('user').get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Ejecuta la generación y guarda el resultado (o el error) en el trabajo."""
+    try:
+        generator = CVGeneratorService(
+            user=job.user, job_description=job.job_description, language=job.language
+        )
+        cv_data = generator.generate_cv()
+        job.result = format_cv_response(cv_data, generator.history_id)
+        job.status = GenerationJob.Status.DONE
+    except Exception as e:
+        logger.exception(f'Error en el trabajo de generación {job.pk}')
+        job.error = str(e)
+        job.status = GenerationJob.Status.FAILED
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'error', 'status', 'finished_at'])
+
+
+def requeue_stale_jobs():
+    """Devuelve a la cola los trabajos de workers que murieron a mitad de camino."""
+    limit = timezone.now() - timedelta(seconds=settings.CV_JOB_STALE_AFTER)
+    return GenerationJob.objects.filter(
+        status=GenerationJob.Status.RUNNING, started_at__lt=limit
+    ).update(status=GenerationJob.Status.PENDING, worker='', started_at=None)
+
+
+def purge_expired_jobs():
+    """Borra los trabajos caducados (terminados o no). Devuelve cuántos se borraron."""
+    deleted, _ = GenerationJob.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+class WorkerPool:
+    """
+    Pool de hilos que consumen la cola de GenerationJob.
+    La llamada al LLM es I/O, así que los hilos bastan; para escalar en CPU
+    se lanzan varios procesos del comando run_cv_workers.
+    """
+
+    def __init__(self, concurrency=None, poll_interval=None, drain=False):
+        self.concurrency = concurrency or settings.CV_WORKER_CONCURRENCY
+        self.poll_interval = (
+            poll_interval if poll_interval is not None else settings.CV_WORKER_POLL_INTERVAL
+        )
+        # En modo drain cada hilo termina en cuanto no encuentra trabajo
+        self.drain = drain
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._work, args=(f'{self.name}:{index}',), name=f'cv-worker-{index}'
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def is_alive(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _work(self, worker_name):
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim_next_job(worker_name)
+                    if job is not None:
+                        run_job(job)
+                except DatabaseError:
+                    # Un fallo puntual de la DB (bloqueo, conexión caída) no mata el hilo;
+                    # si el trabajo quedó en RUNNING lo reencola requeue_stale_jobs
+                    logger.exception(f'Error de base de datos en el worker {worker_name}')
+                    connection.close()
+                    self._stop.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self.drain:
+                        return
+                    self._stop.wait(self.poll_interval)
+        finally:
+            # Cada hilo tiene su propia conexión: la cerramos al salir
+            connection.close()
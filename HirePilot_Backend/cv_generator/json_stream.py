@@ -0,0 +1,228 @@
+import json
+import re
+
+WHITESPACE = ' \t\r\n'
+
+# Dentro de un string solo nos interesan las comillas y las barras de escape
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Tamaño máximo (caracteres) del texto pendiente de parsear: una sección o un elemento
+DEFAULT_MAX_BUFFER = 1024 * 1024
+
+
+class IncrementalJSONParser:
+    """
+    Parser incremental para el objeto JSON que devuelve la IA (structured_cv_data).
+
+    Se alimenta con fragmentos de texto (feed) y devuelve eventos en cuanto están listos,
+    sin esperar al final de la respuesta:
+      - ('item', clave, valor): un elemento de una sección lista (una experiencia, una skill...)
+      - ('section', clave, valor): una clave de primer nivel completa
+
+    Memoria acotada: solo guardamos el texto del elemento (o sección) en curso;
+    lo ya completado se guarda parseado en result.
+    """
+
+    def __init__(self, max_buffer=DEFAULT_MAX_BUFFER):
+        self.result = {}
+        self.done = False
+        self.max_buffer = max_buffer
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Qué esperamos dentro del objeto raíz: key, colon, value, in_value, comma
+        self._expect = 'key'
+        self._value_kind = None  # string, scalar, object o array
+        self._key = None
+        self._token = []
+        self._token_size = 0
+
+        # Estado dentro de una sección lista
+        self._items = None
+        self._item_expect = 'value'  # value, in_value o comma
+        self._item_kind = None  # string, scalar o container
+
+    def feed(self, chunk):
+        events = []
+        index = 0
+        length = len(chunk)
+        while index < length and not self.done:
+            if self._in_string:
+                index = self._read_string(chunk, index, events)
+                continue
+
+            char = chunk[index]
+            index += 1
+            if self._depth == 0:
+                # Ignoramos cualquier cosa antes del objeto raíz (ej: ```json)
+                if char == '{':
+                    self._depth = 1
+            elif self._value_kind == 'array':
+                self._read_array(char, events)
+            elif self._expect == 'in_value':
+                self._read_value(char, events)
+            else:
+                self._read_structure(char, events)
+        return events
+
+    # --- Lectura ---
+
+    def _read_string(self, chunk, index, events):
+        """Consume el string en curso a trozos (no carácter a carácter)."""
+        if self._escape:
+            self._append(chunk[index])
+            self._escape = False
+            return index + 1
+
+        match = _STRING_SPECIAL.search(chunk, index)
+        if match is None:
+            self._append(chunk[index:])
+            return len(chunk)
+
+        end = match.end()
+        self._append(chunk[index:end])
+        if match.group() == '\\':
+            self._escape = True
+            return end
+
+        self._in_string = False
+        if self._depth == 1:
+            if self._expect == 'key':
+                self._key = json.loads(self._take())
+                self._expect = 'colon'
+            else:
+                self._complete_section(json.loads(self._take()), events)
+        elif self._depth == 2 and self._value_kind == 'array':
+            self._complete_item(events)
+        return end
+
+    def _read_value(self, char, events):
+        """Valor de primer nivel que no es lista (string, escalar u objeto)."""
+        if self._value_kind == 'scalar':
+            if char in ',}':
+                self._complete_section(json.loads(self._take()), events)
+                self._read_structure(char, events)
+            else:
+                self._append(char)
+            return
+
+        self._append(char)
+        if char == '"':
+            self._in_string = True
+        elif char in '{[':
+            self._depth += 1
+        elif char in '}]':
+            self._depth -= 1
+            if self._depth == 1:
+                self._complete_section(json.loads(self._take()), events)
+
+    def _read_array(self, char, events):
+        """Sección lista: emitimos cada elemento en cuanto se cierra."""
+        if self._item_expect == 'in_value':
+            if self._item_kind == 'scalar':
+                if char not in ',]':
+                    self._append(char)
+                    return
+                self._complete_item(events)
+            else:
+                self._append(char)
+                if char == '"':
+                    self._in_string = True
+                elif char in '{[':
+                    self._depth += 1
+                elif char in '}]':
+                    self._depth -= 1
+                    if self._depth == 2:
+                        self._complete_item(events)
+                return
+
+        if char in WHITESPACE:
+            return
+        if char == ']':
+            self._depth = 1
+            items = self._items
+            self._items = None
+            self._complete_section(items, events)
+        elif self._item_expect == 'comma':
+            if char == ',':
+                self._item_expect = 'value'
+        else:
+            self._item_expect = 'in_value'
+            self._append(char)
+            if char == '"':
+                self._item_kind = 'string'
+                self._in_string = True
+            elif char in '{[':
+                self._item_kind = 'container'
+                self._depth += 1
+            else:
+                self._item_kind = 'scalar'
+
+    def _read_structure(self, char, events):
+        if char in WHITESPACE:
+            return
+        if self._expect == 'key':
+            if char == '"':
+                self._append(char)
+                self._in_string = True
+            elif char == '}':
+                self._finish()
+        elif self._expect == 'colon':
+            if char == ':':
+                self._expect = 'value'
+        elif self._expect == 'value':
+            self._expect = 'in_value'
+            if char == '[':
+                self._value_kind = 'array'
+                self._depth = 2
+                self._items = []
+                self._item_expect = 'value'
+                return
+            self._append(char)
+            if char == '"':
+                self._value_kind = 'string'
+                self._in_string = True
+            elif char == '{':
+                self._value_kind = 'object'
+                self._depth += 1
+            else:
+                self._value_kind = 'scalar'
+        elif self._expect == 'comma':
+            if char == ',':
+                self._expect = 'key'
+            elif char == '}':
+                self._finish()
+
+    # --- Buffer ---
+
+    def _append(self, text):
+        self._token.append(text)
+        self._token_size += len(text)
+        if self._token_size > self.max_buffer:
+            raise ValueError(f'Fragmento JSON de más de {self.max_buffer} caracteres')
+
+    def _take(self):
+        text = ''.join(self._token)
+        self._token = []
+        self._token_size = 0
+        return text
+
+    # --- Eventos ---
+
+    def _complete_item(self, events):
+        value = json.loads(self._take())
+        self._items.append(value)
+        events.append(('item', self._key, value))
+        self._item_expect = 'comma'
+        self._item_kind = None
+
+    def _complete_section(self, value, events):
+        self.result[self._key] = value
+        events.append(('section', self._key, value))
+        self._value_kind = None
+        self._expect = 'comma'
+
+    def _finish(self):
+        self._depth = 0
+        self.done = True
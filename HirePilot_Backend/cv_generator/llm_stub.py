@@ -0,0 +1,459 @@
+"""
+Servidor local compatible con la API de chat de OpenAI/OpenRouter para pruebas de carga y
+de regresión sin gastar tokens: manage.py run_llm_stub, o el fixture llm_stub en los tests.
+
+El servicio lo usa como a cualquier proveedor, por el camino HTTP real (cliente
+compartido, deadline, reintentos, hedging): AI_BASE_URL=http://localhost:8765/v1.
+
+- Latencia: distribución configurable (parse_latency) antes de la respuesta o del primer
+  fragmento en streaming, más una pausa opcional entre fragmentos.
+- Streaming: eventos SSE con el formato del proveedor (stream=True e include_usage).
+- Errores inyectados con probabilidad (parse_errors): 429, 500, 503, JSON cortado,
+  conexión cerrada sin respuesta y peticiones que se quedan colgadas.
+- Respuestas según el modo:
+  - generate: un CV válido construido con el motor local (tailoring.py) a partir del
+    propio prompt (idioma, perfil, oferta y claves pedidas).
+  - record: responde desde el cassette si ya tiene la petición; si no, la reenvía al
+    proveedor real y la graba.
+  - replay: solo responde desde el cassette (404 si la petición no está grabada).
+  El cassette es un fichero JSON Lines con una petición y su respuesta por línea.
+"""
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+from . import prompts
+from .preprocessing import estimate_tokens
+from .tailoring import tailor_cv
+
+MODES = ('generate', 'record', 'replay')
+HTTP_ERRORS = {
+    '429': ('rate_limit_exceeded', 'Rate limit exceeded'),
+    '500': ('server_error', 'Internal server error'),
+    '503': ('service_unavailable', 'Service unavailable'),
+}
+ERROR_KINDS = (*HTTP_ERRORS, 'truncate', 'disconnect', 'hang')
+
+USER_PROMPT_PROFILE = 'PERFIL CANDIDATO:\n'
+USER_PROMPT_JOB = 'OFERTA DE TRABAJO:\n'
+USER_PROMPT_KEYS = '\nGENERA SOLO estas claves del JSON: '
+
+
+def parse_latency(spec):
+    """
+    '0.5' (fija), 'uniform:0.2,1.5', 'normal:1,0.3' o 'lognormal:1,0.6' (mediana y sigma:
+    la cola larga de un LLM real). Devuelve una función rng -> segundos.
+    """
+    kind, _, args = str(spec).partition(':')
+    if not args:
+        seconds = float(kind)
+        return lambda rng: seconds
+    first, second = (float(value) for value in args.split(','))
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(first, second)
+    if kind == 'normal':
+        return lambda rng: max(rng.gauss(first, second), 0)
+    if kind == 'lognormal':
+        return lambda rng: rng.lognormvariate(math.log(first), second)
+    raise ValueError(f'Distribución de latencia desconocida: {spec}')
+
+
+def parse_errors(spec):
+    """'429:0.05,500:0.01,truncate:0.02' -> {'429': 0.05, ...} (probabilidad por petición)."""
+    if isinstance(spec, dict):
+        errors = {str(kind): float(rate) for kind, rate in spec.items()}
+    else:
+        errors = {}
+        for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+            kind, _, rate = item.partition(':')
+            errors[kind] = float(rate)
+    unknown = set(errors) - set(ERROR_KINDS)
+    if unknown:
+        raise ValueError(f'Errores desconocidos: {sorted(unknown)} (válidos: {ERROR_KINDS})')
+    if sum(errors.values()) > 1:
+        raise ValueError('La suma de probabilidades de error no puede pasar de 1')
+    return errors
+
+
+def request_key(request):
+    """Huella de lo que determina la respuesta (no el streaming ni las cabeceras)."""
+    relevant = {
+        name: request.get(name) for name in ('model', 'messages', 'response_format', 'temperature')
+    }
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """Respuestas grabadas (JSON Lines): {'key', 'request', 'response'} por línea."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._responses = {}
+        if self.path.exists():
+            for line in self.path.read_text(encoding='utf-8').splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses[entry['key']] = entry['response']
+
+    def __len__(self):
+        return len(self._responses)
+
+    def get(self, request):
+        return self._responses.get(request_key(request))
+
+    def add(self, request, response):
+        key = request_key(request)
+        line = json.dumps(
+            {'key': key, 'request': request, 'response': response}, ensure_ascii=False
+        )
+        with self._lock:
+            self._responses[key] = response
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open('a', encoding='utf-8') as file:
+                file.write(line + '\n')
+
+
+class StubError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _message(messages, role, last=False):
+    contents = [m.get('content') or '' for m in messages if m.get('role') == role]
+    if not contents:
+        return ''
+    return contents[-1] if last else contents[0]
+
+
+def _language(system):
+    for code, name in prompts.LANGUAGE_NAMES.items():
+        if system.rstrip().endswith(f'IDIOMA DE SALIDA: {name}'):
+            return code
+    return prompts.DEFAULT_LANGUAGE
+
+
+def generated_content(request):
+    """Respuesta del modo generate: lo que pide el prompt, hecho con el motor local."""
+    messages = request.get('messages') or []
+    system = _message(messages, 'system')
+    user = _message(messages, 'user', last=True)
+    if system.startswith(prompts.STATIC_TRANSLATION_PROMPT):
+        # Traducción: devolvemos los textos tal cual (misma estructura)
+        return user
+
+    head, _, rest = user.partition(USER_PROMPT_JOB)
+    profile_text = head.strip().removeprefix(USER_PROMPT_PROFILE.strip()).strip()
+    try:
+        profile = json.loads(profile_text) if profile_text else {}
+    except ValueError:
+        profile = {}
+    job, marker, keys_text = rest.partition(USER_PROMPT_KEYS)
+    keys = keys_text.split('.')[0].split(', ') if marker else prompts.OUTPUT_KEYS
+
+    cv = tailor_cv(profile if isinstance(profile, dict) else {}, job.strip(), _language(system))
+    return json.dumps({key: cv[key] for key in keys if key in cv}, ensure_ascii=False)
+
+
+class StubLLM:
+    """
+    El servidor. Los parámetros se pueden cambiar en caliente con configure()
+    (ej: subir la tasa de errores a mitad de una prueba).
+    """
+
+    def __init__(self, host='localhost', port=0, **options):
+        self.host = host
+        self.port = port
+        self.model = 'stub'
+        self.chunk_size = 24  # Caracteres por fragmento en streaming
+        self.chunk_delay = 0.0
+        self.hang_seconds = 60.0
+        self.mode = 'generate'
+        self.cassette = None
+        self.upstream = None
+        self.api_key = None
+        self._latency = parse_latency(0)
+        self._errors = {}
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'streamed': 0, 'in_flight': 0, 'max_in_flight': 0}
+        self._server = None
+        self._thread = None
+        self._http = None
+        self.configure(**options)
+
+    def configure(
+        self,
+        latency=None,
+        errors=None,
+        mode=None,
+        cassette=None,
+        upstream=None,
+        api_key=None,
+        seed=None,
+        **attributes,
+    ):
+        if latency is not None:
+            self._latency = parse_latency(latency)
+        if errors is not None:
+            self._errors = parse_errors(errors)
+        if mode is not None:
+            if mode not in MODES:
+                raise ValueError(f'Modo desconocido: {mode} (válidos: {MODES})')
+            self.mode = mode
+        if cassette is not None:
+            self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+        if upstream is not None:
+            self.upstream = upstream.rstrip('/')
+        if api_key is not None:
+            self.api_key = api_key
+        if seed is not None:
+            self._rng.seed(seed)
+        for name, value in attributes.items():
+            if not hasattr(self, name) or name.startswith('_'):
+                raise TypeError(f'Opción desconocida: {name}')
+            setattr(self, name, value)
+        if self.mode != 'generate' and self.cassette is None:
+            raise ValueError(f'El modo {self.mode} necesita un cassette')
+        if self.mode == 'record' and not self.upstream:
+            raise ValueError('El modo record necesita la URL del proveedor (upstream)')
+
+    # --- Ciclo de vida ---
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self._server.server_address[1]}/v1'
+
+    def start(self):
+        self._server = _StubServer((self.host, self.port), _StubHandler)
+        self._server.stub = self
+        self._http = httpx.Client(timeout=httpx.Timeout(120, connect=10))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self):
+        """Bloquea hasta Ctrl+C (comando run_llm_stub)."""
+        while self._thread.is_alive():
+            self._thread.join(timeout=0.5)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._http.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    # --- Peticiones ---
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._stats[name] = self._stats.get(name, 0) + delta
+            if name == 'in_flight':
+                self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats[name])
+
+    def _draw(self):
+        """(segundos de latencia, error a inyectar o None) para una petición."""
+        with self._lock:
+            delay = self._latency(self._rng)
+            roll = self._rng.random()
+        for kind, rate in self._errors.items():
+            if roll < rate:
+                return delay, kind
+            roll -= rate
+        return delay, None
+
+    def completion(self, request):
+        """Respuesta completa (chat.completion) a una petición, según el modo."""
+        if self.mode != 'generate':
+            recorded = self.cassette.get(request)
+            if recorded is not None:
+                self._count('replayed')
+                return recorded
+            if self.mode == 'replay':
+                self._count('replay_miss')
+                raise StubError(404, 'not_recorded', 'Petición no grabada en el cassette')
+            response = self._forward(request)
+            self.cassette.add(request, response)
+            self._count('recorded')
+            return response
+
+        content = generated_content(request)
+        prompt_text = ''.join(str(m.get('content') or '') for m in request.get('messages') or [])
+        prompt_tokens = estimate_tokens(prompt_text)
+        completion_tokens = estimate_tokens(content)
+        return {
+            'id': f'chatcmpl-stub-{self._rng.getrandbits(32):08x}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model') or self.model,
+            'choices': [
+                {
+                    'index': 0,
+                    'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': content},
+                }
+            ],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'prompt_tokens_details': {'cached_tokens': 0},
+            },
+        }
+
+    def _forward(self, request):
+        # Al proveedor siempre sin streaming: grabamos la respuesta entera
+        body = {k: v for k, v in request.items() if k not in ('stream', 'stream_options')}
+        try:
+            response = self._http.post(
+                f'{self.upstream}/chat/completions',
+                json=body,
+                headers={'Authorization': f'Bearer {self.api_key}', 'X-Title': 'HirePilot'},
+            )
+        except httpx.HTTPError as e:
+            raise StubError(502, 'upstream_unreachable', str(e)) from e
+        if response.status_code != 200:
+            raise StubError(response.status_code, 'upstream_error', response.text[:500])
+        return response.json()
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # Aguanta ráfagas de conexiones de las pruebas de carga
+
+    def handle_error(self, request, client_address):
+        # El cliente se fue antes de la respuesta (timeout, hedge perdedor): no es un error
+        pass
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, como el proveedor real
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            model = self.server.stub.model
+            self._send_json(200, {'object': 'list', 'data': [{'id': model, 'object': 'model'}]})
+        else:
+            self._send_error(StubError(404, 'not_found', f'Ruta desconocida: {self.path}'))
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_error(StubError(404, 'not_found', f'Ruta desconocida: {self.path}'))
+            return
+        stub._count('requests')
+        stub._count('in_flight')
+        try:
+            self._complete(stub, json.loads(body or b'{}'))
+        finally:
+            stub._count('in_flight', -1)
+
+    def _complete(self, stub, request):
+        delay, error = stub._draw()
+        time.sleep(delay)  # Lo que tarda el LLM en empezar a responder
+        if error:
+            stub._count(f'error_{error}')
+        if error in HTTP_ERRORS:
+            code, message = HTTP_ERRORS[error]
+            self._send_error(StubError(int(error), code, message))
+            return
+        if error in ('disconnect', 'hang'):
+            if error == 'hang':
+                time.sleep(stub.hang_seconds)
+            # Sin respuesta: el cliente ve la conexión cerrada
+            self.close_connection = True
+            return
+
+        try:
+            completion = stub.completion(request)
+        except StubError as e:
+            self._send_error(e)
+            return
+        if error == 'truncate':
+            completion = json.loads(json.dumps(completion))
+            choice = completion['choices'][0]
+            content = choice['message']['content'] or ''
+            choice['message']['content'] = content[: len(content) // 2]
+            choice['finish_reason'] = 'length'
+
+        if request.get('stream'):
+            stub._count('streamed')
+            include_usage = (request.get('stream_options') or {}).get('include_usage')
+            self._stream(stub, completion, include_usage)
+        else:
+            self._send_json(200, completion)
+
+    def _stream(self, stub, completion, include_usage):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')  # El final del cuerpo es el cierre
+        self.end_headers()
+        self.close_connection = True
+
+        choice = completion['choices'][0]
+        content = choice['message']['content'] or ''
+        base = {
+            'id': completion.get('id', 'chatcmpl-stub'),
+            'object': 'chat.completion.chunk',
+            'created': completion.get('created', int(time.time())),
+            'model': completion.get('model', stub.model),
+        }
+        for start in range(0, len(content), stub.chunk_size):
+            piece = content[start : start + stub.chunk_size]
+            delta = {'content': piece} if start else {'role': 'assistant', 'content': piece}
+            self._event({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+            if stub.chunk_delay:
+                time.sleep(stub.chunk_delay)
+        finish = {'index': 0, 'delta': {}, 'finish_reason': choice.get('finish_reason', 'stop')}
+        self._event({**base, 'choices': [finish]})
+        if include_usage and completion.get('usage'):
+            self._event({**base, 'choices': [], 'usage': completion['usage']})
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def _event(self, data):
+        self.wfile.write(f'data: {json.dumps(data, ensure_ascii=False)}\n\n'.encode())
+        self.wfile.flush()
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, error):
+        headers = {'Retry-After': '1'} if error.status == 429 else None
+        self._send_json(
+            error.status,
+            {'error': {'message': str(error), 'type': error.code, 'code': error.code}},
+            headers,
+        )
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,447 @@
+"""
+Prueba de carga extremo a extremo de la API (manage.py loadtest).
+
+Cada usuario virtual es un hilo con su propio cliente HTTP: inicia sesión en /api/login/ y
+repite un recorrido completo (listar, crear, leer, editar y borrar en cada viewset del perfil
+y generar un CV). El recorrido se ejecuta a varios niveles de concurrencia y por nivel se
+mide el throughput y los percentiles p50/p95/p99 de latencia de cada endpoint. El resultado
+es un JSON, así se pueden comparar ejecuciones (ver compare_results).
+
+Sin base_url la app se arranca en el propio proceso (servidor WSGI con hilos de Django) con
+el proveedor de IA local de llm_stub.py: no se paga ni depende de la red. Contra un servidor
+externo, ese servidor tiene que tener AI_BASE_URL apuntando a manage.py run_llm_stub.
+"""
+
+import logging
+import socket
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import httpx
+from django.contrib.auth import get_user_model
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+
+from accounts.models import Skill, WorkExperience
+
+from .llm_stub import StubLLM
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SYNTHETIC_EMAIL = 'loadtest-{}@loadtest.invalid'
+SYNTHETIC_DOMAIN = '@loadtest.invalid'
+PERCENTILES = (50, 95, 99)
+RESULTS_VERSION = 1
+
+JOB_DESCRIPTIONS = (
+    'Backend Developer Python. Requisitos: Django, PostgreSQL, Docker y APIs REST.',
+    'Data Engineer. Requisitos: Python, SQL, Airflow, Spark y experiencia en AWS.',
+    'Full Stack Developer. Requisitos: React, TypeScript, Django y despliegue continuo.',
+    'DevOps Engineer. Requisitos: Kubernetes, Terraform, observabilidad y Linux.',
+)
+
+# Viewsets del perfil (server/urls.py): payload de creación y de edición parcial
+CRUD_RESOURCES = {
+    'skills': ({'name': 'Carga', 'skill_type': 'TECHNICAL'}, {'level': 'EXPERT'}),
+    'languages': ({'language': 'Alemán', 'level': 'B1'}, {'level': 'B2'}),
+    'experience': (
+        {
+            'company': 'Carga S.L.',
+            'role': 'Backend Developer',
+            'description': 'APIs REST con Django.',
+            'start_date': '2020-01-01',
+            'achievements': [{'description': 'Redujo la latencia un 40%.'}],
+        },
+        {'current_job': True},
+    ),
+    'education': (
+        {'institution': 'Universidad de Carga', 'degree': 'Grado', 'start_date': '2012-09-01'},
+        {'grade': '8.5'},
+    ),
+    'certificates': (
+        {'name': 'AWS Developer', 'issuing_organization': 'AWS', 'issue_date': '2023-05-01'},
+        {'credential_id': 'ABC-123'},
+    ),
+    'projects': (
+        {'title': 'Plataforma de pagos', 'description': 'Migración a microservicios.'},
+        {'role': 'Tech Lead'},
+    ),
+}
+
+
+# --- Usuarios sintéticos ---
+
+
+def create_synthetic_users(count, password, plan=User.Plan.PRO):
+    """
+    Crea (o reutiliza) `count` usuarios verificados con un perfil mínimo para generar CVs.
+    Devuelve sus emails. El hash de la contraseña es lento a propósito, así que solo se
+    recalcula en los usuarios nuevos o si cambió.
+    """
+    emails = []
+    for i in range(count):
+        email = SYNTHETIC_EMAIL.format(i)
+        user, created = User.objects.get_or_create(
+            email=email,
+            defaults={'first_name': 'Carga', 'last_name': str(i), 'plan': plan},
+        )
+        if created or user.plan != plan or not user.check_password(password):
+            user.plan = plan
+            user.is_verified = True
+            user.set_password(password)
+            user.save()
+        if created:
+            Skill.objects.create(user=user, name='Python', level=Skill.SkillLevel.EXPERT)
+            WorkExperience.objects.create(
+                user=user,
+                company='Empresa Sintética',
+                role='Backend Developer',
+                description='Servicios en Python y Django.',
+                start_date='2019-01-01',
+                current_job=True,
+            )
+        emails.append(email)
+    return emails
+
+
+def delete_synthetic_users():
+    """Borra los usuarios de create_synthetic_users (y todo lo suyo, en cascada)."""
+    deleted, _ = User.objects.filter(email__endswith=SYNTHETIC_DOMAIN).delete()
+    return deleted
+
+
+# --- Medición ---
+
+
+def percentile(values, q):
+    """Percentil q (0-100) con interpolación lineal; None si no hay valores."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Recorder:
+    """Muestras (endpoint, segundos, status) de todos los hilos de un nivel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self.samples.append((endpoint, seconds, status))
+
+    def summary(self, elapsed):
+        """Por endpoint: peticiones, errores, status, throughput y latencias en ms."""
+        with self._lock:
+            samples = list(self.samples)
+        by_endpoint = {}
+        for endpoint, seconds, status in samples:
+            by_endpoint.setdefault(endpoint, []).append((seconds, status))
+        endpoints = {
+            endpoint: _latency_summary(rows, elapsed)
+            for endpoint, rows in sorted(by_endpoint.items())
+        }
+        overall = _latency_summary([(seconds, status) for _, seconds, status in samples], elapsed)
+        return overall, endpoints
+
+
+def _latency_summary(rows, elapsed):
+    timings = [seconds * 1000 for seconds, _ in rows]
+    statuses = {}
+    for _, status in rows:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    summary = {
+        'requests': len(rows),
+        'errors': sum(1 for _, status in rows if not _ok(status)),
+        'statuses': statuses,
+        'throughput_rps': round(len(rows) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(timings) / len(timings), 2) if timings else None,
+        'max_ms': round(max(timings), 2) if timings else None,
+    }
+    for q in PERCENTILES:
+        value = percentile(timings, q)
+        summary[f'p{q}_ms'] = round(value, 2) if value is not None else None
+    return summary
+
+
+def _ok(status):
+    return isinstance(status, int) and status < 400
+
+
+# --- Usuarios virtuales ---
+
+
+class VirtualUser:
+    """
+    Un cliente HTTP con su sesión. Cada petición se mide con su plantilla de ruta
+    ('PATCH /api/skills/{id}/') para agrupar por endpoint y no por id.
+    """
+
+    def __init__(self, base_url, email, password, recorder, timeout=60.0, jobs=None, tag=''):
+        self.email = email
+        self.tag = tag
+        self.password = password
+        self.recorder = recorder
+        self.jobs = jobs
+        self.http = httpx.Client(base_url=base_url.rstrip('/'), timeout=timeout)
+
+    def close(self):
+        self.http.close()
+
+    def request(self, method, path, endpoint=None, **kwargs):
+        """Hace la petición y registra su latencia. Los fallos de red cuentan como error."""
+        endpoint = endpoint or f'{method} {path}'
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(endpoint, time.perf_counter() - start, type(e).__name__)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - start, response.status_code)
+        return response
+
+    def login(self):
+        response = self.request(
+            'POST', '/api/login/', json={'email': self.email, 'password': self.password}
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.http.headers['Authorization'] = f'Bearer {response.json()["access"]}'
+        return True
+
+    def crud(self, resource, create, update):
+        """Recorrido completo de un viewset: list, create, retrieve, partial_update, destroy."""
+        base = f'/api/{resource}/'
+        item = f'{base}{{id}}/'
+        self.request('GET', base)
+        response = self.request('POST', base, json=create)
+        if response is None or response.status_code != 201:
+            return
+        path = f'{base}{response.json()["id"]}/'
+        self.request('GET', path, endpoint=f'GET {item}')
+        self.request('PATCH', path, endpoint=f'PATCH {item}', json=update)
+        self.request('DELETE', path, endpoint=f'DELETE {item}')
+
+    def generate(self, job_description):
+        self.request('POST', '/api/cv/generate/', json={'job_description': job_description})
+
+    def iteration(self, number):
+        for resource, (create, update) in CRUD_RESOURCES.items():
+            self.crud(resource, create, update)
+        self.generate(self.job_description(number))
+
+    def job_description(self, number):
+        """
+        Sin `jobs` fijas, cada (ejecución y nivel, usuario, iteración) pide una oferta
+        distinta: así se mide la generación y no el caché de CVs.
+        """
+        if self.jobs:
+            return self.jobs[number % len(self.jobs)]
+        job = JOB_DESCRIPTIONS[number % len(JOB_DESCRIPTIONS)]
+        return f'{job}\nReferencia: {self.tag}-{self.email}-{number}'
+
+
+def job_pool(distinct):
+    """
+    `distinct` ofertas que se repiten entre usuarios (0 = todas distintas). Con pocas, casi
+    todo sale del caché de CVs o se agrupa en vuelo: mide el camino caliente.
+    """
+    if not distinct:
+        return None
+    return [
+        f'{JOB_DESCRIPTIONS[i % len(JOB_DESCRIPTIONS)]}\nReferencia: {i}' for i in range(distinct)
+    ]
+
+
+def run_level(
+    base_url,
+    emails,
+    password,
+    concurrency,
+    duration=None,
+    iterations=None,
+    timeout=60.0,
+    jobs=None,
+    run_id='',
+):
+    """
+    Un nivel de concurrencia: `concurrency` usuarios virtuales a la vez, cada uno hasta
+    completar `iterations` recorridos o hasta que pasen `duration` segundos.
+    """
+    if len(emails) < concurrency:
+        raise ValueError(f'Hacen falta {concurrency} usuarios sintéticos y hay {len(emails)}.')
+    recorder = Recorder()
+    deadline = time.monotonic() + duration if duration else None
+
+    def worker(email):
+        user = VirtualUser(
+            base_url,
+            email,
+            password,
+            recorder,
+            timeout=timeout,
+            jobs=jobs,
+            tag=f'{run_id}-c{concurrency}',
+        )
+        completed = 0
+        try:
+            if not user.login():
+                return None
+            while iterations is None or completed < iterations:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                user.iteration(completed)
+                completed += 1
+        finally:
+            user.close()
+        return completed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        completed = list(pool.map(worker, emails[:concurrency]))
+    elapsed = time.perf_counter() - start
+
+    overall, endpoints = recorder.summary(elapsed)
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'iterations': sum(count for count in completed if count),
+        'failed_logins': completed.count(None),
+        **overall,
+        'endpoints': endpoints,
+    }
+
+
+def _revision():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_loadtest(
+    base_url,
+    emails,
+    password,
+    levels=(1, 4, 16),
+    duration=None,
+    iterations=None,
+    timeout=60.0,
+    jobs=None,
+    metadata=None,
+):
+    """Ejecuta los niveles en orden creciente y devuelve el documento de resultados."""
+    if duration is None and iterations is None:
+        raise ValueError('Indica una duración o un número de iteraciones por nivel.')
+    started = datetime.now(timezone.utc)
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+    for concurrency in sorted(set(levels)):
+        logger.info('Prueba de carga: nivel de concurrencia %s', concurrency)
+        results.append(
+            run_level(
+                base_url,
+                emails,
+                password,
+                concurrency,
+                duration=duration,
+                iterations=iterations,
+                timeout=timeout,
+                jobs=jobs,
+                run_id=run_id,
+            )
+        )
+    return {
+        'version': RESULTS_VERSION,
+        'run_id': run_id,
+        'started_at': started.isoformat(timespec='seconds'),
+        'revision': _revision(),
+        'base_url': base_url,
+        'config': {
+            'levels': sorted(set(levels)),
+            'duration_s': duration,
+            'iterations': iterations,
+            'distinct_jobs': len(jobs) if jobs else 0,
+            **(metadata or {}),
+        },
+        'levels': results,
+    }
+
+
+def compare_results(previous, current, metric='p95_ms'):
+    """
+    Filas (concurrencia, endpoint, antes, ahora, cambio %) de `metric` para los endpoints
+    presentes en las dos ejecuciones. Un cambio positivo en latencia es un empeoramiento.
+    """
+    before = {
+        (level['concurrency'], endpoint): summary.get(metric)
+        for level in previous['levels']
+        for endpoint, summary in level['endpoints'].items()
+    }
+    rows = []
+    for level in current['levels']:
+        for endpoint, summary in level['endpoints'].items():
+            old = before.get((level['concurrency'], endpoint))
+            new = summary.get(metric)
+            if old is None or new is None:
+                continue
+            change = round((new - old) / old * 100, 1) if old else None
+            rows.append((level['concurrency'], endpoint, old, new, change))
+    return rows
+
+
+# --- Servidor en proceso ---
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        # Cabeceras y cuerpo van en escrituras separadas: sin esto, Nagle + ACK retrasado
+        # añaden ~40 ms a cada respuesta con keep-alive y tapan lo que se quiere medir
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass  # Miles de líneas de acceso no aportan nada a la prueba
+
+
+@contextmanager
+def local_server(latency='0.5', errors='', seed=None, **settings_overrides):
+    """
+    Arranca la app (ThreadedWSGIServer de Django, un hilo por conexión) y el proveedor de
+    IA local en puertos libres. Dentro del bloque, AI_BASE_URL apunta al stub y los límites
+    por plan están desactivados: se mide la API, no el throttling. Devuelve la URL base.
+    """
+    with StubLLM(latency=latency, errors=errors, seed=seed) as stub:
+        overrides = {
+            'OPENAI_API_KEY': 'sk-stub',
+            'AI_BASE_URL': stub.base_url,
+            'CV_RATE_LIMIT_ENABLED': False,
+            **settings_overrides,
+        }
+        with override_settings(**overrides):
+            server = ThreadedWSGIServer(('localhost', 0), _QuietHandler, allow_reuse_address=True)
+            server.set_app(get_wsgi_application())
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                yield f'http://localhost:{server.server_address[1]}'
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cv_generator.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los micro-benchmarks del generador de CVs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help=f'Benchmarks a ejecutar (todos por defecto): {sorted(BENCHMARKS)}',
+        )
+        parser.add_argument('--json', action='store_true', help='Salida en JSON (para comparar).')
+
+    def handle(self, *args, **options):
+        names = options['names'] or sorted(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f'Benchmarks desconocidos: {", ".join(sorted(unknown))}')
+
+        results = {name: BENCHMARKS[name]() for name in names}
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, metrics in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for metric, value in metrics.items():
+                self.stdout.write(f'  {metric:<32} {value}')
@@ -0,0 +1,163 @@
+import json
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from cv_generator.loadtest import (
+    compare_results,
+    create_synthetic_users,
+    delete_synthetic_users,
+    job_pool,
+    local_server,
+    run_loadtest,
+)
+
+User = get_user_model()
+
+
+def _levels(value):
+    try:
+        levels = [int(level) for level in value.split(',') if level.strip()]
+    except ValueError as e:
+        raise CommandError(f'Niveles de concurrencia no válidos: {value!r}') from e
+    if not levels or min(levels) < 1:
+        raise CommandError('Los niveles de concurrencia deben ser enteros positivos.')
+    return levels
+
+
+def _ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de la API: usuarios sintéticos que inician sesión, usan los viewsets '
+        'del perfil y generan CVs a varios niveles de concurrencia. Guarda los resultados en JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            help='Servidor a probar. Por defecto arranca la app en este proceso con el LLM local.',
+        )
+        parser.add_argument('--levels', default='1,4,16', help='Niveles de concurrencia: "1,4,16".')
+        parser.add_argument(
+            '--duration', type=float, default=10.0, help='Segundos por nivel (por defecto 10).'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            help='Recorridos por usuario y nivel (en lugar de --duration).',
+        )
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--plan', choices=User.Plan.values, default=User.Plan.PRO)
+        parser.add_argument(
+            '--distinct-jobs',
+            type=int,
+            default=0,
+            help='Ofertas distintas que se reparten los usuarios (0 = todas distintas, sin caché).',
+        )
+        parser.add_argument('--timeout', type=float, default=60.0, help='Segundos por petición.')
+        parser.add_argument(
+            '--latency',
+            default='lognormal:0.8,0.3',
+            help='Latencia del LLM local (mismo formato que run_llm_stub).',
+        )
+        parser.add_argument('--llm-errors', default='', help='Errores del LLM local, ej: 429:0.02.')
+        parser.add_argument(
+            '--seed', type=int, help='Semilla de latencias y errores del LLM local.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Fichero JSON de resultados (por defecto loadtest-<fecha>.json).',
+        )
+        parser.add_argument('--compare', help='JSON de una ejecución anterior para comparar p95.')
+        parser.add_argument(
+            '--cleanup', action='store_true', help='Borra los usuarios sintéticos al terminar.'
+        )
+
+    def handle(self, *args, **options):
+        levels = _levels(options['levels'])
+        duration = None if options['iterations'] is not None else options['duration']
+        previous = None
+        if options['compare']:
+            try:
+                previous = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f'No se puede leer {options["compare"]}: {e}') from e
+
+        emails = create_synthetic_users(max(levels), options['password'], plan=options['plan'])
+        base_url = options['base_url']
+        if base_url:
+            server = nullcontext(base_url)
+        else:
+            server = local_server(
+                latency=options['latency'], errors=options['llm_errors'], seed=options['seed']
+            )
+
+        try:
+            with server as url:
+                self.stdout.write(f'Probando {url} con niveles {levels}...')
+                results = run_loadtest(
+                    url,
+                    emails,
+                    options['password'],
+                    levels=levels,
+                    duration=duration,
+                    iterations=options['iterations'],
+                    timeout=options['timeout'],
+                    jobs=job_pool(options['distinct_jobs']),
+                    metadata={
+                        'plan': options['plan'],
+                        'llm': 'external' if base_url else 'stub',
+                        'llm_latency': None if base_url else options['latency'],
+                        'llm_errors': None if base_url else options['llm_errors'],
+                    },
+                )
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        finally:
+            if options['cleanup']:
+                delete_synthetic_users()
+
+        output = Path(
+            options['output'] or datetime.now(timezone.utc).strftime('loadtest-%Y%m%dT%H%M%SZ.json')
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+
+        self._report(results)
+        if previous:
+            self._compare(previous, results)
+        self.stdout.write(self.style.SUCCESS(f'Resultados en {output}'))
+
+    def _report(self, results):
+        for level in results['levels']:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f'Concurrencia {level["concurrency"]}: {level["throughput_rps"]} req/s, '
+                    f'{level["requests"]} peticiones, {level["errors"]} errores, '
+                    f'{level["iterations"]} recorridos'
+                )
+            )
+            self.stdout.write(
+                f'  {"endpoint":<34} {"n":>6} {"err":>5} {"req/s":>8} '
+                f'{"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}'
+            )
+            for endpoint, summary in level['endpoints'].items():
+                self.stdout.write(
+                    f'  {endpoint:<34} {summary["requests"]:>6} {summary["errors"]:>5} '
+                    f'{summary["throughput_rps"]:>8} {_ms(summary["p50_ms"]):>9} '
+                    f'{_ms(summary["p95_ms"]):>9} {_ms(summary["p99_ms"]):>9}'
+                )
+
+    def _compare(self, previous, results):
+        self.stdout.write(self.style.MIGRATE_HEADING('p95 frente a la ejecución anterior'))
+        for concurrency, endpoint, old, new, change in compare_results(previous, results):
+            change = '-' if change is None else f'{change:+.1f}%'
+            self.stdout.write(
+                f'  c={concurrency:<4} {endpoint:<34} {_ms(old):>9} -> {_ms(new):>9} {change:>8}'
+            )
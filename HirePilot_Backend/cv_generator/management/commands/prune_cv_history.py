@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cv_generator.history import PRUNE_BATCH_SIZE, prune
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra por lotes las entradas del historial de CVs más antiguas que la retención '
+        '(CV_HISTORY_RETENTION_DAYS) y los contenidos que quedan sin usar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help=(
+                'Días que se conservan '
+                '(por defecto settings.CV_HISTORY_RETENTION_DAYS; 0 = sin límite).'
+            ),
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PRUNE_BATCH_SIZE,
+            help='Filas por DELETE.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Solo cuenta lo que se borraría.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que 0.')
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days no puede ser negativo.')
+
+        entries, payloads = prune(
+            days=options['days'], batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        verb = 'Se borrarían' if options['dry_run'] else 'Borradas'
+        self.stdout.write(f'{verb} {entries} entradas del historial y {payloads} contenidos.')
@@ -0,0 +1,63 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from cv_generator.jobs import WorkerPool, purge_expired_jobs, requeue_stale_jobs
+
+# Cada cuánto (segundos) reencolamos trabajos colgados y borramos los caducados
+MAINTENANCE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Arranca un pool de workers que procesa las generaciones de CV asíncronas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Número de hilos (por defecto settings.CV_WORKER_CONCURRENCY).',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='Segundos de espera cuando la cola está vacía.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesa los trabajos pendientes y termina (útil en cron o tests).',
+        )
+
+    def handle(self, *args, **options):
+        requeue_stale_jobs()
+        purge_expired_jobs()
+
+        pool = WorkerPool(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            drain=options['once'],
+        )
+        pool.start()
+        self.stdout.write(f'{pool.concurrency} workers escuchando ({pool.name})')
+
+        if options['once']:
+            pool.join()
+            return
+
+        # SIGTERM (gunicorn/systemd/docker) para de forma ordenada como Ctrl+C
+        signal.signal(signal.SIGTERM, lambda *_: pool.stop())
+        last_maintenance = time.monotonic()
+        try:
+            while pool.is_alive():
+                pool.join(timeout=1)
+                if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                    requeue_stale_jobs()
+                    purge_expired_jobs()
+                    last_maintenance = time.monotonic()
+        except KeyboardInterrupt:
+            pool.stop()
+            pool.join()
+        self.stdout.write('Workers detenidos.')
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cv_generator.llm_stub import ERROR_KINDS, MODES, StubLLM
+
+
+class Command(BaseCommand):
+    help = (
+        'Arranca un servidor local compatible con la API de OpenAI/OpenRouter '
+        '(pruebas de carga y de regresión). Apunta AI_BASE_URL a la URL que muestra.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--latency',
+            default='0',
+            help="Segundos hasta la respuesta: '0.5', 'uniform:0.2,1.5', 'normal:1,0.3' "
+            "o 'lognormal:1,0.6'.",
+        )
+        parser.add_argument(
+            '--chunk-delay',
+            type=float,
+            default=0.0,
+            help='Segundos entre fragmentos en streaming.',
+        )
+        parser.add_argument(
+            '--errors',
+            default='',
+            help=f"Probabilidad de cada error, ej: '429:0.05,truncate:0.01'. Tipos: {ERROR_KINDS}",
+        )
+        parser.add_argument('--mode', choices=MODES, default='generate')
+        parser.add_argument('--cassette', help='Fichero JSON Lines para record/replay.')
+        parser.add_argument(
+            '--upstream',
+            default='https://openrouter.ai/api/v1',
+            help='Proveedor real al que reenvía el modo record.',
+        )
+        parser.add_argument('--seed', type=int, help='Semilla de latencias y errores.')
+
+    def handle(self, *args, **options):
+        try:
+            stub = StubLLM(
+                host=options['host'],
+                port=options['port'],
+                latency=options['latency'],
+                chunk_delay=options['chunk_delay'],
+                errors=options['errors'],
+                mode=options['mode'],
+                cassette=options['cassette'],
+                upstream=options['upstream'],
+                api_key=settings.OPENAI_API_KEY,
+                seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        stub.start()
+        self.stdout.write(f'Servidor LLM local ({stub.mode}) en {stub.base_url}')
+        try:
+            stub.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.stop()
+            self.stdout.write(f'Estadísticas: {stub.stats()}')
@@ -0,0 +1,210 @@
+import logging
+import math
+import threading
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_llm_usage = {
+    'calls': 0,
+    'prompt_tokens': 0,
+    'cached_prompt_tokens': 0,
+    'completion_tokens': 0,
+}
+# Coste en USD por modelo según AI_MODEL_PRICES
+_llm_cost = {}
+
+# Resultado de cada llamada al LLM (ver resilience.py) y latencias recientes de las correctas
+LATENCY_WINDOW = 500
+LLM_CALL_OUTCOMES = ('ok', 'failed', 'deadline_exceeded', 'retried', 'hedged', 'hedge_won')
+_llm_calls = dict.fromkeys(LLM_CALL_OUTCOMES, 0)
+_latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+def cached_tokens(usage):
+    """Tokens del prompt servidos desde el caché de prefijos del proveedor."""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return int(getattr(details, 'cached_tokens', None) or 0) if details else 0
+
+
+def usage_cost(model, prompt, cached, completion):
+    """Coste en USD de una respuesta, o None si el modelo no está en AI_MODEL_PRICES."""
+    prices = settings.AI_MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (
+        (prompt - cached) * prices['prompt']
+        + cached * prices.get('cached_prompt', prices['prompt'])
+        + completion * prices['completion']
+    ) / 1_000_000
+
+
+def record_llm_usage(usage, model=None):
+    """
+    Acumula el campo usage de una respuesta del proveedor (por proceso).
+    Si el proveedor no lo manda, no hacemos nada.
+    """
+    if usage is None:
+        return
+    prompt = int(usage.prompt_tokens or 0)
+    cached = cached_tokens(usage)
+    completion = int(usage.completion_tokens or 0)
+    cost = usage_cost(model, prompt, cached, completion)
+    with _lock:
+        _llm_usage['calls'] += 1
+        _llm_usage['prompt_tokens'] += prompt
+        _llm_usage['cached_prompt_tokens'] += cached
+        _llm_usage['completion_tokens'] += completion
+        if cost is not None:
+            _llm_cost[(model,)] = _llm_cost.get((model,), 0) + cost
+    logger.info(f'Uso LLM ({model}): prompt={prompt} (cacheados={cached}) completion={completion}')
+
+
+def llm_usage_stats():
+    """Totales de tokens del proceso y proporción del prompt que vino del caché."""
+    with _lock:
+        stats = dict(_llm_usage)
+    prompt = stats['prompt_tokens']
+    stats['cached_prompt_ratio'] = round(stats['cached_prompt_tokens'] / prompt, 4) if prompt else 0
+    return stats
+
+
+def llm_cost_stats():
+    """Coste acumulado del proceso en USD por modelo (solo los que tienen precio)."""
+    with _lock:
+        return dict(_llm_cost)
+
+
+def record_llm_call(outcome, duration=None):
+    """Cuenta un resultado (ok, failed, deadline_exceeded, retried, hedged, hedge_won)."""
+    with _lock:
+        _llm_calls[outcome] += 1
+        if outcome == 'ok' and duration is not None:
+            _latencies.append(duration)
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def llm_latency_percentile(percentile, min_samples=1):
+    """Percentil de la latencia de las últimas llamadas correctas (None si hay pocas)."""
+    with _lock:
+        values = list(_latencies)
+    if len(values) < max(min_samples, 1):
+        return None
+    return _percentile(values, percentile)
+
+
+def llm_call_stats():
+    """Resultados de las llamadas al LLM y latencias p50/p95/p99 en milisegundos."""
+    with _lock:
+        stats = dict(_llm_calls)
+        values = list(_latencies)
+    for percentile in (50, 95, 99):
+        stats[f'latency_p{percentile}_ms'] = (
+            round(_percentile(values, percentile) * 1000, 1) if values else None
+        )
+    return stats
+
+
+# Validación de la salida del LLM contra el esquema (schema.py)
+_validation = {'valid': 0, 'repaired': 0, 'repair_failed': 0}
+_invalid_sections = {}
+
+
+def record_validation(outcome, invalid_sections=()):
+    """
+    Cuenta una respuesta validada: valid (a la primera), repaired (bien tras pedir otra vez
+    las secciones inválidas) o repair_failed (alguna sección salió del motor local).
+    """
+    with _lock:
+        _validation[outcome] += 1
+        for key in invalid_sections:
+            _invalid_sections[key] = _invalid_sections.get(key, 0) + 1
+
+
+def validation_stats():
+    """Resultados de la validación y cuántas veces vino mal cada sección."""
+    with _lock:
+        return {**_validation, 'invalid_sections': dict(_invalid_sections)}
+
+
+# --- GENERACIONES (ver tracing.py) ---
+# Histogramas con buckets fijos (acumulados al exportar, como los de Prometheus)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+class Histogram:
+    """Histograma sin lock propio: se usa siempre con el lock del módulo."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[index] += 1
+                break
+
+    def snapshot(self):
+        cumulative, running = [], 0
+        for upper, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative.append((upper, running))
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+# Claves: (outcome, model), (stage,), (kind, model) y (reason,)
+_generations = {}
+_generation_seconds = {}
+_stage_seconds = {}
+_generation_tokens = {}
+_fallbacks = {}
+
+
+def _observe(histograms, labels, value, buckets):
+    histogram = histograms.get(labels)
+    if histogram is None:
+        histogram = histograms[labels] = Histogram(buckets)
+    histogram.observe(value)
+
+
+def record_generation(outcome, model, duration, stages, tokens, fallback_reason=None):
+    """
+    Una generación terminada: resultado (ai, cache, coalesced, partial, local o error),
+    duración total, segundos por etapa y tokens (prompt, completion, cached_prompt).
+    """
+    with _lock:
+        _generations[(outcome, model)] = _generations.get((outcome, model), 0) + 1
+        _observe(_generation_seconds, (outcome,), duration, STAGE_BUCKETS)
+        for stage, seconds in stages.items():
+            _observe(_stage_seconds, (stage,), seconds, STAGE_BUCKETS)
+        if tokens.get('prompt') or tokens.get('completion'):
+            for kind, count in tokens.items():
+                _observe(_generation_tokens, (kind, model), count, TOKEN_BUCKETS)
+        if fallback_reason:
+            _fallbacks[(fallback_reason,)] = _fallbacks.get((fallback_reason,), 0) + 1
+
+
+def generation_stats():
+    """Contadores e histogramas de las generaciones del proceso, por etiquetas."""
+    with _lock:
+        return {
+            'generations': dict(_generations),
+            'fallbacks': dict(_fallbacks),
+            'generation_seconds': {k: h.snapshot() for k, h in _generation_seconds.items()},
+            'stage_seconds': {k: h.snapshot() for k, h in _stage_seconds.items()},
+            'generation_tokens': {k: h.snapshot() for k, h in _generation_tokens.items()},
+        }
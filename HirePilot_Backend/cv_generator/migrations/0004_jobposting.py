@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cv_generator', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPosting',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('required_skills', models.JSONField(blank=True, default=list)),
+                ('keywords', models.JSONField(blank=True, default=list)),
+                ('use_count', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('cv_generator', '0004_jobposting'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVPayload',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('codec', models.CharField(max_length=10)),
+                ('data', models.BinaryField()),
+                ('raw_size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CVGeneration',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('job_title', models.CharField(blank=True, default='', max_length=255)),
+                ('language', models.CharField(default='es', max_length=10)),
+                ('outcome', models.CharField(max_length=20)),
+                ('model', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='generated_cvs',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    'payload',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name='generations',
+                        to='cv_generator.cvpayload',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['user', '-id'], name='cv_history_user_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,107 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class GenerationJob(models.Model):
+    """
+    Generación de CV en segundo plano. La propia tabla hace de cola:
+    los workers (manage.py run_cv_workers) reclaman los trabajos PENDING.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendiente'
+        RUNNING = 'RUNNING', 'En proceso'
+        DONE = 'DONE', 'Completado'
+        FAILED = 'FAILED', 'Fallido'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='generation_jobs'
+    )
+    job_description = models.TextField()
+    language = models.CharField(max_length=10, default='es')
+
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING, db_index=True
+    )
+    result = models.JSONField(null=True, blank=True)  # Misma respuesta que el modo síncrono
+    error = models.TextField(blank=True, default='')
+    worker = models.CharField(max_length=100, blank=True, default='')  # Quién lo reclamó
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['created_at']  # FIFO
+
+    def __str__(self):
+        return f'{self.id} ({self.status})'
+
+
+class JobPosting(models.Model):
+    """
+    Análisis de una oferta compartido entre todos los usuarios.
+    Muchos candidatos se presentan a la misma oferta: la identificamos por el hash del
+    texto normalizado y guardamos una sola vez el puesto, los requisitos y las palabras clave.
+    """
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    title = models.CharField(max_length=255, blank=True, default='')
+    required_skills = models.JSONField(default=list, blank=True)  # Requisitos tal cual la oferta
+    keywords = models.JSONField(default=list, blank=True)
+    use_count = models.PositiveIntegerField(default=1)  # Generaciones contra esta oferta
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.title or self.content_hash[:12]} ({self.use_count})'
+
+
+class CVPayload(models.Model):
+    """
+    Contenido (structured_cv_data) de un CV generado, comprimido y guardado una sola vez.
+    Se direcciona por el hash del JSON canónico: dos generaciones con la misma salida
+    (el caché de CVs, reintentos, el mismo CV pedido otra vez) comparten la fila.
+    """
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    codec = models.CharField(max_length=10)  # zlib o zstd (ver history.py)
+    data = models.BinaryField()
+    raw_size = models.PositiveIntegerField()  # Bytes del JSON sin comprimir
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.content_hash[:12]} ({self.codec}, {len(self.data)}/{self.raw_size} B)'
+
+
+class CVGeneration(models.Model):
+    """
+    Historial: un CV que recibió el usuario. Solo guarda los metadatos para listar; el
+    contenido está en CVPayload, así que el listado nunca lee ni descomprime blobs.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='generated_cvs'
+    )
+    # PROTECT: la poda no puede borrar un contenido que alguien acaba de volver a usar
+    payload = models.ForeignKey(CVPayload, on_delete=models.PROTECT, related_name='generations')
+    job_title = models.CharField(max_length=255, blank=True, default='')
+    language = models.CharField(max_length=10, default='es')
+    outcome = models.CharField(max_length=20)  # ai, cache, coalesced, partial o local
+    model = models.CharField(max_length=100, blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # Para la poda
+
+    class Meta:
+        ordering = ['-id']
+        # Listado paginado por keyset: WHERE user_id = ? AND id < ? ORDER BY id DESC
+        indexes = [models.Index(fields=['user', '-id'], name='cv_history_user_id_idx')]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.job_title or "CV"} ({self.created_at:%Y-%m-%d})'
@@ -0,0 +1,135 @@
+"""
+El mismo CV en varios idiomas en una sola petición.
+
+Estrategias (CV_MULTILANG_STRATEGY):
+  - parallel: una generación completa por idioma, todas a la vez. Menos latencia, más tokens.
+  - translate: se genera el primer idioma y el resto se traduce (solo los textos libres).
+  - auto: como translate, pero para cada idioma compara los tokens de una generación completa
+    (los que midió el proveedor en la del primer idioma) con los de la traducción y se queda
+    con la más barata.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+
+from . import prompts
+from .preprocessing import estimate_tokens
+from .services import CVGeneratorService, format_cv_response
+from .snapshot import get_profile_snapshot
+from .translation import IncompleteTranslation, extract_free_text
+
+logger = logging.getLogger(__name__)
+
+
+def _messages_tokens(messages):
+    return sum(estimate_tokens(message['content']) for message in messages)
+
+
+def _json_tokens(data):
+    return estimate_tokens(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+
+def estimate_costs(generator, user_data, source_cv, measured=None):
+    """
+    Tokens (prompt + respuesta) de generar el CV desde cero en el idioma de `generator`
+    frente a traducir source_cv.
+
+    `measured` son los tokens que devolvió el proveedor al generar source_cv (trace.tokens
+    del primer idioma). Una generación en otro idioma cuesta lo mismo que esa, y la relación
+    entre el prompt medido y el estimado ajusta la estimación de la traducción al tokenizador
+    real. Sin medición (source_cv salió del caché) ambas cifras son estimaciones y la
+    respuesta de la generación se estima con el tamaño del propio source_cv.
+    """
+    generation_messages = generator._build_messages(
+        user_data, job_text=generator._sanitize_text(generator.job_description)
+    )
+    generation_prompt = _messages_tokens(generation_messages)
+    ai_output = {key: value for key, value in source_cv.items() if key != 'profile'}
+    generation = generation_prompt + _json_tokens(ai_output)
+
+    free_text = extract_free_text(source_cv)
+    translation_messages = prompts.build_translation_messages(generator.language, free_text)
+    translation = _messages_tokens(translation_messages) + _json_tokens(free_text)
+
+    measured = measured or {}
+    if measured.get('prompt') and generation_prompt:
+        translation = round(translation * measured['prompt'] / generation_prompt)
+        generation = measured['prompt'] + measured.get('completion', 0)
+    return generation, translation
+
+
+def _variant(generator, result, strategy):
+    return {
+        'strategy': strategy,
+        'cache': generator.cache_status,
+        **format_cv_response(result, generator.history_id),
+    }
+
+
+async def _generate(generator):
+    return _variant(generator, await generator.agenerate_cv(), 'generated')
+
+
+async def _translate_or_generate(generator, user_data, source_cv, strategy, measured):
+    if strategy == 'auto':
+        generation, translation = estimate_costs(generator, user_data, source_cv, measured)
+        logger.info(
+            f'Variante {generator.language}: generar ~{generation} tokens, '
+            f'traducir ~{translation} tokens'
+        )
+        if generation <= translation:
+            return await _generate(generator)
+
+    try:
+        return _variant(generator, await generator.atranslate_cv(source_cv), 'translated')
+    except IncompleteTranslation as error:
+        logger.warning(f'{error} ({generator.language}); se genera completo')
+        generator.cache_hit = False
+        return await _generate(generator)
+    except Exception:
+        logger.exception(f'Error traduciendo el CV a {generator.language}; se genera completo')
+        generator.cache_hit = False
+        return await _generate(generator)
+
+
+async def agenerate_languages(user, job_description, languages, strategy=None, user_data=None):
+    """Devuelve {'variants': {idioma: respuesta}} en el orden de `languages`."""
+    strategy = strategy or settings.CV_MULTILANG_STRATEGY
+    if user_data is None:
+        user_data = await sync_to_async(get_profile_snapshot)(user)
+
+    def service(language):
+        return CVGeneratorService(user, job_description, language, user_data=user_data)
+
+    if strategy == 'parallel' or len(languages) == 1:
+        variants = await asyncio.gather(*(_generate(service(language)) for language in languages))
+    else:
+        primary = service(languages[0])
+        source_cv = await primary.agenerate_cv()
+        first = _variant(primary, source_cv, 'generated')
+        # Los demás servicios se crean ahora para que su Deadline empiece a contar al terminar
+        # el primer idioma y no herede el tiempo que este ya consumió
+        others = [service(language) for language in languages[1:]]
+        if primary.from_ai:
+            measured = dict(primary.trace.tokens)
+            rest = await asyncio.gather(
+                *(
+                    _translate_or_generate(generator, user_data, source_cv, strategy, measured)
+                    for generator in others
+                )
+            )
+        else:
+            # Sin IA (CV del motor local) no hay nada que traducir: cada idioma se genera en local
+            rest = await asyncio.gather(*(_generate(generator) for generator in others))
+        variants = [first, *rest]
+
+    return {'variants': dict(zip(languages, variants))}
+
+
+def generate_languages(user, job_description, languages, strategy=None):
+    """Versión para vistas síncronas (DRF)."""
+    return async_to_sync(agenerate_languages)(user, job_description, languages, strategy)
@@ -0,0 +1,1086 @@
+"""
+PDF del CV generado en el servidor, con las mismas plantillas que el frontend
+(components/pdf/CVDocument.jsx: modern, classic y creative) y sus mismas fuentes.
+
+El PDF lo escribe fpdf2: fuentes TrueType Unicode (recortadas a los glifos usados), texto,
+rectángulos y enlaces. Aquí solo viven las plantillas y los cachés:
+
+- Plantillas: compile_template resuelve una vez por proceso los estilos, las métricas de las
+  fuentes (para medir y partir líneas sin tocar el documento) y el fondo de cada página.
+  Un render solo coloca el contenido y se lo pasa a fpdf2.
+- Resultado: cached_cv_pdf guarda el PDF en caché (CV_PDF_CACHE) por el hash del contenido,
+  la plantilla y el idioma; volver a descargar el mismo CV no renderiza nada.
+
+Las fuentes del frontend solo traen latín; para otros alfabetos se configuran fuentes de
+reserva (CV_PDF_FALLBACK_FONTS), que fpdf2 usa para los caracteres que les faltan.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from fpdf import FPDF
+
+from .history import canonical_json
+
+# Súbelo si cambia cualquier cosa del dibujo: invalida los PDFs cacheados
+RENDERER_VERSION = 2
+
+PAGE_WIDTH = 595.28  # A4 en puntos
+PAGE_HEIGHT = 841.89
+# Fecha fija en los metadatos: mismo CV, mismos bytes
+CREATION_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+TRANSLATIONS = {
+    'es': {
+        'contact': 'Contacto',
+        'skills': 'Habilidades',
+        'languages': 'Idiomas',
+        'experience': 'Experiencia Laboral',
+        'projects': 'Proyectos Destacados',
+        'education': 'Educación',
+        'present': 'Presente',
+        'profile': 'Perfil Profesional',
+        'aboutMe': 'Sobre mí',
+        'competences': 'Competencias',
+    },
+    'en': {
+        'contact': 'Contact',
+        'skills': 'Skills',
+        'languages': 'Languages',
+        'experience': 'Work Experience',
+        'projects': 'Featured Projects',
+        'education': 'Education',
+        'present': 'Present',
+        'profile': 'Professional Profile',
+        'aboutMe': 'About Me',
+        'competences': 'Competences',
+    },
+    'fr': {
+        'contact': 'Contact',
+        'skills': 'Compétences',
+        'languages': 'Langues',
+        'experience': 'Expérience Professionnelle',
+        'projects': 'Projets Remarquables',
+        'education': 'Éducation',
+        'present': 'Présent',
+        'profile': 'Profil Professionnel',
+        'aboutMe': 'À propos de moi',
+        'competences': 'Compétences',
+    },
+}
+
+# Meses abreviados como toLocaleDateString(..., {month: 'short'}) del frontend
+MONTHS = {
+    'es': ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sept', 'oct', 'nov', 'dic'],
+    'en': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+    'fr': [
+        'janv.',
+        'févr.',
+        'mars',
+        'avr.',
+        'mai',
+        'juin',
+        'juil.',
+        'août',
+        'sept.',
+        'oct.',
+        'nov.',
+        'déc.',
+    ],
+}
+PRESENT_WORDS = ('present', 'actualidad', 'présent')
+
+# Lo que cabe en una página (mismos recortes que el adaptador del frontend)
+MAX_EXPERIENCE = 3
+MAX_EDUCATION = 2
+MAX_PROJECTS = 2
+MAX_PROJECTS_WITHOUT_EXPERIENCE = 4
+MAX_SKILLS = 10
+MAX_LANGUAGES = 3
+
+LINK_SCHEMES = ('http', 'https', 'mailto')
+# Holgura al comparar anchos: un texto medido para su propia caja debe caber en ella
+WIDTH_TOLERANCE = 0.01
+
+
+class FontError(ValueError):
+    pass
+
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'renders': 0, 'pages': 0}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def pdf_cache_stats():
+    """Aciertos/fallos del caché de PDFs y PDFs/páginas renderizados (por proceso)."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+# --- Datos: el mismo adaptador que CVDocument.jsx ---
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _list(value):
+    return value if isinstance(value, list) else []
+
+
+def _dict(value):
+    return value if isinstance(value, dict) else {}
+
+
+_ISO_DATE = re.compile(r'(\d{4})(?:-(\d{1,2})(?:-\d{1,2})?)?')
+
+
+def format_date(value, language):
+    """'2020-05-01' -> 'may 2020'. Lo que no es una fecha se deja tal cual."""
+    value = _text(value)
+    match = _ISO_DATE.fullmatch(value)
+    if not match:
+        return value
+    year, month = match.groups()
+    month = int(month or 1)
+    if not 1 <= month <= 12:
+        return value
+    return f'{MONTHS[language][month - 1]} {year}'
+
+
+def parse_date_range(value):
+    """'2019-01-01 - Actualidad' -> (inicio, fin, actual)."""
+    parts = _text(value).split(' - ')
+    start = parts[0].strip() or None
+    end = parts[1].strip() if len(parts) > 1 and parts[1].strip() else None
+    current = bool(end) and any(word in end.lower() for word in PRESENT_WORDS)
+    return start, None if current else end, current
+
+
+def document_data(cv_data, language):
+    """Lo que dibujan las plantillas a partir de structured_cv_data (o de la respuesta entera)."""
+    source = _dict(cv_data.get('structured_cv_data')) or cv_data
+    profile = _dict(source.get('profile'))
+
+    experience = []
+    for item in _list(source.get('experience'))[:MAX_EXPERIENCE]:
+        item = _dict(item)
+        start, end, current = parse_date_range(item.get('date_range'))
+        bullets = item.get('enhanced_description')
+        if isinstance(bullets, list):
+            description = '\n'.join(f'• {_text(bullet)}' for bullet in bullets if _text(bullet))
+        else:
+            description = _text(bullets or item.get('description'))
+        experience.append(
+            {
+                'position': _text(item.get('position')),
+                'company': _text(item.get('company')),
+                'start': format_date(start, language),
+                'end': format_date(end, language),
+                'current': current,
+                'description': description,
+            }
+        )
+
+    education = []
+    for item in _list(source.get('education'))[:MAX_EDUCATION]:
+        item = _dict(item)
+        start, _, _ = parse_date_range(item.get('date_range'))
+        education.append(
+            {
+                'degree': _text(item.get('degree')),
+                'institution': _text(item.get('institution')),
+                'start': format_date(start, language),
+            }
+        )
+
+    max_projects = MAX_PROJECTS if experience else MAX_PROJECTS_WITHOUT_EXPERIENCE
+    projects = []
+    for item in _list(source.get('projects'))[:max_projects]:
+        item = _dict(item)
+        projects.append(
+            {
+                'title': _text(item.get('title')),
+                'role': _text(item.get('role')),
+                'description': _text(item.get('description')),
+                'tech_stack': [_text(tech) for tech in _list(item.get('tech_stack')) if tech],
+                'url': safe_url(item.get('url')),
+            }
+        )
+
+    languages = []
+    for item in _list(source.get('selected_languages') or source.get('languages'))[:MAX_LANGUAGES]:
+        item = _dict(item)
+        languages.append({'name': _text(item.get('name')), 'level': _text(item.get('level'))})
+
+    return {
+        'first_name': _text(profile.get('firstName')),
+        'last_name': _text(profile.get('lastName')),
+        'email': _text(profile.get('email')),
+        'phone': _text(profile.get('phone')),
+        'location': _text(profile.get('location')),
+        'linkedin': safe_url(profile.get('linkedin')),
+        'title': _text(
+            source.get('job_title_target')
+            or cv_data.get('job_title_extracted')
+            or profile.get('profession')
+        ),
+        'summary': _text(source.get('profile_summary') or profile.get('summary')),
+        'experience': experience,
+        'education': education,
+        'projects': projects,
+        'skills': [
+            _text(skill) for skill in _list(source.get('selected_skills'))[:MAX_SKILLS] if skill
+        ],
+        'languages': languages,
+    }
+
+
+def safe_url(value):
+    """URL para un enlace del PDF, o None si no es http(s)/mailto (nada de javascript:)."""
+    url = _text(value)
+    if not url:
+        return None
+    try:
+        scheme = urlsplit(url).scheme.lower()
+    except ValueError:
+        return None  # 'http://[roto': lo escribe el usuario o la IA, no debe tumbar el PDF
+    if not scheme:
+        url = f'https://{url}'  # 'linkedin.com/in/...', como lo suelen escribir los usuarios
+    elif scheme not in LINK_SCHEMES:
+        return None
+    return quote(url, safe=":/?#[]@!$&'()*+,;=%~")
+
+
+# --- Primitivas de dibujo ---
+
+
+@lru_cache(maxsize=None)
+def _rgb(color):
+    """'#1F2937' -> (31, 41, 55)."""
+    return tuple(int(color[i : i + 2], 16) for i in (1, 3, 5))
+
+
+class FontMetrics(NamedTuple):
+    path: str
+    widths: dict  # Código -> ancho en milésimas de em (los mismos que usa fpdf2)
+    missing: int  # Ancho de lo que la fuente no tiene
+    digest: str
+
+
+@lru_cache(maxsize=None)
+def load_font(path):
+    """Métricas de una fuente (relativa a CV_PDF_FONT_DIR o absoluta), una vez por proceso."""
+    full_path = Path(settings.CV_PDF_FONT_DIR) / path
+    probe = FPDF()
+    try:
+        probe.add_font('probe', fname=full_path)
+        digest = hashlib.sha256(full_path.read_bytes()).hexdigest()[:16]
+    except Exception as e:  # fontTools falla de muchas formas con algo que no es TrueType
+        raise FontError(f'No se pudo cargar la fuente {full_path}: {e}') from e
+    font = probe.fonts['probe']
+    metrics = FontMetrics(str(full_path), dict(font.cw), font.desc.missing_width, digest)
+    font.close()
+    return metrics
+
+
+def _text_width(fonts, text):
+    """Ancho en milésimas de em: cada carácter con la primera fuente que lo tiene, como fpdf2."""
+    total = 0
+    for char in text:
+        code = ord(char)
+        for font in fonts:
+            width = font.widths.get(code)
+            if width is not None:
+                break
+        else:
+            width = fonts[0].missing
+        total += width
+    return total
+
+
+class Style(NamedTuple):
+    family: str  # Fuente registrada en el documento (la variante de la plantilla)
+    fonts: tuple  # FontMetrics de la variante y de las fuentes de reserva
+    size: float
+    color: tuple  # (r, g, b)
+    leading: float
+    tracking: float = 0
+    uppercase: bool = False
+    underline: bool = False
+
+    def prepare(self, text):
+        # NFC: sin shaping, 'e' + acento combinado se dibujaría desplazado
+        text = unicodedata.normalize('NFC', text)
+        return text.upper() if self.uppercase else text
+
+    def width(self, text):
+        """Ancho de un texto ya preparado."""
+        return _text_width(self.fonts, text) * self.size / 1000 + self.tracking * len(text)
+
+
+def wrap(text, style, width, max_lines=None):
+    """
+    Parte un texto preparado en líneas de `width` puntos: [(línea, justificable)]. Los '\\n'
+    separan párrafos; con max_lines la última línea visible acaba en '…'.
+    """
+    width += WIDTH_TOLERANCE
+    space = style.width(' ')
+    lines = []
+    for paragraph in text.split('\n'):
+        current, current_width = '', 0
+        for word in paragraph.split():
+            word_width = style.width(word)
+            if current and current_width + space + word_width <= width:
+                current += ' ' + word
+                current_width += space + word_width
+                continue
+            if current:
+                lines.append((current, True))
+            while word_width > width and len(word) > 1:
+                # Palabra más larga que la línea (URLs): se corta donde quepa
+                cut = _fit(word, style, width)
+                lines.append((word[:cut], False))
+                word = word[cut:]
+                word_width = style.width(word)
+            current, current_width = word, word_width
+        lines.append((current, False))
+    if max_lines and len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = (_ellipsize(lines[-1][0], style, width), False)
+    return lines
+
+
+def _fit(text, style, width):
+    used = 0
+    for index, char in enumerate(text):
+        used += style.width(char)
+        if used > width:
+            return max(index, 1)
+    return len(text)
+
+
+def _ellipsize(text, style, width):
+    text = text.rstrip()
+    while text and style.width(text + '…') > width:
+        text = text[:-1].rstrip()
+    return text + '…'
+
+
+class Block:
+    """
+    Operaciones de dibujo con origen en la esquina superior izquierda del bloque (y crece
+    hacia abajo). Los bloques se miden al construirlos y una columna los coloca enteros.
+    Cada operación es (tipo, x, y, ...); ver _draw.
+    """
+
+    def __init__(self):
+        self.ops = []
+        self.height = 0
+
+    def rect(self, x, y, width, height, color, radius=0):
+        radius = min(radius, width / 2, height / 2)
+        self.ops.append(('rect', x, y, width, height, _rgb(color), radius))
+
+    def rule(self, x, y, width, thickness, color):
+        self.rect(x, y, width, thickness, color)
+
+    def text(
+        self, x, y, text, style, width, max_lines=None, align='left', link=None, prepared=False
+    ):
+        """Dibuja el texto desde `y` (parte superior) y devuelve la y de debajo."""
+        if not prepared:
+            text = style.prepare(text)
+        lines = wrap(text, style, width, max_lines) if text else []
+        for line, justifiable in lines:
+            line_width = style.width(line)
+            left = x
+            if align == 'right':
+                left = x + width - line_width
+            elif align == 'center':
+                left = x + (width - line_width) / 2
+            words = line.split(' ')
+            if align == 'justify' and justifiable and len(words) > 1:
+                # Sin justificado de una sola línea en fpdf2: repartimos el hueco entre palabras
+                widths = [style.width(word) for word in words]
+                gap = (width - sum(widths)) / (len(words) - 1)
+                word_x = left
+                for word, word_width in zip(words, widths):
+                    self.ops.append(('text', word_x, y, word, style))
+                    word_x += word_width + gap
+                line_width = width
+            else:
+                self.ops.append(('text', left, y, line, style))
+            if link:
+                self.ops.append(('link', left, y, line_width, style.leading, link))
+            y += style.leading
+        return y
+
+
+class _Document:
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.styles = compiled.styles
+        self.pages = []
+
+    def page(self, index):
+        while len(self.pages) <= index:
+            compiled = self.compiled
+            self.pages.append(
+                list(compiled.first_page_ops if not self.pages else compiled.next_page_ops)
+            )
+        return self.pages[index]
+
+    def place(self, index, block, x, top):
+        self.page(index).extend(
+            (kind, x + op_x, top + op_y, *args) for kind, op_x, op_y, *args in block.ops
+        )
+
+
+class Column:
+    """Flujo vertical de bloques en una columna: si un bloque no cabe, sigue en otra página."""
+
+    def __init__(self, document, x, width, top, bottom, next_top):
+        self.document = document
+        self.x = x
+        self.width = width
+        self.y = self.page_top = top
+        self.bottom = bottom
+        self.next_top = next_top
+        self.page = 0
+        document.page(0)
+
+    def add(self, block, keep_with=0):
+        """Coloca el bloque; keep_with: alto del siguiente, que debe ir en la misma página."""
+        if self.y + block.height + keep_with > self.bottom and self.y > self.page_top:
+            self.page += 1
+            self.y = self.page_top = self.next_top
+        self.document.place(self.page, block, self.x, self.y)
+        self.y += block.height
+
+    def section(self, title, blocks):
+        if blocks:
+            self.add(title, keep_with=blocks[0].height)
+            for block in blocks:
+                self.add(block)
+
+
+def _paragraph(text, style, width, max_lines=None, align='left', before=0, after=0, link=None):
+    block = Block()
+    block.height = (
+        block.text(0, before, text, style, width, max_lines, align=align, link=link) + after
+    )
+    return block
+
+
+def _section_title(text, style, width, before, after, padding=0, rule=None, thickness=1):
+    block = Block()
+    y = block.text(0, before, text, style, width) + padding
+    if rule:
+        block.rule(0, y, width, thickness, rule)
+        y += thickness
+    block.height = y + after
+    return block
+
+
+def _row(block, y, width, left, left_style, right, right_style, link=None):
+    """Texto a la izquierda y a la derecha en la misma línea (título y fechas)."""
+    right = right_style.prepare(right)
+    right_width = min(right_style.width(right), width * 0.45) if right else 0
+    left_width = width - right_width - (8 if right else 0)
+    bottom = block.text(0, y, left, left_style, left_width, link=link)
+    if right:
+        offset = max(left_style.leading - right_style.leading, 0) / 2
+        right_bottom = block.text(
+            width - right_width,
+            y + offset,
+            right,
+            right_style,
+            right_width,
+            align='right',
+            prepared=True,
+        )
+        bottom = max(bottom, right_bottom)
+    return bottom
+
+
+def _chips(block, y, width, items, style, fill, padding_x, padding_y, gap, radius):
+    """Etiquetas con fondo redondeado que pasan a la línea siguiente cuando no caben."""
+    x = 0
+    height = style.leading + 2 * padding_y
+    for item in items:
+        text = style.prepare(item)
+        chip_width = min(style.width(text) + 2 * padding_x, width)
+        if x and x + chip_width > width:
+            x = 0
+            y += height + gap
+        block.rect(x, y, chip_width, height, fill, radius)
+        block.text(
+            x + padding_x,
+            y + padding_y,
+            text,
+            style,
+            chip_width - 2 * padding_x,
+            max_lines=1,
+            prepared=True,
+        )
+        x += chip_width + gap
+    return y + height if items else y
+
+
+def _inline(block, x, y, items, style, gap, width, align='left'):
+    """Textos cortos (con enlace opcional) en una sola línea separados por `gap` puntos."""
+    items = [(style.prepare(text), link) for text, link in items if text]
+    widths = [style.width(text) for text, _ in items]
+    total = sum(widths) + gap * max(len(items) - 1, 0)
+    if align == 'center' and total < width:
+        x += (width - total) / 2
+    end = x + width
+    for (text, link), text_width in zip(items, widths):
+        if x >= end:
+            break
+        text_width = min(text_width, end - x)
+        block.text(x, y, text, style, text_width, max_lines=1, link=link, prepared=True)
+        x += text_width + gap
+
+
+def _dates(item, t, separator):
+    end = t['present'] if item['current'] else item['end']
+    return separator.join(part for part in (item['start'], end) if part)
+
+
+def _full_name(data):
+    return ' '.join(part for part in (data['first_name'], data['last_name']) if part)
+
+
+# --- Plantillas ---
+
+
+def _layout_modern(document, data, t):
+    s = document.styles
+    sidebar_width = PAGE_WIDTH * 0.35
+    side = Column(document, 15, sidebar_width - 30, 15, PAGE_HEIGHT - 15, 15)
+    width = side.width
+
+    contact = Block()
+    y = contact.text(0, 0, t['contact'], s['side_label'], width)
+    for value in (data['email'], data['phone'], data['location']):
+        if value:
+            y = contact.text(0, y, value, s['side_text'], width) + 4
+    if data['linkedin']:
+        y = contact.text(0, y, 'LinkedIn', s['side_link'], width, link=data['linkedin']) + 4
+    contact.height = y + 20
+    side.add(contact)
+
+    def side_title(text):
+        return _section_title(
+            text, s['side_title'], width, before=12, after=8, padding=4, rule='#4B5563'
+        )
+
+    if data['skills']:
+        chips = Block()
+        chips.height = _chips(chips, 0, width, data['skills'], s['chip'], '#374151', 6, 3, 5, 4)
+        side.section(side_title(t['skills']), [chips])
+    if data['languages']:
+        languages = [
+            _paragraph(f'• {item["name"]} ({item["level"]})', s['side_text'], width, after=4)
+            for item in data['languages']
+        ]
+        side.section(side_title(t['languages']), languages)
+
+    main = Column(document, sidebar_width + 15, PAGE_WIDTH * 0.65 - 30, 15, PAGE_HEIGHT - 15, 15)
+    width = main.width
+
+    header = Block()
+    y = header.text(0, 0, _full_name(data), s['name'], width) + 3
+    y = header.text(0, y, data['title'], s['role'], width) + 12
+    y = header.text(0, y, data['summary'], s['text'], width, max_lines=4)
+    header.height = y + 3 + 20
+    main.add(header)
+
+    def main_title(text):
+        return _section_title(
+            text, s['section'], width, before=0, after=10, padding=4, rule='#E5E7EB', thickness=2
+        )
+
+    blocks = []
+    for item in data['experience']:
+        block = Block()
+        y = _row(block, 0, width, item['position'], s['item'], _dates(item, t, ' - '), s['date'])
+        y = block.text(0, y + 2, item['company'], s['company'], width)
+        y = block.text(0, y + 5, item['description'], s['text'], width, max_lines=3)
+        block.height = y + 3 + 10
+        blocks.append(block)
+    main.section(main_title(t['experience']), blocks)
+
+    blocks = []
+    for item in data['education']:
+        block = Block()
+        y = block.text(0, 0, item['degree'], s['item'], width)
+        details = ' | '.join(part for part in (item['institution'], item['start']) if part)
+        y = block.text(0, y, details, s['text'], width)
+        block.height = y + 3 + 8
+        blocks.append(block)
+    main.section(main_title(t['education']), blocks)
+
+    blocks = []
+    for item in data['projects']:
+        block = Block()
+        title_style = s['link'] if item['url'] else s['item']
+        y = _row(block, 0, width, item['title'], title_style, item['role'], s['date'], item['url'])
+        if item['tech_stack']:
+            y = block.text(0, y + 2, ' • '.join(item['tech_stack']), s['company'], width)
+        y = block.text(0, y + 5, item['description'], s['text'], width, max_lines=3)
+        block.height = y + 3 + 15
+        blocks.append(block)
+    main.section(main_title(t['projects']), blocks)
+
+
+def _background_modern(styles):
+    sidebar = Block()
+    sidebar.rect(0, 0, PAGE_WIDTH * 0.35, PAGE_HEIGHT, '#1F2937')
+    return tuple(sidebar.ops), tuple(sidebar.ops)
+
+
+def _layout_classic(document, data, t):
+    s = document.styles
+    column = Column(document, 30, PAGE_WIDTH - 60, 30, PAGE_HEIGHT - 30, 30)
+    width = column.width
+
+    header = Block()
+    y = header.text(0, 0, _full_name(data), s['name'], width, align='center') + 8
+    y = header.text(0, y, data['title'], s['role'], width, align='center') + 5
+    items = [(value, None) for value in (data['email'], data['phone'], data['location']) if value]
+    if data['linkedin']:
+        items.append(('LinkedIn', data['linkedin']))
+    if items:
+        # Separadores '|' entre los datos, como en el frontend
+        items = [item for pair in zip([('|', None)] * len(items), items) for item in pair][1:]
+        _inline(header, 0, y, items, s['contact'], 10, width, align='center')
+        y += s['contact'].leading
+    y += 12
+    header.rule(0, y, width, 1, '#000000')
+    header.height = y + 1 + 15
+    column.add(header)
+
+    def section_title(text):
+        return _section_title(
+            text, s['section'], width, before=10, after=6, padding=2, rule='#CCCCCC'
+        )
+
+    if data['summary']:
+        column.section(
+            section_title(t['profile']),
+            [_paragraph(data['summary'], s['text'], width, 4, align='justify', after=10)],
+        )
+
+    blocks = []
+    for item in data['experience']:
+        block = Block()
+        dates = s['date'].prepare(_dates(item, t, ' — '))
+        dates_width = min(s['date'].width(dates), width * 0.45)
+        left_width = width - dates_width - 8
+        y = block.text(0, 0, item['position'], s['item'], left_width)
+        y = block.text(0, y, item['company'], s['company'], left_width)
+        # Fechas alineadas con la base de la empresa (alignItems: flex-end)
+        block.text(
+            width - dates_width,
+            y - s['date'].leading,
+            dates,
+            s['date'],
+            dates_width,
+            align='right',
+            prepared=True,
+        )
+        y = block.text(0, y + 2, item['description'], s['text'], width, 3, align='justify')
+        block.height = y + 10
+        blocks.append(block)
+    column.section(section_title(t['experience']), blocks)
+
+    blocks = []
+    for item in data['education']:
+        block = Block()
+        degree = ', '.join(part for part in (item['degree'], item['institution']) if part)
+        block.height = _row(block, 0, width, degree, s['item_small'], item['start'], s['date'])
+        blocks.append(block)
+    column.section(section_title(t['education']), blocks)
+
+    blocks = []
+    for item in data['projects']:
+        block = Block()
+        title_style = s['link'] if item['url'] else s['item']
+        stack = ' • '.join(item['tech_stack'])
+        title = title_style.prepare(item['title'])
+        role = s['company'].prepare(f'| {item["role"]}') if item['role'] else ''
+        stack_width = min(s['date'].width(s['date'].prepare(stack)), width * 0.45) if stack else 0
+        available = width - stack_width - (8 if stack else 0)
+        title_width = min(title_style.width(title), available)
+        y = block.text(0, 0, title, title_style, title_width, link=item['url'], prepared=True)
+        if role and title_width + 6 < available:
+            offset = (title_style.leading - s['company'].leading) / 2
+            block.text(title_width + 6, offset, role, s['company'], available - title_width - 6, 1)
+        if stack:
+            offset = title_style.leading - s['date'].leading
+            block.text(width - stack_width, offset, stack, s['date'], stack_width, 1, align='right')
+        y = block.text(0, y + 2, item['description'], s['text'], width, 3, align='justify')
+        block.height = y + 10
+        blocks.append(block)
+    column.section(section_title(t['projects']), blocks)
+
+    if data['skills']:
+        column.section(
+            section_title(t['competences']),
+            [_paragraph(' • '.join(data['skills']), s['text'], width)],
+        )
+
+
+def _background_classic(styles):
+    return (), ()
+
+
+CREATIVE_PADDING = 20
+
+
+def _creative_header_height(styles):
+    # Alto fijo (nombre y puesto en una línea) para que la banda sea parte del fondo precompilado
+    return (
+        2 * CREATIVE_PADDING
+        + styles['name'].leading
+        + 4
+        + styles['role'].leading
+        + 15
+        + styles['contact'].leading
+    )
+
+
+def _layout_creative(document, data, t):
+    s = document.styles
+    header_height = _creative_header_height(s)
+    width = PAGE_WIDTH - 2 * CREATIVE_PADDING
+
+    header = Block()
+    y = header.text(0, 0, _full_name(data), s['name'], width, max_lines=1) + 4
+    y = header.text(0, y, data['title'], s['role'], width, max_lines=1) + 15
+    items = [(value, None) for value in (data['email'], data['phone'], data['location']) if value]
+    if data['linkedin']:
+        items.append(('LinkedIn', data['linkedin']))
+    _inline(header, 0, y, items, s['contact'], 15, width)
+    header.height = header_height - 2 * CREATIVE_PADDING
+    document.place(0, header, CREATIVE_PADDING, CREATIVE_PADDING)
+
+    top = header_height + CREATIVE_PADDING
+    bottom = PAGE_HEIGHT - CREATIVE_PADDING
+    inner = PAGE_WIDTH - 2 * CREATIVE_PADDING
+    left = Column(document, CREATIVE_PADDING, inner * 0.65 - 15, top, bottom, CREATIVE_PADDING)
+    right = Column(
+        document,
+        CREATIVE_PADDING + inner * 0.65 + 15,
+        inner * 0.35 - 15,
+        top,
+        bottom,
+        CREATIVE_PADDING,
+    )
+
+    def section_title(column, text):
+        return _section_title(text, s['section'], column.width, before=0, after=8)
+
+    width = left.width
+    if data['summary']:
+        left.section(
+            section_title(left, t['aboutMe']),
+            [_paragraph(data['summary'], s['text'], width, 4, after=3 + 20)],
+        )
+
+    blocks = []
+    for item in data['experience']:
+        block = Block()
+        y = block.text(0, 0, item['position'], s['item'], width)
+        meta = ' | '.join(part for part in (item['company'], _dates(item, t, ' - ')) if part)
+        y = block.text(0, y, meta, s['meta'], width) + 4
+        y = block.text(0, y, item['description'], s['text'], width, max_lines=3)
+        block.height = y + 3 + 15
+        blocks.append(block)
+    left.section(section_title(left, t['experience']), blocks)
+
+    blocks = []
+    for item in data['projects']:
+        block = Block()
+        title_style = s['link'] if item['url'] else s['item']
+        y = block.text(0, 0, item['title'], title_style, width, link=item['url']) + 2
+        meta = item['role']
+        if item['tech_stack']:
+            meta = f'{meta} | {", ".join(item["tech_stack"])}'
+        y = block.text(0, y, meta, s['meta'], width) + 4
+        y = block.text(0, y, item['description'], s['text'], width, max_lines=3)
+        block.height = y + 3 + 15
+        blocks.append(block)
+    left.section(section_title(left, t['projects']), blocks)
+
+    width = right.width
+    if data['skills']:
+        tags = Block()
+        tags.height = _chips(tags, 0, width, data['skills'], s['tag'], '#DBEAFE', 6, 3, 4, 8) + 20
+        right.section(section_title(right, t['skills']), [tags])
+
+    blocks = []
+    for item in data['education']:
+        block = Block()
+        y = block.text(0, 0, item['degree'], s['item'], width)
+        y = block.text(0, y, item['institution'], s['text'], width)
+        block.height = y + 3 + 10
+        blocks.append(block)
+    right.section(section_title(right, t['education']), blocks)
+
+
+def _background_creative(styles):
+    header_height = _creative_header_height(styles)
+    inner = PAGE_WIDTH - 2 * CREATIVE_PADDING
+    divider = CREATIVE_PADDING + inner * 0.65
+
+    first = Block()
+    first.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, '#F9FAFB')
+    first.rect(0, 0, PAGE_WIDTH, header_height, '#3B82F6')
+    first.rect(
+        divider,
+        header_height + CREATIVE_PADDING,
+        1,
+        PAGE_HEIGHT - header_height - 2 * CREATIVE_PADDING,
+        '#E5E7EB',
+    )
+    following = Block()
+    following.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, '#F9FAFB')
+    return tuple(first.ops), tuple(following.ops)
+
+
+class TemplateSpec(NamedTuple):
+    fonts: dict  # Variante -> ruta dentro de CV_PDF_FONT_DIR
+    styles: dict  # Nombre -> (variante, tamaño, color, interlineado, extras)
+    layout: object
+    background: object
+
+
+TEMPLATES = {
+    'modern': TemplateSpec(
+        fonts={
+            'regular': 'Roboto/roboto-v50-latin-regular.ttf',
+            'italic': 'Roboto/roboto-v50-latin-italic.ttf',
+            'medium': 'Roboto/roboto-v50-latin-500.ttf',
+            'bold': 'Roboto/roboto-v50-latin-700.ttf',
+        },
+        styles={
+            'name': ('bold', 22, '#10B981', 1.2, {}),
+            'role': ('regular', 12, '#D1D5DB', 1.2, {}),
+            'text': ('regular', 10, '#374151', 1.3, {}),
+            'section': ('bold', 14, '#111827', 1.2, {'uppercase': True}),
+            'item': ('bold', 11, '#111827', 1.2, {}),
+            'link': ('bold', 11, '#10B981', 1.2, {'underline': True}),
+            'company': ('italic', 10, '#111827', 1.2, {}),
+            'date': ('regular', 9, '#6B7280', 1.2, {}),
+            'side_label': ('regular', 10, '#9CA3AF', 1.2, {}),
+            'side_text': ('regular', 10, '#E5E7EB', 1.2, {}),
+            'side_link': ('regular', 10, '#10B981', 1.2, {}),
+            'side_title': ('bold', 11, '#10B981', 1.2, {'uppercase': True}),
+            'chip': ('regular', 9, '#E5E7EB', 1.2, {}),
+        },
+        layout=_layout_modern,
+        background=_background_modern,
+    ),
+    'classic': TemplateSpec(
+        fonts={
+            'regular': 'Merriweather/merriweather-v33-latin-regular.ttf',
+            'italic': 'Merriweather/merriweather-v33-latin-italic.ttf',
+            'bold': 'Merriweather/merriweather-v33-latin-700.ttf',
+        },
+        styles={
+            'name': ('bold', 22, '#000000', 1.3, {'uppercase': True}),
+            'role': ('regular', 12, '#000000', 1.3, {}),
+            'contact': ('regular', 9, '#000000', 1.3, {}),
+            'text': ('regular', 10, '#000000', 1.3, {}),
+            'section': ('bold', 12, '#000000', 1.3, {'uppercase': True}),
+            'item': ('bold', 11, '#000000', 1.3, {}),
+            'item_small': ('bold', 10, '#000000', 1.3, {}),
+            'link': ('bold', 11, '#4B5563', 1.3, {'underline': True}),
+            'company': ('italic', 10, '#000000', 1.3, {}),
+            'date': ('regular', 9, '#000000', 1.3, {}),
+        },
+        layout=_layout_classic,
+        background=_background_classic,
+    ),
+    'creative': TemplateSpec(
+        fonts={
+            'regular': 'Lato/lato-v25-latin-regular.ttf',
+            'bold': 'Lato/lato-v25-latin-700.ttf',
+        },
+        styles={
+            'name': ('bold', 26, '#FFFFFF', 1.2, {}),
+            # opacity: 0.9 sobre el azul de la banda
+            'role': ('regular', 13, '#EBF3FE', 1.2, {}),
+            'contact': ('regular', 10, '#EBF3FE', 1.2, {}),
+            'section': ('bold', 12, '#3B82F6', 1.2, {'uppercase': True, 'tracking': 1}),
+            'text': ('regular', 10, '#4B5563', 1.3, {}),
+            'item': ('bold', 11, '#111827', 1.2, {}),
+            'link': ('bold', 11, '#3B82F6', 1.2, {'underline': True}),
+            'meta': ('regular', 10, '#9CA3AF', 1.2, {}),
+            'tag': ('regular', 8, '#1E40AF', 1.2, {}),
+        },
+        layout=_layout_creative,
+        background=_background_creative,
+    ),
+}
+
+
+class CompiledTemplate(NamedTuple):
+    name: str
+    styles: dict
+    fonts: tuple  # (familia, ruta): se registran en cada documento
+    fallbacks: tuple  # Familias de reserva para lo que no tienen las fuentes de la plantilla
+    first_page_ops: tuple
+    next_page_ops: tuple
+    fingerprint: str  # Cambia si cambian las fuentes: parte de la clave del caché
+
+
+@lru_cache(maxsize=None)
+def compile_template(name):
+    """Todo lo que no depende del CV, preparado una vez por plantilla y proceso."""
+    try:
+        spec = TEMPLATES[name]
+    except KeyError:
+        raise ValueError(f'Plantilla de PDF desconocida: {name!r}') from None
+
+    fonts = {variant: load_font(path) for variant, path in spec.fonts.items()}
+    fallbacks = {
+        f'fallback{index}': load_font(path)
+        for index, path in enumerate(settings.CV_PDF_FALLBACK_FONTS)
+    }
+
+    styles = {}
+    for style_name, (variant, size, color, line_height, extras) in spec.styles.items():
+        styles[style_name] = Style(
+            family=variant,
+            fonts=(fonts[variant], *fallbacks.values()),
+            size=size,
+            color=_rgb(color),
+            leading=size * line_height,
+            **extras,
+        )
+
+    registered = {**fonts, **fallbacks}
+    first_page_ops, next_page_ops = spec.background(styles)
+    fingerprint = hashlib.sha256(
+        '|'.join(f'{family}:{font.digest}' for family, font in registered.items()).encode()
+    ).hexdigest()[:16]
+    return CompiledTemplate(
+        name=name,
+        styles=styles,
+        fonts=tuple((family, font.path) for family, font in registered.items()),
+        fallbacks=tuple(fallbacks),
+        first_page_ops=first_page_ops,
+        next_page_ops=next_page_ops,
+        fingerprint=fingerprint,
+    )
+
+
+# --- Dibujo con fpdf2 ---
+
+
+def _draw_rect(document, x, y, width, height, color, radius):
+    document.set_fill_color(*color)
+    document.rect(x, y, width, height, style='F', round_corners=bool(radius), corner_radius=radius)
+
+
+def _draw_text(document, x, y, text, style):
+    document.set_font(style.family, 'U' if style.underline else '', style.size)
+    document.set_text_color(*style.color)
+    document.set_char_spacing(style.tracking)
+    document.set_xy(x, y)
+    document.cell(style.width(text), style.leading, text)
+
+
+def _draw_link(document, x, y, width, height, url):
+    document.link(x, y, width, height, url)
+
+
+_DRAW = {'rect': _draw_rect, 'text': _draw_text, 'link': _draw_link}
+
+
+def _draw(compiled, pages):
+    document = FPDF(unit='pt', format=(PAGE_WIDTH, PAGE_HEIGHT))
+    document.set_auto_page_break(False)
+    document.set_margin(0)
+    document.c_margin = 0
+    document.set_creation_date(CREATION_DATE)
+    for family, path in compiled.fonts:
+        document.add_font(family, fname=path)
+    if compiled.fallbacks:
+        document.set_fallback_fonts(compiled.fallbacks, exact_match=False)
+    for ops in pages:
+        document.add_page()
+        for kind, *args in ops:
+            _DRAW[kind](document, *args)
+    return bytes(document.output())
+
+
+# --- API ---
+
+
+def _language(language):
+    return language if language in TRANSLATIONS else 'es'
+
+
+def layout_cv(cv_data, template='modern', language='es'):
+    """Páginas del CV ya maquetadas (listas de operaciones de dibujo), sin escribir el PDF."""
+    language = _language(language)
+    document = _Document(compile_template(template))
+    TEMPLATES[template].layout(document, document_data(cv_data, language), TRANSLATIONS[language])
+    return document.pages
+
+
+def render_cv_pdf(cv_data, template='modern', language='es'):
+    """PDF (bytes) del CV con la plantilla e idioma indicados, sin pasar por el caché."""
+    pages = layout_cv(cv_data, template, language)
+    _count('renders')
+    _count('pages', len(pages))
+    return _draw(compile_template(template), pages)
+
+
+def make_key(cv_data, template, language):
+    """Clave direccionada por contenido: mismo CV, plantilla, idioma y fuentes = mismo PDF."""
+    digest = hashlib.sha256(canonical_json(cv_data))
+    digest.update(f'|{template}|{language}|{compile_template(template).fingerprint}'.encode())
+    return f'cv:pdf:{RENDERER_VERSION}:{digest.hexdigest()}'
+
+
+def cached_cv_pdf(cv_data, template='modern', language='es'):
+    """(pdf, acierto): el PDF del caché CV_PDF_CACHE o recién renderizado (y guardado)."""
+    language = _language(language)
+    key = make_key(cv_data, template, language)
+    cache = caches[settings.CV_PDF_CACHE]
+    pdf = cache.get(key)
+    if pdf is not None:
+        _count('hits')
+        return pdf, True
+    _count('misses')
+    pdf = render_cv_pdf(cv_data, template, language)
+    cache.set(key, pdf)
+    return pdf, False
+
+
+def page_count(pdf):
+    """Páginas de un PDF generado aquí (para tests y benchmarks)."""
+    match = re.search(rb'/Count (\d+)[^>]*/Type /Pages\b', pdf)
+    return int(match.group(1)) if match else 0
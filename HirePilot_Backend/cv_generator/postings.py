@@ -0,0 +1,138 @@
+"""
+Almacén compartido de ofertas analizadas (modelo JobPosting).
+
+La primera generación contra una oferta manda el texto completo y guarda su análisis
+(puesto, requisitos y palabras clave, extraídos en local). Las siguientes, de cualquier
+usuario, reutilizan ese análisis y mandan al LLM un resumen compacto (format_summary) en
+su lugar.
+"""
+
+import hashlib
+import re
+from collections import Counter
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import JobPosting
+from .ranking import tokenize
+
+# Cabeceras tras las que vienen los requisitos (y las tareas) del puesto
+_REQUIREMENTS_HEADING = re.compile(
+    r"""^(
+        requisitos | requerimientos | requirements | qualifications | imprescindible
+      | se\s+valorar[aá] | valorable | nice\s+to\s+have | must\s+have
+      | conocimientos | skills | perfil | buscamos | what\s+we.?re\s+looking\s+for
+      | what\s+you.?ll\s+(need|bring|do) | funciones | responsabilidades | responsibilities
+      | tareas | funciones\s+principales
+    )\b.*""",
+    re.IGNORECASE | re.VERBOSE,
+)
+# Palabras que nombran un puesto (es/en/fr): la línea del título suele llevar alguna.
+# "Consultora" no está: es más a menudo la empresa ("Consultora Tecnológica S.L.")
+_ROLE_WORD = re.compile(
+    r"""\b(
+        desarrollador(a|es)? | programador(a)? | ingenier[oa] | analista | arquitect[oa]
+      | consultor | dise[ñn]ador(a)? | t[ée]cnic[oa] | administrador(a)? | responsable
+      | jef[ea] | director(a)? | becari[oa] | especialista | cient[íi]fic[oa]
+      | developer | engineer | programmer | analyst | architect | consultant | designer
+      | technician | administrator | manager | lead | head | intern | specialist | scientist
+      | tester | devops | sre | qa | product\s+owner | scrum\s+master
+      | d[ée]veloppeur(se)? | ing[ée]nieur(e)? | chef\s+de\s+projet | stagiaire
+    )\b""",
+    re.IGNORECASE | re.VERBOSE,
+)
+_BULLET = re.compile(r'^[-•·*▪–]\s*')
+_NON_WORD = re.compile(r'[\W_]+')
+
+MAX_TITLE_CHARS = 255
+# El título es una de las primeras líneas cortas (no una frase de la descripción)
+TITLE_SEARCH_LINES = 8
+MAX_TITLE_WORDS = 10
+MAX_REQUIREMENTS = 20
+MAX_REQUIREMENT_CHARS = 200
+MAX_KEYWORDS = 20
+
+
+def posting_hash(clean_text):
+    """
+    Hash de la oferta ya limpia (preprocessing), insensible a mayúsculas, puntuación
+    y espacios: la misma oferta copiada de dos portales suele dar el mismo hash.
+    """
+    normalized = _NON_WORD.sub(' ', clean_text.casefold()).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _is_heading(line):
+    # "Funciones:" o una cabecera corta sin puntuación ("Descripción", "About the role")
+    return line.endswith(':') or (len(line.split()) <= 3 and not re.search(r'[.,;()]', line))
+
+
+def _title_index(lines):
+    """
+    Línea del puesto: la primera línea corta del principio que nombra un rol. Muchas ofertas
+    abren con la empresa o una cabecera ("Grupo Industrial del Norte, S.A.", "Descripción
+    del puesto"); si ninguna lo parece, la primera línea.
+    """
+    for index, line in enumerate(lines[:TITLE_SEARCH_LINES]):
+        if len(line.split()) <= MAX_TITLE_WORDS and _ROLE_WORD.search(line):
+            return index
+    return 0
+
+
+def analyze_posting(clean_text):
+    """Extrae puesto, requisitos y palabras clave sin llamar al LLM."""
+    lines = [line for line in clean_text.split('\n') if line]
+    title_index = _title_index(lines)
+    title = lines[title_index][:MAX_TITLE_CHARS] if lines else ''
+
+    requirements = []
+    in_block = False
+    for line in lines[:title_index] + lines[title_index + 1 :]:
+        heading, _, inline = line.partition(':')
+        if _REQUIREMENTS_HEADING.match(line):
+            in_block = True
+            # "Conocimientos necesarios: React, Node.js" trae el requisito en la misma línea
+            if inline.strip() and len(heading) <= 40:
+                requirements.append(line[:MAX_REQUIREMENT_CHARS])
+            continue
+        if in_block and _is_heading(line):
+            in_block = False
+        if in_block:
+            requirements.append(_BULLET.sub('', line)[:MAX_REQUIREMENT_CHARS])
+        if len(requirements) >= MAX_REQUIREMENTS:
+            break
+
+    # Palabras clave: los términos más repetidos de los requisitos (o de toda la oferta)
+    source = '\n'.join(requirements) or clean_text
+    counts = Counter(token for token in tokenize(source) if len(token) > 1 and not token.isdigit())
+    keywords = [token for token, _ in counts.most_common(MAX_KEYWORDS)]
+
+    return {'title': title, 'required_skills': requirements, 'keywords': keywords}
+
+
+def get_or_analyze_posting(clean_text):
+    """
+    Devuelve (JobPosting, created). Si la oferta ya existía solo cuesta un SELECT y un
+    UPDATE atómico del contador; el análisis se hace una única vez por oferta.
+    """
+    posting, created = JobPosting.objects.get_or_create(
+        content_hash=posting_hash(clean_text), defaults=analyze_posting(clean_text)
+    )
+    if not created:
+        JobPosting.objects.filter(pk=posting.pk).update(
+            use_count=F('use_count') + 1, last_used_at=timezone.now()
+        )
+    return posting, created
+
+
+def format_summary(posting):
+    """
+    Resumen compacto que sustituye al texto completo en el prompt: puesto, requisitos y las
+    palabras clave que el LLM debe reflejar en el CV (las que buscan los ATS).
+    """
+    parts = [f'PUESTO: {posting.title}', 'REQUISITOS:']
+    parts.extend(f'- {requirement}' for requirement in posting.required_skills)
+    if posting.keywords:
+        parts.append(f'PALABRAS CLAVE: {", ".join(posting.keywords)}')
+    return '\n'.join(parts)
@@ -0,0 +1,140 @@
+"""
+Limpieza de la oferta de trabajo antes de mandarla al LLM.
+
+Los usuarios pegan páginas enteras de portales de empleo (banners de cookies, botones,
+cabeceras repetidas, "empleos similares"...) o texto copiado de PDFs con palabras
+partidas. Todo eso cuesta tokens y no aporta nada al CV.
+Los patrones se compilan una sola vez al importar el módulo.
+"""
+
+import re
+import unicodedata
+
+from django.conf import settings
+
+# Caracteres de control (salvo \n y \t) e invisibles: zero-width, BOM, separadores unicode
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\u200b-\u200f\u2028\u2029\ufeff]')
+_NEWLINES = re.compile(r'\r\n?')
+_SPACES = re.compile(r'[ \t\xa0\u2000-\u200a\u202f\u205f\u3000]+')
+# Palabra partida a final de línea (PDF): "desa-\nrrollo" -> "desarrollo"
+_HYPHENATION = re.compile(r'([^\W\d_])[-\xad][ \t]*\n[ \t]*([a-záéíóúüñàèìòùç])')
+_SOFT_HYPHEN = '\xad'
+
+# Líneas sueltas que son interfaz del portal, no contenido de la oferta
+_BOILERPLATE_LINE = re.compile(
+    r"""^(
+        .*\bcookies?\b.*\b(acept|accept|pol[ií]tica|policy|configur|settings|preferenc).*
+      | .*\b(acept|accept|rechaz|reject)\w*\s+(todas|all)\b.*
+      | (inscr[ií]b\w*|aplicar|postularme|solicitar|apply|easy\s+apply)(\s+(ahora|now|ya))?
+      | (compartir|share)(\s+(esta\s+)?(oferta|empleo|this\s+job|job))?
+      | (guardar|save)(\s+(oferta|empleo|job))?
+      | (denunciar|reportar|report)\s+(esta\s+)?(oferta|empleo|this\s+job|job)
+      | (iniciar\s+sesi[oó]n|reg[ií]strate|sign\s+in|sign\s+up|log\s+in|join\s+now)
+      | (ver|mostrar|show|see)\s+(m[aá]s|menos|more|less)
+      | (publicad[ao]|posted|reposted)\s+(hace|\d|on|about|a\b).*
+      | \d+\s*(\+\s*)?(candidat[oa]s|inscritos|solicitudes|applicants|applications)\b.*
+      | (volver|back)(\s+(al?|to)\b.*)?
+      | skip\s+to\s+(main\s+)?content
+      | (p[aá]gina|page)\s+\d+(\s+(de|of)\s+\d+)?
+      | men[uú] | inicio | home | buscar | search | mi\s+red | my\s+network | empleos | jobs
+      | mensajes | messaging | notificaciones | notifications | find\s+jobs | company\s+reviews
+    )$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Cabeceras de bloques que no sirven para adaptar el CV: se quitan con su contenido
+_BOILERPLATE_HEADING = re.compile(
+    r"""^(
+        beneficios | benefits | perks | qu[eé]\s+(te\s+)?ofrecemos | what\s+we\s+offer
+      | sobre\s+(nosotros|la\s+empresa) | about\s+(us|the\s+company)
+      | se\s+ofrece | igualdad\s+de\s+oportunidades
+      | equal\s+(employment\s+)?opportunit\w*(\s+employer)?
+      | aviso\s+de\s+privacidad | privacy\s+notice
+    )\s*:?$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# A partir de aquí solo viene la lista de otras ofertas del portal: cortamos el resto
+_TRAILING_SECTION = re.compile(
+    r"""^(
+        empleos\s+similares | ofertas\s+similares | otras\s+ofertas | similar\s+jobs
+      | people\s+also\s+viewed | more\s+jobs\s+(from|like)\b.* | m[aá]s\s+ofertas\b.*
+    )\s*:?$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Aproximación habitual para texto europeo: ~4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _is_heading(line):
+    return line.endswith(':') and len(line) <= 60
+
+
+def _strip_boilerplate(lines):
+    kept = []
+    seen = set()
+    skipping_block = False
+    for line in lines:
+        if not line:
+            skipping_block = False
+            if kept and kept[-1]:
+                kept.append('')
+            continue
+        if _TRAILING_SECTION.match(line):
+            break
+        if _BOILERPLATE_HEADING.match(line):
+            skipping_block = True
+            continue
+        if skipping_block:
+            if not _is_heading(line):
+                continue
+            skipping_block = False
+        if _BOILERPLATE_LINE.match(line):
+            continue
+
+        # Cabeceras/pies repetidos (cada página del PDF, menús...): solo la primera vez
+        key = line.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(line)
+
+    while kept and not kept[-1]:
+        kept.pop()
+    return kept
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Recorta al presupuesto de tokens sin partir líneas (o palabras, si no hay salto)."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind('\n', 0, max_chars + 1)
+    if cut <= 0:
+        cut = text.rfind(' ', 0, max_chars + 1)
+    return text[: cut if cut > 0 else max_chars].rstrip()
+
+
+def clean_job_description(text, max_tokens=None):
+    """
+    Pipeline completo: unicode NFC, caracteres de control, guiones de PDF, espacios,
+    boilerplate del portal, líneas repetidas y límite de tokens.
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', text)
+    text = _NEWLINES.sub('\n', text)
+    text = _CONTROL_CHARS.sub('', text)
+    text = _HYPHENATION.sub(r'\1\2', text).replace(_SOFT_HYPHEN, '')
+
+    lines = [_SPACES.sub(' ', line).strip() for line in text.split('\n')]
+    text = '\n'.join(_strip_boilerplate(lines))
+
+    if max_tokens is None:
+        max_tokens = settings.JOB_DESCRIPTION_MAX_TOKENS
+    return truncate_to_tokens(text, max_tokens)
@@ -0,0 +1,191 @@
+"""
+Métricas del generador de CVs en el formato de texto de Prometheus (versión 0.0.4).
+
+Todo sale de los contadores en memoria de cada módulo, así que son métricas POR PROCESO:
+con varios workers de gunicorn cada scrape ve las del worker que lo atiende. Prometheus
+lo resuelve con la etiqueta instance si cada worker se expone por separado; si no, los
+contadores saltan entre scrapes (rate() lo tolera mal).
+"""
+
+from . import metrics, pdf, resilience, result_cache, snapshot, throttling
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PREFIX = 'hirepilot_cv'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def _header(self, name, kind, help_text):
+        self.lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        self.lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+    def counter(self, name, help_text, samples, label_names=()):
+        """samples: {tupla de etiquetas: valor} (o un número si no hay etiquetas)."""
+        self._metric(name, 'counter', help_text, samples, label_names)
+
+    def gauge(self, name, help_text, samples, label_names=()):
+        self._metric(name, 'gauge', help_text, samples, label_names)
+
+    def _metric(self, name, kind, help_text, samples, label_names):
+        self._header(name, kind, help_text)
+        if not isinstance(samples, dict):
+            samples = {(): samples}
+        for values, value in sorted(samples.items()):
+            self.lines.append(f'{PREFIX}_{name}{_labels(label_names, values)} {_number(value)}')
+
+    def histogram(self, name, help_text, histograms, label_names=()):
+        self._header(name, 'histogram', help_text)
+        for values, histogram in sorted(histograms.items()):
+            for upper, count in histogram['buckets']:
+                labels = _labels(label_names, values, [('le', _number(upper))])
+                self.lines.append(f'{PREFIX}_{name}_bucket{labels} {count}')
+            labels = _labels(label_names, values, [('le', '+Inf')])
+            self.lines.append(f'{PREFIX}_{name}_bucket{labels} {histogram["count"]}')
+            labels = _labels(label_names, values)
+            self.lines.append(f'{PREFIX}_{name}_sum{labels} {_number(histogram["sum"])}')
+            self.lines.append(f'{PREFIX}_{name}_count{labels} {histogram["count"]}')
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def render():
+    """Texto completo del endpoint de métricas."""
+    out = _Writer()
+
+    generations = metrics.generation_stats()
+    out.counter(
+        'generations_total',
+        'Generaciones de CV por resultado y modelo.',
+        generations['generations'],
+        ('outcome', 'model'),
+    )
+    out.counter(
+        'fallbacks_total',
+        'Generaciones que usaron el motor local, por motivo.',
+        generations['fallbacks'],
+        ('reason',),
+    )
+    out.histogram(
+        'generation_seconds',
+        'Duración total de la generación.',
+        generations['generation_seconds'],
+        ('outcome',),
+    )
+    out.histogram(
+        'stage_seconds',
+        'Tiempo de cada etapa de la generación.',
+        generations['stage_seconds'],
+        ('stage',),
+    )
+    out.histogram(
+        'generation_tokens',
+        'Tokens del LLM por generación.',
+        generations['generation_tokens'],
+        ('kind', 'model'),
+    )
+
+    usage = metrics.llm_usage_stats()
+    out.counter('llm_requests_total', 'Respuestas del LLM con usage.', usage['calls'])
+    out.counter(
+        'llm_tokens_total',
+        'Tokens del LLM acumulados.',
+        {
+            ('prompt',): usage['prompt_tokens'],
+            ('cached_prompt',): usage['cached_prompt_tokens'],
+            ('completion',): usage['completion_tokens'],
+        },
+        ('kind',),
+    )
+    out.counter(
+        'generation_cost_usd_total',
+        'Coste del LLM en USD según AI_MODEL_PRICES (sin los modelos sin precio).',
+        metrics.llm_cost_stats(),
+        ('model',),
+    )
+
+    calls = resilience.llm_call_stats()
+    out.counter(
+        'llm_calls_total',
+        'Resultados de las llamadas al LLM (ver resilience.py).',
+        {(outcome,): calls[outcome] for outcome in metrics.LLM_CALL_OUTCOMES},
+        ('outcome',),
+    )
+    out.gauge(
+        'llm_latency_seconds',
+        'Percentiles de latencia de las últimas llamadas correctas al LLM.',
+        {
+            (str(percentile / 100),): calls[f'latency_p{percentile}_ms'] / 1000
+            for percentile in (50, 95, 99)
+            if calls[f'latency_p{percentile}_ms'] is not None
+        },
+        ('quantile',),
+    )
+    breaker = calls['breaker']
+    out.gauge(
+        'llm_breaker_open',
+        '1 si el circuit breaker del LLM no está cerrado.',
+        int(breaker['state'] != 'closed'),
+    )
+    out.counter('llm_breaker_opened_total', 'Veces que se abrió el breaker.', breaker['opened'])
+    out.counter(
+        'llm_breaker_short_circuited_total',
+        'Llamadas rechazadas con el breaker abierto.',
+        breaker['short_circuited'],
+    )
+
+    validation = metrics.validation_stats()
+    out.counter(
+        'validations_total',
+        'Respuestas del LLM validadas contra el esquema, por resultado.',
+        {(outcome,): validation[outcome] for outcome in ('valid', 'repaired', 'repair_failed')},
+        ('outcome',),
+    )
+    out.counter(
+        'invalid_sections_total',
+        'Secciones que no cumplían el esquema.',
+        {(key,): count for key, count in validation['invalid_sections'].items()},
+        ('section',),
+    )
+
+    pdf_stats = pdf.pdf_cache_stats()
+    for name, stats, help_text in (
+        ('result_cache', result_cache.result_cache_stats(), 'Caché de CVs generados.'),
+        ('snapshot_cache', snapshot.snapshot_cache_stats(), 'Caché de snapshots del perfil.'),
+        ('pdf_cache', pdf_stats, 'Caché de PDFs del CV.'),
+    ):
+        out.counter(
+            f'{name}_requests_total',
+            help_text,
+            {('hit',): stats['hits'], ('miss',): stats['misses']},
+            ('result',),
+        )
+
+    out.counter('pdf_pages_total', 'Páginas de PDF renderizadas.', pdf_stats['pages'])
+
+    out.counter(
+        'throttle_decisions_total',
+        'Decisiones de los límites por plan.',
+        {(decision,): count for decision, count in throttling.throttle_stats().items()},
+        ('decision',),
+    )
+    return out.text()
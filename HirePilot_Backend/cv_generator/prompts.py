@@ -0,0 +1,210 @@
+"""
+Plantillas del prompt, compiladas una sola vez al importar el módulo.
+
+Orden pensado para el caché de prefijos del proveedor: el bloque estático (reglas +
+esquema JSON) es idéntico byte a byte en todas las peticiones e idiomas, y lo que
+cambia va al final: idioma de salida, perfil del candidato y, por último, la oferta.
+"""
+
+import json
+import textwrap
+
+LANGUAGE_NAMES = {'es': 'Español', 'en': 'Inglés', 'fr': 'Francés'}
+DEFAULT_LANGUAGE = 'es'
+
+STATIC_SYSTEM_PROMPT = textwrap.dedent(
+    """\
+    Eres un experto reclutador de TI y especialista en redacción de CVs optimizados para ATS.
+
+    TU MISIÓN:
+    Tienes la "Base de Datos Maestra" de un candidato (toda su historia) y una "Oferta de Trabajo" específica.
+    Debes CONSTRUIR el contenido para un CV perfecto seleccionando y adaptando SOLO la información relevante.
+
+    REGLAS DE ORO (FILTRADO Y ADAPTACIÓN):
+    1. **Job Title Target:** Extrae el nombre exacto del puesto de la oferta.
+    2. **Profile Summary:** Escribe un resumen profesional potente (3-4 líneas) que conecte la experiencia del candidato con los requisitos de la oferta.
+    3. **Skills:** De la lista del candidato, SELECCIONA solo las que sean relevantes para esta oferta. Ordenalas por prioridad.
+    4. **Experiencia:** - SELECCIONA las experiencias relevantes. Si una experiencia antigua no aporta valor, descártala.
+       - REESCRIBE la descripción (`enhanced_description`) usando bullet points con verbos de acción.
+       - ENFATIZA logros que coincidan con las palabras clave de la oferta.
+    5. **Proyectos:** Elige solo aquellos proyectos que demuestren habilidades requeridas en la oferta.
+    6. **Educación y Certificados:** Prioriza los relacionados con el puesto o tecnología.
+    7. **Idiomas:** Inclúyelos estandarizados.
+    8. **IDIOMA DE SALIDA (MUY IMPORTANTE):** TODO el contenido generado (job_title_target, profile_summary, enhanced_description, títulos, etc.) DEBE estar redactado estrictamente en el IDIOMA DE SALIDA indicado al final. Si la Base de Datos Maestra está en un idioma distinto, tradúcelo fielmente sin inventar información que no exista originalmente.
+
+    SALIDA JSON OBLIGATORIA:
+    Debes responder EXCLUSIVAMENTE con un JSON válido siguiendo esta estructura exacta:
+    {
+        "job_title_target": "String",
+        "profile_summary": "String",
+        "selected_skills": ["Skill 1", "Skill 2", "Skill 3"],
+        "selected_languages": [{"name": "String", "level": "String"}],
+        "experience": [
+            {
+                "company": "String (Igual al input)",
+                "position": "String (Igual al input)",
+                "date_range": "YYYY-MM-DD - YYYY-MM-DD",
+                "location": "String",
+                "enhanced_description": [
+                    "Bullet point de acción potente alineado a la oferta",
+                    "Logro cuantificable (si es posible)"
+                ]
+            }
+        ],
+        "education": [
+            {
+                "institution": "String",
+                "degree": "String",
+                "date_range": "String"
+            }
+        ],
+        "projects": [
+            {
+                "title": "String",
+                "role": "String",
+                "description": "Breve descripción adaptada a la oferta",
+                "tech_stack": ["Tech1", "Tech2"],
+                "url": "Aquí debes mantener el link original del proyecto (si existe) sin inventar nuevos links"
+            }
+        ],
+        "certificates": [
+            {"name": "String", "issuer": "String", "date": "String"}
+        ]
+    }
+    """
+)
+
+# Un system prompt por idioma: prefijo estático común + la única línea variable al final
+SYSTEM_PROMPTS = {
+    code: f'{STATIC_SYSTEM_PROMPT}\nIDIOMA DE SALIDA: {name}\n'
+    for code, name in LANGUAGE_NAMES.items()
+}
+
+
+def system_prompt(language):
+    return SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS[DEFAULT_LANGUAGE])
+
+
+def user_prompt(safe_user_data, job_description):
+    """
+    Perfil primero (estable entre ofertas del mismo usuario) y la oferta al final.
+    JSON compacto: mismas claves en el mismo orden, menos tokens.
+    """
+    profile = json.dumps(safe_user_data, default=str, ensure_ascii=False, separators=(',', ':'))
+    return f'PERFIL CANDIDATO:\n{profile}\n\nOFERTA DE TRABAJO:\n{job_description}\n'
+
+
+def build_messages(language, safe_user_data, job_description):
+    return [
+        {'role': 'system', 'content': system_prompt(language)},
+        {'role': 'user', 'content': user_prompt(safe_user_data, job_description)},
+    ]
+
+
+# --- MODO POR SECCIONES (CV_SECTION_PARALLEL) ---
+# Cada grupo es una llamada independiente: qué claves del JSON genera y qué parte del perfil
+# necesita. El system prompt es el mismo que el de la llamada única (prefijo cacheable).
+
+OUTPUT_KEYS = (
+    'job_title_target',
+    'profile_summary',
+    'selected_skills',
+    'selected_languages',
+    'experience',
+    'education',
+    'projects',
+    'certificates',
+)
+
+SECTION_GROUPS = {
+    'summary': {
+        'output': ('job_title_target', 'profile_summary', 'selected_skills', 'selected_languages'),
+        'profile': ('skills', 'languages', 'experience'),
+    },
+    'experience': {
+        'output': ('experience',),
+        'profile': ('experience',),
+    },
+    'projects': {
+        'output': ('education', 'projects', 'certificates'),
+        'profile': ('education', 'projects', 'certificates'),
+    },
+}
+
+
+def build_section_messages(language, group, safe_user_data, job_description):
+    return build_keys_messages(
+        language, SECTION_GROUPS[group]['output'], safe_user_data, job_description
+    )
+
+
+def profile_keys_for(output_keys):
+    """Partes del perfil que necesitan los grupos que generan alguna de `output_keys`."""
+    profile_keys = []
+    for section in SECTION_GROUPS.values():
+        if set(section['output']) & set(output_keys):
+            profile_keys.extend(key for key in section['profile'] if key not in profile_keys)
+    return profile_keys
+
+
+def build_keys_messages(language, output_keys, safe_user_data, job_description):
+    """
+    Prompt que pide solo algunas claves del JSON: un grupo del modo por secciones o las
+    secciones que hay que reparar porque no cumplían el esquema (ver schema.py).
+    """
+    profile = {
+        key: safe_user_data[key] for key in profile_keys_for(output_keys) if key in safe_user_data
+    }
+    keys = ', '.join(output_keys)
+    return [
+        {'role': 'system', 'content': system_prompt(language)},
+        {
+            'role': 'user',
+            'content': f'{user_prompt(profile, job_description)}\n'
+            f'GENERA SOLO estas claves del JSON: {keys}. No incluyas ninguna otra.\n',
+        },
+    ]
+
+
+def merge_sections(parts):
+    """Une las respuestas (grupo, json) en un único CV con las claves en el orden del esquema."""
+    merged = {}
+    for group, part in parts:
+        for key in SECTION_GROUPS[group]['output']:
+            if key in part:
+                merged[key] = part[key]
+    return {key: merged[key] for key in OUTPUT_KEYS if key in merged}
+
+
+# --- TRADUCCIÓN DE UN CV YA GENERADO (variantes en otros idiomas) ---
+
+STATIC_TRANSLATION_PROMPT = textwrap.dedent(
+    """\
+    Eres un traductor profesional especializado en CVs del sector TI.
+
+    Recibirás un JSON con los textos libres de un CV ya adaptado a una oferta.
+    Tradúcelo al IDIOMA DE SALIDA indicado al final respetando estas reglas:
+    1. Mantén EXACTAMENTE la misma estructura: mismas claves, mismo número de elementos
+       en cada lista y en el mismo orden.
+    2. No añadas, elimines ni inventes información.
+    3. No traduzcas nombres de tecnologías, empresas, productos ni certificaciones.
+
+    Responde EXCLUSIVAMENTE con el JSON traducido.
+    """
+)
+
+TRANSLATION_PROMPTS = {
+    code: f'{STATIC_TRANSLATION_PROMPT}\nIDIOMA DE SALIDA: {name}\n'
+    for code, name in LANGUAGE_NAMES.items()
+}
+
+
+def build_translation_messages(language, free_text):
+    content = json.dumps(free_text, ensure_ascii=False, separators=(',', ':'))
+    return [
+        {
+            'role': 'system',
+            'content': TRANSLATION_PROMPTS.get(language, TRANSLATION_PROMPTS[DEFAULT_LANGUAGE]),
+        },
+        {'role': 'user', 'content': content},
+    ]
@@ -0,0 +1,154 @@
+"""
+Ranking local (BM25) del perfil maestro frente a la oferta.
+
+Antes de construir el prompt nos quedamos solo con las experiencias, proyectos,
+logros y skills más relevantes, para no mandar al LLM toda la historia del candidato.
+Es determinista y no usa red: una pasada de tokenización y conteo por sección.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+
+# Palabras con símbolos típicos de tecnologías: c++, c#, node.js, ci/cd
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*(?:[./][a-z0-9+#]+)*')
+
+STOPWORDS = frozenset(
+    """
+    a al ante con de del desde el en entre es esta este la las lo los o para por que se sin
+    su sus un una y the and or of to in on for with at by from an as is are be this that we
+    you your our will
+    """.split()
+)
+
+# Parámetros estándar de BM25
+K1 = 1.5
+B = 0.75
+
+
+def _strip_accents(text):
+    if text.isascii():
+        return text
+    return ''.join(
+        char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char)
+    )
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [
+        token for token in _TOKEN_RE.findall(_strip_accents(text.lower())) if token not in STOPWORDS
+    ]
+
+
+def bm25_scores(documents, query_terms):
+    """
+    Puntuación BM25 de cada documento (lista de tokens) para los términos de la oferta.
+    El IDF se calcula dentro de la propia sección del perfil.
+    """
+    if not documents:
+        return []
+    total = len(documents)
+    average_length = sum(len(doc) for doc in documents) / total or 1
+
+    frequencies = [Counter(doc) for doc in documents]
+    document_frequency = Counter()
+    for counts in frequencies:
+        document_frequency.update(query_terms.intersection(counts))
+
+    idf = {
+        term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+        for term, df in document_frequency.items()
+    }
+
+    scores = []
+    for doc, counts in zip(documents, frequencies):
+        norm = K1 * (1 - B + B * len(doc) / average_length)
+        scores.append(
+            sum(
+                weight * counts[term] * (K1 + 1) / (counts[term] + norm)
+                for term, weight in idf.items()
+                if term in counts
+            )
+        )
+    return scores
+
+
+def top_indices(scores, limit):
+    """
+    Índices de los `limit` mejores (a igualdad de puntuación, el que iba antes:
+    el perfil ya viene ordenado del más reciente al más antiguo).
+    """
+    ranked = sorted(range(len(scores)), key=lambda index: (-scores[index], index))
+    return ranked[:limit]
+
+
+def _experience_text(exp):
+    parts = [exp.get('role'), exp.get('company'), exp.get('description')]
+    for achievement in exp.get('achievements', []):
+        parts.append(achievement.get('description'))
+        parts.extend(achievement.get('keywords') or [])
+    return ' '.join(part for part in parts if part)
+
+
+def _project_text(project):
+    parts = [project.get('title'), project.get('role'), project.get('description')]
+    parts.extend(project.get('technologies') or [])
+    return ' '.join(part for part in parts if part)
+
+
+def _select(items, scores, limit):
+    """Los `limit` más relevantes, manteniendo su orden original (cronológico)."""
+    if len(items) <= limit:
+        return items
+    keep = set(top_indices(scores, limit))
+    return [item for index, item in enumerate(items) if index in keep]
+
+
+def _prune_achievements(exp, query_terms, limit):
+    achievements = exp.get('achievements') or []
+    if len(achievements) <= limit:
+        return exp
+    documents = [
+        tokenize(' '.join([a.get('description') or ''] + (a.get('keywords') or [])))
+        for a in achievements
+    ]
+    scores = bm25_scores(documents, query_terms)
+    return {**exp, 'achievements': [achievements[i] for i in top_indices(scores, limit)]}
+
+
+def prune_profile(user_data, job_description):
+    """
+    Devuelve una copia del perfil recortada a los elementos más relevantes para la oferta
+    según los límites CV_RANKING_*. Las secciones dentro del límite no se tocan.
+    """
+    if not settings.CV_RANKING_ENABLED:
+        return user_data
+
+    query_terms = set(tokenize(job_description))
+    pruned = dict(user_data)
+
+    experiences = user_data.get('experience') or []
+    if experiences:
+        scores = bm25_scores([tokenize(_experience_text(e)) for e in experiences], query_terms)
+        pruned['experience'] = [
+            _prune_achievements(exp, query_terms, settings.CV_RANKING_MAX_ACHIEVEMENTS)
+            for exp in _select(experiences, scores, settings.CV_RANKING_MAX_EXPERIENCES)
+        ]
+
+    projects = user_data.get('projects') or []
+    if len(projects) > settings.CV_RANKING_MAX_PROJECTS:
+        scores = bm25_scores([tokenize(_project_text(p)) for p in projects], query_terms)
+        pruned['projects'] = _select(projects, scores, settings.CV_RANKING_MAX_PROJECTS)
+
+    skills = user_data.get('skills') or []
+    if skills:
+        # Las skills sí se reordenan por relevancia: el prompt pide ordenarlas por prioridad
+        scores = bm25_scores([tokenize(skill) for skill in skills], query_terms)
+        pruned['skills'] = [skills[i] for i in top_indices(scores, settings.CV_RANKING_MAX_SKILLS)]
+
+    return pruned
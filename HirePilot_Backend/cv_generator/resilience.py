@@ -0,0 +1,290 @@
+"""
+Protecciones de la llamada al LLM.
+
+- Deadline: presupuesto de tiempo de punta a punta por petición (AI_REQUEST_DEADLINE).
+  Cada intento recibe como timeout lo que queda, y los reintentos solo ocurren si queda tiempo.
+- Circuit breaker: tras AI_BREAKER_FAILURE_THRESHOLD llamadas seguidas fallidas o lentas
+  se abre y, mientras está abierto, no llamamos al proveedor: el servicio sirve el CV de
+  respaldo al instante. Pasados AI_BREAKER_RESET_TIMEOUT segundos deja pasar una prueba.
+- Hedging (AI_HEDGE_ENABLED): si un intento tarda más que el p95 reciente, lanzamos un
+  segundo en paralelo y nos quedamos con el primero que responda.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import openai
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Errores del proveedor que tiene sentido reintentar (red, 429, 5xx)
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+RETRY_BACKOFF = 0.5  # Segundos, se duplica en cada reintento
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded('Se agotó el tiempo para generar el CV')
+
+
+class CircuitBreaker:
+    """closed -> open (fallos seguidos) -> half_open (tras el cooldown) -> closed u open."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {'opened': 0, 'short_circuited': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN:
+            if time.monotonic() - self._opened_at >= settings.AI_BREAKER_RESET_TIMEOUT:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Lanza CircuitOpenError si no debemos llamar al proveedor ahora."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True  # Solo una llamada de prueba a la vez
+                return
+            self._stats['short_circuited'] += 1
+        raise CircuitOpenError('Proveedor de IA no disponible (circuit breaker abierto)')
+
+    def record(self, success, duration):
+        """Una llamada lenta (> AI_BREAKER_SLOW_CALL) cuenta como fallo aunque responda."""
+        failed = not success or duration > settings.AI_BREAKER_SLOW_CALL
+        with self._lock:
+            self._trial_in_flight = False
+            if not failed:
+                self._state = self.CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._failures >= settings.AI_BREAKER_FAILURE_THRESHOLD
+                and self._state == self.CLOSED
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._stats['opened'] += 1
+                logger.warning(f'Circuit breaker del LLM abierto tras {self._failures} fallos')
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                **self._stats,
+            }
+
+
+# Un breaker por proceso, compartido por hilos y event loops
+breaker = CircuitBreaker()
+
+
+def hedge_delay():
+    """Segundos tras los que lanzar el intento de respaldo (None: sin hedging)."""
+    if not settings.AI_HEDGE_ENABLED:
+        return None
+    p95 = metrics.llm_latency_percentile(95, min_samples=settings.AI_HEDGE_MIN_SAMPLES)
+    if p95 is None:
+        return None
+    return max(p95, settings.AI_HEDGE_MIN_DELAY)
+
+
+def _retry_pause(attempt, deadline):
+    """Pausa antes del reintento `attempt` o None si ya no quedan reintentos ni tiempo."""
+    pause = RETRY_BACKOFF * 2**attempt
+    if attempt >= settings.AI_MAX_RETRIES or deadline.remaining() <= pause:
+        return None
+    return pause
+
+
+def _start(deadline):
+    deadline.check()
+    breaker.before_call()
+    return time.monotonic()
+
+
+def _finish(start, error=None):
+    duration = time.monotonic() - start
+    breaker.record(error is None, duration)
+    if error is None:
+        metrics.record_llm_call('ok', duration)
+    elif isinstance(error, (DeadlineExceeded, openai.APITimeoutError)):
+        metrics.record_llm_call('deadline_exceeded', duration)
+    else:
+        metrics.record_llm_call('failed', duration)
+
+
+def _first_success(futures, deadline):
+    pending = set(futures)
+    error = None
+    while pending:
+        done, pending = wait(
+            pending, timeout=max(deadline.remaining(), 0), return_when=FIRST_COMPLETED
+        )
+        if not done:
+            raise DeadlineExceeded('Se agotó el tiempo para generar el CV')
+        for future in done:
+            if future.exception() is None:
+                if future is not futures[0]:
+                    metrics.record_llm_call('hedge_won')
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def _hedged(attempt, deadline, delay):
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='llm-hedge')
+    try:
+        futures = [pool.submit(attempt)]
+        done, _ = wait(futures, timeout=min(delay, max(deadline.remaining(), 0)))
+        if not done and deadline.remaining() > 0:
+            futures.append(pool.submit(attempt))
+            metrics.record_llm_call('hedged')
+        return _first_success(futures, deadline)
+    finally:
+        # El intento perdedor no se puede cancelar: termina solo (como mucho, en su timeout)
+        pool.shutdown(wait=False)
+
+
+def call_llm(create, deadline, **kwargs):
+    """
+    Llama a create(**kwargs) (ej: client.chat.completions.create) con deadline, breaker,
+    reintentos dentro del presupuesto y hedging opcional.
+    """
+    start = _start(deadline)
+
+    def attempt():
+        deadline.check()
+        return create(**kwargs, timeout=deadline.remaining())
+
+    delay = None if kwargs.get('stream') else hedge_delay()
+    retry = 0
+    try:
+        while True:
+            try:
+                result = attempt() if delay is None else _hedged(attempt, deadline, delay)
+                break
+            except RETRYABLE_ERRORS:
+                pause = _retry_pause(retry, deadline)
+                if pause is None:
+                    raise
+                retry += 1
+                metrics.record_llm_call('retried')
+                time.sleep(pause)
+    except Exception as e:
+        _finish(start, e)
+        raise
+    _finish(start)
+    return result
+
+
+async def _ahedged(attempt, deadline, delay):
+    tasks = [asyncio.ensure_future(attempt())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=min(delay, max(deadline.remaining(), 0)))
+        if not done and deadline.remaining() > 0:
+            tasks.append(asyncio.ensure_future(attempt()))
+            metrics.record_llm_call('hedged')
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(deadline.remaining(), 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise DeadlineExceeded('Se agotó el tiempo para generar el CV')
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        metrics.record_llm_call('hedge_won')
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # En async el perdedor sí se cancela (y su conexión vuelve al pool)
+        for task in tasks:
+            task.cancel()
+
+
+async def acall_llm(create, deadline, **kwargs):
+    """Versión async de call_llm (AsyncOpenAI)."""
+    start = _start(deadline)
+
+    async def attempt():
+        deadline.check()
+        return await create(**kwargs, timeout=deadline.remaining())
+
+    delay = hedge_delay()
+    retry = 0
+    try:
+        while True:
+            try:
+                if delay is None:
+                    result = await attempt()
+                else:
+                    result = await _ahedged(attempt, deadline, delay)
+                break
+            except RETRYABLE_ERRORS:
+                pause = _retry_pause(retry, deadline)
+                if pause is None:
+                    raise
+                retry += 1
+                metrics.record_llm_call('retried')
+                await asyncio.sleep(pause)
+    except Exception as e:
+        _finish(start, e)
+        raise
+    _finish(start)
+    return result
+
+
+def llm_call_stats():
+    """Contadores y tiempos de las llamadas al LLM más el estado del breaker."""
+    return {**metrics.llm_call_stats(), 'breaker': breaker.stats()}
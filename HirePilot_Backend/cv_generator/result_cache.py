@@ -0,0 +1,58 @@
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Cabecera con la que la vista indica si el CV salió del caché
+CACHE_HEADER = 'X-CV-Cache'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _cache():
+    return caches[settings.CV_RESULT_CACHE]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def make_key(job_description, user_data, language, model):
+    """
+    Clave estable (direccionada por contenido) de un CV generado.
+    Cualquier cambio en la oferta, el perfil, el idioma o el modelo produce otra clave.
+    """
+    payload = json.dumps(
+        {
+            'job_description': job_description,
+            'profile': user_data,
+            'language': language,
+            'model': model,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+        separators=(',', ':'),
+    )
+    return 'cv:result:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_result(key):
+    result = _cache().get(key)
+    _count('hits' if result is not None else 'misses')
+    return result
+
+
+def set_result(key, result):
+    # El TTL lo define TIMEOUT en la configuración del alias
+    _cache().set(key, result)
+
+
+def result_cache_stats():
+    """Contadores de aciertos/fallos del caché de CVs generados (por proceso)."""
+    with _stats_lock:
+        return dict(_stats)
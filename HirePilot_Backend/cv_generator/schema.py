@@ -0,0 +1,157 @@
+"""
+Esquema del JSON que genera la IA (el mismo que describe prompts.STATIC_SYSTEM_PROMPT).
+
+Cada sección de primer nivel se valida por separado: si la IA se salta una clave o devuelve
+una lista donde iba un texto, solo esa sección se vuelve a pedir (ver
+CVGeneratorService._validated) en vez de tirar toda la respuesta.
+
+Las diferencias inofensivas se normalizan en vez de darse por malas: null como texto vacío,
+números como texto, un texto con saltos de línea donde iba una lista de bullets y claves
+de más (se ignoran).
+"""
+
+from functools import lru_cache
+from typing import Annotated
+
+from pydantic import (
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    StringConstraints,
+    TypeAdapter,
+    ValidationError,
+    create_model,
+)
+
+from .prompts import OUTPUT_KEYS
+
+BULLET_CHARS = '-•*· '
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _text_list(value):
+    if isinstance(value, str):
+        lines = (line.strip().lstrip(BULLET_CHARS).strip() for line in value.splitlines())
+        return [line for line in lines if line]
+    return value
+
+
+Text = Annotated[str, BeforeValidator(_text), StringConstraints(strip_whitespace=True)]
+# Campos que no pueden quedar vacíos (un título de puesto vacío no es un CV)
+RequiredText = Annotated[Text, StringConstraints(min_length=1)]
+TextList = Annotated[list[Text], BeforeValidator(_text_list)]
+
+
+class _Item(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+
+class Language(_Item):
+    name: RequiredText
+    level: Text = ''
+
+
+class Experience(_Item):
+    company: RequiredText
+    position: Text = ''
+    date_range: Text = ''
+    location: Text = ''
+    enhanced_description: TextList = []
+
+
+class Education(_Item):
+    institution: RequiredText
+    degree: Text = ''
+    date_range: Text = ''
+
+
+class Project(_Item):
+    title: RequiredText
+    role: Text = ''
+    description: Text = ''
+    tech_stack: TextList = []
+    url: Text = ''
+
+
+class Certificate(_Item):
+    name: RequiredText
+    issuer: Text = ''
+    date: Text = ''
+
+
+SECTION_TYPES = {
+    'job_title_target': RequiredText,
+    'profile_summary': RequiredText,
+    'selected_skills': list[RequiredText],
+    'selected_languages': list[Language],
+    'experience': list[Experience],
+    'education': list[Education],
+    'projects': list[Project],
+    'certificates': list[Certificate],
+}
+
+_ADAPTERS = {key: TypeAdapter(section_type) for key, section_type in SECTION_TYPES.items()}
+
+
+def validate_sections(data, keys=OUTPUT_KEYS):
+    """
+    (secciones válidas ya normalizadas, claves que faltan o no cumplen el esquema).
+    Solo mira las claves pedidas (`keys`); el resto de `data` se descarta.
+    """
+    if not isinstance(data, dict):
+        return {}, list(keys)
+    valid, invalid = {}, []
+    for key in keys:
+        if key not in data:
+            invalid.append(key)
+            continue
+        adapter = _ADAPTERS[key]
+        try:
+            valid[key] = adapter.dump_python(adapter.validate_python(data[key]), mode='json')
+        except ValidationError:
+            invalid.append(key)
+    return valid, invalid
+
+
+# --- SALIDA ESTRUCTURADA (AI_STRUCTURED_OUTPUT) ---
+# Modo estricto de json_schema: todas las propiedades obligatorias, sin propiedades extra
+# y sin las palabras clave que los proveedores no aceptan (default, minLength, title...).
+
+_STRICT_KEYWORDS = ('type', 'properties', 'required', 'items', 'additionalProperties', '$ref')
+
+
+def _strict(node):
+    if isinstance(node, list):
+        return [_strict(child) for child in node]
+    if not isinstance(node, dict):
+        return node
+    strict = {key: _strict(value) for key, value in node.items() if key in _STRICT_KEYWORDS}
+    if '$defs' in node:
+        strict['$defs'] = {name: _strict(value) for name, value in node['$defs'].items()}
+    if 'properties' in node:
+        strict['properties'] = {name: _strict(value) for name, value in node['properties'].items()}
+        strict['required'] = list(node['properties'])
+        strict['additionalProperties'] = False
+    return strict
+
+
+@lru_cache
+def json_schema(keys=OUTPUT_KEYS):
+    """JSON Schema estricto de un CV con solo las claves `keys` (en ese orden)."""
+    model = create_model('CV', **{key: (SECTION_TYPES[key], ...) for key in keys})
+    return _strict(model.model_json_schema())
+
+
+def response_format(keys=OUTPUT_KEYS):
+    """response_format de la API de chat para pedir exactamente el esquema de `keys`."""
+    return {
+        'type': 'json_schema',
+        'json_schema': {'name': 'cv', 'strict': True, 'schema': json_schema(tuple(keys))},
+    }
@@ -1,6 +1,121 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from . import history, pdf, throttling
+from .models import CVGeneration, GenerationJob
+from .prompts import LANGUAGE_NAMES
+from .services import format_cv_response
+
 
 class CVGenerationRequestSerializer(serializers.Serializer):
-    job_description = serializers.CharField(required=True, allow_blank=False)
+    job_description = serializers.CharField(
+        required=True, allow_blank=False, max_length=settings.JOB_DESCRIPTION_MAX_CHARS
+    )
     language = serializers.CharField(required=False, default='es')
+    # Varios idiomas a la vez: la respuesta trae una variante por idioma (ver multilang.py)
+    languages = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(LANGUAGE_NAMES)),
+        required=False,
+        allow_empty=False,
+        max_length=len(LANGUAGE_NAMES),
+    )
+    # 'async' devuelve 202 con un job_id en lugar de esperar a la IA
+    mode = serializers.ChoiceField(choices=['sync', 'async'], required=False, default='sync')
+
+    def validate_languages(self, value):
+        return list(dict.fromkeys(value))  # Sin duplicados, respetando el orden
+
+    def validate(self, attrs):
+        if attrs.get('languages') and attrs['mode'] == 'async':
+            raise serializers.ValidationError(
+                {'languages': 'La generación en varios idiomas solo está disponible en modo sync.'}
+            )
+        return attrs
+
+
+class CVStreamRequestSerializer(CVGenerationRequestSerializer):
+    """El streaming genera un solo idioma y en la propia petición: languages y async no aplican."""
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        errors = {}
+        if attrs.get('languages'):
+            errors['languages'] = 'El streaming genera un solo idioma: usa language.'
+        if attrs['mode'] == 'async':
+            errors['mode'] = 'El streaming solo está disponible en modo sync.'
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class CVBatchItemSerializer(serializers.Serializer):
+    job_description = serializers.CharField(
+        required=True, allow_blank=False, max_length=settings.JOB_DESCRIPTION_MAX_CHARS
+    )
+    language = serializers.CharField(required=False, default='es')
+
+
+class CVBatchGenerationRequestSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=CVBatchItemSerializer(),
+        allow_empty=False,
+        max_length=settings.CV_BATCH_MAX_ITEMS,
+    )
+
+    def validate_items(self, value):
+        # Cada elemento consume una ficha: más que la ráfaga del plan no pasaría nunca
+        request = self.context.get('request')
+        limit = throttling.max_cost(request.user) if request else None
+        if limit is not None and len(value) > limit:
+            raise serializers.ValidationError(
+                f'Tu plan permite como mucho {limit} ofertas por lote (pides {len(value)}).'
+            )
+        return value
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationJob
+        fields = [
+            'id',
+            'status',
+            'language',
+            'result',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'expires_at',
+        ]
+        read_only_fields = fields
+
+
+class CVHistoryEntrySerializer(serializers.ModelSerializer):
+    """Una entrada del listado del historial (sin el contenido del CV)."""
+
+    class Meta:
+        model = CVGeneration
+        fields = ['id', 'job_title', 'language', 'outcome', 'model', 'created_at']
+        read_only_fields = fields
+
+
+class CVHistoryDetailSerializer(CVHistoryEntrySerializer):
+    """La entrada con el CV completo, en el mismo formato que la respuesta de generación."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data.update(format_cv_response(history.load(instance), instance.pk))
+        return data
+
+
+class CVPdfOptionsSerializer(serializers.Serializer):
+    """Plantilla e idioma del PDF (los mismos que CVDocument.jsx en el frontend)."""
+
+    template = serializers.ChoiceField(
+        choices=list(pdf.TEMPLATES), required=False, default='modern'
+    )
+    language = serializers.ChoiceField(choices=list(LANGUAGE_NAMES), required=False)
+
+
+class CVPdfRequestSerializer(CVPdfOptionsSerializer):
+    structured_cv_data = serializers.DictField(allow_empty=False)
@@ -1,299 +1,647 @@
+import asyncio
 import json
 import logging
-import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from openai import OpenAI
-
-from accounts.models import (
-    Certificate,
-    Education,
-    Language,
-    Project,
-    Skill,
-    UserProfile,
-    WorkExperience,
+
+from . import (
+    history,
+    metrics,
+    postings,
+    prompts,
+    ranking,
+    resilience,
+    result_cache,
+    schema,
+    singleflight,
+    tailoring,
+    throttling,
+    tracing,
 )
+from .client import acreate_completion, get_openai_client
+from .json_stream import IncrementalJSONParser
+from .preprocessing import clean_job_description
+from .snapshot import get_profile_snapshot
+from .translation import check_translation, extract_free_text, merge_translation
 
 logger = logging.getLogger(__name__)
 
 
+def format_cv_response(cv_data, history_id=None):
+    """
+    Respuesta que recibe el frontend (igual en modo síncrono, asíncrono y streaming).
+    history_id: entrada del historial con la que volver a descargar este CV (o None).
+    """
+    return {
+        'job_title_extracted': cv_data.get('job_title_target', 'N/A'),
+        'structured_cv_data': cv_data,
+        'history_id': history_id,
+    }
+
+
 class CVGeneratorService:
-    def __init__(self, user, job_description, language):
+    def __init__(self, user, job_description, language, user_data=None):
         self.user = user
         self.job_description = job_description
         self.language = language
+        # Snapshot ya cargado (ej: generación por lotes, un solo snapshot para todo el lote)
+        self._user_data = user_data
+        # True si generate_cv devolvió un resultado del caché de CVs
+        self.cache_hit = False
+        # True si esperamos el resultado de otra petición idéntica en vuelo (singleflight.py)
+        self.coalesced = False
+        # True si el contenido es de la IA (el caché solo guarda respuestas de la IA)
+        self.from_ai = False
+        # True si alguna sección de la IA no cumplía el esquema ni tras repararla y salió
+        # del motor local: el CV se devuelve pero no se cachea
+        self.partial = False
+        # Presupuesto de tiempo de toda la petición: al agotarse, CV de respaldo
+        self.deadline = resilience.Deadline(settings.AI_REQUEST_DEADLINE)
+        # Tiempos por etapa, tokens y motivo del respaldo (ver tracing.py)
+        self.trace = tracing.GenerationTrace(settings.AI_MODEL)
+        # Entrada del historial (history.py) del CV devuelto
+        self.history_id = None
+        # Texto de la oferta del prompt (completo o resumen de postings.py): se decide una vez
+        # por generación y lo reutilizan los prompts de reparación y de secciones
+        self._job_text = None
 
-        self.client = OpenAI(
-            base_url='https://openrouter.ai/api/v1', api_key=settings.OPENAI_API_KEY
-        )
+    @property
+    def cache_status(self):
+        """Valor de la cabecera CACHE_HEADER: HIT, COALESCED (esperó a otra petición) o MISS."""
+        if self.cache_hit:
+            return 'HIT'
+        return 'COALESCED' if self.coalesced else 'MISS'
+
+    @property
+    def outcome(self):
+        """Resultado de la generación para las métricas: cache, coalesced, ai, partial o local."""
+        if self.cache_hit:
+            return 'cache'
+        if self.coalesced:
+            return 'coalesced'
+        if not self.from_ai:
+            return 'local'
+        return 'partial' if self.partial else 'ai'
+
+    @contextmanager
+    def _traced(self):
+        """Cierra la traza al terminar la generación (error si se escapa una excepción)."""
+        outcome = 'error'
+        try:
+            yield
+            outcome = self.outcome
+        except GeneratorExit:
+            # El cliente cerró el stream antes del final
+            outcome = 'cancelled'
+            raise
+        finally:
+            self.trace.finish(outcome)
+
+    def _remember(self, result):
+        """Guarda el CV devuelto en el historial del usuario y lo devuelve tal cual."""
+        if self.user is not None and settings.CV_HISTORY_ENABLED:
+            with self.trace.stage('history'):
+                self.history_id = history.record(
+                    self.user, result, self.language, self.outcome, settings.AI_MODEL
+                )
+        return result
+
+    @property
+    def client(self):
+        # Cliente compartido por todo el proceso (pool de conexiones reutilizado)
+        return get_openai_client()
 
     def generate_cv(self):
         """
         Orquestador principal.
         Combina la inteligencia de la IA con la veracidad de la Base de Datos.
         """
-        # 1. Recopilar datos maestros (Master Data) de la DB
-        user_data = self._gather_user_data()
+        with self._traced():
+            # 1. Recopilar datos maestros (Master Data) de la DB
+            user_data = self._gather_user_data()
+
+            # 2. ¿Ya generamos este mismo CV (misma oferta, perfil, idioma y modelo)?
+            cache_key = self._result_cache_key(user_data)
+            cached_result = result_cache.get_result(cache_key)
+            if cached_result is not None:
+                self.cache_hit = self.from_ai = True
+                return self._remember(cached_result)
+
+            # 3. Si otra petición idéntica ya está generando este CV, esperamos su resultado
+            result = self._single_flight(
+                cache_key, lambda: self._generate_fresh(user_data, cache_key)
+            )
+            return self._remember(result)
 
-        # 2. Obtener contenido generado (Ya sea Mock o AI)
+    def _generate_fresh(self, user_data, cache_key):
+        # 4. Obtener contenido generado (IA o, si no está disponible, el motor local)
         ai_generated_content = {}
 
         if not settings.OPENAI_API_KEY:
-            logger.warning('OPENAI_API_KEY no encontrada. Usando modo MOCK.')
-            ai_generated_content = self._mock_ai_logic(user_data)
+            logger.warning('OPENAI_API_KEY no encontrada. Usando el motor local.')
+            self.trace.fell_back('no_api_key')
+            ai_generated_content = self._local_cv(user_data)
         else:
             try:
                 ai_generated_content = self._call_openai(user_data)
+                self.from_ai = True
             except Exception as e:
                 error_msg = str(e).encode('ascii', 'replace').decode('ascii')
                 logger.error(f'Error llamando a OpenAI: {error_msg}')
-                ai_generated_content = self._mock_ai_logic(user_data)
+                self.trace.fell_back(tracing.fallback_reason(e))
+                ai_generated_content = self._local_cv(user_data)
 
-        # 3. MERGE FINAL (ESTRATEGIA HÍBRIDA)
-        # Inyectamos los datos personales VERIFICADOS de la DB en la respuesta final.
-        # Esto asegura que el nombre, email y teléfono nunca sean alucinados por la IA.
-        final_response = {
-            'profile': user_data['personal_info'],  # Datos estáticos (DB)
-            **ai_generated_content,  # Datos dinámicos (IA)
-        }
+        # 5. MERGE FINAL (ESTRATEGIA HÍBRIDA)
+        final_response = self._merge(user_data, ai_generated_content)
+
+        # Solo cacheamos respuestas reales (y completas) de la IA, nunca el fallback
+        if self.from_ai and not self.partial:
+            result_cache.set_result(cache_key, final_response)
 
         return final_response
 
-    def _call_openai(self, user_data):
+    async def agenerate_cv(self):
         """
-        Envía los datos a OpenAI y espera un JSON estructurado.
+        Versión async de generate_cv (ruta ASGI).
+        La espera a la IA no bloquea ningún hilo: un solo worker puede tener
+        cientos de generaciones en vuelo.
         """
+        with self._traced():
+            # La DB y el caché siguen siendo síncronos: un único salto a hilo para todo el
+            # snapshot (9 consultas) en vez de uno por consulta con el ORM async.
+            user_data = self._user_data or await sync_to_async(self._gather_user_data)()
 
-        # 1. Limpieza de caracteres "peligrosos" o no imprimibles
-        clean_job_description = self._sanitize_text(self.job_description)
-        language_map = {'es': 'Español', 'en': 'Inglés', 'fr': 'Francés'}
-        target_language = language_map.get(self.language)
-        system_prompt = (
-            f"""
-        Eres un experto reclutador de TI y especialista en redacción de CVs optimizados para ATS.
-        
-        TU MISIÓN: 
-        Tienes la "Base de Datos Maestra" de un candidato (toda su historia) y una "Oferta de Trabajo" específica.
-        Debes CONSTRUIR el contenido para un CV perfecto seleccionando y adaptando SOLO la información relevante.
-
-        REGLAS DE ORO (FILTRADO Y ADAPTACIÓN):
-        1. **Job Title Target:** Extrae el nombre exacto del puesto de la oferta.
-        2. **Profile Summary:** Escribe un resumen profesional potente (3-4 líneas) que conecte la experiencia del candidato con los requisitos de la oferta.
-        3. **Skills:** De la lista del candidato, SELECCIONA solo las que sean relevantes para esta oferta. Ordenalas por prioridad.
-        4. **Experiencia:** - SELECCIONA las experiencias relevantes. Si una experiencia antigua no aporta valor, descártala.
-           - REESCRIBE la descripción (`enhanced_description`) usando bullet points con verbos de acción.
-           - ENFATIZA logros que coincidan con las palabras clave de la oferta.
-        5. **Proyectos:** Elige solo aquellos proyectos que demuestren habilidades requeridas en la oferta.
-        6. **Educación y Certificados:** Prioriza los relacionados con el puesto o tecnología.
-        7. **Idiomas:** Inclúyelos estandarizados.
-        8. **IDIOMA DE SALIDA (MUY IMPORTANTE):** TODO el contenido generado (job_title_target, profile_summary, enhanced_description, títulos, etc.) DEBE estar redactado estrictamente en {target_language}. Si la Base de Datos Maestra está en un idioma distinto, tradúcelo fielmente a {target_language} sin inventar información que no exista originalmente.
-        
-        SALIDA JSON OBLIGATORIA:
-        Debes responder EXCLUSIVAMENTE con un JSON válido siguiendo esta estructura exacta:
+            cache_key = self._result_cache_key(user_data)
+            cached_result = await sync_to_async(result_cache.get_result)(cache_key)
+            if cached_result is not None:
+                self.cache_hit = self.from_ai = True
+                return await sync_to_async(self._remember)(cached_result)
+
+            result = await self._asingle_flight(
+                cache_key, lambda: self._agenerate_fresh(user_data, cache_key)
+            )
+            return await sync_to_async(self._remember)(result)
+
+    async def _agenerate_fresh(self, user_data, cache_key):
+        ai_generated_content = {}
+
+        if not settings.OPENAI_API_KEY:
+            logger.warning('OPENAI_API_KEY no encontrada. Usando el motor local.')
+            self.trace.fell_back('no_api_key')
+            ai_generated_content = self._local_cv(user_data)
+        else:
+            try:
+                ai_generated_content = await self._acall_openai(user_data)
+                self.from_ai = True
+            except Exception as e:
+                error_msg = str(e).encode('ascii', 'replace').decode('ascii')
+                logger.error(f'Error llamando a OpenAI: {error_msg}')
+                self.trace.fell_back(tracing.fallback_reason(e))
+                ai_generated_content = self._local_cv(user_data)
+
+        final_response = self._merge(user_data, ai_generated_content)
+
+        if self.from_ai and not self.partial:
+            await sync_to_async(result_cache.set_result)(cache_key, final_response)
+
+        return final_response
+
+    def _single_flight(self, cache_key, generate):
         """
-            + """
-        {
-            "job_title_target": "String",
-            "profile_summary": "String",
-            "selected_skills": ["Skill 1", "Skill 2", "Skill 3"],
-            "selected_languages": [{"name": "String", "level": "String"}],
-            "experience": [
-                {
-                    "company": "String (Igual al input)",
-                    "position": "String (Igual al input)",
-                    "date_range": "YYYY-MM-DD - YYYY-MM-DD",
-                    "location": "String",
-                    "enhanced_description": [
-                        "Bullet point de acción potente alineado a la oferta",
-                        "Logro cuantificable (si es posible)"
-                    ]
-                }
-            ],
-            "education": [
-                {
-                    "institution": "String",
-                    "degree": "String",
-                    "date_range": "String"
-                }
-            ],
-            "projects": [
-                {
-                    "title": "String",
-                    "role": "String",
-                    "description": "Breve descripción adaptada a la oferta",
-                    "tech_stack": ["Tech1", "Tech2"],
-                    "url": "Aquí debes mantener el link original del proyecto (si existe) sin inventar nuevos links"
-                }
-            ],
-            "certificates": [
-                {"name": "String", "issuer": "String", "date": "String"}
-            ]
-        }
+        Llama a generate() salvo que otra petición idéntica (este u otro worker) ya esté
+        generando el mismo CV: entonces esperamos a que publique su resultado.
         """
-        )
+        if not self._coalescing_enabled():
+            return generate()
+        while True:
+            if singleflight.acquire(cache_key):
+                break
+            shared = singleflight.wait_for(cache_key, self.deadline)
+            if shared is not None:
+                return self._use_shared(shared)
+            if self.deadline.remaining() <= 0:
+                # Sin tiempo para esperar más: generate() sirve el respaldo al instante
+                return generate()
+            # El líder falló sin publicar nada: lo intentamos nosotros
 
-        # Filtramos datos sensibles antes de enviarlos a la IA (Privacidad)
-        # La IA no necesita saber el teléfono o email para optimizar el texto
-        safe_user_data = {k: v for k, v in user_data.items() if k != 'personal_info'}
+        try:
+            result = generate()
+        except Exception:
+            singleflight.release(cache_key)
+            raise
+        singleflight.publish(cache_key, result, self.from_ai)
+        return result
+
+    async def _asingle_flight(self, cache_key, generate):
+        """Versión async de _single_flight (generate devuelve una corrutina)."""
+        if not self._coalescing_enabled():
+            return await generate()
+        while True:
+            if await sync_to_async(singleflight.acquire)(cache_key):
+                break
+            shared = await singleflight.await_for(cache_key, self.deadline)
+            if shared is not None:
+                return self._use_shared(shared)
+            if self.deadline.remaining() <= 0:
+                return await generate()
+
+        try:
+            result = await generate()
+        except Exception:
+            await sync_to_async(singleflight.release)(cache_key)
+            raise
+        await sync_to_async(singleflight.publish)(cache_key, result, self.from_ai)
+        return result
 
-        user_message = f"""
-        PERFIL CANDIDATO:
-        {json.dumps(safe_user_data, default=str, ensure_ascii=False)}
+    def _coalescing_enabled(self):
+        # Sin API key el motor local tarda milisegundos: no hay nada que coalescer
+        return settings.CV_SINGLE_FLIGHT_ENABLED and bool(settings.OPENAI_API_KEY)
 
-        OFERTA DE TRABAJO:
-        {clean_job_description}
+    def _use_shared(self, shared):
+        self.coalesced = True
+        self.from_ai = shared['from_ai']
+        return shared['result']
+
+    async def atranslate_cv(self, source_cv):
+        """
+        El CV ya generado en otro idioma (source_cv), traducido al idioma de este servicio.
+        Solo viajan los textos libres: es mucho más barato que otra generación completa.
         """
+        with self._traced():
+            user_data = self._user_data or await sync_to_async(self._gather_user_data)()
 
-        completion = self.client.chat.completions.create(
-            model=settings.AI_MODEL,
-            # Headers requeridos/recomendados por OpenRouter para rankings
-            extra_headers={
-                'HTTP-Referer': 'http://localhost:8000',  # Pon la URL de tu app (o localhost en dev)
-                'X-Title': 'HirePilot',  # El nombre de tu App
-            },
-            response_format={'type': 'json_object'},  # FUERZA LA SALIDA JSON
-            messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_message},
-            ],
-            temperature=0.5,
+            cache_key = self._result_cache_key(user_data)
+            cached_result = await sync_to_async(result_cache.get_result)(cache_key)
+            if cached_result is not None:
+                self.cache_hit = self.from_ai = True
+                return await sync_to_async(self._remember)(cached_result)
+
+            free_text = extract_free_text(source_cv)
+            messages = prompts.build_translation_messages(self.language, free_text)
+            translated = await self._acomplete(messages)
+            # Sin todos los textos traducidos no se guarda nada: quien llama genera el CV completo
+            check_translation(free_text, translated)
+
+            final_response = merge_translation(source_cv, translated)
+            self.from_ai = True
+            await sync_to_async(result_cache.set_result)(cache_key, final_response)
+            return await sync_to_async(self._remember)(final_response)
+
+    def stream_cv(self):
+        """
+        Variante en streaming de generate_cv.
+        Produce eventos (nombre, datos): un 'item' por cada elemento de las secciones lista,
+        un 'section' por cada sección del CV en cuanto la IA la termina de escribir
+        y un 'done' final con la respuesta completa.
+        """
+        with self._traced():
+            user_data = self._gather_user_data()
+            # Los datos personales salen de la DB: los mandamos antes de llamar a la IA
+            yield 'section', {'key': 'profile', 'value': user_data['personal_info']}
+
+            cache_key = self._result_cache_key(user_data)
+            cached_result = result_cache.get_result(cache_key)
+            if cached_result is not None:
+                self.cache_hit = self.from_ai = True
+                for key, value in cached_result.items():
+                    if key != 'profile':
+                        yield 'section', {'key': key, 'value': value}
+                self._remember(cached_result)
+                yield 'done', format_cv_response(cached_result, self.history_id)
+                return
+
+            ai_generated_content = None
+            stream_error = None
+            if not settings.OPENAI_API_KEY:
+                logger.warning('OPENAI_API_KEY no encontrada. Usando el motor local.')
+                self.trace.fell_back('no_api_key')
+            else:
+                parser = IncrementalJSONParser()
+                try:
+                    for delta in self._stream_openai(user_data):
+                        with self.trace.stage('parse'):
+                            events = parser.feed(delta)
+                        for event, key, value in events:
+                            yield event, {'key': key, 'value': value}
+                    if not parser.done:
+                        raise ValueError('La respuesta de la IA terminó con un JSON incompleto')
+                except Exception as e:
+                    stream_error = e
+                    error_msg = str(e).encode('ascii', 'replace').decode('ascii')
+                    logger.error(f'Error en streaming con OpenAI: {error_msg}')
+                # Las secciones que llegaron completas valen: solo se repara lo que falta
+                if parser.done or parser.result:
+                    streamed = parser.result
+                    ai_generated_content = self._validated(user_data, streamed)
+                    # Reenviamos las secciones reparadas o normalizadas
+                    for key, value in ai_generated_content.items():
+                        if streamed.get(key) != value:
+                            yield 'section', {'key': key, 'value': value}
+
+            self.from_ai = ai_generated_content is not None
+            if not self.from_ai:
+                if stream_error is not None:
+                    self.trace.fell_back(tracing.fallback_reason(stream_error))
+                # El fallback reemplaza cualquier sección parcial que ya se haya enviado
+                ai_generated_content = self._local_cv(user_data)
+                for key, value in ai_generated_content.items():
+                    yield 'section', {'key': key, 'value': value}
+
+            final_response = self._merge(user_data, ai_generated_content)
+            if self.from_ai and not self.partial:
+                result_cache.set_result(cache_key, final_response)
+            self._remember(final_response)
+            yield 'done', format_cv_response(final_response, self.history_id)
+
+    def _result_cache_key(self, user_data):
+        return result_cache.make_key(
+            self._sanitize_text(self.job_description),
+            user_data,
+            self.language,
+            settings.AI_MODEL,
         )
 
-        # Parseamos la respuesta de texto a Diccionario Python
-        content = completion.choices[0].message.content
-        return json.loads(content)
+    def _merge(self, user_data, ai_generated_content):
+        # Inyectamos los datos personales VERIFICADOS de la DB en la respuesta final.
+        # Esto asegura que el nombre, email y teléfono nunca sean alucinados por la IA.
+        with self.trace.stage('merge'):
+            return {
+                'profile': user_data['personal_info'],  # Datos estáticos (DB)
+                **ai_generated_content,  # Datos dinámicos (IA)
+            }
 
-    def _sanitize_text(self, text):
+    def _call_openai(self, user_data):
         """
-        Normaliza el texto para eliminar caracteres de control extraños
-        que a veces vienen de copiar/pegar de PDFs, pero MANTIENE los acentos.
+        Envía los datos a OpenAI y espera un JSON estructurado.
         """
-        if not text:
-            return ''
-        # Normaliza unicode (NFC es estándar para web)
-        return unicodedata.normalize('NFC', text)
+        if settings.CV_SECTION_PARALLEL:
+            content = self._call_openai_sections(user_data)
+        else:
+            content = self._complete(self._build_messages(user_data), prompts.OUTPUT_KEYS)
+        return self._validated(user_data, content)
 
-    def _gather_user_data(self):
+    def _complete(self, messages, keys=None):
         """
-        Extrae datos y convierte fechas a String (YYYY-MM-DD)
+        Una llamada al LLM y su respuesta como diccionario.
+        keys: claves del CV que se piden (para la salida estructurada); None si no es un CV.
         """
-        profile = UserProfile.objects.filter(user=self.user).first()
-
-        # --- EXPERIENCIA ---
-        experiences = []
-        for exp in WorkExperience.objects.filter(user=self.user):
-            experiences.append(
-                {
-                    'company': exp.company,
-                    'role': exp.role,
-                    'start_date': exp.start_date.strftime('%Y-%m-%d') if exp.start_date else None,
-                    'end_date': exp.end_date.strftime('%Y-%m-%d') if exp.end_date else None,
-                    'current_job': exp.current_job,
-                    'description': exp.description,
-                    'location': exp.location,
-                }
+        # Deadline, circuit breaker, reintentos y hedging: ver resilience.py
+        with self.trace.stage('llm'):
+            completion = resilience.call_llm(
+                self.client.chat.completions.create,
+                self.deadline,
+                **self._request_kwargs(messages, keys),
             )
+        self._record_usage(completion.usage)
+
+        # Parseamos la respuesta de texto a Diccionario Python
+        return self._parse_content(completion.choices[0].message.content)
+
+    def _parse_content(self, content):
+        """
+        json.loads tolerante: si la respuesta llegó cortada (límite de tokens), nos quedamos
+        con las secciones que sí se completaron y la validación pide el resto.
+        """
+        with self.trace.stage('parse'):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                parser = IncrementalJSONParser()
+                parser.feed(content)
+                if not parser.result:
+                    raise
+        logger.warning(f'JSON de la IA incompleto; secciones completas: {list(parser.result)}')
+        return parser.result
+
+    def _validated(self, user_data, content):
+        """
+        Valida la respuesta contra el esquema (schema.py). Las secciones que faltan o no lo
+        cumplen se vuelven a pedir, todas en una sola llamada; si siguen mal, salen del
+        motor local y el CV queda marcado como parcial.
+        """
+        with self.trace.stage('validate'):
+            valid, invalid = schema.validate_sections(content)
+        if not invalid:
+            metrics.record_validation('valid')
+            return valid
+        logger.warning(f'Secciones de la IA fuera del esquema: {invalid}. Reparando.')
+        try:
+            repair = self._complete(self._repair_messages(user_data, invalid), invalid)
+            with self.trace.stage('validate'):
+                repaired, still_invalid = schema.validate_sections(repair, invalid)
+        except Exception as e:
+            error_msg = str(e).encode('ascii', 'replace').decode('ascii')
+            logger.error(f'Error reparando secciones con OpenAI: {error_msg}')
+            repaired, still_invalid = {}, invalid
+        return self._complete_sections(user_data, invalid, {**valid, **repaired}, still_invalid)
+
+    async def _avalidated(self, user_data, content):
+        """Versión async de _validated."""
+        with self.trace.stage('validate'):
+            valid, invalid = schema.validate_sections(content)
+        if not invalid:
+            metrics.record_validation('valid')
+            return valid
+        logger.warning(f'Secciones de la IA fuera del esquema: {invalid}. Reparando.')
+        try:
+            messages = await sync_to_async(self._repair_messages)(user_data, invalid)
+            repair = await self._acomplete(messages, invalid)
+            with self.trace.stage('validate'):
+                repaired, still_invalid = schema.validate_sections(repair, invalid)
+        except Exception as e:
+            error_msg = str(e).encode('ascii', 'replace').decode('ascii')
+            logger.error(f'Error reparando secciones con OpenAI: {error_msg}')
+            repaired, still_invalid = {}, invalid
+        return self._complete_sections(user_data, invalid, {**valid, **repaired}, still_invalid)
 
-        # --- EDUCACIÓN ---
-        educations = []
-        for edu in Education.objects.filter(user=self.user):
-            educations.append(
-                {
-                    'institution': edu.institution,
-                    'degree': edu.degree,
-                    'field_of_study': edu.field_of_study,
-                    'start_date': edu.start_date.strftime('%Y-%m-%d') if edu.start_date else None,
-                    'end_date': edu.end_date.strftime('%Y-%m-%d') if edu.end_date else None,
-                    'current': edu.current,
-                }
+    def _complete_sections(self, user_data, invalid, sections, still_invalid):
+        """Rellena con el motor local lo que no se pudo reparar y deja el orden del esquema."""
+        if still_invalid:
+            logger.warning(f'Secciones sin reparar, del motor local: {still_invalid}')
+            metrics.record_validation('repair_failed', invalid)
+            self.trace.fell_back('repair_failed')
+            self.partial = True
+            local = self._local_cv(user_data)
+            sections.update({key: local[key] for key in still_invalid})
+        else:
+            metrics.record_validation('repaired', invalid)
+        return {key: sections[key] for key in prompts.OUTPUT_KEYS if key in sections}
+
+    def _call_openai_sections(self, user_data):
+        """
+        Modo por secciones: una llamada más pequeña por grupo de secciones, todas a la vez.
+        La latencia pasa a ser la de la sección más lenta y no la suma de todas.
+        """
+        requests = self._section_messages(user_data)
+        keys = [prompts.SECTION_GROUPS[group]['output'] for group in requests]
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            parts = pool.map(self._complete, requests.values(), keys)
+            return prompts.merge_sections(zip(requests, parts))
+
+    async def _acall_openai(self, user_data):
+        # El prompt consulta la DB (ofertas ya analizadas): un salto a hilo
+        if settings.CV_SECTION_PARALLEL:
+            requests = await sync_to_async(self._section_messages)(user_data)
+            parts = await asyncio.gather(
+                *(
+                    self._acomplete(messages, prompts.SECTION_GROUPS[group]['output'])
+                    for group, messages in requests.items()
+                )
             )
+            content = prompts.merge_sections(zip(requests, parts))
+        else:
+            messages = await sync_to_async(self._build_messages)(user_data)
+            content = await self._acomplete(messages, prompts.OUTPUT_KEYS)
+        return await self._avalidated(user_data, content)
 
-        # --- PROYECTOS ---
-        projects = []
-        for proj in Project.objects.filter(user=self.user):
-            tech_stack = [skill.name for skill in proj.skills.all()]
-            projects.append(
-                {
-                    'title': proj.title,
-                    'role': proj.role,
-                    'description': proj.description,
-                    'technologies': tech_stack,
-                    'link': proj.project_url or proj.resource_url or '',
-                }
+    async def _acomplete(self, messages, keys=None):
+        with self.trace.stage('llm'):
+            completion = await resilience.acall_llm(
+                acreate_completion,
+                self.deadline,
+                **self._request_kwargs(messages, keys),
             )
+        await sync_to_async(self._record_usage)(completion.usage)
+        return self._parse_content(completion.choices[0].message.content)
 
-        # --- SKILLS ---
-        skills = list(Skill.objects.filter(user=self.user).values_list('name', flat=True))
-
-        # --- IDIOMAS (Nuevo) ---
-        languages = []
-        for lang in Language.objects.filter(user=self.user):
-            languages.append(
-                {
-                    'name': lang.language,
-                    'proficiency': lang.level or '',
-                    'certificate_by': lang.certificate or '',
-                }
+    def _stream_openai(self, user_data):
+        """
+        Igual que _call_openai pero en modo streaming: va devolviendo
+        los fragmentos de texto según llegan.
+        """
+        kwargs = self._completion_kwargs(user_data)
+        with self.trace.stage('llm'):
+            stream = resilience.call_llm(
+                self.client.chat.completions.create,
+                self.deadline,
+                **kwargs,
+                stream=True,
+                # El último fragmento trae el usage (tokens y tokens cacheados)
+                stream_options={'include_usage': True},
             )
+        with stream:
+            chunks = iter(stream)
+            while True:
+                # Solo cuenta como espera al LLM el tiempo hasta cada fragmento
+                with self.trace.stage('llm'):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                # El timeout de lectura es por fragmento: el deadline total lo vigilamos aquí
+                self.deadline.check()
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, 'usage', None):
+                    self._record_usage(chunk.usage)
 
-        # --- CERTIFICADOS (Nuevo) ---
-        certificates = []
-        if 'Certificate' in globals():
-            for cert in Certificate.objects.filter(user=self.user):
-                certificates.append(
-                    {
-                        'name': cert.name,
-                        'issuer': cert.issuing_organization,
-                        'date': cert.issue_date.strftime('%Y-%m-%d') if cert.issue_date else None,
-                        'description': cert.description or '',
-                    }
-                )
+    def _record_usage(self, usage):
+        metrics.record_llm_usage(usage, settings.AI_MODEL)
+        self.trace.add_usage(usage)
+        # Cuenta para la cuota diaria de tokens del usuario
+        throttling.record_token_usage(self.user, usage)
 
+    def _completion_kwargs(self, user_data):
+        return self._request_kwargs(self._build_messages(user_data), prompts.OUTPUT_KEYS)
+
+    def _request_kwargs(self, messages, keys=None):
+        if keys and settings.AI_STRUCTURED_OUTPUT:
+            # Salida estructurada: el proveedor solo puede devolver JSON que cumple el esquema
+            response_format = schema.response_format(keys)
+        else:
+            response_format = {'type': 'json_object'}  # FUERZA LA SALIDA JSON
         return {
-            'personal_info': {
-                'firstName': self.user.first_name,
-                'lastName': self.user.last_name,
-                'profession': profile.headline if profile else '',
-                'email': self.user.email,
-                'phone': profile.phone if profile else '',
-                'linkedin': profile.linkedin_url if profile else '',
-                'website': profile.personal_website if profile else '',
+            'model': settings.AI_MODEL,
+            # Headers requeridos/recomendados por OpenRouter para rankings
+            'extra_headers': {
+                'HTTP-Referer': 'http://localhost:8000',  # Pon la URL de tu app (o localhost en dev)
+                'X-Title': 'HirePilot',  # El nombre de tu App
             },
-            'experience': experiences,
-            'education': educations,
-            'skills': skills,
-            'projects': projects,
-            'languages': languages,
-            'certificates': certificates,
+            'response_format': response_format,
+            'messages': messages,
+            'temperature': 0.5,
         }
 
-    def _mock_ai_logic(self, user_data):
-        # MANTENEMOS ESTO COMO RESPALDO (FALLBACK)
-        selected_skills = user_data['skills'][:5] if user_data['skills'] else []
-
-        processed_experience = []
-        for exp in user_data['experience']:
-            processed_experience.append(
-                {
-                    'company': exp['company'],
-                    'position': exp['role'],
-                    'date_range': f'{exp["start_date"]} - ...',
-                    'location': exp['location'],
-                    'enhanced_description': [
-                        f'Gestión experta en {exp["company"]} (Mock Generated).',
-                        'Logro destacado relacionado con la oferta.',
-                    ],
-                }
-            )
+    def _build_messages(self, user_data, job_text=None):
+        """
+        Construye el prompt (sistema + usuario) a partir de los datos maestros.
+        job_text sustituye al texto de la oferta que iría al prompt (sin pasar por la DB).
+        """
+        # Las plantillas están precompiladas por idioma (ver prompts.py)
+        with self.trace.stage('prompt'):
+            return prompts.build_messages(self.language, *self._prompt_inputs(user_data, job_text))
 
-        return {
-            'job_title_target': 'Puesto Objetivo (Mock)',
-            'profile_summary': 'Resumen generado automáticamente por el sistema de respaldo.',
-            'selected_skills': selected_skills,
-            'selected_languages': user_data.get('languages', []),
-            'experience': processed_experience,
-            'education': user_data['education'],
-            'projects': user_data['projects'],
-            'certificates': user_data.get('certificates', []),
-        }
+    def _repair_messages(self, user_data, keys):
+        """Prompt que vuelve a pedir solo las claves `keys` (las que no cumplían el esquema)."""
+        with self.trace.stage('prompt'):
+            return prompts.build_keys_messages(self.language, keys, *self._prompt_inputs(user_data))
+
+    def _section_messages(self, user_data):
+        """Un prompt por grupo de secciones (ver prompts.SECTION_GROUPS)."""
+        with self.trace.stage('prompt'):
+            safe_user_data, job_text = self._prompt_inputs(user_data)
+            return {
+                group: prompts.build_section_messages(
+                    self.language, group, safe_user_data, job_text
+                )
+                for group in prompts.SECTION_GROUPS
+            }
+
+    def _prompt_inputs(self, user_data, job_text=None):
+        """Perfil (sin datos personales y recortado) y oferta tal y como van al prompt."""
+
+        # 1. Limpieza de caracteres "peligrosos" o no imprimibles
+        clean_job_description = self._sanitize_text(self.job_description)
+
+        # Filtramos datos sensibles antes de enviarlos a la IA (Privacidad)
+        # La IA no necesita saber el teléfono o email para optimizar el texto
+        safe_user_data = {k: v for k, v in user_data.items() if k != 'personal_info'}
+
+        # Solo mandamos lo más relevante para la oferta (ranking local, sin red)
+        safe_user_data = ranking.prune_profile(safe_user_data, clean_job_description)
+
+        if job_text is None:
+            if self._job_text is None:
+                self._job_text = self._job_prompt_text(clean_job_description)
+            job_text = self._job_text
+        return safe_user_data, job_text
+
+    def _job_prompt_text(self, clean_job_description):
+        """
+        Texto de la oferta que va al prompt. Si otra generación ya analizó esta misma oferta,
+        mandamos su resumen de requisitos en vez del texto completo.
+        """
+        if not settings.JOB_POSTING_STORE_ENABLED:
+            return clean_job_description
+        posting, created = postings.get_or_analyze_posting(clean_job_description)
+        if created or not posting.required_skills:
+            return clean_job_description
+        summary = postings.format_summary(posting)
+        # En ofertas muy cortas el resumen no ahorra nada
+        return summary if len(summary) < len(clean_job_description) else clean_job_description
+
+    def _sanitize_text(self, text):
+        """
+        Limpia la oferta pegada por el usuario (caracteres de control, guiones de PDF,
+        boilerplate del portal, líneas repetidas...) pero MANTIENE los acentos.
+        """
+        return clean_job_description(text)
+
+    def _gather_user_data(self):
+        """
+        Extrae el perfil maestro (con fechas como String YYYY-MM-DD).
+        Sale del caché de snapshots y solo consulta la DB si el perfil cambió.
+        """
+        if self._user_data is not None:
+            return self._user_data
+        with self.trace.stage('snapshot'):
+            return get_profile_snapshot(self.user)
+
+    def _local_cv(self, user_data):
+        # RESPALDO (FALLBACK): CV adaptado en local, sin red (ver tailoring.py)
+        with self.trace.stage('local'):
+            return tailoring.tailor_cv(
+                user_data, self._sanitize_text(self.job_description), self.language
+            )
@@ -0,0 +1,92 @@
+# cv_generator/signals.py
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import (
+    Certificate,
+    Education,
+    Language,
+    Project,
+    Skill,
+    UserProfile,
+    WorkAchievement,
+    WorkExperience,
+)
+
+from .snapshot import bump_profile_version
+
+User = get_user_model()
+
+# Modelos que cuelgan directamente del usuario (campo user)
+USER_OWNED_MODELS = (
+    WorkExperience,
+    Education,
+    Project,
+    Skill,
+    Language,
+    Certificate,
+    UserProfile,
+)
+
+# Campos del usuario que entran en el snapshot (personal_info)
+USER_SNAPSHOT_FIELDS = frozenset({'first_name', 'last_name', 'email'})
+
+
+def _owner_id(instance):
+    """Devuelve el id del usuario dueño de la instancia, o None si ya no existe."""
+    if isinstance(instance, User):
+        return instance.pk
+    if isinstance(instance, WorkAchievement):
+        try:
+            return instance.work_experience.user_id
+        except ObjectDoesNotExist:
+            # La experiencia se está borrando en cascada: su propia signal invalida
+            return None
+    return instance.user_id
+
+
+def invalidate_profile_snapshot(sender, instance, **kwargs):
+    """
+    Cualquier cambio en el perfil maestro sube la versión del snapshot del usuario.
+    """
+    user_id = _owner_id(instance)
+    if user_id is not None:
+        bump_profile_version(user_id)
+
+
+@receiver(post_save, sender=User, dispatch_uid='cv_snapshot_save_User')
+def invalidate_on_user_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Cada login guarda last_login con update_fields (y el cambio de plan, plan): si el guardado
+    no toca ningún campo del snapshot no invalidamos ni él ni los CVs cacheados que dependen de él.
+    """
+    if update_fields is not None and not USER_SNAPSHOT_FIELDS.intersection(update_fields):
+        return
+    bump_profile_version(instance.pk)
+
+
+post_delete.connect(
+    invalidate_profile_snapshot, sender=User, dispatch_uid='cv_snapshot_delete_User'
+)
+
+for model in (WorkAchievement, *USER_OWNED_MODELS):
+    post_save.connect(
+        invalidate_profile_snapshot, sender=model, dispatch_uid=f'cv_snapshot_save_{model.__name__}'
+    )
+    post_delete.connect(
+        invalidate_profile_snapshot,
+        sender=model,
+        dispatch_uid=f'cv_snapshot_delete_{model.__name__}',
+    )
+
+
+@receiver(m2m_changed, sender=Project.skills.through)
+def invalidate_on_project_skills_change(sender, instance, action, **kwargs):
+    """
+    Añadir/quitar skills de un proyecto no dispara post_save.
+    instance puede ser el Project o el Skill según el lado de la relación.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_profile_version(instance.user_id)
@@ -0,0 +1,92 @@
+"""
+Coalescencia de generaciones idénticas en vuelo (single-flight).
+
+Un doble clic o un reintento del cliente mientras la primera petición sigue esperando a la
+IA producía dos llamadas iguales al LLM. Ahora la primera petición (líder) se queda un lock
+en el caché (CV_SINGLE_FLIGHT_CACHE) con la clave del CV (result_cache.make_key) y las
+demás esperan a que publique su resultado en vez de llamar otra vez.
+
+Con Redis o Memcached el lock lo ven todos los workers y nodos. El lock caduca solo si el
+líder muere, y el resultado publicado (también el CV de respaldo, que no va al caché de
+CVs) vive unos segundos: lo justo para que lo recojan las peticiones que esperaban. Una
+petición que llega después no lo reutiliza: si el líder no sacó nada de la IA, lo vuelve a
+intentar.
+"""
+
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+# Margen sobre el deadline de la petición antes de dar por muerto al líder
+LOCK_MARGIN = 5  # Segundos
+SHARED_RESULT_TTL = 10  # Segundos
+
+
+def _cache():
+    return caches[settings.CV_SINGLE_FLIGHT_CACHE]
+
+
+def _lock_key(key):
+    return f'cv:inflight:{key}'
+
+
+def _shared_key(key):
+    return f'cv:inflight-result:{key}'
+
+
+def acquire(key):
+    """True si esta petición es la líder (nadie más está generando este CV)."""
+    cache = _cache()
+    if not cache.add(_lock_key(key), 1, timeout=settings.AI_REQUEST_DEADLINE + LOCK_MARGIN):
+        return False
+    # El resultado de un líder anterior ya no vale para quien espere a este
+    cache.delete(_shared_key(key))
+    return True
+
+
+def release(key):
+    _cache().delete(_lock_key(key))
+
+
+def publish(key, result, from_ai):
+    """El líder deja su resultado a las peticiones que esperan y suelta el lock."""
+    _cache().set(_shared_key(key), {'result': result, 'from_ai': from_ai}, SHARED_RESULT_TTL)
+    release(key)
+
+
+def _poll(key):
+    """(resultado publicado o None, True si el líder sigue generando)."""
+    cache = _cache()
+    shared = cache.get(_shared_key(key))
+    if shared is not None:
+        return shared, False
+    if cache.get(_lock_key(key)) is None:
+        # Puede haber publicado justo entre las dos lecturas
+        return cache.get(_shared_key(key)), False
+    return None, True
+
+
+def wait_for(key, deadline):
+    """
+    Espera al líder. Devuelve su resultado o None si falló (lock liberado sin resultado)
+    o si se agotó el deadline de esta petición.
+    """
+    while deadline.remaining() > 0:
+        shared, running = _poll(key)
+        if not running:
+            return shared
+        time.sleep(settings.CV_SINGLE_FLIGHT_POLL_INTERVAL)
+    return None
+
+
+async def await_for(key, deadline):
+    """Versión async de wait_for (no bloquea el event loop mientras espera)."""
+    while deadline.remaining() > 0:
+        shared, running = await sync_to_async(_poll)(key)
+        if not running:
+            return shared
+        await asyncio.sleep(settings.CV_SINGLE_FLIGHT_POLL_INTERVAL)
+    return None
@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from accounts.models import (
+    Certificate,
+    Education,
+    Language,
+    Project,
+    Skill,
+    UserProfile,
+    WorkAchievement,
+    WorkExperience,
+)
+
+from .checks import is_local_memory
+
+
+def _format_date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def load_profile_snapshot(user):
+    """
+    Carga el perfil maestro completo del usuario en un número CONSTANTE de consultas,
+    sin importar cuántas experiencias, proyectos o skills tenga.
+
+    Usamos .values() para no instanciar modelos y resolvemos las relaciones
+    (logros por experiencia, skills por proyecto) en memoria.
+    """
+    # --- PERFIL ---
+    profile = (
+        UserProfile.objects.filter(user=user)
+        .values('headline', 'phone', 'linkedin_url', 'personal_website')
+        .first()
+    ) or {}
+
+    # --- SKILLS (se reutilizan para resolver el stack de cada proyecto) ---
+    skill_rows = list(Skill.objects.filter(user=user).values('id', 'name'))
+    skill_names = {row['id']: row['name'] for row in skill_rows}
+
+    # --- EXPERIENCIA + LOGROS ---
+    achievements = defaultdict(list)
+    for row in (
+        WorkAchievement.objects.filter(work_experience__user=user)
+        .order_by('id')
+        .values('work_experience_id', 'description', 'keywords')
+    ):
+        achievements[row['work_experience_id']].append(
+            {'description': row['description'], 'keywords': row['keywords'] or []}
+        )
+
+    experiences = [
+        {
+            'company': exp['company'],
+            'role': exp['role'],
+            'start_date': _format_date(exp['start_date']),
+            'end_date': _format_date(exp['end_date']),
+            'current_job': exp['current_job'],
+            'description': exp['description'],
+            'location': exp['location'],
+            'achievements': achievements.get(exp['id'], []),
+        }
+        for exp in WorkExperience.objects.filter(user=user).values(
+            'id',
+            'company',
+            'role',
+            'start_date',
+            'end_date',
+            'current_job',
+            'description',
+            'location',
+        )
+    ]
+
+    # --- EDUCACIÓN ---
+    educations = [
+        {
+            'institution': edu['institution'],
+            'degree': edu['degree'],
+            'field_of_study': edu['field_of_study'],
+            'start_date': _format_date(edu['start_date']),
+            'end_date': _format_date(edu['end_date']),
+            'current': edu['current'],
+        }
+        for edu in Education.objects.filter(user=user).values(
+            'institution', 'degree', 'field_of_study', 'start_date', 'end_date', 'current'
+        )
+    ]
+
+    # --- PROYECTOS (una sola consulta a la tabla intermedia, nada de N+1) ---
+    project_skills = defaultdict(list)
+    for project_id, skill_id in (
+        Project.skills.through.objects.filter(project__user=user)
+        .order_by('id')
+        .values_list('project_id', 'skill_id')
+    ):
+        if skill_id in skill_names:
+            project_skills[project_id].append(skill_names[skill_id])
+
+    projects = [
+        {
+            'title': proj['title'],
+            'role': proj['role'],
+            'description': proj['description'],
+            'technologies': project_skills.get(proj['id'], []),
+            'link': proj['project_url'] or proj['resource_url'] or '',
+        }
+        for proj in Project.objects.filter(user=user).values(
+            'id', 'title', 'role', 'description', 'project_url', 'resource_url'
+        )
+    ]
+
+    # --- IDIOMAS ---
+    languages = [
+        {
+            'name': lang['language'],
+            'proficiency': lang['level'] or '',
+            'certificate_by': lang['certificate'] or '',
+        }
+        for lang in Language.objects.filter(user=user).values('language', 'level', 'certificate')
+    ]
+
+    # --- CERTIFICADOS ---
+    certificates = [
+        {
+            'name': cert['name'],
+            'issuer': cert['issuing_organization'],
+            'date': _format_date(cert['issue_date']),
+            'description': cert['description'] or '',
+        }
+        for cert in Certificate.objects.filter(user=user).values(
+            'name', 'issuing_organization', 'issue_date', 'description'
+        )
+    ]
+
+    return {
+        'personal_info': {
+            'firstName': user.first_name,
+            'lastName': user.last_name,
+            'profession': profile.get('headline', ''),
+            'email': user.email,
+            'phone': profile.get('phone', ''),
+            'linkedin': profile.get('linkedin_url', ''),
+            'website': profile.get('personal_website', ''),
+        },
+        'experience': experiences,
+        'education': educations,
+        'skills': [row['name'] for row in skill_rows],
+        'projects': projects,
+        'languages': languages,
+        'certificates': certificates,
+    }
+
+
+# --- CACHÉ VERSIONADO ---
+# Cada usuario tiene un número de versión que las signals incrementan cuando cambia
+# cualquier parte de su perfil. El snapshot se guarda bajo (usuario, versión), así que
+# una versión nueva invalida el anterior sin tener que borrarlo explícitamente.
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _cache():
+    return caches[settings.PROFILE_SNAPSHOT_CACHE]
+
+
+def _ttl():
+    """
+    En LocMemCache la invalidación solo llega al proceso que guardó el perfil,
+    así que limitamos cuánto tiempo puede servir otro proceso un snapshot viejo.
+    """
+    if is_local_memory(settings.PROFILE_SNAPSHOT_CACHE):
+        return min(settings.PROFILE_SNAPSHOT_TTL, settings.PROFILE_SNAPSHOT_LOCAL_TTL)
+    return settings.PROFILE_SNAPSHOT_TTL
+
+
+def _version_key(user_id):
+    return f'cv:profile_version:{user_id}'
+
+
+def _snapshot_key(user_id, version):
+    return f'cv:profile_snapshot:{user_id}:{version}'
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_profile_version(user_id):
+    """
+    Devuelve la versión actual del perfil. Si no existe (caché vacío o expulsado)
+    arrancamos desde un valor basado en el reloj para no reutilizar versiones viejas.
+    """
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def bump_profile_version(user_id):
+    """Invalida el snapshot del usuario (lo llaman las signals)."""
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # La clave no existía: cualquier versión nueva sirve
+        cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def get_profile_snapshot(user):
+    """
+    Devuelve el snapshot del perfil desde caché y solo va a la base de datos
+    si no hay uno para la versión actual.
+    """
+    cache = _cache()
+    key = _snapshot_key(user.pk, get_profile_version(user.pk))
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        _count('hits')
+        return snapshot
+
+    _count('misses')
+    snapshot = load_profile_snapshot(user)
+    cache.set(key, snapshot, timeout=_ttl())
+    return snapshot
+
+
+def snapshot_cache_stats():
+    """Contadores de aciertos/fallos del caché de snapshots (por proceso)."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,290 @@
+"""
+Motor local de adaptación del CV (sin LLM, sin red).
+
+Es el respaldo cuando no hay IA (sin API key, proveedor caído, breaker abierto, deadline
+agotado): en vez de texto de relleno construye un CV de verdad con los datos del perfil.
+  - Puesto objetivo: la línea de la oferta que nombra el rol (ver postings.analyze_posting).
+  - Skills, experiencias y proyectos: se eligen y ordenan por coincidencia (BM25) con la oferta.
+  - Bullets: las frases y logros del propio perfil que más coinciden con la oferta,
+    primero los que tienen cifras. No se inventa nada: todo sale del perfil.
+Es determinista y tarda milisegundos incluso con perfiles grandes.
+"""
+
+import re
+from datetime import date
+
+from .postings import analyze_posting
+from .ranking import bm25_scores, tokenize, top_indices
+
+MAX_TITLE_CHARS = 80
+MAX_SKILLS = 12
+MAX_EXPERIENCES = 4
+# Experiencias que se mantienen aunque no coincidan con la oferta (un CV sin experiencia es peor)
+MIN_EXPERIENCES = 2
+MAX_BULLETS = 4
+MAX_PROJECTS = 3
+MAX_PROJECT_SENTENCES = 2
+MAX_SUMMARY_SKILLS = 5
+# Las frases con cifras ("reduje un 40%...") son logros cuantificables: pesan más
+QUANTIFIED_BONUS = 0.5
+
+# "Oferta: Backend Developer", "We're hiring: ..." -> solo el puesto
+_TITLE_PREFIX = re.compile(
+    r"""^(
+        oferta(\s+de\s+(empleo|trabajo))? | puesto | vacante | buscamos | se\s+busca
+      | job(\s+title)? | position | role | we.?re\s+hiring | hiring | poste | recherche
+    )\s*[:\-–—]?\s+""",
+    re.IGNORECASE | re.VERBOSE,
+)
+# Lo que va tras estos separadores es equipo, modalidad, ubicación...: "(remoto)", "| Madrid"
+_TITLE_SUFFIX = re.compile(r'\s+[-–—|/·]\s+|\s*\(')
+_SENTENCE_END = re.compile(r'(?<=[.!?;])\s+|\n+')
+_BULLET = re.compile(r'^[-•·*▪–]\s*')
+_DIGIT = re.compile(r'\d')
+
+PRESENT = {'es': 'Actualidad', 'en': 'Present', 'fr': 'Présent'}
+
+SUMMARY_TEMPLATES = {
+    'es': {
+        'years': '{headline} con {years} años de experiencia.',
+        'headline': '{headline}.',
+        'recent': 'Experiencia reciente como {role} en {company}.',
+        'skills': 'Competencias clave para el puesto: {skills}.',
+    },
+    'en': {
+        'years': '{headline} with {years} years of experience.',
+        'headline': '{headline}.',
+        'recent': 'Most recently {role} at {company}.',
+        'skills': 'Key skills for this role: {skills}.',
+    },
+    'fr': {
+        'years': "{headline} avec {years} ans d'expérience.",
+        'headline': '{headline}.',
+        'recent': 'Dernièrement {role} chez {company}.',
+        'skills': 'Compétences clés pour ce poste : {skills}.',
+    },
+}
+
+
+def extract_job_title(clean_text):
+    """Puesto de la oferta (postings.analyze_posting), sin prefijos ("Oferta:") ni coletillas."""
+    title = _TITLE_PREFIX.sub('', analyze_posting(clean_text)['title']).strip(' :.-')
+    # "Backend Developer - Equipo de pagos (remoto)" -> "Backend Developer"
+    title = _TITLE_SUFFIX.split(title, maxsplit=1)[0] or title
+    if len(title) > MAX_TITLE_CHARS:
+        title = title.split(',', 1)[0]
+    if len(title) > MAX_TITLE_CHARS:
+        title = title[:MAX_TITLE_CHARS].rsplit(' ', 1)[0]
+    return title
+
+
+def _sentences(text):
+    sentences = []
+    for part in _SENTENCE_END.split(text or ''):
+        part = _BULLET.sub('', part.strip()).strip()
+        if len(part) > 1:
+            sentences.append(part[0].upper() + part[1:])
+    return sentences
+
+
+def _ranked(documents, query_terms):
+    """Índices de documents (textos) de más a menos relevante (a igualdad, el orden original)."""
+    scores = bm25_scores([tokenize(document) for document in documents], query_terms)
+    return top_indices(scores, len(documents)), scores
+
+
+def _best_sentences(candidates, query_terms, limit):
+    """Las `limit` frases más alineadas con la oferta, priorizando las que tienen cifras."""
+    unique = list(dict.fromkeys(candidates))
+    scores = bm25_scores([tokenize(sentence) for sentence in unique], query_terms)
+    scores = [
+        score + (QUANTIFIED_BONUS if _DIGIT.search(sentence) else 0)
+        for score, sentence in zip(scores, unique)
+    ]
+    return [unique[index] for index in top_indices(scores, limit)]
+
+
+def _experience_document(exp):
+    parts = [exp.get('role'), exp.get('company'), exp.get('description')]
+    for achievement in exp.get('achievements') or []:
+        parts.append(achievement.get('description'))
+        parts.extend(achievement.get('keywords') or [])
+    return ' '.join(part for part in parts if part)
+
+
+def _date_range(start, end, current, language):
+    if not start:
+        return ''
+    if current:
+        end = PRESENT.get(language, PRESENT['es'])
+    return f'{start} - {end}' if end else start
+
+
+def _select_skills(skills, query_terms):
+    order, scores = _ranked(skills, query_terms)
+    return [skills[index] for index in order[:MAX_SKILLS]], [
+        skills[index] for index in order if scores[index] > 0
+    ]
+
+
+def _select_experience(experiences, query_terms, language):
+    if not experiences:
+        return []
+    order, scores = _ranked([_experience_document(e) for e in experiences], query_terms)
+    keep = {
+        index
+        for rank, index in enumerate(order[:MAX_EXPERIENCES])
+        if scores[index] > 0 or rank < MIN_EXPERIENCES
+    }
+
+    selected = []
+    # Orden cronológico (como viene del perfil): es lo que espera un reclutador
+    for index, exp in enumerate(experiences):
+        if index not in keep:
+            continue
+        candidates = [
+            sentence
+            for achievement in exp.get('achievements') or []
+            for sentence in _sentences(achievement.get('description'))
+        ] + _sentences(exp.get('description'))
+        selected.append(
+            {
+                'company': exp.get('company'),
+                'position': exp.get('role'),
+                'date_range': _date_range(
+                    exp.get('start_date'),
+                    exp.get('end_date'),
+                    # Sin fecha de fin es el trabajo actual
+                    exp.get('current_job') or not exp.get('end_date'),
+                    language,
+                ),
+                'location': exp.get('location') or '',
+                'enhanced_description': _best_sentences(candidates, query_terms, MAX_BULLETS),
+            }
+        )
+    return selected
+
+
+def _select_projects(projects, query_terms, matched_skills):
+    if not projects:
+        return []
+    documents = [
+        ' '.join(
+            part
+            for part in [
+                p.get('title'),
+                p.get('role'),
+                p.get('description'),
+                *(p.get('technologies') or []),
+            ]
+            if part
+        )
+        for p in projects
+    ]
+    order, scores = _ranked(documents, query_terms)
+    relevant = [index for index in order if scores[index] > 0] or order
+    matched = set(matched_skills)
+
+    selected = []
+    for index in relevant[:MAX_PROJECTS]:
+        project = projects[index]
+        technologies = project.get('technologies') or []
+        sentences = _sentences(project.get('description'))
+        best = set(_best_sentences(sentences, query_terms, MAX_PROJECT_SENTENCES))
+        selected.append(
+            {
+                'title': project.get('title'),
+                'role': project.get('role') or '',
+                # Frases elegidas, en el orden en que las escribió el candidato
+                'description': ' '.join(s for s in sentences if s in best),
+                # Primero las tecnologías que pide la oferta
+                'tech_stack': sorted(technologies, key=lambda tech: tech not in matched),
+                'url': project.get('link') or '',
+            }
+        )
+    return selected
+
+
+def _years_of_experience(experiences):
+    starts = [e['start_date'] for e in experiences if e.get('start_date')]
+    if not starts:
+        return 0
+    return (date.today() - date.fromisoformat(min(starts))).days // 365
+
+
+def _summary(user_data, job_title, experiences, matched_skills, skills, language):
+    templates = SUMMARY_TEMPLATES.get(language, SUMMARY_TEMPLATES['es'])
+    headline = (
+        user_data.get('personal_info', {}).get('profession')
+        or (experiences[0].get('role') if experiences else '')
+        or job_title
+    )
+    parts = []
+    if headline:
+        years = _years_of_experience(experiences)
+        if years >= 1:
+            parts.append(templates['years'].format(headline=headline, years=years))
+        else:
+            parts.append(templates['headline'].format(headline=headline))
+    if experiences and experiences[0].get('role') and experiences[0].get('company'):
+        recent = experiences[0]
+        parts.append(templates['recent'].format(role=recent['role'], company=recent['company']))
+    highlighted = (matched_skills or skills)[:MAX_SUMMARY_SKILLS]
+    if highlighted:
+        parts.append(templates['skills'].format(skills=', '.join(highlighted)))
+    return ' '.join(parts)
+
+
+def _sort_by_relevance(items, text, query_terms):
+    if not items:
+        return []
+    order, _ = _ranked([text(item) for item in items], query_terms)
+    return [items[index] for index in order]
+
+
+def tailor_cv(user_data, clean_job_description, language):
+    """
+    Contenido del CV (mismo esquema JSON que devuelve la IA) construido en local.
+    clean_job_description es la oferta ya limpia (preprocessing.clean_job_description).
+    """
+    query_terms = set(tokenize(clean_job_description))
+    job_title = extract_job_title(clean_job_description)
+    skills = user_data.get('skills') or []
+    experiences = user_data.get('experience') or []
+    selected_skills, matched_skills = _select_skills(skills, query_terms)
+
+    return {
+        'job_title_target': job_title,
+        'profile_summary': _summary(
+            user_data, job_title, experiences, matched_skills, skills, language
+        ),
+        'selected_skills': selected_skills,
+        'selected_languages': [
+            {'name': lang.get('name'), 'level': lang.get('proficiency') or ''}
+            for lang in user_data.get('languages') or []
+        ],
+        'experience': _select_experience(experiences, query_terms, language),
+        'education': [
+            {
+                'institution': edu.get('institution'),
+                'degree': ', '.join(filter(None, [edu.get('degree'), edu.get('field_of_study')])),
+                'date_range': _date_range(
+                    edu.get('start_date'), edu.get('end_date'), edu.get('current'), language
+                ),
+            }
+            for edu in _sort_by_relevance(
+                user_data.get('education') or [],
+                lambda edu: f'{edu.get("degree") or ""} {edu.get("field_of_study") or ""}',
+                query_terms,
+            )
+        ],
+        'projects': _select_projects(user_data.get('projects') or [], query_terms, matched_skills),
+        'certificates': [
+            {'name': cert.get('name'), 'issuer': cert.get('issuer') or '', 'date': cert.get('date')}
+            for cert in _sort_by_relevance(
+                user_data.get('certificates') or [],
+                lambda cert: f'{cert.get("name") or ""} {cert.get("description") or ""}',
+                query_terms,
+            )
+        ],
+    }
@@ -1,13 +1,76 @@
 # cv_generator/tests/conftest.py
+from unittest.mock import patch
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
 from django.utils import timezone
 
 from accounts.models import Education, Project, Skill, UserProfile, WorkExperience
+from cv_generator.client import reset_openai_client
+from cv_generator.llm_stub import StubLLM
+from cv_generator.resilience import breaker
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    El caché en memoria sobrevive entre tests (la DB no), así que lo vaciamos
+    para que ningún test lea snapshots o CVs cacheados de otro.
+    """
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_openai_client():
+    """
+    El cliente de IA es único por proceso: lo reiniciamos para que cada test
+    construya el suyo (y los patch de OpenAI surtan efecto).
+    """
+    reset_openai_client()
+    yield
+    reset_openai_client()
+
+
+@pytest.fixture(autouse=True)
+def closed_circuit_breaker():
+    """El breaker también es del proceso: los fallos de un test no deben abrirlo en otro."""
+    breaker.reset()
+    yield
+    breaker.reset()
+
+
+@pytest.fixture
+def llm_stub():
+    """
+    Proveedor de IA local (llm_stub.py) por HTTP real: el servicio apunta a él con
+    AI_BASE_URL. Latencia, errores y modo se cambian con llm_stub.configure(...).
+    """
+    with StubLLM(seed=0) as stub:
+        with override_settings(OPENAI_API_KEY='sk-stub', AI_BASE_URL=stub.base_url):
+            yield stub
+
+
+@pytest.fixture
+def async_llm():
+    """
+    Cliente AsyncOpenAI simulado (con API key para que el servicio lo use). Cada test le
+    asigna su respuesta: async_llm.chat.completions.create = create
+    """
+    with (
+        override_settings(OPENAI_API_KEY='sk-fake-key-for-testing'),
+        patch('cv_generator.client.AsyncOpenAI') as mock_async_openai,
+    ):
+        yield mock_async_openai.return_value
+
+
 @pytest.fixture
 def full_user_profile(db):
     """
@@ -0,0 +1,41 @@
+"""Respuestas de la IA de ejemplo para los tests (mismo esquema que schema.py)."""
+
+
+def large_cv_output(experiences=300, skills=200, projects=100):
+    """Un structured_cv_data exagerado, como el de un perfil senior muy largo."""
+    return {
+        'job_title_target': 'Senior Backend Engineer',
+        'profile_summary': 'Ingeniero con 15 años de experiencia en sistemas distribuidos. ' * 4,
+        'selected_skills': [f'Skill {i}' for i in range(skills)],
+        'selected_languages': [{'name': 'Inglés', 'level': 'C1'}],
+        'experience': [
+            {
+                'company': f'Empresa {i}',
+                'position': 'Backend Developer',
+                'date_range': '2015-01-01 - 2018-01-01',
+                'location': 'Madrid',
+                'enhanced_description': [
+                    f'Diseñé la API "{i}" reduciendo la latencia un {i % 90}% con caché.'
+                    for _ in range(5)
+                ],
+            }
+            for i in range(experiences)
+        ],
+        'education': [{'institution': 'UPM', 'degree': 'Ingeniería', 'date_range': '2010'}],
+        'projects': [
+            {
+                'title': f'Proyecto {i}',
+                'role': 'Lead',
+                'description': 'Plataforma SaaS con Django, React y PostgreSQL.',
+                'tech_stack': ['Django', 'React'],
+                'url': f'https://example.com/{i}',
+            }
+            for i in range(projects)
+        ],
+        'certificates': [{'name': 'AWS SAA', 'issuer': 'AWS', 'date': '2022-01-01'}],
+    }
+
+
+def small_cv_output(**overrides):
+    """Una respuesta de la IA pequeña que cumple el esquema (schema.py)."""
+    return {**large_cv_output(experiences=1, skills=3, projects=1), **overrides}
@@ -0,0 +1,60 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cv_generator.test.factories import small_cv_output
+
+
+@pytest.mark.django_db
+class TestAsyncGenerateCVView:
+    def get_url(self):
+        return reverse('generate-cv-asgi')
+
+    def auth_headers(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def post(self, client, data, **headers):
+        return client.post(
+            self.get_url(), json.dumps(data), content_type='application/json', **headers
+        )
+
+    def test_requires_jwt(self, client):
+        response = self.post(client, {'job_description': 'Some job'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = self.post(
+            client, {'job_description': 'Some job'}, HTTP_AUTHORIZATION='Bearer basura'
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_validation_error(self, client, full_user_profile):
+        response = self.post(client, {}, **self.auth_headers(full_user_profile))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'job_description' in response.json()
+
+    @override_settings(OPENAI_API_KEY='sk-fake-key-for-testing')
+    @patch('cv_generator.client.AsyncOpenAI')
+    def test_generates_with_async_client(self, mock_async_openai, client, full_user_profile):
+        """Misma respuesta que la vista síncrona, pero esperando a AsyncOpenAI."""
+        mock_client = MagicMock()
+        mock_async_openai.return_value = mock_client
+        completion = MagicMock()
+        completion.choices[0].message.content = json.dumps(small_cv_output(job_title_target='Dev'))
+        mock_client.chat.completions.create = AsyncMock(return_value=completion)
+
+        response = self.post(
+            client, {'job_description': 'Python Dev'}, **self.auth_headers(full_user_profile)
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['job_title_extracted'] == 'Dev'
+        assert data['structured_cv_data']['profile']['email'] == 'test@example.com'
+        assert response['X-CV-Cache'] == 'MISS'
+        mock_client.chat.completions.create.assert_awaited_once()
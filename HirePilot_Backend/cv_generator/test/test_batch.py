@@ -0,0 +1,135 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from cv_generator import client
+from cv_generator.services import CVGeneratorService
+from cv_generator.snapshot import snapshot_cache_stats
+from cv_generator.test.factories import small_cv_output
+
+
+@pytest.fixture
+def fake_async_llm(async_llm):
+    """AsyncOpenAI simulado que responde con el puesto de la oferta y mide la concurrencia."""
+    state = {'in_flight': 0, 'max_in_flight': 0, 'calls': 0}
+
+    async def create(**kwargs):
+        state['calls'] += 1
+        state['in_flight'] += 1
+        state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        await asyncio.sleep(0.01)
+        state['in_flight'] -= 1
+        offer = kwargs['messages'][1]['content'].split('OFERTA DE TRABAJO:\n')[1].strip()
+        completion = MagicMock()
+        completion.choices[0].message.content = json.dumps(small_cv_output(job_title_target=offer))
+        return completion
+
+    async_llm.chat.completions.create = create
+    return state
+
+
+@pytest.mark.django_db
+class TestGenerateCVBatchView:
+    def get_url(self):
+        return reverse('generate-cv-batch')
+
+    def post(self, api_client, items):
+        return api_client.post(self.get_url(), {'items': items}, format='json')
+
+    def test_requires_authentication(self, api_client):
+        response = self.post(api_client, [{'job_description': 'Python Dev'}])
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_validation_errors(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        assert self.post(api_client, []).status_code == status.HTTP_400_BAD_REQUEST
+        too_many = [{'job_description': 'Dev'}] * (settings.CV_BATCH_MAX_ITEMS + 1)
+        assert self.post(api_client, too_many).status_code == status.HTTP_400_BAD_REQUEST
+        response = self.post(api_client, [{'language': 'en'}])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'items' in response.data
+
+    def test_batch_larger_than_the_plan_burst_is_rejected(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        burst = settings.CV_RATE_LIMIT_BURST['FREE']
+
+        response = self.post(api_client, [{'job_description': 'Dev'}] * (burst + 1))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert f'como mucho {burst} ofertas' in str(response.data['items'])
+
+    def test_generates_every_item_with_one_snapshot(
+        self, api_client, full_user_profile, fake_async_llm
+    ):
+        api_client.force_authenticate(user=full_user_profile)
+        items = [{'job_description': f'Oferta {i}', 'language': 'en'} for i in range(5)]
+
+        before = snapshot_cache_stats()
+        response = self.post(api_client, items)
+        after = snapshot_cache_stats()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['succeeded'] == 5
+        assert response.data['failed'] == 0
+        assert [r['job_title_extracted'] for r in response.data['results']] == [
+            f'Oferta {i}' for i in range(5)
+        ]
+        assert response.data['results'][0]['structured_cv_data']['profile']['firstName'] == 'Juan'
+        assert after['misses'] - before['misses'] == 1
+        assert after['hits'] - before['hits'] == 0
+
+    def test_consecutive_batches_share_the_async_client(
+        self, api_client, full_user_profile, fake_async_llm
+    ):
+        """async_to_sync abre un loop por petición: el cliente (y su pool) no debe ir con él."""
+        api_client.force_authenticate(user=full_user_profile)
+
+        with patch(
+            'cv_generator.client.build_async_openai_client',
+            wraps=client.build_async_openai_client,
+        ) as build:
+            first = self.post(api_client, [{'job_description': 'Oferta A'}])
+            second = self.post(api_client, [{'job_description': 'Oferta B'}])
+
+        assert first.data['succeeded'] == second.data['succeeded'] == 1
+        assert fake_async_llm['calls'] == 2
+        assert build.call_count == 1
+
+    # 10 elementos superan la ráfaga del plan FREE: aquí solo medimos la concurrencia
+    @override_settings(CV_BATCH_CONCURRENCY=3, CV_RATE_LIMIT_ENABLED=False)
+    def test_concurrency_is_bounded(self, api_client, full_user_profile, fake_async_llm):
+        api_client.force_authenticate(user=full_user_profile)
+
+        self.post(api_client, [{'job_description': f'Oferta {i}'} for i in range(10)])
+
+        assert fake_async_llm['calls'] == 10
+        assert fake_async_llm['max_in_flight'] == 3
+
+    def test_one_failure_does_not_break_the_batch(
+        self, api_client, full_user_profile, fake_async_llm
+    ):
+        api_client.force_authenticate(user=full_user_profile)
+        original = CVGeneratorService.agenerate_cv
+
+        async def flaky(service):
+            if service.job_description == 'Rota':
+                raise RuntimeError('boom')
+            return await original(service)
+
+        with patch.object(CVGeneratorService, 'agenerate_cv', flaky):
+            response = self.post(
+                api_client, [{'job_description': 'Rota'}, {'job_description': 'Buena'}]
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['failed'] == 1
+        assert response.data['results'][0]['status'] == 'error'
+        assert response.data['results'][1]['status'] == 'ok'
+        assert response.data['results'][1]['job_title_extracted'] == 'Buena'
@@ -0,0 +1,190 @@
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from cv_generator import history
+from cv_generator.models import CVGeneration, CVPayload
+from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import large_cv_output, small_cv_output
+
+User = get_user_model()
+
+
+def make_entries(user, count):
+    return [
+        history.record(user, small_cv_output(job_title_target=f'Puesto {i}'), 'es', 'ai')
+        for i in range(count)
+    ]
+
+
+class TestCodecs:
+    def test_zlib_round_trip(self):
+        raw = history.canonical_json(large_cv_output())
+
+        data = history.compress(raw, 'zlib')
+
+        assert len(data) < len(raw) / 5
+        assert history.decompress(memoryview(data), 'zlib') == raw
+
+    def test_canonical_json_ignores_key_order(self):
+        assert history.canonical_json({'b': 1, 'a': 'ñ'}) == history.canonical_json(
+            {'a': 'ñ', 'b': 1}
+        )
+
+    @override_settings(CV_HISTORY_CODEC='zstd')
+    def test_missing_zstd_falls_back_to_zlib(self):
+        with patch.object(history, 'zstandard', None):
+            assert history._codec() == 'zlib'
+
+
+@pytest.mark.django_db
+class TestRecord:
+    def test_identical_outputs_share_one_payload(self, full_user_profile):
+        other = User.objects.create_user(email='otra@example.com', password='x')
+        cv = small_cv_output()
+
+        first = history.record(full_user_profile, cv, 'es', 'ai', 'modelo')
+        second = history.record(other, dict(reversed(cv.items())), 'es', 'cache', 'modelo')
+
+        assert first != second
+        assert CVPayload.objects.count() == 1
+        payload = CVPayload.objects.get()
+        assert payload.codec == 'zlib' and len(payload.data) < payload.raw_size
+        entry = CVGeneration.objects.select_related('payload').get(pk=second)
+        assert history.load(entry) == cv
+        assert entry.job_title == cv['job_title_target'] and entry.model == 'modelo'
+
+    def test_database_errors_do_not_break_generation(self, full_user_profile):
+        with patch.object(CVGeneration.objects, 'create', side_effect=DatabaseError('caída')):
+            assert history.record(full_user_profile, small_cv_output(), 'es', 'ai') is None
+
+    @override_settings(OPENAI_API_KEY=None)
+    def test_service_records_what_it_returns(self, full_user_profile):
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+
+        result = service.generate_cv()
+
+        entry = CVGeneration.objects.select_related('payload').get(pk=service.history_id)
+        assert entry.outcome == 'local' and entry.user == full_user_profile
+        assert history.load(entry) == result
+        assert 'history' in service.trace.stages
+
+    @override_settings(OPENAI_API_KEY=None, CV_HISTORY_ENABLED=False)
+    def test_can_be_disabled(self, full_user_profile):
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        service.generate_cv()
+
+        assert service.history_id is None
+        assert not CVGeneration.objects.exists()
+
+
+@pytest.mark.django_db
+class TestHistoryEndpoints:
+    def test_keyset_pagination_newest_first(self, api_client, full_user_profile):
+        ids = make_entries(full_user_profile, 5)
+        api_client.force_authenticate(user=full_user_profile)
+
+        seen = []
+        url = reverse('cv-history') + '?page_size=2'
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        assert seen == list(reversed(ids))
+
+    def test_listing_does_not_read_payloads(
+        self, api_client, full_user_profile, django_assert_num_queries
+    ):
+        make_entries(full_user_profile, 3)
+        api_client.force_authenticate(user=full_user_profile)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('cv-history'))
+
+        assert 'structured_cv_data' not in response.data['results'][0]
+
+    def test_retrieve_in_one_query(self, api_client, full_user_profile, django_assert_num_queries):
+        [entry_id] = make_entries(full_user_profile, 1)
+        api_client.force_authenticate(user=full_user_profile)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('cv-history-detail', args=[entry_id]))
+
+        assert response.data['history_id'] == entry_id
+        assert response.data['job_title_extracted'] == 'Puesto 0'
+        assert response.data['structured_cv_data'] == small_cv_output(job_title_target='Puesto 0')
+
+    def test_other_users_entries_are_not_visible(self, api_client, full_user_profile):
+        other = User.objects.create_user(email='otra@example.com', password='x')
+        [entry_id] = make_entries(other, 1)
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.get(reverse('cv-history-detail', args=[entry_id]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert api_client.get(reverse('cv-history')).data['results'] == []
+
+    def test_delete(self, api_client, full_user_profile):
+        [entry_id] = make_entries(full_user_profile, 1)
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.delete(reverse('cv-history-detail', args=[entry_id]))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not CVGeneration.objects.exists()
+        assert CVPayload.objects.count() == 1  # Lo limpia la poda
+
+
+@pytest.mark.django_db
+class TestPrune:
+    def age(self, ids, days):
+        CVGeneration.objects.filter(pk__in=ids).update(
+            created_at=timezone.now() - timedelta(days=days)
+        )
+
+    def test_prunes_old_entries_and_orphan_payloads_in_batches(self, full_user_profile):
+        old = make_entries(full_user_profile, 5)
+        recent = history.record(
+            full_user_profile, small_cv_output(job_title_target='Puesto 0'), 'es', 'cache'
+        )
+        self.age(old, 400)
+
+        assert history.prune(days=365, dry_run=True) == (5, 4)
+        assert CVGeneration.objects.count() == 6
+
+        assert history.prune(days=365, batch_size=2) == (5, 4)
+        assert list(CVGeneration.objects.values_list('pk', flat=True)) == [recent]
+        # El contenido de 'Puesto 0' lo sigue usando la entrada reciente
+        assert CVPayload.objects.count() == 1
+
+    def test_reused_payloads_are_skipped(self, full_user_profile):
+        [entry_id] = make_entries(full_user_profile, 1)
+        CVGeneration.objects.filter(pk=entry_id).delete()
+        orphans = CVPayload.objects.filter(generations__isnull=True)
+        payload_id = orphans.get().pk
+        # Alguien vuelve a usar el contenido entre la selección del lote y el DELETE
+        make_entries(full_user_profile, 1)
+
+        assert history._delete_in_batches(CVPayload.objects.filter(pk=payload_id), 10) == 0
+        assert CVPayload.objects.filter(pk=payload_id).exists()
+
+    @override_settings(CV_HISTORY_RETENTION_DAYS=30)
+    def test_command(self, full_user_profile):
+        self.age(make_entries(full_user_profile, 2), 31)
+        out = io.StringIO()
+
+        call_command('prune_cv_history', stdout=out)
+
+        assert 'Borradas 2 entradas del historial y 2 contenidos.' in out.getvalue()
+        assert not CVPayload.objects.exists()
@@ -0,0 +1,124 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cv_generator.models import GenerationJob
+
+
+@pytest.fixture(autouse=True)
+def local_engine():
+    # Sin API key el CV sale del motor local: respuestas rápidas y sin red
+    with override_settings(OPENAI_API_KEY=None):
+        yield
+
+
+@pytest.mark.django_db
+class TestIdempotencyKey:
+    def post(self, api_client, data, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return api_client.post(reverse('generate-cv'), data, format='json', **headers)
+
+    def test_retry_replays_the_stored_response(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        data = {'job_description': 'Python Dev'}
+
+        first = self.post(api_client, data, key='clave-1')
+        with patch('cv_generator.views.CVGeneratorService') as service:
+            retry = self.post(api_client, data, key='clave-1')
+
+        service.assert_not_called()
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.data == first.data
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert retry['X-CV-Cache'] == first['X-CV-Cache']
+        assert 'Idempotent-Replayed' not in first
+
+    def test_async_mode_does_not_enqueue_twice(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        data = {'job_description': 'Python Dev', 'mode': 'async'}
+
+        first = self.post(api_client, data, key='clave-async')
+        retry = self.post(api_client, data, key='clave-async')
+
+        assert retry.status_code == status.HTTP_202_ACCEPTED
+        assert retry.data['job_id'] == first.data['job_id']
+        assert retry['Location'] == first['Location']
+        assert GenerationJob.objects.count() == 1
+
+    def test_same_key_with_another_body_is_rejected(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        self.post(api_client, {'job_description': 'Python Dev'}, key='clave-2')
+        response = self.post(api_client, {'job_description': 'Java Dev'}, key='clave-2')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_keys_are_per_user(self, api_client, full_user_profile, django_user_model):
+        other = django_user_model.objects.create_user(email='otra@example.com', password='x')
+        data = {'job_description': 'Python Dev'}
+        api_client.force_authenticate(user=full_user_profile)
+        self.post(api_client, data, key='clave-3')
+
+        api_client.force_authenticate(user=other)
+        response = self.post(api_client, data, key='clave-3')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Idempotent-Replayed' not in response
+
+    def test_errors_are_not_stored(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        assert self.post(api_client, {}, key='clave-4').status_code == 400
+        response = self.post(api_client, {'job_description': 'Python Dev'}, key='clave-4')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_replays_do_not_count_towards_rate_limits(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        data = {'job_description': 'Python Dev'}
+
+        with override_settings(CV_RATE_LIMITS={'FREE': '1/hour'}, CV_RATE_LIMIT_BURST={'FREE': 1}):
+            assert self.post(api_client, data, key='clave-5').status_code == 200
+            assert self.post(api_client, data, key='clave-5').status_code == 200
+            assert self.post(api_client, data).status_code == 429
+
+    def test_key_too_long(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = self.post(api_client, {'job_description': 'Dev'}, key='x' * 256)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_async_view_replays_too(self, client, full_user_profile):
+        token = RefreshToken.for_user(full_user_profile).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}', 'HTTP_IDEMPOTENCY_KEY': 'clave-6'}
+        body = json.dumps({'job_description': 'Python Dev'})
+        url = reverse('generate-cv-asgi')
+
+        first = client.post(url, body, content_type='application/json', **headers)
+        retry = client.post(url, body, content_type='application/json', **headers)
+
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.json() == first.json()
+        assert retry['Idempotent-Replayed'] == 'true'
+
+    def test_async_view_async_mode_does_not_enqueue_twice(self, client, full_user_profile):
+        """La vista ASGI también encola con mode='async', y un reintento no encola otra vez."""
+        token = RefreshToken.for_user(full_user_profile).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}', 'HTTP_IDEMPOTENCY_KEY': 'clave-7'}
+        body = json.dumps({'job_description': 'Python Dev', 'mode': 'async'})
+        url = reverse('generate-cv-asgi')
+
+        first = client.post(url, body, content_type='application/json', **headers)
+        retry = client.post(url, body, content_type='application/json', **headers)
+
+        assert first.status_code == retry.status_code == status.HTTP_202_ACCEPTED
+        assert retry.json()['job_id'] == first.json()['job_id']
+        assert retry['Location'] == first['Location']
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert GenerationJob.objects.get().user == full_user_profile
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from cv_generator.jobs import claim_next_job, enqueue_job, purge_expired_jobs, run_job
+from cv_generator.models import GenerationJob
+
+
+@pytest.mark.django_db
+class TestGenerationJobs:
+    def test_async_request_returns_202_and_job_can_be_polled(self, api_client, full_user_profile):
+        """POST en modo async devuelve el id y el GET refleja el estado del trabajo."""
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.post(
+            reverse('generate-cv'), {'job_description': 'Python Dev', 'mode': 'async'}
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_url = reverse('generation-job-detail', args=[response.data['job_id']])
+        assert response['Location'] == job_url
+        assert api_client.get(job_url).data['status'] == GenerationJob.Status.PENDING
+
+        with patch('cv_generator.services.settings.OPENAI_API_KEY', None):
+            run_job(claim_next_job('test-worker'))
+
+        data = api_client.get(job_url).data
+        assert data['status'] == GenerationJob.Status.DONE
+        assert data['result']['structured_cv_data']['profile']['email'] == 'test@example.com'
+
+    def test_job_is_claimed_only_once(self, full_user_profile):
+        job = enqueue_job(full_user_profile, 'Python Dev', 'es')
+
+        claimed = claim_next_job('worker-a')
+
+        assert claimed.pk == job.pk
+        assert claimed.status == GenerationJob.Status.RUNNING
+        assert claim_next_job('worker-b') is None
+
+    def test_failed_generation_is_recorded(self, full_user_profile):
+        enqueue_job(full_user_profile, 'Python Dev', 'es')
+        job = claim_next_job('worker-a')
+
+        with patch('cv_generator.jobs.CVGeneratorService.generate_cv', side_effect=Exception('x')):
+            run_job(job)
+
+        job.refresh_from_db()
+        assert job.status == GenerationJob.Status.FAILED
+        assert job.error == 'x'
+
+    def test_other_users_and_expired_jobs_are_hidden(self, api_client, full_user_profile):
+        job = enqueue_job(full_user_profile, 'Python Dev', 'es')
+        stranger = type(full_user_profile).objects.create_user(
+            email='otro@example.com', password='password123'
+        )
+        api_client.force_authenticate(user=stranger)
+        assert api_client.get(reverse('generation-job-detail', args=[job.id])).status_code == 404
+
+        GenerationJob.objects.filter(pk=job.pk).update(expires_at=timezone.now())
+        api_client.force_authenticate(user=full_user_profile)
+        assert api_client.get(reverse('generation-job-detail', args=[job.id])).status_code == 404
+        assert purge_expired_jobs() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@patch('cv_generator.services.settings.OPENAI_API_KEY', None)
+def test_run_cv_workers_drains_queue(full_user_profile):
+    """El comando con --once procesa toda la cola con varios hilos y termina."""
+    for i in range(6):
+        enqueue_job(full_user_profile, f'Oferta {i}', 'es')
+    expired = enqueue_job(full_user_profile, 'Caducada', 'es')
+    GenerationJob.objects.filter(pk=expired.pk).update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+
+    call_command('run_cv_workers', '--once', '--concurrency', '3')
+
+    assert GenerationJob.objects.filter(status=GenerationJob.Status.DONE).count() == 6
+    assert not GenerationJob.objects.filter(job_description='Caducada').exists()
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from cv_generator.json_stream import IncrementalJSONParser
+
+CV_JSON = {
+    'job_title_target': 'Backend "Senior" Dev',
+    'profile_summary': 'Experto en Django \\ APIs {REST}, 10 años',
+    'selected_skills': ['Python', 'Django', 'C++ [avanzado]'],
+    'experience': [
+        {
+            'company': 'Tech Corp',
+            'position': 'Backend Dev',
+            'enhanced_description': ['Reduje la latencia un 40%', 'Lideré {3} personas'],
+        }
+    ],
+    'years': 7,
+    'remote': True,
+    'certificates': [],
+}
+
+
+class TestIncrementalJSONParser:
+    def test_sections_are_emitted_in_order(self):
+        parser = IncrementalJSONParser()
+        events = parser.feed(json.dumps(CV_JSON, ensure_ascii=False, indent=2))
+
+        sections = [key for event, key, _ in events if event == 'section']
+        assert sections == list(CV_JSON)
+        assert parser.done
+        assert parser.result == CV_JSON
+
+    def test_any_chunk_boundary_gives_same_result(self):
+        """Los fragmentos del streaming cortan el texto en cualquier sitio."""
+        text = '```json\n' + json.dumps(CV_JSON, ensure_ascii=False) + '\n```'
+        for size in (1, 2, 3, 7, 64):
+            parser = IncrementalJSONParser()
+            events = []
+            for start in range(0, len(text), size):
+                events.extend(parser.feed(text[start : start + size]))
+
+            assert parser.result == CV_JSON
+            assert [key for event, key, _ in events if event == 'section'] == list(CV_JSON)
+
+    def test_section_is_emitted_before_the_object_ends(self):
+        parser = IncrementalJSONParser()
+
+        events = parser.feed('{"job_title_target": "Dev", "profile_summary": "Resu')
+
+        assert events == [('section', 'job_title_target', 'Dev')]
+        assert not parser.done
+
+    def test_list_items_are_emitted_as_they_close(self):
+        """Cada experiencia llega como 'item' antes de que se cierre la lista."""
+        parser = IncrementalJSONParser()
+
+        events = parser.feed(
+            '{"selected_skills": ["Python", "SQL"], "experience": [{"company": "A"}, {"comp'
+        )
+
+        assert events == [
+            ('item', 'selected_skills', 'Python'),
+            ('item', 'selected_skills', 'SQL'),
+            ('section', 'selected_skills', ['Python', 'SQL']),
+            ('item', 'experience', {'company': 'A'}),
+        ]
+        assert parser.feed('any": "B"}]}') == [
+            ('item', 'experience', {'company': 'B'}),
+            ('section', 'experience', [{'company': 'A'}, {'company': 'B'}]),
+        ]
+
+    def test_buffer_is_bounded(self):
+        """Un elemento desbocado no puede crecer sin límite en memoria."""
+        parser = IncrementalJSONParser(max_buffer=100)
+        parser.feed('{"experience": [{"company": "A"}, {"company": "B"}, ')
+
+        with pytest.raises(ValueError):
+            parser.feed('"' + 'x' * 200)
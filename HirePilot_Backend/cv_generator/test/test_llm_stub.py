@@ -0,0 +1,145 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+
+from cv_generator.llm_stub import Cassette, StubLLM, parse_errors, parse_latency
+from cv_generator.services import CVGeneratorService
+
+JOB = 'Backend Developer Python\nRequisitos: Django y APIs REST'
+
+
+def generate(user, job=JOB, language='es', user_data=None):
+    service = CVGeneratorService(user, job, language, user_data=user_data)
+    return service, service.generate_cv()
+
+
+class TestStubOptions:
+    def test_latency_distributions(self):
+        rng = random.Random(0)
+
+        assert parse_latency('0.25')(rng) == 0.25
+        assert all(0.1 <= parse_latency('uniform:0.1,0.2')(rng) <= 0.2 for _ in range(50))
+        assert all(parse_latency('normal:0,1')(rng) >= 0 for _ in range(50))
+        assert parse_latency('lognormal:1,0.5')(rng) > 0
+        with pytest.raises(ValueError):
+            parse_latency('pareto:1,2')
+
+    def test_error_spec(self):
+        assert parse_errors('429:0.1, truncate:0.05') == {'429': 0.1, 'truncate': 0.05}
+        with pytest.raises(ValueError):
+            parse_errors('418:0.1')
+        with pytest.raises(ValueError):
+            parse_errors({'500': 0.7, '503': 0.7})
+
+    def test_record_and_replay_need_a_cassette(self):
+        with pytest.raises(ValueError):
+            StubLLM(mode='replay')
+
+
+@pytest.mark.django_db
+class TestStubEndToEnd:
+    def test_generation_goes_through_http(self, llm_stub, full_user_profile):
+        service, result = generate(full_user_profile, language='en')
+
+        assert service.from_ai is True and service.partial is False
+        assert result['job_title_target'] == 'Backend Developer Python'
+        assert result['experience'][0]['date_range'].endswith(' - Present')
+        assert service.trace.tokens['prompt'] > 0
+        assert llm_stub.stats()['requests'] == 1
+
+    def test_streaming(self, llm_stub, full_user_profile):
+        llm_stub.configure(chunk_size=8)
+        service = CVGeneratorService(full_user_profile, JOB, 'es')
+
+        events = list(service.stream_cv())
+
+        assert service.from_ai is True
+        assert sum(name == 'section' for name, _ in events) == 9  # profile + 8 claves
+        assert events[-1][1]['job_title_extracted'] == 'Backend Developer Python'
+        assert llm_stub.stats()['streamed'] == 1
+        assert service.trace.tokens['completion'] > 0
+
+    @override_settings(JOB_POSTING_STORE_ENABLED=False)
+    def test_concurrent_requests_overlap(self, llm_stub, full_user_profile):
+        llm_stub.configure(latency=0.2)
+        # Un solo snapshot para todos los hilos (como en los lotes): sin DB desde los hilos
+        snapshot = CVGeneratorService(full_user_profile, JOB, 'es')._gather_user_data()
+
+        def one(i):
+            return generate(full_user_profile, f'{JOB} {i}', user_data=snapshot)[0]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(one, range(6)))
+        elapsed = time.perf_counter() - start
+
+        assert all(service.from_ai for service in results)
+        assert llm_stub.stats()['max_in_flight'] > 1
+        assert elapsed < 6 * 0.2
+
+    @override_settings(AI_MAX_RETRIES=1)
+    def test_injected_errors_are_retried_then_fall_back(self, llm_stub, full_user_profile):
+        llm_stub.configure(errors={'503': 1.0})
+
+        service, result = generate(full_user_profile)
+
+        assert service.from_ai is False
+        assert service.trace.fallback_reason == 'provider_error'
+        assert llm_stub.stats()['error_503'] == 2  # Intento + 1 reintento
+        assert result['job_title_target'] == 'Backend Developer Python'
+
+    @override_settings(AI_MAX_RETRIES=0)
+    def test_dropped_connection(self, llm_stub, full_user_profile):
+        llm_stub.configure(errors='disconnect:1')
+
+        service, _ = generate(full_user_profile)
+
+        assert service.trace.fallback_reason == 'connection_error'
+
+    def test_truncated_output_is_repaired(self, llm_stub, full_user_profile):
+        llm_stub.configure(errors={'truncate': 1.0})
+
+        service, result = generate(full_user_profile)
+
+        # La reparación también llega cortada: lo que falta sale del motor local
+        assert service.from_ai is True
+        assert service.partial is True
+        assert llm_stub.stats()['requests'] == 2
+        assert set(result) >= {'job_title_target', 'experience', 'certificates'}
+
+
+@pytest.mark.django_db
+class TestRecordReplay:
+    def test_records_then_replays_without_the_provider(self, tmp_path, full_user_profile):
+        cassette = tmp_path / 'cassettes' / 'cv.jsonl'
+
+        with StubLLM() as provider:
+            with StubLLM(mode='record', cassette=cassette, upstream=provider.base_url) as stub:
+                with override_settings(OPENAI_API_KEY='sk-stub', AI_BASE_URL=stub.base_url):
+                    _, recorded = generate(full_user_profile)
+                    # Ya grabada: aunque no esté en el caché de CVs, no se paga otra vez
+                    caches[settings.CV_RESULT_CACHE].clear()
+                    generate(full_user_profile)
+            assert provider.stats()['requests'] == 1
+            assert stub.stats()['replayed'] == 1
+
+        entry = json.loads(cassette.read_text().splitlines()[0])
+        assert entry['request']['messages'][1]['content'].startswith('PERFIL CANDIDATO')
+        assert len(Cassette(cassette)) == 1
+
+        with StubLLM(mode='replay', cassette=cassette) as replay:
+            with override_settings(OPENAI_API_KEY='sk-stub', AI_BASE_URL=replay.base_url):
+                service, replayed = generate(full_user_profile)
+                assert service.from_ai is True
+                assert replayed == recorded
+
+                # Una petición no grabada es un 404: CV del motor local
+                missing, _ = generate(full_user_profile, 'Otra oferta distinta')
+                assert missing.from_ai is False
+            assert replay.stats()['replay_miss'] == 1
@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+
+from cv_generator.loadtest import (
+    Recorder,
+    compare_results,
+    create_synthetic_users,
+    delete_synthetic_users,
+    job_pool,
+    percentile,
+)
+
+User = get_user_model()
+
+
+class TestMeasurement:
+    def test_percentile_interpolates(self):
+        values = [10, 20, 30, 40, 50]
+
+        assert percentile(values, 50) == 30
+        assert percentile(values, 95) == pytest.approx(48)
+        assert percentile([7], 99) == 7
+        assert percentile([], 50) is None
+
+    def test_summary_per_endpoint(self):
+        recorder = Recorder()
+        for ms in (10, 20, 30):
+            recorder.record('GET /api/skills/', ms / 1000, 200)
+        recorder.record('POST /api/cv/generate/', 0.5, 429)
+        recorder.record('POST /api/cv/generate/', 1.0, 'ReadTimeout')
+
+        overall, endpoints = recorder.summary(elapsed=2.0)
+
+        assert overall['requests'] == 5 and overall['errors'] == 2
+        assert overall['throughput_rps'] == 2.5
+        skills = endpoints['GET /api/skills/']
+        assert skills['p50_ms'] == 20 and skills['errors'] == 0
+        assert endpoints['POST /api/cv/generate/']['statuses'] == {'429': 1, 'ReadTimeout': 1}
+
+    def test_compare_results(self):
+        def run(p95):
+            return {
+                'levels': [{'concurrency': 4, 'endpoints': {'GET /api/skills/': {'p95_ms': p95}}}]
+            }
+
+        assert compare_results(run(10.0), run(15.0)) == [(4, 'GET /api/skills/', 10.0, 15.0, 50.0)]
+        assert compare_results({'levels': []}, run(15.0)) == []
+
+    def test_job_pool(self):
+        assert job_pool(0) is None
+        assert len(set(job_pool(6))) == 6
+
+
+@pytest.mark.django_db
+class TestSyntheticUsers:
+    def test_created_once_and_deleted(self):
+        emails = create_synthetic_users(2, 'secreto-1')
+        assert create_synthetic_users(2, 'secreto-1') == emails
+
+        user = User.objects.get(email=emails[0])
+        assert user.plan == User.Plan.PRO and user.is_verified
+        assert user.skills.exists() and user.work_experiences.exists()
+
+        assert delete_synthetic_users() > 0
+        assert not User.objects.filter(email__in=emails).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLoadTestCommand:
+    @override_settings(CV_RATE_LIMIT_ENABLED=False)
+    def test_run_against_a_server(self, live_server, llm_stub, tmp_path):
+        output = tmp_path / 'run.json'
+
+        call_command(
+            'loadtest',
+            base_url=live_server.url,
+            levels='1,2',
+            iterations=1,
+            output=str(output),
+            cleanup=True,
+            stdout=io.StringIO(),
+        )
+
+        results = json.loads(output.read_text())
+        assert [level['concurrency'] for level in results['levels']] == [1, 2]
+        level = results['levels'][1]
+        assert level['errors'] == 0 and level['iterations'] == 2
+        endpoints = level['endpoints']
+        assert endpoints['POST /api/login/']['requests'] == 2
+        assert endpoints['POST /api/cv/generate/']['statuses'] == {'200': 2}
+        assert endpoints['PATCH /api/experience/{id}/']['p99_ms'] is not None
+        assert llm_stub.stats()['requests'] == 3
+        assert not User.objects.filter(email__endswith='@loadtest.invalid').exists()
@@ -0,0 +1,239 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from cv_generator import multilang, resilience
+from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import small_cv_output
+from cv_generator.translation import extract_free_text, merge_translation, missing_translations
+
+GENERATED_CV = {
+    'job_title_target': 'Desarrollador Backend',
+    'profile_summary': 'Backend con 5 años de experiencia en Django.',
+    'selected_skills': ['Python', 'Django'],
+    'experience': [
+        {
+            'company': 'Tech Corp',
+            'position': 'Desarrollador',
+            'date_range': '2020-01-01 - 2023-01-01',
+            'enhanced_description': ['Diseñé APIs REST', 'Reduje la latencia un 40%'],
+        }
+    ],
+    'projects': [{'title': 'HirePilot', 'role': 'Autor', 'description': 'Generador de CVs'}],
+}
+
+TRANSLATED_TEXT = {
+    'job_title_target': 'Backend Developer',
+    'profile_summary': 'Backend developer with 5 years of Django experience.',
+    'experience': [
+        {'position': 'Developer', 'enhanced_description': ['Designed REST APIs', 'Cut latency']}
+    ],
+    'projects': [{'role': 'Author', 'description': 'CV generator'}],
+    # Secciones que small_cv_output añade a GENERATED_CV
+    'education': [{'degree': 'Engineering'}],
+    'selected_languages': [{'name': 'English', 'level': 'C1'}],
+}
+
+
+class TestTranslation:
+    def test_extracts_only_free_text(self):
+        assert extract_free_text(GENERATED_CV) == {
+            'job_title_target': 'Desarrollador Backend',
+            'profile_summary': 'Backend con 5 años de experiencia en Django.',
+            'experience': [
+                {
+                    'position': 'Desarrollador',
+                    'enhanced_description': ['Diseñé APIs REST', 'Reduje la latencia un 40%'],
+                }
+            ],
+            'projects': [{'role': 'Autor', 'description': 'Generador de CVs'}],
+        }
+
+    def test_merge_keeps_facts_and_ignores_mismatched_shapes(self):
+        translated = {
+            **TRANSLATED_TEXT,
+            'selected_skills': ['Pitón'],  # No es un campo traducible
+            'projects': [{'role': 'Author'}, {'role': 'Inventado'}],  # Otra longitud
+        }
+
+        merged = merge_translation(GENERATED_CV, translated)
+
+        assert merged['job_title_target'] == 'Backend Developer'
+        assert merged['experience'][0]['enhanced_description'][0] == 'Designed REST APIs'
+        assert merged['experience'][0]['company'] == 'Tech Corp'
+        assert merged['selected_skills'] == ['Python', 'Django']
+        assert merged['projects'][0]['role'] == 'Autor'
+        assert GENERATED_CV['job_title_target'] == 'Desarrollador Backend'  # Sin mutar
+
+    def test_missing_translations(self):
+        free_text = extract_free_text(GENERATED_CV)
+        translated = {
+            **TRANSLATED_TEXT,
+            'profile_summary': '',
+            'experience': [{'position': 'Developer'}],
+            'projects': [],
+        }
+
+        assert missing_translations(free_text, TRANSLATED_TEXT) == []
+        assert missing_translations(free_text, translated) == [
+            'profile_summary',
+            'experience[0].enhanced_description',
+            'projects',
+        ]
+
+
+@pytest.fixture
+def fake_llm(async_llm):
+    """AsyncOpenAI simulado: genera GENERATED_CV y traduce con TRANSLATED_TEXT."""
+    calls = []
+
+    async def create(**kwargs):
+        system = kwargs['messages'][0]['content']
+        kind = 'translation' if 'traductor' in system else 'generation'
+        calls.append((kind, kwargs['messages']))
+        completion = MagicMock()
+        # GENERATED_CV completado con las secciones que exige el esquema
+        content = TRANSLATED_TEXT if kind == 'translation' else small_cv_output(**GENERATED_CV)
+        completion.choices[0].message.content = json.dumps(content)
+        completion.usage.prompt_tokens = 1200
+        completion.usage.completion_tokens = 800
+        completion.usage.prompt_tokens_details.cached_tokens = 0
+        return completion
+
+    async_llm.chat.completions.create = create
+    return calls
+
+
+@pytest.mark.django_db
+class TestEstimateCosts:
+    def test_generation_uses_measured_tokens(self, full_user_profile):
+        generator = CVGeneratorService(full_user_profile, 'Backend Python', 'en')
+        user_data = generator._gather_user_data()
+        source_cv = {'profile': user_data['personal_info'], **GENERATED_CV}
+        generation, translation = multilang.estimate_costs(generator, user_data, source_cv)
+        prompt = multilang._messages_tokens(
+            generator._build_messages(user_data, job_text='Backend Python')
+        )
+
+        measured = {'prompt': 2 * prompt, 'completion': 5000, 'cached_prompt': 0}
+        assert multilang.estimate_costs(generator, user_data, source_cv, measured) == (
+            2 * prompt + 5000,
+            round(translation * 2),
+        )
+        # Sin tokens medidos (CV del caché) se queda la estimación
+        assert multilang.estimate_costs(generator, user_data, source_cv, {'prompt': 0}) == (
+            generation,
+            translation,
+        )
+
+
+@pytest.mark.django_db
+class TestMultiLanguageGeneration:
+    def post(self, api_client, data):
+        return api_client.post(reverse('generate-cv'), data, format='json')
+
+    def test_translates_free_text_for_extra_languages(
+        self, api_client, full_user_profile, fake_llm
+    ):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = self.post(
+            api_client, {'job_description': 'Backend Python', 'languages': ['es', 'en']}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        es, en = response.data['variants']['es'], response.data['variants']['en']
+        assert es['strategy'] == 'generated'
+        assert en['strategy'] == 'translated'
+        assert es['job_title_extracted'] == 'Desarrollador Backend'
+        assert en['job_title_extracted'] == 'Backend Developer'
+        assert en['structured_cv_data']['profile']['email'] == full_user_profile.email
+        assert en['structured_cv_data']['selected_skills'] == ['Python', 'Django']
+
+        assert [kind for kind, _ in fake_llm] == ['generation', 'translation']
+        translation_messages = fake_llm[1][1]
+        assert 'Inglés' in translation_messages[0]['content']
+        assert 'PERFIL CANDIDATO' not in translation_messages[1]['content']
+
+    def test_extra_languages_get_their_own_deadline(self, api_client, full_user_profile, fake_llm):
+        api_client.force_authenticate(user=full_user_profile)
+        created_after = []
+        real_deadline = resilience.Deadline
+
+        def deadline(seconds):
+            created_after.append(len(fake_llm))
+            return real_deadline(seconds)
+
+        with patch('cv_generator.services.resilience.Deadline', side_effect=deadline):
+            self.post(
+                api_client, {'job_description': 'Backend Python', 'languages': ['es', 'en', 'fr']}
+            )
+
+        # El presupuesto de en y fr empieza cuando ya terminó la generación en es
+        assert created_after == [0, 1, 1]
+
+    @override_settings(CV_MULTILANG_STRATEGY='parallel')
+    def test_parallel_strategy_generates_every_language(
+        self, api_client, full_user_profile, fake_llm
+    ):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = self.post(
+            api_client, {'job_description': 'Backend Python', 'languages': ['es', 'en', 'fr']}
+        )
+
+        assert [v['strategy'] for v in response.data['variants'].values()] == ['generated'] * 3
+        assert [kind for kind, _ in fake_llm] == ['generation'] * 3
+
+    def test_incomplete_translation_is_generated_instead(
+        self, api_client, full_user_profile, fake_llm, monkeypatch
+    ):
+        api_client.force_authenticate(user=full_user_profile)
+        monkeypatch.setitem(TRANSLATED_TEXT, 'projects', [])  # Sin traducir
+
+        response = self.post(
+            api_client, {'job_description': 'Backend Python', 'languages': ['es', 'en']}
+        )
+        cached = self.post(api_client, {'job_description': 'Backend Python', 'language': 'en'})
+
+        assert response.data['variants']['en']['strategy'] == 'generated'
+        assert [kind for kind, _ in fake_llm] == ['generation', 'translation', 'generation']
+        # En el caché del inglés queda la generación completa, no la traducción a medias
+        assert cached['X-CV-Cache'] == 'HIT'
+        assert cached.data['job_title_extracted'] == 'Desarrollador Backend'
+
+    def test_translated_variant_is_cached(self, api_client, full_user_profile, fake_llm):
+        api_client.force_authenticate(user=full_user_profile)
+        payload = {'job_description': 'Backend Python', 'languages': ['es', 'en']}
+
+        self.post(api_client, payload)
+        response = self.post(api_client, {'job_description': 'Backend Python', 'language': 'en'})
+
+        assert response['X-CV-Cache'] == 'HIT'
+        assert response.data['job_title_extracted'] == 'Backend Developer'
+        assert len(fake_llm) == 2
+
+    def test_validation(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = self.post(api_client, {'job_description': 'Dev', 'languages': ['es', 'de']})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.post(
+            api_client, {'job_description': 'Dev', 'languages': ['es', 'en'], 'mode': 'async'}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'languages' in response.data
+
+    @override_settings(OPENAI_API_KEY=None)
+    def test_without_ai_every_language_uses_fallback(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = self.post(api_client, {'job_description': 'Dev', 'languages': ['en', 'en']})
+
+        assert list(response.data['variants']) == ['en']
+        assert response.data['variants']['en']['strategy'] == 'generated'
@@ -0,0 +1,371 @@
+import re
+import zlib
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from cv_generator import history, pdf
+from cv_generator.checks import check_pdf_fonts
+from cv_generator.result_cache import CACHE_HEADER
+from cv_generator.test.factories import large_cv_output, small_cv_output
+
+User = get_user_model()
+
+ROBOTO = 'Roboto/roboto-v50-latin-regular.ttf'
+MERRIWEATHER = 'Merriweather/merriweather-v33-latin-regular.ttf'
+
+
+def sample_cv(**overrides):
+    cv = large_cv_output(experiences=4, skills=14, projects=3)
+    cv['profile'] = {
+        'firstName': 'Lucía',
+        'lastName': 'Núñez',
+        'email': 'lucia@example.com',
+        'phone': '+34 600 000 000',
+        'linkedin': 'linkedin.com/in/lucia',
+    }
+    cv['experience'][0]['date_range'] = '2020-03-01 - Actualidad'
+    return {**cv, **overrides}
+
+
+def streams(document):
+    """Los streams del PDF (páginas, ToUnicode de las fuentes...), descomprimidos si lo están."""
+    found = []
+    for raw in re.findall(rb'stream\n(.*?)\nendstream', document, re.S):
+        try:
+            found.append(zlib.decompress(raw))
+        except zlib.error:
+            found.append(raw)
+    return found
+
+
+def drawn_text(cv, template='modern', language='es'):
+    """El texto que dibuja la plantilla, línea a línea, en el orden en que se coloca."""
+    return [
+        op[3] for page in pdf.layout_cv(cv, template, language) for op in page if op[0] == 'text'
+    ]
+
+
+def assert_valid_structure(document):
+    assert document.startswith(b'%PDF-') and document.endswith(b'%%EOF\n')
+    xref = int(re.search(rb'startxref\n(\d+)', document).group(1))
+    assert document[xref:].startswith(b'xref\n')
+    size = int(re.search(rb'/Size (\d+)', document).group(1))
+    offsets = re.findall(rb'(\d{10}) 00000 n ', document[xref:])
+    assert len(offsets) == size - 1
+    for number, offset in enumerate(offsets, start=1):
+        assert document[int(offset) :].startswith(f'{number} 0 obj'.encode())
+
+
+@pytest.fixture
+def fresh_fonts():
+    """Fuentes y plantillas se cachean por proceso: los tests que las cambian empiezan de cero."""
+    pdf.load_font.cache_clear()
+    pdf.compile_template.cache_clear()
+    yield
+    pdf.load_font.cache_clear()
+    pdf.compile_template.cache_clear()
+
+
+class TestFonts:
+    def test_loaded_once_per_process(self):
+        assert pdf.load_font(ROBOTO) is pdf.load_font(ROBOTO)
+
+    def test_width(self):
+        style = pdf.compile_template('modern').styles['text']
+
+        assert style.width('aa') == 2 * style.width('a') > 0
+        assert style._replace(size=20).width('a') == 2 * style.width('a')
+
+    def test_text_outside_winansi_is_kept(self):
+        """Nada de transliterar: '−' (U+2212) no está en cp1252 pero sí en las fuentes."""
+        cv = sample_cv(profile_summary='Latencia −40 % y “caché”')
+
+        document = pdf.render_cv_pdf(cv, 'modern')
+
+        assert 'Latencia −40 % y “caché”' in drawn_text(cv)
+        assert any(b'<2212>' in stream for stream in streams(document))
+
+    def test_decomposed_accents_are_composed(self):
+        style = pdf.compile_template('modern').styles['text']
+
+        assert style.prepare('Luci\u0301a') == 'Lucía'
+
+    @pytest.mark.usefixtures('fresh_fonts')
+    def test_fallback_fonts(self):
+        """Lo que no tiene Lato (Ă) sale de la fuente de reserva, que se incrusta en el PDF."""
+        cv = sample_cv()
+        cv['profile']['firstName'] = 'Ăna'
+        spec = pdf.TEMPLATES['creative']
+
+        with override_settings(CV_PDF_FALLBACK_FONTS=[MERRIWEATHER]):
+            document = pdf.render_cv_pdf(cv, 'creative')
+            style = pdf.compile_template('creative').styles['name']
+
+        assert document.count(b'/FontFile2') == len(spec.fonts) + 1
+        assert any(b'<0102>' in stream for stream in streams(document))
+        fallback = pdf.load_font(MERRIWEATHER)
+        assert style.width('Ă') == fallback.widths[ord('Ă')] * style.size / 1000
+
+    @pytest.mark.usefixtures('fresh_fonts')
+    def test_missing_font_dir(self, tmp_path):
+        with override_settings(CV_PDF_FONT_DIR=str(tmp_path)):
+            with pytest.raises(pdf.FontError):
+                pdf.render_cv_pdf(small_cv_output())
+
+    @pytest.mark.usefixtures('fresh_fonts')
+    def test_not_a_truetype_font(self, tmp_path):
+        (tmp_path / 'Roboto').mkdir()
+        (tmp_path / ROBOTO).write_bytes(b'wOFF' + b'\0' * 64)
+
+        with override_settings(CV_PDF_FONT_DIR=str(tmp_path)):
+            with pytest.raises(pdf.FontError):
+                pdf.load_font(ROBOTO)
+
+
+class TestFontsCheck:
+    def test_bundled_fonts_are_found(self):
+        assert check_pdf_fonts(None) == []
+
+    def test_missing_fonts_warn(self, tmp_path):
+        with override_settings(CV_PDF_FONT_DIR=str(tmp_path)):
+            warnings = check_pdf_fonts(None)
+
+        assert [w.id for w in warnings] == ['cv_generator.W004']
+        assert ROBOTO in warnings[0].msg
+
+
+class TestDocumentData:
+    def test_same_limits_as_the_frontend(self):
+        data = pdf.document_data(large_cv_output(experiences=5, skills=20, projects=5), 'es')
+
+        assert len(data['experience']) == 3
+        assert len(data['education']) == 1
+        assert len(data['projects']) == 2
+        assert len(data['skills']) == 10
+
+    def test_more_projects_without_experience(self):
+        data = pdf.document_data(large_cv_output(experiences=0, projects=5), 'es')
+
+        assert len(data['projects']) == 4
+
+    def test_dates_and_bullets(self):
+        data = pdf.document_data(sample_cv(), 'fr')
+        current, previous = data['experience'][:2]
+
+        assert current['start'] == 'mars 2020' and current['current']
+        assert previous['start'] == 'janv. 2015' and previous['end'] == 'janv. 2018'
+        assert current['description'].count('\n• ') == 4
+
+    def test_format_date(self):
+        assert pdf.format_date('2020-05-01', 'es') == 'may 2020'
+        assert pdf.format_date('2020', 'en') == 'Jan 2020'
+        assert pdf.format_date('Verano 2020', 'es') == 'Verano 2020'
+
+    def test_accepts_the_whole_generation_response(self):
+        cv = sample_cv()
+
+        assert pdf.document_data({'structured_cv_data': cv}, 'es') == pdf.document_data(cv, 'es')
+
+    def test_only_safe_links(self):
+        assert pdf.safe_url('linkedin.com/in/lucía') == 'https://linkedin.com/in/luc%C3%ADa'
+        assert pdf.safe_url('javascript:alert(1)') is None
+        assert pdf.safe_url('http://[roto') is None
+        assert pdf.safe_url('') is None
+
+
+class TestWrap:
+    def style(self):
+        return pdf.compile_template('modern').styles['text']
+
+    def test_lines_fit_the_width(self):
+        style = self.style()
+        text = style.prepare('Diseñé la API reduciendo la latencia un 40% con caché. ' * 10)
+
+        lines = pdf.wrap(text, style, 200)
+
+        assert len(lines) > 3
+        assert all(style.width(line) <= 200 for line, _ in lines)
+        assert lines[-1][1] is False  # La última línea del párrafo no se justifica
+
+    def test_max_lines_ends_with_ellipsis(self):
+        style = self.style()
+
+        lines = pdf.wrap('palabra ' * 200, style, 200, max_lines=3)
+
+        assert len(lines) == 3 and lines[-1][0].endswith('…')
+
+    def test_long_words_are_cut(self):
+        style = self.style()
+
+        lines = pdf.wrap('x' * 300, style, 100)
+
+        assert ''.join(line for line, _ in lines) == 'x' * 300
+
+
+class TestRender:
+    @pytest.mark.parametrize('template', list(pdf.TEMPLATES))
+    def test_templates(self, template):
+        document = pdf.render_cv_pdf(sample_cv(), template, 'es')
+
+        assert_valid_structure(document)
+        assert pdf.page_count(document) == 1
+        assert document.count(b'/FontFile2') == len(pdf.TEMPLATES[template].fonts)
+        assert b'/URI (https://linkedin.com/in/lucia)' in document
+        assert b'/URI (https://example.com/0)' in document
+        text = drawn_text(sample_cv(), template)
+        assert 'EXPERIENCIA LABORAL' in text
+        assert 'Lucía Núñez' in text or 'LUCÍA NÚÑEZ' in text
+
+    def test_language(self):
+        text = drawn_text(sample_cv(), 'modern', 'en')
+
+        assert 'WORK EXPERIENCE' in text and any('Present' in line for line in text)
+
+    def test_deterministic(self):
+        assert pdf.render_cv_pdf(sample_cv()) == pdf.render_cv_pdf(sample_cv())
+
+    def test_long_content_continues_on_another_page(self):
+        cv = sample_cv(profile_summary='Resumen muy largo. ' * 300)
+        for item in cv['experience']:
+            item['position'] = 'Puesto con un nombre larguísimo ' * 20
+
+        document = pdf.render_cv_pdf(cv, 'classic')
+
+        assert_valid_structure(document)
+        assert pdf.page_count(document) == 2
+
+    def test_unsafe_links_are_not_rendered(self):
+        cv = sample_cv()
+        cv['projects'][0]['url'] = 'javascript:alert(1)'
+
+        document = pdf.render_cv_pdf(cv)
+
+        assert b'javascript' not in document
+        assert b'/URI (https://example.com/1)' in document
+
+    def test_empty_cv(self):
+        assert_valid_structure(pdf.render_cv_pdf({}, 'creative'))
+
+    def test_unknown_template(self):
+        with pytest.raises(ValueError):
+            pdf.render_cv_pdf(sample_cv(), 'gothic')
+
+    def test_templates_are_compiled_once(self):
+        assert pdf.compile_template('classic') is pdf.compile_template('classic')
+
+
+class TestCache:
+    def test_hit_after_first_render(self):
+        before = pdf.pdf_cache_stats()
+
+        first, first_hit = pdf.cached_cv_pdf(sample_cv(), 'modern', 'es')
+        # Mismo contenido aunque las claves lleguen en otro orden
+        second, second_hit = pdf.cached_cv_pdf(dict(reversed(sample_cv().items())), 'modern', 'es')
+
+        after = pdf.pdf_cache_stats()
+        assert (first_hit, second_hit) == (False, True)
+        assert first == second
+        assert after['misses'] - before['misses'] == 1 and after['hits'] - before['hits'] == 1
+        assert after['renders'] - before['renders'] == 1
+
+    def test_pdfs_do_not_share_the_result_cache(self):
+        pdf.cached_cv_pdf(sample_cv(), 'modern', 'es')
+
+        assert settings.CV_PDF_CACHE != settings.CV_RESULT_CACHE
+        assert not caches[settings.CV_RESULT_CACHE]._cache
+        assert caches[settings.CV_PDF_CACHE]._cache
+
+    def test_template_and_language_are_part_of_the_key(self):
+        cv = sample_cv()
+        keys = {pdf.make_key(cv, template, 'es') for template in pdf.TEMPLATES}
+        keys.add(pdf.make_key(cv, 'modern', 'en'))
+
+        assert len(keys) == len(pdf.TEMPLATES) + 1
+
+
+@pytest.mark.django_db
+class TestPdfEndpoints:
+    def test_requires_authentication(self, api_client):
+        response = api_client.post(
+            reverse('cv-pdf'), {'structured_cv_data': sample_cv()}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_render_and_cache(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        body = {'structured_cv_data': sample_cv(), 'template': 'classic', 'language': 'en'}
+
+        first = api_client.post(reverse('cv-pdf'), body, format='json')
+        second = api_client.post(reverse('cv-pdf'), body, format='json')
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first['Content-Type'] == 'application/pdf'
+        assert first['Content-Disposition'] == (
+            'attachment; filename="cv-senior-backend-engineer.pdf"'
+        )
+        assert (first[CACHE_HEADER], second[CACHE_HEADER]) == ('MISS', 'HIT')
+        assert first.content == second.content
+        assert_valid_structure(first.content)
+
+    def test_malformed_urls(self, api_client, full_user_profile):
+        cv = sample_cv()
+        cv['profile']['linkedin'] = 'http://[roto'
+        cv['projects'][0]['url'] = 'https://[::1'
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.post(reverse('cv-pdf'), {'structured_cv_data': cv}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert (
+            b'[roto' not in response.content and b'/URI (https://example.com/1)' in response.content
+        )
+
+    def test_invalid_template(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.post(
+            reverse('cv-pdf'),
+            {'structured_cv_data': sample_cv(), 'template': 'gothic'},
+            format='json',
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'template' in response.data
+
+    def test_history_entry(self, api_client, full_user_profile):
+        cv = sample_cv()
+        entry_id = history.record(full_user_profile, cv, 'fr', 'ai')
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.get(reverse('cv-history-pdf', args=[entry_id]) + '?template=creative')
+
+        assert response.status_code == status.HTTP_200_OK
+        # Por defecto, el idioma con el que se generó el CV
+        assert response.content == pdf.render_cv_pdf(cv, 'creative', 'fr')
+
+    def test_history_entry_of_another_user(self, api_client, full_user_profile):
+        other = User.objects.create_user(email='otra@example.com', password='x')
+        entry_id = history.record(other, sample_cv(), 'es', 'ai')
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.get(reverse('cv-history-pdf', args=[entry_id]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.usefixtures('fresh_fonts')
+    def test_missing_fonts(self, api_client, full_user_profile, tmp_path):
+        api_client.force_authenticate(user=full_user_profile)
+
+        with override_settings(CV_PDF_FONT_DIR=str(tmp_path)):
+            response = api_client.post(
+                reverse('cv-pdf'), {'structured_cv_data': sample_cv()}, format='json'
+            )
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -0,0 +1,156 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.test import override_settings
+
+from cv_generator.models import JobPosting
+from cv_generator.postings import (
+    analyze_posting,
+    format_summary,
+    get_or_analyze_posting,
+    posting_hash,
+)
+from cv_generator.preprocessing import clean_job_description
+from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import small_cv_output
+
+POSTING = """Backend Developer (Python/Django)
+Fintech Labs · Madrid
+
+Requisitos:
+- 3+ años de experiencia con Python.
+- Experiencia sólida con Django y PostgreSQL.
+Conocimientos necesarios: Docker, Redis
+
+Descripción
+Construimos la infraestructura de pagos de más de 2.000 comercios en Europa.
+Somos un equipo de 40 personas repartidas entre Madrid, Lisboa y remoto, con
+despliegues diarios, guardias rotativas y mucha autonomía para proponer mejoras."""
+
+JOB_POSTINGS_DIR = Path(__file__).resolve().parent.parent / 'benchmark_data' / 'job_postings'
+# Ofertas reales copiadas de portales y PDFs: puesto esperado de cada una
+POSTING_TITLES = {
+    'glassdoor_en.txt': 'Frontend Engineer (React)',
+    'indeed_en.txt': 'Senior Data Engineer',
+    'infojobs_es.txt': 'Desarrollador/a Full Stack React + Node.js',
+    'linkedin_es.txt': 'Backend Developer (Python/Django)',
+    'pdf_devops_es.txt': 'OFERTA DE EMPLEO - Ingeniero/a DevOps',
+}
+
+
+class TestAnalyzePosting:
+    def test_hash_ignores_case_punctuation_and_spacing(self):
+        assert posting_hash('Backend Developer.\nPython, Django') == posting_hash(
+            'backend  developer\npython django'
+        )
+        assert posting_hash('Backend Developer') != posting_hash('Frontend Developer')
+
+    def test_extracts_title_requirements_and_keywords(self):
+        analysis = analyze_posting(POSTING)
+
+        assert analysis['title'] == 'Backend Developer (Python/Django)'
+        assert analysis['required_skills'] == [
+            '3+ años de experiencia con Python.',
+            'Experiencia sólida con Django y PostgreSQL.',
+            'Conocimientos necesarios: Docker, Redis',
+        ]
+        assert {'python', 'django', 'postgresql', 'docker'} <= set(analysis['keywords'])
+
+    @pytest.mark.parametrize(('name', 'title'), POSTING_TITLES.items())
+    def test_title_of_real_postings(self, name, title):
+        text = clean_job_description((JOB_POSTINGS_DIR / name).read_text(encoding='utf-8'))
+        lines = [line for line in text.split('\n') if line]
+        # Copiada desde el nombre de la empresa o con una cabecera delante
+        company_first = '\n'.join([lines[1], lines[0], *lines[2:]])
+        header_first = 'Descripción de la oferta\n' + text
+
+        assert analyze_posting(text)['title'] == title
+        assert analyze_posting(company_first)['title'] == title
+        assert analyze_posting(header_first)['title'] == title
+
+    def test_title_falls_back_to_the_first_line(self):
+        assert analyze_posting('Fintech Labs\nTrabajo en remoto')['title'] == 'Fintech Labs'
+
+    def test_summary_lists_the_keywords(self):
+        posting = JobPosting(**analyze_posting(POSTING))
+
+        summary = format_summary(posting)
+
+        assert summary.startswith('PUESTO: Backend Developer (Python/Django)\nREQUISITOS:\n')
+        assert 'PALABRAS CLAVE: ' in summary
+        assert 'django' in summary.rsplit('PALABRAS CLAVE: ', 1)[1].split(', ')
+
+
+@pytest.mark.django_db
+class TestJobPostingStore:
+    def test_same_posting_is_stored_once(self):
+        posting, created = get_or_analyze_posting(POSTING)
+        again, created_again = get_or_analyze_posting(POSTING.upper())
+
+        assert created and not created_again
+        assert again.pk == posting.pk
+        assert JobPosting.objects.count() == 1
+        assert JobPosting.objects.get().use_count == 2
+
+    @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+    @patch('cv_generator.client.OpenAI')
+    def test_second_generation_sends_requirement_summary(
+        self, mock_openai_class, full_user_profile
+    ):
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.return_value.choices[0].message.content = json.dumps(
+            small_cv_output(job_title_target='Backend Developer')
+        )
+
+        def sent_prompt(language):
+            CVGeneratorService(full_user_profile, POSTING, language).generate_cv()
+            return mock_client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+
+        # Otro idioma = otra entrada del caché de CVs, pero la misma oferta
+        first = sent_prompt('es')
+        second = sent_prompt('en')
+
+        assert 'infraestructura de pagos' in first
+        assert 'infraestructura de pagos' not in second
+        assert 'PUESTO: Backend Developer (Python/Django)' in second
+        assert '- Experiencia sólida con Django y PostgreSQL.' in second
+        assert 'PALABRAS CLAVE: ' in second
+        assert len(second) < len(first)
+
+    def test_short_postings_keep_full_text(self, full_user_profile):
+        short = 'Python Dev\nRequisitos:\n- Python'
+        get_or_analyze_posting(short)
+
+        service = CVGeneratorService(full_user_profile, short, 'es')
+        assert service._job_prompt_text(short) == short
+
+    @override_settings(JOB_POSTING_STORE_ENABLED=False)
+    def test_store_can_be_disabled(self, full_user_profile):
+        service = CVGeneratorService(full_user_profile, POSTING, 'es')
+        service._build_messages(service._gather_user_data())
+        service._build_messages(service._gather_user_data())
+
+        assert not JobPosting.objects.exists()
+
+    @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+    @patch('cv_generator.client.OpenAI')
+    def test_repair_prompt_reuses_the_posting_text_of_the_generation(
+        self, mock_openai_class, full_user_profile
+    ):
+        create = mock_openai_class.return_value.chat.completions.create
+        broken, fixed = small_cv_output(selected_skills=None), small_cv_output()
+        replies = [json.dumps(broken), json.dumps({'selected_skills': fixed['selected_skills']})]
+        completions = [MagicMock() for _ in replies]
+        for completion, content in zip(completions, replies):
+            completion.choices[0].message.content = content
+        create.side_effect = completions
+
+        CVGeneratorService(full_user_profile, POSTING, 'es').generate_cv()
+
+        first, repair = (call.kwargs['messages'][1]['content'] for call in create.call_args_list)
+        assert 'infraestructura de pagos' in first
+        assert 'infraestructura de pagos' in repair  # No el resumen guardado por el primero
+        assert JobPosting.objects.get().use_count == 1
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.test import override_settings
+
+from cv_generator.preprocessing import (
+    clean_job_description,
+    estimate_tokens,
+    truncate_to_tokens,
+)
+from cv_generator.serializers import CVGenerationRequestSerializer
+
+
+class TestCleanJobDescription:
+    def test_removes_control_and_invisible_characters(self):
+        text = 'Backend​ Developer\x0c\r\nPython﻿ y\xa0Django\x07'
+        assert clean_job_description(text) == 'Backend Developer\nPython y Django'
+
+    def test_joins_words_split_by_pdf_hyphenation(self):
+        text = 'Experiencia en desa-\nrrollo de micro\xadservicios.\nFront-\nEnd'
+        assert clean_job_description(text) == (
+            'Experiencia en desarrollo de microservicios.\nFront-\nEnd'
+        )
+
+    def test_drops_repeated_lines_and_collapses_blank_lines(self):
+        text = 'ACME S.L.\nRequisitos:\n\n\n\nPython\nACME S.L.\n\nPágina 2 de 3\nDjango'
+        assert clean_job_description(text) == 'ACME S.L.\nRequisitos:\n\nPython\n\nDjango'
+
+    def test_strips_portal_boilerplate(self):
+        text = '\n'.join(
+            [
+                'Aceptar todas las cookies',
+                'Inscribirme',
+                'Backend Developer',
+                'Publicado hace 3 días',
+                '',
+                'Qué ofrecemos:',
+                'Fruta fresca y futbolín',
+                '',
+                'Requisitos:',
+                'Python y Django',
+                '',
+                'Empleos similares',
+                'Frontend Developer en Otra Empresa',
+            ]
+        )
+        assert clean_job_description(text) == 'Backend Developer\n\nRequisitos:\nPython y Django'
+
+    def test_benefits_block_ends_at_next_heading(self):
+        text = 'Beneficios:\nSeguro médico\nFunciones:\nMantener la API'
+        assert clean_job_description(text) == 'Funciones:\nMantener la API'
+
+    def test_truncates_to_token_budget_on_line_boundary(self):
+        text = '\n'.join(f'Requisito número {i}' for i in range(100))
+
+        cleaned = clean_job_description(text, max_tokens=20)
+
+        assert estimate_tokens(cleaned) <= 20
+        assert cleaned.split('\n')[0] == 'Requisito número 0'
+        assert all(line.startswith('Requisito número') for line in cleaned.split('\n'))
+
+    def test_truncate_without_newlines_cuts_on_word(self):
+        assert truncate_to_tokens('uno dos tres cuatro', 2) == 'uno dos'
+
+    @override_settings(JOB_DESCRIPTION_MAX_TOKENS=5)
+    def test_token_budget_comes_from_settings(self):
+        assert clean_job_description('palabra ' * 50) == 'palabra palabra'
+
+
+class TestJobDescriptionLimit:
+    def test_serializer_rejects_oversized_descriptions(self):
+        oversized = 'x' * (settings.JOB_DESCRIPTION_MAX_CHARS + 1)
+        serializer = CVGenerationRequestSerializer(data={'job_description': oversized})
+        assert not serializer.is_valid()
+        assert 'job_description' in serializer.errors
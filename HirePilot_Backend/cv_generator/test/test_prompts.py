@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+from django.test import override_settings
+
+from cv_generator import prompts
+from cv_generator.metrics import llm_cost_stats, llm_usage_stats, record_llm_usage
+
+
+class TestPrompts:
+    def test_static_prefix_is_identical_for_every_language(self):
+        """El caché de prefijos del proveedor necesita los mismos bytes al principio."""
+        for language in ('es', 'en', 'fr'):
+            system = prompts.system_prompt(language)
+            assert system.startswith(prompts.STATIC_SYSTEM_PROMPT)
+            assert system.endswith(f'IDIOMA DE SALIDA: {prompts.LANGUAGE_NAMES[language]}\n')
+
+    def test_templates_are_compiled_once(self):
+        assert prompts.system_prompt('en') is prompts.system_prompt('en')
+        assert prompts.system_prompt('xx') is prompts.system_prompt('es')
+
+    def test_job_description_goes_last(self):
+        messages = prompts.build_messages('en', {'skills': ['Python']}, 'Oferta X')
+
+        assert messages[0]['content'] == prompts.system_prompt('en')
+        assert messages[1]['content'].endswith('OFERTA DE TRABAJO:\nOferta X\n')
+        assert '{"skills":["Python"]}' in messages[1]['content']
+
+    def test_section_prompts_share_prefix_and_send_only_needed_profile(self):
+        profile = {'experience': [{'company': 'ACME'}], 'projects': [{'title': 'HirePilot'}]}
+
+        messages = prompts.build_section_messages('es', 'experience', profile, 'Oferta X')
+
+        assert messages[0]['content'] == prompts.system_prompt('es')
+        assert 'ACME' in messages[1]['content']
+        assert 'HirePilot' not in messages[1]['content']
+        assert messages[1]['content'].endswith(
+            'GENERA SOLO estas claves del JSON: experience. No incluyas ninguna otra.\n'
+        )
+
+    def test_merge_sections_keeps_schema_order_and_drops_foreign_keys(self):
+        merged = prompts.merge_sections(
+            [
+                ('projects', {'projects': [], 'job_title_target': 'Inventado'}),
+                ('experience', {'experience': [{'company': 'ACME'}]}),
+                ('summary', {'job_title_target': 'Dev', 'profile_summary': 'Resumen'}),
+            ]
+        )
+
+        assert list(merged) == ['job_title_target', 'profile_summary', 'experience', 'projects']
+        assert merged['job_title_target'] == 'Dev'
+
+
+def test_record_llm_usage_counts_cached_tokens():
+    before = llm_usage_stats()
+    usage = SimpleNamespace(
+        prompt_tokens=1000,
+        completion_tokens=200,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=800),
+    )
+
+    record_llm_usage(usage, 'test-model')
+    record_llm_usage(None)
+
+    after = llm_usage_stats()
+    assert after['calls'] - before['calls'] == 1
+    assert after['prompt_tokens'] - before['prompt_tokens'] == 1000
+    assert after['cached_prompt_tokens'] - before['cached_prompt_tokens'] == 800
+
+
+@override_settings(
+    AI_MODEL_PRICES={
+        'modelo-con-precio': {'prompt': 2.0, 'cached_prompt': 0.5, 'completion': 8.0},
+    }
+)
+def test_record_llm_usage_adds_the_cost_of_priced_models():
+    before = llm_cost_stats()
+    usage = SimpleNamespace(
+        prompt_tokens=1000,
+        completion_tokens=200,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=800),
+    )
+
+    record_llm_usage(usage, 'modelo-con-precio')
+    record_llm_usage(usage, 'modelo-sin-precio')
+
+    after = llm_cost_stats()
+    # 200 * 2.0 + 800 * 0.5 + 200 * 8.0 por millón de tokens
+    added = after[('modelo-con-precio',)] - before.get(('modelo-con-precio',), 0)
+    assert added == pytest.approx(0.0024)
+    assert ('modelo-sin-precio',) not in after
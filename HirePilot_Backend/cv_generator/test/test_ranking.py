@@ -0,0 +1,62 @@
+from django.test import override_settings
+
+from cv_generator.ranking import prune_profile, tokenize
+
+JOB = 'Buscamos Backend Developer con Python, Django y PostgreSQL. Valorable Docker y C++.'
+
+
+def experience(company, description, achievements=()):
+    return {
+        'company': company,
+        'role': 'Developer',
+        'description': description,
+        'achievements': [{'description': a, 'keywords': []} for a in achievements],
+    }
+
+
+class TestRanking:
+    def test_tokenize_keeps_tech_names_and_ignores_accents(self):
+        assert tokenize('Gestión de APIs en Node.js, C++ y C#') == [
+            'gestion',
+            'apis',
+            'node.js',
+            'c++',
+            'c#',
+        ]
+
+    @override_settings(CV_RANKING_MAX_EXPERIENCES=2, CV_RANKING_MAX_ACHIEVEMENTS=1)
+    def test_keeps_most_relevant_experiences_in_original_order(self):
+        profile = {
+            'experience': [
+                experience('Bar', 'Camarero en turno de noche'),
+                experience('Tech', 'APIs con Django y PostgreSQL', ['Ventas', 'Migré a Python 3']),
+                experience('Tienda', 'Atención al cliente'),
+                experience('Infra', 'Contenedores Docker y CI'),
+            ]
+        }
+
+        pruned = prune_profile(profile, JOB)
+
+        assert [e['company'] for e in pruned['experience']] == ['Tech', 'Infra']
+        assert pruned['experience'][0]['achievements'][0]['description'] == 'Migré a Python 3'
+        assert len(profile['experience']) == 4  # El original no se modifica
+
+    @override_settings(CV_RANKING_MAX_SKILLS=3, CV_RANKING_MAX_PROJECTS=1)
+    def test_skills_are_sorted_by_relevance_and_projects_capped(self):
+        profile = {
+            'skills': ['Photoshop', 'Docker', 'Excel', 'Python', 'Django'],
+            'projects': [
+                {'title': 'Blog', 'description': 'Mi blog', 'technologies': ['WordPress']},
+                {'title': 'API', 'description': 'REST', 'technologies': ['Django', 'Python']},
+            ],
+        }
+
+        pruned = prune_profile(profile, JOB)
+
+        assert set(pruned['skills']) == {'Docker', 'Python', 'Django'}
+        assert [p['title'] for p in pruned['projects']] == ['API']
+
+    @override_settings(CV_RANKING_ENABLED=False)
+    def test_can_be_disabled(self):
+        profile = {'skills': ['Excel'] * 100}
+        assert prune_profile(profile, JOB) is profile
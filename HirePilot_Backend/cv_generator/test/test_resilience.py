@@ -0,0 +1,190 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import httpx
+import openai
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+
+from cv_generator import metrics
+from cv_generator.resilience import (
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    acall_llm,
+    breaker,
+    call_llm,
+    llm_call_stats,
+)
+from cv_generator.services import CVGeneratorService
+
+
+def server_error():
+    request = httpx.Request('POST', 'https://ai.test/v1/chat/completions')
+    return openai.InternalServerError(
+        'boom', response=httpx.Response(500, request=request), body=None
+    )
+
+
+class TestDeadline:
+    def test_each_attempt_gets_the_remaining_budget(self):
+        create = MagicMock(return_value='ok')
+
+        assert call_llm(create, Deadline(10), model='m') == 'ok'
+
+        timeout = create.call_args.kwargs['timeout']
+        assert 9 < timeout <= 10
+        assert create.call_args.kwargs['model'] == 'm'
+
+    def test_expired_deadline_does_not_call_the_provider(self):
+        create = MagicMock()
+
+        with pytest.raises(DeadlineExceeded):
+            call_llm(create, Deadline(0))
+
+        create.assert_not_called()
+
+    @override_settings(AI_MAX_RETRIES=2)
+    def test_retries_only_while_budget_remains(self):
+        create = MagicMock(side_effect=[server_error(), 'ok'])
+        assert call_llm(create, Deadline(10)) == 'ok'
+        assert create.call_count == 2
+
+        # Con 0.3 s de presupuesto no cabe la pausa de 0.5 s antes del reintento
+        create = MagicMock(side_effect=server_error())
+        with pytest.raises(openai.InternalServerError):
+            call_llm(create, Deadline(0.3))
+        assert create.call_count == 1
+
+
+class TestCircuitBreaker:
+    @pytest.fixture(autouse=True)
+    def fast_breaker(self):
+        with override_settings(AI_BREAKER_FAILURE_THRESHOLD=2, AI_BREAKER_RESET_TIMEOUT=0.2):
+            yield
+
+    def test_opens_after_consecutive_failures_and_recovers(self):
+        failing = MagicMock(side_effect=ValueError('caído'))
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                call_llm(failing, Deadline(10))
+        assert breaker.state == 'open'
+
+        # Abierto: ni siquiera llamamos al proveedor
+        healthy = MagicMock(return_value='ok')
+        with pytest.raises(CircuitOpenError):
+            call_llm(healthy, Deadline(10))
+        healthy.assert_not_called()
+
+        time.sleep(0.25)
+        assert breaker.state == 'half_open'
+        assert call_llm(healthy, Deadline(10)) == 'ok'
+        assert breaker.state == 'closed'
+        assert llm_call_stats()['breaker']['short_circuited'] >= 1
+
+    @override_settings(AI_BREAKER_SLOW_CALL=0.01)
+    def test_slow_calls_count_as_failures(self):
+        def slow(**kwargs):
+            time.sleep(0.02)
+            return 'ok'
+
+        call_llm(slow, Deadline(10))
+        call_llm(slow, Deadline(10))
+
+        assert breaker.state == 'open'
+
+    def test_failed_half_open_trial_reopens(self):
+        for _ in range(2):
+            breaker.record(False, 0)
+        time.sleep(0.25)
+
+        with pytest.raises(ValueError):
+            call_llm(MagicMock(side_effect=ValueError('sigue caído')), Deadline(10))
+
+        assert breaker.state == 'open'
+
+
+class TestHedging:
+    @pytest.fixture(autouse=True)
+    def hedging(self):
+        with override_settings(
+            AI_HEDGE_ENABLED=True, AI_HEDGE_MIN_DELAY=0.05, AI_HEDGE_MIN_SAMPLES=1
+        ):
+            yield
+
+    def test_slow_attempt_is_hedged_and_fast_one_wins(self):
+        attempts = []
+
+        def create(**kwargs):
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                time.sleep(0.5)
+                return 'lento'
+            return 'rápido'
+
+        before = metrics.llm_call_stats()
+        with patch('cv_generator.metrics.llm_latency_percentile', return_value=0.01):
+            start = time.monotonic()
+            assert call_llm(create, Deadline(10)) == 'rápido'
+            elapsed = time.monotonic() - start
+        after = metrics.llm_call_stats()
+
+        assert len(attempts) == 2
+        assert elapsed < 0.4
+        assert after['hedged'] - before['hedged'] == 1
+        assert after['hedge_won'] - before['hedge_won'] == 1
+
+    def test_async_hedge_cancels_the_loser(self):
+        cancelled = []
+
+        async def create(**kwargs):
+            if not cancelled:
+                cancelled.append(False)
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled[0] = True
+                    raise
+                return 'lento'
+            return 'rápido'
+
+        with patch('cv_generator.metrics.llm_latency_percentile', return_value=0.01):
+            assert async_to_sync(acall_llm)(create, Deadline(10)) == 'rápido'
+
+        assert cancelled == [True]
+
+    def test_no_hedge_without_enough_samples(self):
+        create = MagicMock(return_value='ok')
+        with patch('cv_generator.metrics.llm_latency_percentile', return_value=None):
+            call_llm(create, Deadline(10))
+        assert create.call_count == 1
+
+
+@pytest.mark.django_db
+@patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+class TestServiceFallback:
+    @override_settings(AI_BREAKER_FAILURE_THRESHOLD=1)
+    @patch('cv_generator.client.OpenAI')
+    def test_open_breaker_serves_fallback_immediately(self, mock_openai_class, full_user_profile):
+        create = mock_openai_class.return_value.chat.completions.create
+        create.side_effect = Exception('OpenAI is down')
+
+        CVGeneratorService(full_user_profile, 'Backend Dev', 'es').generate_cv()
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        result = service.generate_cv()
+
+        assert create.call_count == 1
+        assert service.from_ai is False
+        assert result['job_title_target'] == 'Python Dev'
+
+    @override_settings(AI_REQUEST_DEADLINE=0)
+    @patch('cv_generator.client.OpenAI')
+    def test_exhausted_deadline_serves_fallback(self, mock_openai_class, full_user_profile):
+        service = CVGeneratorService(full_user_profile, 'Backend Dev', 'es')
+        result = service.generate_cv()
+
+        mock_openai_class.return_value.chat.completions.create.assert_not_called()
+        assert service.from_ai is False
+        assert result['job_title_target'] == 'Backend Dev'
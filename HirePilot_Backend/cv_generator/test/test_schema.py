@@ -0,0 +1,99 @@
+from cv_generator import prompts, schema
+from cv_generator.test.factories import small_cv_output
+
+
+class TestSchema:
+    def test_valid_output_passes_unchanged(self):
+        cv = small_cv_output(profile_summary='Resumen')
+
+        valid, invalid = schema.validate_sections(cv)
+
+        assert invalid == []
+        assert valid == cv
+
+    def test_missing_and_malformed_sections_are_reported_one_by_one(self):
+        cv = small_cv_output(selected_skills='Python, Django', experience=[{'position': 'Dev'}])
+        del cv['certificates']
+
+        valid, invalid = schema.validate_sections(cv)
+
+        assert invalid == ['selected_skills', 'experience', 'certificates']
+        assert list(valid) == [
+            'job_title_target',
+            'profile_summary',
+            'selected_languages',
+            'education',
+            'projects',
+        ]
+
+    def test_harmless_deviations_are_normalized(self):
+        valid, invalid = schema.validate_sections(
+            {
+                'job_title_target': '  Backend Developer ',
+                'experience': [
+                    {
+                        'company': 'ACME',
+                        'position': None,
+                        'date_range': 2020,
+                        'enhanced_description': '- Diseñé APIs\n• Reduje la latencia\n',
+                        'inventada': True,
+                    }
+                ],
+            },
+            keys=('job_title_target', 'experience'),
+        )
+
+        assert invalid == []
+        assert valid == {
+            'job_title_target': 'Backend Developer',
+            'experience': [
+                {
+                    'company': 'ACME',
+                    'position': '',
+                    'date_range': '2020',
+                    'location': '',
+                    'enhanced_description': ['Diseñé APIs', 'Reduje la latencia'],
+                }
+            ],
+        }
+
+    def test_empty_title_is_invalid(self):
+        assert schema.validate_sections({'job_title_target': ' '}, ('job_title_target',))[1] == [
+            'job_title_target'
+        ]
+
+    def test_not_an_object(self):
+        assert schema.validate_sections(['a'], ('experience',)) == ({}, ['experience'])
+
+    def test_strict_json_schema(self):
+        response_format = schema.response_format(['job_title_target', 'projects'])
+        json_schema = response_format['json_schema']['schema']
+
+        assert response_format['json_schema']['strict'] is True
+        assert json_schema['required'] == ['job_title_target', 'projects']
+        assert json_schema['additionalProperties'] is False
+        project = json_schema['$defs']['Project']
+        assert project['required'] == ['title', 'role', 'description', 'tech_stack', 'url']
+        assert project['additionalProperties'] is False
+        assert 'default' not in str(json_schema) and 'minLength' not in str(json_schema)
+
+
+class TestKeysPrompt:
+    def test_asks_only_for_the_keys_and_the_profile_they_need(self):
+        profile = {'skills': ['Python'], 'education': [{'institution': 'UPM'}]}
+
+        messages = prompts.build_keys_messages('es', ['certificates'], profile, 'Oferta X')
+
+        assert messages[0]['content'] == prompts.system_prompt('es')
+        assert 'UPM' in messages[1]['content']
+        assert 'Python' not in messages[1]['content']
+        assert messages[1]['content'].endswith(
+            'GENERA SOLO estas claves del JSON: certificates. No incluyas ninguna otra.\n'
+        )
+
+    def test_profile_keys_of_several_groups(self):
+        assert prompts.profile_keys_for(['selected_skills', 'experience']) == [
+            'skills',
+            'languages',
+            'experience',
+        ]
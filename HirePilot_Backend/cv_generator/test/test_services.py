@@ -2,8 +2,12 @@ import json
 from unittest.mock import MagicMock, patch
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.test import override_settings
 
+from cv_generator import metrics, prompts
 from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import small_cv_output
 
 
 @pytest.mark.django_db
@@ -26,7 +30,7 @@ class TestCVGeneratorService:
         assert 'Python' in data['projects'][0]['technologies']
 
     @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
-    @patch('cv_generator.services.OpenAI')
+    @patch('cv_generator.client.OpenAI')
     def test_generate_cv_success_flow(self, mock_openai_class, full_user_profile):
         """
         Prueba el flujo feliz: Tenemos API Key, llamamos a OpenAI
@@ -72,23 +76,28 @@ class TestCVGeneratorService:
     @patch('cv_generator.services.settings.OPENAI_API_KEY', None)
     def test_generate_cv_no_api_key_fallback(self, full_user_profile):
         """
-        Si no hay API KEY, debe retornar el Mock interno sin romper la app.
+        Si no hay API KEY, debe retornar el CV del motor local sin romper la app.
         """
 
         service = CVGeneratorService(
-            user=full_user_profile, job_description='Cualquier cosa', language='es'
+            user=full_user_profile,
+            job_description='Django Developer (remoto)\nRequisitos: Django y APIs REST',
+            language='es',
         )
         result = service.generate_cv()
 
-        assert result['job_title_target'] == 'Puesto Objetivo (Mock)'
-        assert 'Mock Generated' in result['experience'][0]['enhanced_description'][0]
+        assert service.from_ai is False
+        assert result['job_title_target'] == 'Django Developer'
+        assert result['selected_skills'] == ['Django', 'Python']
+        assert result['experience'][0]['enhanced_description'] == ['Developed APIs']
+        assert result['profile']['email'] == full_user_profile.email
 
     @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
-    @patch('cv_generator.services.OpenAI')
+    @patch('cv_generator.client.OpenAI')
     def test_generate_cv_openai_error_handling(self, mock_openai_class, full_user_profile):
         """
         Si OpenAI falla (Timeout, 500, etc), el servicio debe capturar
-        la excepción y devolver el Mock por seguridad.
+        la excepción y devolver el CV del motor local por seguridad.
         """
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
@@ -99,5 +108,273 @@ class TestCVGeneratorService:
         service = CVGeneratorService(user=full_user_profile, job_description='Test', language='es')
         result = service.generate_cv()
 
-        # Debe haber hecho fallback al mock
-        assert result['job_title_target'] == 'Puesto Objetivo (Mock)'
+        # Debe haber hecho fallback al motor local
+        assert service.from_ai is False
+        assert result['job_title_target'] == 'Test'
+
+    @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+    @patch('cv_generator.client.OpenAI')
+    def test_generate_cv_reuses_cached_result(self, mock_openai_class, full_user_profile):
+        """
+        La misma oferta, perfil, idioma y modelo no deben volver a llamar a la IA.
+        Un idioma distinto es otro CV.
+        """
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = json.dumps(small_cv_output())
+        mock_client.chat.completions.create.return_value = mock_completion
+
+        first = CVGeneratorService(full_user_profile, 'Need Python Dev', 'es')
+        first_result = first.generate_cv()
+        second = CVGeneratorService(full_user_profile, 'Need Python Dev', 'es')
+        second_result = second.generate_cv()
+
+        assert first.cache_hit is False
+        assert second.cache_hit is True
+        assert second_result == first_result
+        assert mock_client.chat.completions.create.call_count == 1
+
+        CVGeneratorService(full_user_profile, 'Need Python Dev', 'en').generate_cv()
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+    @patch('cv_generator.client.OpenAI')
+    def test_generate_cv_does_not_cache_fallback(self, mock_openai_class, full_user_profile):
+        """Si la IA falla, el CV de respaldo no se cachea."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create.side_effect = Exception('OpenAI is down')
+
+        CVGeneratorService(full_user_profile, 'Test', 'es').generate_cv()
+        service = CVGeneratorService(full_user_profile, 'Test', 'es')
+        service.generate_cv()
+
+        assert service.cache_hit is False
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+    @patch('cv_generator.client.OpenAI')
+    def test_openai_client_is_shared_between_requests(self, mock_openai_class, full_user_profile):
+        """Un solo cliente (y un solo pool de conexiones) por proceso."""
+        first = CVGeneratorService(full_user_profile, 'Oferta A', 'es')
+        second = CVGeneratorService(full_user_profile, 'Oferta B', 'es')
+
+        assert first.client is second.client
+        mock_openai_class.assert_called_once()
+
+
+def section_reply(**kwargs):
+    """Respuesta simulada del LLM con solo las claves que pide cada prompt por secciones."""
+    prompt = kwargs['messages'][1]['content']
+    keys = prompt.rsplit('GENERA SOLO estas claves del JSON: ', 1)[1].split('.')[0].split(', ')
+    cv = small_cv_output(job_title_target='Puesto generado')
+    completion = MagicMock()
+    completion.choices[0].message.content = json.dumps({key: cv[key] for key in keys})
+    return completion
+
+
+@pytest.mark.django_db
+@patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+class TestSectionParallelGeneration:
+    @override_settings(CV_SECTION_PARALLEL=True)
+    @patch('cv_generator.client.OpenAI')
+    def test_one_call_per_section_group_merged_in_schema_order(
+        self, mock_openai_class, full_user_profile
+    ):
+        mock_client = mock_openai_class.return_value
+        mock_client.chat.completions.create.side_effect = section_reply
+
+        result = CVGeneratorService(full_user_profile, 'Python Dev', 'es').generate_cv()
+
+        assert mock_client.chat.completions.create.call_count == 3
+        assert list(result) == [
+            'profile',
+            'job_title_target',
+            'profile_summary',
+            'selected_skills',
+            'selected_languages',
+            'experience',
+            'education',
+            'projects',
+            'certificates',
+        ]
+        assert result['experience'] == small_cv_output()['experience']
+        assert result['profile']['email'] == full_user_profile.email
+
+    @override_settings(CV_SECTION_PARALLEL=True)
+    @patch('cv_generator.client.OpenAI')
+    def test_failed_section_falls_back_to_local_engine(self, mock_openai_class, full_user_profile):
+        def flaky(**kwargs):
+            if 'claves del JSON: experience.' in kwargs['messages'][1]['content']:
+                raise Exception('timeout')
+            return section_reply(**kwargs)
+
+        mock_openai_class.return_value.chat.completions.create.side_effect = flaky
+
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        result = service.generate_cv()
+
+        assert service.from_ai is False
+        assert result['job_title_target'] == 'Python Dev'
+
+    @override_settings(CV_SECTION_PARALLEL=True)
+    @patch('cv_generator.client.AsyncOpenAI')
+    def test_async_path_uses_sections_too(self, mock_async_openai, full_user_profile):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            return section_reply(**kwargs)
+
+        mock_async_openai.return_value.chat.completions.create = create
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+
+        result = async_to_sync(service.agenerate_cv)()
+
+        assert len(calls) == 3
+        assert result['job_title_target'] == 'Puesto generado'
+
+
+def llm_replies(*contents):
+    """Respuestas simuladas del LLM en orden (una por llamada)."""
+    completions = []
+    for content in contents:
+        completion = MagicMock()
+        completion.choices[0].message.content = content
+        completions.append(completion)
+    return completions
+
+
+def requested_keys(call):
+    prompt = call.kwargs['messages'][1]['content']
+    return prompt.rsplit('GENERA SOLO estas claves del JSON: ', 1)[1].split('.')[0].split(', ')
+
+
+@pytest.mark.django_db
+@patch('cv_generator.services.settings.OPENAI_API_KEY', 'sk-fake-key')
+class TestOutputValidation:
+    @patch('cv_generator.client.OpenAI')
+    def test_only_invalid_sections_are_requested_again(self, mock_openai_class, full_user_profile):
+        create = mock_openai_class.return_value.chat.completions.create
+        broken = small_cv_output(experience='Trabajé en ACME', certificates=None)
+        del broken['projects']
+        fixed = small_cv_output()
+        create.side_effect = llm_replies(
+            json.dumps(broken),
+            json.dumps({key: fixed[key] for key in ('experience', 'projects', 'certificates')}),
+        )
+        before = metrics.validation_stats()
+
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        result = service.generate_cv()
+
+        assert create.call_count == 2
+        assert requested_keys(create.call_args) == ['experience', 'projects', 'certificates']
+        assert result['experience'] == fixed['experience']
+        assert list(result)[1:] == list(prompts.OUTPUT_KEYS)
+        assert service.from_ai is True and service.partial is False
+        stats = metrics.validation_stats()
+        assert stats['repaired'] == before['repaired'] + 1
+        assert stats['invalid_sections']['experience'] == (
+            before['invalid_sections'].get('experience', 0) + 1
+        )
+        # Reparado = respuesta completa de la IA: se cachea
+        assert CVGeneratorService(full_user_profile, 'Python Dev', 'es').generate_cv() == result
+
+    @patch('cv_generator.client.OpenAI')
+    def test_sections_that_stay_invalid_come_from_the_local_engine(
+        self, mock_openai_class, full_user_profile
+    ):
+        create = mock_openai_class.return_value.chat.completions.create
+        create.side_effect = llm_replies(
+            json.dumps(small_cv_output(job_title_target='')),
+            json.dumps({'job_title_target': ['no es un texto']}),
+            json.dumps(small_cv_output()),
+        )
+        before = metrics.validation_stats()
+
+        service = CVGeneratorService(full_user_profile, 'Django Developer', 'es')
+        result = service.generate_cv()
+
+        assert result['job_title_target'] == 'Django Developer'
+        assert result['profile_summary'] == small_cv_output()['profile_summary'].strip()
+        assert service.partial is True
+        assert metrics.validation_stats()['repair_failed'] == before['repair_failed'] + 1
+
+        # El CV parcial no se cachea: la siguiente petición vuelve a llamar a la IA
+        again = CVGeneratorService(full_user_profile, 'Django Developer', 'es')
+        again.generate_cv()
+        assert again.cache_hit is False
+        assert create.call_count == 3
+
+    @patch('cv_generator.client.OpenAI')
+    def test_truncated_json_keeps_the_completed_sections(
+        self, mock_openai_class, full_user_profile
+    ):
+        create = mock_openai_class.return_value.chat.completions.create
+        cv = small_cv_output()
+        text = json.dumps(cv)
+        truncated = text[: text.index('"projects"') + 20]
+        create.side_effect = llm_replies(
+            truncated, json.dumps({'projects': cv['projects'], 'certificates': cv['certificates']})
+        )
+
+        result = CVGeneratorService(full_user_profile, 'Python Dev', 'es').generate_cv()
+
+        assert requested_keys(create.call_args) == ['projects', 'certificates']
+        assert result['projects'] == cv['projects']
+        assert result['experience'] == cv['experience']
+
+    @override_settings(AI_STRUCTURED_OUTPUT=True)
+    @patch('cv_generator.client.OpenAI')
+    def test_structured_output_sends_the_strict_schema(self, mock_openai_class, full_user_profile):
+        create = mock_openai_class.return_value.chat.completions.create
+        create.side_effect = llm_replies(json.dumps(small_cv_output()))
+
+        CVGeneratorService(full_user_profile, 'Python Dev', 'es').generate_cv()
+
+        response_format = create.call_args.kwargs['response_format']
+        assert response_format['type'] == 'json_schema'
+        assert response_format['json_schema']['schema']['required'] == list(prompts.OUTPUT_KEYS)
+
+    @patch('cv_generator.client.AsyncOpenAI')
+    def test_async_path_repairs_too(self, mock_async_openai, full_user_profile):
+        replies = iter(
+            llm_replies(
+                json.dumps(small_cv_output(selected_skills=None)),
+                json.dumps({'selected_skills': ['Python']}),
+            )
+        )
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            return next(replies)
+
+        mock_async_openai.return_value.chat.completions.create = create
+
+        result = async_to_sync(CVGeneratorService(full_user_profile, 'Dev', 'es').agenerate_cv)()
+
+        assert len(calls) == 2
+        assert result['selected_skills'] == ['Python']
+
+    @patch('cv_generator.client.OpenAI')
+    def test_stream_resends_only_repaired_sections(self, mock_openai_class, full_user_profile):
+        cv = small_cv_output(profile_summary='Resumen')
+        text = json.dumps({**cv, 'education': 'UPM'})
+        chunks = []
+        for start in range(0, len(text), 7):
+            chunk = MagicMock(usage=None)
+            chunk.choices[0].delta.content = text[start : start + 7]
+            chunks.append(chunk)
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(chunks)
+        create = mock_openai_class.return_value.chat.completions.create
+        create.side_effect = [stream, *llm_replies(json.dumps({'education': cv['education']}))]
+
+        events = list(CVGeneratorService(full_user_profile, 'Dev', 'es').stream_cv())
+
+        sections = [data['key'] for name, data in events if name == 'section']
+        assert sections == ['profile', *prompts.OUTPUT_KEYS, 'education']
+        assert events[-1][1]['structured_cv_data']['education'] == cv['education']
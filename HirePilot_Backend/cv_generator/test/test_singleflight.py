@@ -0,0 +1,154 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+
+from cv_generator import singleflight
+from cv_generator.checks import check_single_flight_cache
+from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import small_cv_output
+
+PROFILE = {
+    'personal_info': {'firstName': 'Ana', 'profession': 'Backend Developer'},
+    'experience': [],
+    'education': [],
+    'skills': ['Python', 'Django'],
+    'projects': [],
+    'languages': [],
+    'certificates': [],
+}
+
+
+@pytest.fixture(autouse=True)
+def ai_enabled():
+    # Sin DB: el perfil va ya cargado y no consultamos el almacén de ofertas
+    with override_settings(OPENAI_API_KEY='sk-fake-key', JOB_POSTING_STORE_ENABLED=False):
+        yield
+
+
+def service(job='Python Dev'):
+    return CVGeneratorService(None, job, 'es', user_data=PROFILE)
+
+
+def slow_llm(mock_openai_class, delay=0.3, error=None):
+    """LLM simulado que tarda `delay` segundos y cuenta las llamadas."""
+    calls = []
+
+    def create(**kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        if error:
+            raise error
+        completion = MagicMock()
+        completion.choices[0].message.content = json.dumps(small_cv_output(job_title_target='Dev'))
+        return completion
+
+    mock_openai_class.return_value.chat.completions.create.side_effect = create
+    return calls
+
+
+class TestSingleFlight:
+    @patch('cv_generator.client.OpenAI')
+    def test_concurrent_identical_requests_share_one_llm_call(self, mock_openai_class):
+        calls = slow_llm(mock_openai_class)
+        services = [service() for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda s: s.generate_cv(), services))
+
+        assert len(calls) == 1
+        assert all(result == results[0] for result in results)
+        assert results[0]['job_title_target'] == 'Dev'
+        assert sorted(s.cache_status for s in services) == ['COALESCED'] * 3 + ['MISS']
+        assert all(s.from_ai for s in services)
+
+    @patch('cv_generator.client.OpenAI')
+    def test_different_requests_are_not_coalesced(self, mock_openai_class):
+        calls = slow_llm(mock_openai_class, delay=0.1)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda job: service(job).generate_cv(), ['Python Dev', 'Java Dev']))
+
+        assert len(calls) == 2
+
+    @patch('cv_generator.client.OpenAI')
+    def test_followers_get_the_leaders_fallback(self, mock_openai_class):
+        calls = slow_llm(mock_openai_class, error=Exception('OpenAI is down'))
+        services = [service() for _ in range(3)]
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(lambda s: s.generate_cv(), services))
+
+        assert len(calls) == 1
+        assert all(result['job_title_target'] == 'Python Dev' for result in results)
+        assert not any(s.from_ai for s in services)
+
+    def test_follower_takes_over_if_the_leader_dies(self):
+        follower = service()
+        key = follower._result_cache_key(PROFILE)
+        assert singleflight.acquire(key)
+        # El líder muere sin publicar: su lock desaparece
+        threading.Timer(0.2, singleflight.release, args=[key]).start()
+
+        result = follower._single_flight(key, lambda: 'generado por el seguidor')
+
+        assert result == 'generado por el seguidor'
+        assert follower.coalesced is False
+
+    @override_settings(CV_SINGLE_FLIGHT_ENABLED=False)
+    @patch('cv_generator.client.OpenAI')
+    def test_can_be_disabled(self, mock_openai_class):
+        calls = slow_llm(mock_openai_class, delay=0.1)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda s: s.generate_cv(), [service(), service()]))
+
+        assert len(calls) == 2
+
+    @patch('cv_generator.client.AsyncOpenAI')
+    def test_async_requests_are_coalesced(self, mock_async_openai):
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            completion = MagicMock()
+            completion.choices[0].message.content = json.dumps(
+                small_cv_output(job_title_target='Dev')
+            )
+            return completion
+
+        mock_async_openai.return_value.chat.completions.create = create
+        services = [service() for _ in range(3)]
+
+        async def run():
+            return await asyncio.gather(*(s.agenerate_cv() for s in services))
+
+        results = async_to_sync(run)()
+
+        assert len(calls) == 1
+        assert all(result['job_title_target'] == 'Dev' for result in results)
+        assert sum(s.coalesced for s in services) == 2
+
+
+class TestSingleFlightCacheCheck:
+    @override_settings(DEBUG=False)
+    def test_local_memory_warns_in_production(self):
+        assert [w.id for w in check_single_flight_cache(None)] == ['cv_generator.W002']
+
+    @override_settings(
+        DEBUG=False,
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'},
+        },
+        CV_SINGLE_FLIGHT_CACHE='shared',
+    )
+    def test_shared_cache_passes(self):
+        assert check_single_flight_cache(None) == []
@@ -0,0 +1,152 @@
+import time
+
+import pytest
+from django.contrib.auth.models import update_last_login
+from django.core.cache import caches
+from django.test import override_settings
+from django.utils import timezone
+
+from accounts.models import Project, Skill, WorkAchievement, WorkExperience
+from cv_generator.checks import check_profile_snapshot_cache
+from cv_generator.snapshot import (
+    get_profile_snapshot,
+    get_profile_version,
+    load_profile_snapshot,
+    snapshot_cache_stats,
+)
+
+# Perfil, skills, experiencias, logros, educación, tabla intermedia
+# proyecto-skill, proyectos, idiomas y certificados.
+SNAPSHOT_QUERIES = 9
+
+
+@pytest.mark.django_db
+class TestProfileSnapshot:
+    def test_snapshot_includes_achievements(self, full_user_profile):
+        """Los logros de cada experiencia ya no se pierden por el camino."""
+        exp = WorkExperience.objects.get(user=full_user_profile)
+        WorkAchievement.objects.create(
+            work_experience=exp, description='Reduje la latencia un 40%', keywords=['latencia']
+        )
+
+        data = load_profile_snapshot(full_user_profile)
+
+        assert data['experience'][0]['achievements'] == [
+            {'description': 'Reduje la latencia un 40%', 'keywords': ['latencia']}
+        ]
+        assert data['projects'][0]['technologies'] == ['Python']
+
+    def test_query_count_is_constant(self, full_user_profile, django_assert_num_queries):
+        """
+        El número de consultas NO debe crecer con el tamaño del perfil
+        (protege contra el N+1 de Project.skills).
+        """
+        with django_assert_num_queries(SNAPSHOT_QUERIES):
+            load_profile_snapshot(full_user_profile)
+
+        skills = [
+            Skill.objects.create(user=full_user_profile, name=f'Skill {i}') for i in range(10)
+        ]
+        for i in range(20):
+            proj = Project.objects.create(
+                user=full_user_profile, title=f'Proyecto {i}', role='Dev', description='Desc'
+            )
+            proj.skills.add(*skills[: i % 5 + 1])
+            exp = WorkExperience.objects.create(
+                user=full_user_profile,
+                company=f'Empresa {i}',
+                role='Dev',
+                start_date=timezone.now().date(),
+            )
+            WorkAchievement.objects.create(work_experience=exp, description=f'Logro {i}')
+
+        with django_assert_num_queries(SNAPSHOT_QUERIES):
+            data = load_profile_snapshot(full_user_profile)
+
+        assert len(data['projects']) == 21
+        assert len(data['experience']) == 21
+
+
+@pytest.mark.django_db
+class TestProfileSnapshotCache:
+    def test_second_read_is_served_from_cache(self, full_user_profile, django_assert_num_queries):
+        """Si el perfil no cambia, la segunda lectura no toca la base de datos."""
+        before = snapshot_cache_stats()
+        get_profile_snapshot(full_user_profile)
+
+        with django_assert_num_queries(0):
+            data = get_profile_snapshot(full_user_profile)
+
+        after = snapshot_cache_stats()
+        assert data['personal_info']['firstName'] == 'Juan'
+        assert after['misses'] - before['misses'] == 1
+        assert after['hits'] - before['hits'] == 1
+
+    def test_profile_changes_invalidate_snapshot(self, full_user_profile):
+        """Cada signal (save, delete, m2m) debe forzar una recarga."""
+        get_profile_snapshot(full_user_profile)
+
+        exp = WorkExperience.objects.get(user=full_user_profile)
+        WorkAchievement.objects.create(work_experience=exp, description='Nuevo logro')
+        data = get_profile_snapshot(full_user_profile)
+        assert data['experience'][0]['achievements'][0]['description'] == 'Nuevo logro'
+
+        proj = Project.objects.get(user=full_user_profile)
+        proj.skills.add(Skill.objects.get(user=full_user_profile, name='Django'))
+        data = get_profile_snapshot(full_user_profile)
+        assert data['projects'][0]['technologies'] == ['Python', 'Django']
+
+        Skill.objects.filter(user=full_user_profile, name='Django').delete()
+        proj.skills.clear()
+        data = get_profile_snapshot(full_user_profile)
+        assert data['skills'] == ['Python']
+        assert data['projects'][0]['technologies'] == []
+
+        full_user_profile.first_name = 'Juana'
+        full_user_profile.save()
+        data = get_profile_snapshot(full_user_profile)
+        assert data['personal_info']['firstName'] == 'Juana'
+
+    def test_saves_outside_the_snapshot_keep_it(self, full_user_profile):
+        """Un login (last_login) o un cambio de plan no tiran el snapshot ni los CVs cacheados."""
+        version = get_profile_version(full_user_profile.pk)
+
+        update_last_login(None, full_user_profile)
+        full_user_profile.plan = 'PRO'
+        full_user_profile.save(update_fields=['plan'])
+        assert get_profile_version(full_user_profile.pk) == version
+
+        full_user_profile.last_name = 'Pérez'
+        full_user_profile.save(update_fields=['last_name', 'last_login'])
+        assert get_profile_version(full_user_profile.pk) != version
+
+    def test_local_memory_cache_expires_quickly(self, full_user_profile):
+        """Con LocMem otro proceso no ve la invalidación: el snapshot debe caducar pronto."""
+        get_profile_snapshot(full_user_profile)
+
+        cache = caches['default']
+        key = next(k for k in cache._expire_info if 'cv:profile_snapshot:' in k)
+        assert cache._expire_info[key] - time.time() <= 60
+
+
+class TestProfileSnapshotCheck:
+    @override_settings(DEBUG=False)
+    def test_local_memory_warns_in_production(self):
+        warnings = check_profile_snapshot_cache(None)
+        assert [w.id for w in warnings] == ['cv_generator.W003']
+        assert not warnings[0].is_serious()
+
+    @override_settings(DEBUG=True)
+    def test_local_memory_is_fine_in_development(self):
+        assert check_profile_snapshot_cache(None) == []
+
+    @override_settings(
+        DEBUG=False,
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'},
+        },
+        PROFILE_SNAPSHOT_CACHE='shared',
+    )
+    def test_shared_cache_passes(self):
+        assert check_profile_snapshot_cache(None) == []
@@ -0,0 +1,128 @@
+import time
+
+from cv_generator.benchmarks import ranking_profile
+from cv_generator.preprocessing import clean_job_description
+from cv_generator.tailoring import extract_job_title, tailor_cv
+
+JOB = clean_job_description(
+    'Oferta: Backend Developer Python - Equipo de pagos (remoto)\n'
+    'Requisitos:\n'
+    '- Python y Django\n'
+    '- PostgreSQL\n'
+    '- Docker'
+)
+
+
+def experience(company, role, description, achievements=(), start='2020-01-01', end=None):
+    return {
+        'company': company,
+        'role': role,
+        'start_date': start,
+        'end_date': end,
+        'current_job': end is None,
+        'description': description,
+        'location': 'Madrid',
+        'achievements': [{'description': a, 'keywords': []} for a in achievements],
+    }
+
+
+def profile(**overrides):
+    return {
+        'personal_info': {'profession': 'Backend Developer'},
+        'skills': ['Excel', 'Docker', 'React', 'Python', 'Django'],
+        'experience': [
+            experience(
+                'Tech',
+                'Developer',
+                'Mantenimiento de la intranet. APIs REST con Django.',
+                ['Reduje la latencia un 40% con caché en PostgreSQL'],
+            ),
+            experience(
+                'Shop',
+                'Dependiente',
+                'Tienda online en React.',
+                start='2017-01-01',
+                end='2019-01-01',
+            ),
+            experience('Bar', 'Camarero', 'Turno de noche.', start='2015-01-01', end='2016-01-01'),
+        ],
+        'education': [],
+        'projects': [
+            {'title': 'Blog', 'role': '', 'description': 'Blog personal.', 'link': ''},
+            {
+                'title': 'Pagos',
+                'role': 'Lead',
+                'description': 'Pasarela de pagos. Hecha en Django. Con tests.',
+                'technologies': ['React', 'Django'],
+                'link': 'https://example.com',
+            },
+        ],
+        'languages': [{'name': 'Inglés', 'proficiency': 'C1', 'certificate_by': ''}],
+        'certificates': [],
+        **overrides,
+    }
+
+
+class TestTailoring:
+    def test_job_title_comes_from_the_posting(self):
+        assert extract_job_title(JOB) == 'Backend Developer Python'
+        assert extract_job_title('We are hiring') == 'We are hiring'
+        assert len(extract_job_title('Developer ' * 20)) <= 80
+
+    def test_skills_ordered_by_overlap_with_the_posting(self):
+        cv = tailor_cv(profile(), JOB, 'es')
+
+        assert cv['selected_skills'][:3] == ['Docker', 'Python', 'Django']
+        assert set(cv['selected_skills']) == {'Excel', 'Docker', 'React', 'Python', 'Django'}
+
+    def test_irrelevant_experience_is_dropped_and_order_kept(self):
+        cv = tailor_cv(profile(), JOB, 'es')
+
+        # Ni Shop ni Bar coinciden con la oferta: se mantiene la más reciente (mínimo de 2)
+        assert [e['company'] for e in cv['experience']] == ['Tech', 'Shop']
+        assert cv['experience'][0]['date_range'] == '2020-01-01 - Actualidad'
+        assert cv['experience'][1]['date_range'] == '2017-01-01 - 2019-01-01'
+
+    def test_bullets_are_the_strongest_existing_sentences(self):
+        bullets = tailor_cv(profile(), JOB, 'es')['experience'][0]['enhanced_description']
+
+        assert bullets == [
+            'Reduje la latencia un 40% con caché en PostgreSQL',
+            'APIs REST con Django.',
+            'Mantenimiento de la intranet.',
+        ]
+
+    def test_projects_by_relevance_with_matching_tech_first(self):
+        projects = tailor_cv(profile(), JOB, 'es')['projects']
+
+        assert [p['title'] for p in projects] == ['Pagos']
+        assert projects[0]['tech_stack'] == ['Django', 'React']
+        assert projects[0]['description'] == 'Pasarela de pagos. Hecha en Django.'
+        assert projects[0]['url'] == 'https://example.com'
+
+    def test_summary_and_languages_follow_the_output_language(self):
+        cv = tailor_cv(profile(), JOB, 'en')
+
+        assert cv['profile_summary'].startswith('Backend Developer with ')
+        assert 'Key skills for this role: Docker, Python, Django.' in cv['profile_summary']
+        assert cv['experience'][0]['date_range'].endswith(' - Present')
+        assert cv['selected_languages'] == [{'name': 'Inglés', 'level': 'C1'}]
+
+    def test_empty_profile(self):
+        cv = tailor_cv(
+            {'personal_info': {}, 'skills': [], 'experience': [], 'education': []}, JOB, 'fr'
+        )
+
+        assert cv['job_title_target'] == 'Backend Developer Python'
+        assert cv['profile_summary'] == 'Backend Developer Python.'
+        assert cv['experience'] == cv['projects'] == cv['selected_skills'] == []
+
+    def test_is_deterministic_and_fast_on_large_profiles(self):
+        large = ranking_profile()
+
+        start = time.perf_counter()
+        first = tailor_cv(large, JOB, 'es')
+        elapsed = time.perf_counter() - start
+
+        assert tailor_cv(large, JOB, 'es') == first
+        assert elapsed < 0.5
@@ -0,0 +1,189 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cv_generator import throttling
+from cv_generator.checks import check_rate_limit_cache
+from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import small_cv_output
+
+
+@pytest.fixture
+def strict_limits():
+    """FREE: 2 generaciones seguidas y después una por minuto; PRO sin límite de ritmo."""
+    with override_settings(
+        OPENAI_API_KEY=None,
+        CV_RATE_LIMITS={'FREE': '1/minute', 'PRO': ''},
+        CV_RATE_LIMIT_BURST={'FREE': 2},
+        CV_DAILY_TOKEN_QUOTAS={'FREE': 1000, 'PRO': 0},
+    ):
+        yield
+
+
+def usage(prompt, completion):
+    return MagicMock(prompt_tokens=prompt, completion_tokens=completion)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('strict_limits')
+class TestThrottling:
+    def generate(self, api_client, **data):
+        return api_client.post(
+            reverse('generate-cv'), {'job_description': 'Python Dev', **data}, format='json'
+        )
+
+    def test_burst_then_429_with_retry_after(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        assert self.generate(api_client).status_code == status.HTTP_200_OK
+        assert self.generate(api_client).status_code == status.HTTP_200_OK
+        response = self.generate(api_client)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.data['detail'].code == 'rate_limited'
+        assert 0 < int(response['Retry-After']) <= 60
+
+    def test_bucket_refills_over_time(self, full_user_profile):
+        with patch('cv_generator.throttling.time.time', return_value=1000.0):
+            assert throttling.take_tokens(full_user_profile, 2) is None
+            assert throttling.take_tokens(full_user_profile) == pytest.approx(60)
+        with patch('cv_generator.throttling.time.time', return_value=1030.0):
+            assert throttling.take_tokens(full_user_profile) == pytest.approx(30)
+        with patch('cv_generator.throttling.time.time', return_value=1060.0):
+            assert throttling.take_tokens(full_user_profile) is None
+
+    def test_limits_depend_on_the_plan(self, api_client, full_user_profile):
+        full_user_profile.plan = 'PRO'
+        full_user_profile.save()
+        api_client.force_authenticate(user=full_user_profile)
+
+        for _ in range(5):
+            assert self.generate(api_client).status_code == status.HTTP_200_OK
+
+    def test_invalid_requests_are_not_charged(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        for _ in range(3):
+            response = api_client.post(reverse('generate-cv'), {}, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert self.generate(api_client).status_code == status.HTTP_200_OK
+
+    def test_languages_and_batch_items_cost_one_each(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = self.generate(api_client, languages=['es', 'en'])
+        assert response.status_code == status.HTTP_200_OK
+
+        response = api_client.post(
+            reverse('generate-cv-batch'), {'items': [{'job_description': 'Dev'}]}, format='json'
+        )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @override_settings(CV_RATE_LIMIT_BURST={'FREE': 5})
+    def test_each_batch_item_takes_one_token(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        items = [{'job_description': f'Dev {i}'} for i in range(3)]
+
+        response = api_client.post(reverse('generate-cv-batch'), {'items': items}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        # Quedan 2 de las 5 fichas
+        assert throttling.take_tokens(full_user_profile, 2) is None
+        assert throttling.take_tokens(full_user_profile) == pytest.approx(60, abs=5)
+
+    def test_requests_larger_than_the_burst_are_rejected(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        payload = {'job_description': 'Dev', 'languages': ['es', 'en', 'fr']}
+        before = throttling.throttle_stats()
+
+        response = api_client.post(reverse('generate-cv'), payload, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['detail'].code == 'exceeds_burst'
+        assert throttling.throttle_stats()['exceeds_burst'] - before['exceeds_burst'] == 1
+        # No ha gastado fichas: la ráfaga entera sigue disponible
+        assert throttling.take_tokens(full_user_profile, 2) is None
+
+    def test_batches_larger_than_the_burst_fail_validation(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        items = [{'job_description': f'Dev {i}'} for i in range(3)]
+
+        response = api_client.post(reverse('generate-cv-batch'), {'items': items}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'como mucho 2 ofertas' in str(response.data['items'])
+        assert throttling.max_cost(full_user_profile) == 2
+        assert throttling.take_tokens(full_user_profile, 2) is None
+
+    @override_settings(CV_RATE_LIMIT_ENABLED=False)
+    def test_can_be_disabled(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+
+        for _ in range(4):
+            assert self.generate(api_client).status_code == status.HTTP_200_OK
+
+    def test_daily_token_quota(self, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        throttling.record_token_usage(full_user_profile, usage(600, 300))
+        assert self.generate(api_client).status_code == status.HTTP_200_OK
+
+        throttling.record_token_usage(full_user_profile, usage(50, 50))
+        assert throttling.tokens_used_today(full_user_profile.pk) == 1000
+        response = self.generate(api_client)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.data['detail'].code == 'quota_exceeded'
+        assert 0 < int(response['Retry-After']) <= 60 * 60 * 24
+
+    @patch('cv_generator.client.OpenAI')
+    def test_provider_usage_counts_towards_the_quota(self, mock_openai_class, full_user_profile):
+        completion = MagicMock(usage=usage(120, 80))
+        completion.choices[0].message.content = json.dumps(small_cv_output(job_title_target='Dev'))
+        mock_openai_class.return_value.chat.completions.create.return_value = completion
+
+        with override_settings(OPENAI_API_KEY='sk-fake-key'):
+            CVGeneratorService(full_user_profile, 'Python Dev', 'es').generate_cv()
+
+        assert throttling.tokens_used_today(full_user_profile.pk) == 200
+
+    def test_async_view_is_limited_too(self, client, full_user_profile):
+        token = RefreshToken.for_user(full_user_profile).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+        def post():
+            return client.post(
+                reverse('generate-cv-asgi'),
+                json.dumps({'job_description': 'Python Dev'}),
+                content_type='application/json',
+                **headers,
+            )
+
+        assert post().status_code == status.HTTP_200_OK
+        assert post().status_code == status.HTTP_200_OK
+        response = post()
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 0 < int(response['Retry-After']) <= 60
+        assert 'Vuelve a intentarlo' in response.json()['detail']
+
+
+class TestRateLimitCacheCheck:
+    @override_settings(DEBUG=False)
+    def test_local_memory_warns_in_production(self):
+        assert [w.id for w in check_rate_limit_cache(None)] == ['cv_generator.W001']
+
+    @override_settings(
+        DEBUG=False,
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'},
+        },
+        CV_RATE_LIMIT_CACHE='shared',
+    )
+    def test_shared_cache_passes(self):
+        assert check_rate_limit_cache(None) == []
@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import openai
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from cv_generator import metrics, resilience, tracing
+from cv_generator.services import CVGeneratorService
+from cv_generator.test.factories import small_cv_output
+
+
+def generations(outcome, model):
+    return metrics.generation_stats()['generations'].get((outcome, model), 0)
+
+
+def stage_count(stage):
+    histogram = metrics.generation_stats()['stage_seconds'].get((stage,))
+    return histogram['count'] if histogram else 0
+
+
+class TestGenerationTrace:
+    def test_overlapping_calls_of_a_stage_count_wall_time_once(self):
+        trace = tracing.GenerationTrace('modelo')
+
+        def call():
+            with trace.stage('llm'):
+                time.sleep(0.1)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert 0.1 <= trace.stages['llm'] < 0.2
+
+    def test_stages_accumulate(self):
+        trace = tracing.GenerationTrace(None)
+        for _ in range(2):
+            with trace.stage('parse'):
+                time.sleep(0.01)
+
+        assert trace.stages['parse'] >= 0.02
+        assert trace.model == 'none'
+
+    def test_first_fallback_reason_wins(self):
+        trace = tracing.GenerationTrace('modelo')
+        trace.fell_back('deadline_exceeded')
+        trace.fell_back('repair_failed')
+
+        assert trace.fallback_reason == 'deadline_exceeded'
+
+    @pytest.mark.parametrize(
+        'error, reason',
+        [
+            (resilience.DeadlineExceeded(), 'deadline_exceeded'),
+            (resilience.CircuitOpenError(), 'circuit_open'),
+            (openai.APITimeoutError(request=MagicMock()), 'timeout'),
+            (openai.APIConnectionError(request=MagicMock()), 'connection_error'),
+            (json.JSONDecodeError('x', '', 0), 'invalid_json'),
+            (RuntimeError(), 'error'),
+        ],
+    )
+    def test_fallback_reasons(self, error, reason):
+        assert tracing.fallback_reason(error) == reason
+
+    def test_finish_records_once(self):
+        trace = tracing.GenerationTrace('modelo-traza')
+        trace.finish('ai')
+        trace.finish('ai')
+
+        assert generations('ai', 'modelo-traza') == 1
+
+
+@pytest.mark.django_db
+class TestServiceInstrumentation:
+    @override_settings(OPENAI_API_KEY='sk-fake-key', AI_MODEL='modelo-test')
+    @patch('cv_generator.client.OpenAI')
+    def test_generation_records_stages_tokens_and_model(self, mock_openai_class, full_user_profile):
+        completion = MagicMock()
+        completion.usage = MagicMock(prompt_tokens=1200, completion_tokens=300)
+        completion.usage.prompt_tokens_details.cached_tokens = 1000
+        completion.choices[0].message.content = json.dumps(small_cv_output())
+        mock_openai_class.return_value.chat.completions.create.return_value = completion
+        before = generations('ai', 'modelo-test')
+
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        service.generate_cv()
+
+        assert set(service.trace.stages) == {
+            'snapshot',
+            'prompt',
+            'llm',
+            'parse',
+            'validate',
+            'merge',
+            'history',
+        }
+        assert service.trace.tokens == {'prompt': 1200, 'completion': 300, 'cached_prompt': 1000}
+        assert generations('ai', 'modelo-test') == before + 1
+        tokens = metrics.generation_stats()['generation_tokens'][('cached_prompt', 'modelo-test')]
+        assert tokens['count'] >= 1
+
+        # Segunda vez: del caché de CVs, sin etapas de IA
+        cached = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        cached.generate_cv()
+        assert cached.trace.finished and cached.outcome == 'cache'
+        assert 'llm' not in cached.trace.stages
+
+    @override_settings(OPENAI_API_KEY='sk-fake-key')
+    @patch('cv_generator.client.OpenAI')
+    def test_fallback_reason_is_recorded(self, mock_openai_class, full_user_profile):
+        mock_openai_class.return_value.chat.completions.create.side_effect = (
+            resilience.DeadlineExceeded('sin tiempo')
+        )
+        before = metrics.generation_stats()['fallbacks'].get(('deadline_exceeded',), 0)
+
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+        service.generate_cv()
+
+        assert service.outcome == 'local'
+        assert service.trace.fallback_reason == 'deadline_exceeded'
+        assert 'local' in service.trace.stages
+        fallbacks = metrics.generation_stats()['fallbacks']
+        assert fallbacks[('deadline_exceeded',)] == before + 1
+
+    @override_settings(OPENAI_API_KEY=None)
+    def test_errors_are_counted_as_such(self, full_user_profile):
+        before = stage_count('snapshot')
+        service = CVGeneratorService(full_user_profile, 'Python Dev', 'es')
+
+        with patch.object(service, '_merge', side_effect=RuntimeError('boom')):
+            with pytest.raises(RuntimeError):
+                service.generate_cv()
+
+        assert service.trace.finished
+        assert stage_count('snapshot') == before + 1
+        assert metrics.generation_stats()['generations'][('error', service.trace.model)] >= 1
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    url = '/api/cv/metrics/'
+
+    def test_disabled_without_token(self, client):
+        with override_settings(METRICS_TOKEN=''):
+            assert client.get(self.url).status_code == status.HTTP_404_NOT_FOUND
+
+    @override_settings(
+        METRICS_TOKEN='secreto',
+        AI_MODEL_PRICES={'modelo-caro': {'prompt': 10.0, 'completion': 30.0}},
+    )
+    def test_exports_the_cost_by_model(self, client):
+        metrics.record_llm_usage(
+            MagicMock(prompt_tokens=1000, completion_tokens=100, prompt_tokens_details=None),
+            'modelo-caro',
+        )
+
+        response = client.get(reverse('cv-metrics'), HTTP_AUTHORIZATION='Bearer secreto')
+
+        samples = dict(
+            line.rsplit(' ', 1) for line in response.content.decode().splitlines() if line[0] != '#'
+        )
+        assert (
+            float(samples['hirepilot_cv_generation_cost_usd_total{model="modelo-caro"}']) >= 0.013
+        )
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_requires_the_token(self, client):
+        response = client.get(self.url, HTTP_AUTHORIZATION='Bearer otro')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @override_settings(METRICS_TOKEN='secreto', OPENAI_API_KEY=None)
+    def test_prometheus_text_format(self, client, api_client, full_user_profile):
+        api_client.force_authenticate(user=full_user_profile)
+        api_client.post(reverse('generate-cv'), {'job_description': 'Python Dev'}, format='json')
+
+        response = client.get(reverse('cv-metrics'), HTTP_AUTHORIZATION='Bearer secreto')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        body = response.content.decode()
+        assert '# TYPE hirepilot_cv_stage_seconds histogram' in body
+        assert 'hirepilot_cv_stage_seconds_bucket{stage="snapshot",le="+Inf"}' in body
+        assert 'hirepilot_cv_fallbacks_total{reason="no_api_key"}' in body
+        assert 'hirepilot_cv_llm_calls_total{outcome="ok"}' in body
+        assert 'hirepilot_cv_validations_total{outcome="repaired"}' in body
+        assert 'hirepilot_cv_result_cache_requests_total{result="miss"}' in body
+        assert 'hirepilot_cv_throttle_decisions_total{decision="allowed"}' in body
+        assert '# TYPE hirepilot_cv_generation_cost_usd_total counter' in body
+        # Cada línea de muestra es "nombre{etiquetas} valor"
+        for line in body.splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                assert name.startswith('hirepilot_cv_')
+                float(value.replace('+Inf', 'inf'))
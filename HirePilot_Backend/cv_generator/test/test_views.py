@@ -1,8 +1,14 @@
+import json
+from unittest.mock import MagicMock, patch
+
 import pytest
 from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
+from cv_generator.models import CVGeneration
+from cv_generator.test.factories import small_cv_output
+
 
 @pytest.mark.django_db
 class TestGenerateCVView:
@@ -40,3 +46,85 @@ class TestGenerateCVView:
 
         # Opcional: Puedes verificar que los datos estructurados no estén vacíos
         assert response.data['structured_cv_data'] is not None
+
+    @override_settings(OPENAI_API_KEY='sk-fake-key-for-testing')
+    @patch('cv_generator.client.OpenAI')
+    def test_generate_cv_cache_header(self, mock_openai_class, api_client, full_user_profile):
+        """La segunda petición idéntica sale del caché y lo indica en la cabecera."""
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_completion = MagicMock()
+        mock_completion.choices[0].message.content = json.dumps(
+            small_cv_output(job_title_target='Dev')
+        )
+        mock_client.chat.completions.create.return_value = mock_completion
+        api_client.force_authenticate(user=full_user_profile)
+        payload = {'job_description': 'We need a Python Expert.', 'language': 'en'}
+
+        first = api_client.post(self.get_url(), payload)
+        second = api_client.post(self.get_url(), payload)
+
+        assert first['X-CV-Cache'] == 'MISS'
+        assert second['X-CV-Cache'] == 'HIT'
+        assert second.data['structured_cv_data'] == first.data['structured_cv_data']
+        assert mock_client.chat.completions.create.call_count == 1
+        # Cada petición es una entrada del historial, pero el contenido se guarda una vez
+        entries = CVGeneration.objects.filter(
+            pk__in=[first.data['history_id'], second.data['history_id']]
+        )
+        assert [entry.outcome for entry in entries] == ['cache', 'ai']
+        assert len({entry.payload_id for entry in entries}) == 1
+
+    def test_generate_cv_stream_rejects_languages_and_async_mode(
+        self, api_client, full_user_profile
+    ):
+        """El streaming es de un solo idioma y sync: no ignora lo que no sabe hacer."""
+        api_client.force_authenticate(user=full_user_profile)
+        url = reverse('generate-cv-stream')
+
+        response = api_client.post(
+            url, {'job_description': 'Dev', 'languages': ['es', 'en']}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'languages' in response.data
+
+        response = api_client.post(url, {'job_description': 'Dev', 'mode': 'async'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'mode' in response.data
+
+    @override_settings(OPENAI_API_KEY='sk-fake-key-for-testing')
+    @patch('cv_generator.client.OpenAI')
+    def test_generate_cv_stream_emits_sections(
+        self, mock_openai_class, api_client, full_user_profile
+    ):
+        """El endpoint SSE envía cada sección según llega y un evento final 'done'."""
+        content = json.dumps(small_cv_output(job_title_target='Dev', profile_summary='Resumen'))
+        chunks = []
+        for start in range(0, len(content), 5):
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = content[start : start + 5]
+            chunks.append(chunk)
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        # Como openai.Stream: iterable y context manager (cierra la conexión)
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(chunks)
+        mock_client.chat.completions.create.return_value = stream
+        api_client.force_authenticate(user=full_user_profile)
+
+        response = api_client.post(
+            reverse('generate-cv-stream'), {'job_description': 'We need a Python Expert.'}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        body = b''.join(response.streaming_content).decode()
+        events = [block.split('\n', 1) for block in body.strip().split('\n\n')]
+        names = [name.removeprefix('event: ') for name, _ in events]
+        payloads = [json.loads(data.removeprefix('data: ')) for _, data in events]
+        sections = [p['key'] for name, p in zip(names, payloads) if name == 'section']
+        assert sections == ['profile', *small_cv_output()]
+        assert names[-1] == 'done'
+        assert payloads[-1]['job_title_extracted'] == 'Dev'
+        assert mock_client.chat.completions.create.call_args.kwargs['stream'] is True
+        stream.__exit__.assert_called_once()
@@ -0,0 +1,197 @@
+"""
+Límites de uso de la generación de CVs por usuario, según su plan (CustomUser.plan).
+
+- Ritmo (CV_RATE_LIMITS + CV_RATE_LIMIT_BURST): token bucket por usuario. Cada CV pedido
+  consume una ficha; el bucket se rellena al ritmo del plan ("20/hour") hasta la ráfaga
+  máxima. Se guarda como GCRA: un único valor por usuario (el instante en que el bucket
+  vuelve a estar lleno), así que cada comprobación es una lectura y una escritura.
+- Cuota diaria (CV_DAILY_TOKEN_QUOTAS): tokens del LLM consumidos hoy (UTC), contados con
+  el usage que devuelve el proveedor. Se comprueba antes de llamar a la IA, así que la
+  última generación del día puede pasarse un poco.
+
+El estado vive en el caché CV_RATE_LIMIT_CACHE: con Redis o Memcached lo comparten todos
+los workers y nodos (con LocMemCache cada proceso lleva su propia cuenta).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+# Lock por usuario para que dos workers no lean el mismo estado del bucket a la vez
+LOCK_TIMEOUT = 2  # Segundos (por si el proceso muere con el lock cogido)
+LOCK_ATTEMPTS = 20
+LOCK_PAUSE = 0.005  # Segundos
+QUOTA_KEY_TTL = 60 * 60 * 48  # El contador de un día sobrevive a ese día
+
+_stats_lock = threading.Lock()
+_stats = {'allowed': 0, 'rate_limited': 0, 'quota_exceeded': 0, 'exceeds_burst': 0}
+
+
+class RateLimited(Throttled):
+    default_detail = 'Demasiadas generaciones seguidas.'
+    extra_detail_singular = 'Vuelve a intentarlo en {wait} segundo.'
+    extra_detail_plural = 'Vuelve a intentarlo en {wait} segundos.'
+    default_code = 'rate_limited'
+
+
+class QuotaExceeded(RateLimited):
+    default_detail = 'Has agotado la cuota diaria de generación de tu plan.'
+    default_code = 'quota_exceeded'
+
+
+class ExceedsBurst(APIException):
+    """La petición cuesta más fichas de las que caben en el bucket: no pasaría nunca."""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'La petición pide más CVs de los que permite tu plan de una vez.'
+    default_code = 'exceeds_burst'
+
+
+def _cache():
+    return caches[settings.CV_RATE_LIMIT_CACHE]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def parse_rate(rate):
+    """'20/hour' -> (20, 3600). Mismo formato que los throttles de DRF."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def _plan(user):
+    return getattr(user, 'plan', None) or 'FREE'
+
+
+@contextmanager
+def _user_lock(cache, key):
+    lock_key = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            try:
+                yield
+            finally:
+                cache.delete(lock_key)
+            return
+        time.sleep(LOCK_PAUSE)
+    # Sin lock seguimos igual: en el peor caso se cuela alguna petición de más
+    logger.warning(f'No se pudo bloquear {key}; se comprueba el límite sin lock')
+    yield
+
+
+def max_cost(user):
+    """CVs que el plan del usuario permite en una sola petición (su ráfaga); None sin límite."""
+    if not settings.CV_RATE_LIMIT_ENABLED or not settings.CV_RATE_LIMITS.get(_plan(user)):
+        return None
+    return settings.CV_RATE_LIMIT_BURST.get(_plan(user), 1)
+
+
+def take_tokens(user, cost=1):
+    """
+    Consume `cost` fichas del bucket del usuario.
+    Devuelve None si hay fichas o los segundos que faltan para que las haya. Si `cost`
+    supera la ráfaga del plan no habrá fichas nunca: lanza ExceedsBurst (400).
+    """
+    rate = settings.CV_RATE_LIMITS.get(_plan(user))
+    if not rate:
+        return None
+    count, period = parse_rate(rate)
+    interval = period / count  # Segundos por ficha
+    burst = settings.CV_RATE_LIMIT_BURST.get(_plan(user), 1)
+    if cost > burst:
+        raise ExceedsBurst(
+            f'Esta petición cuenta como {cost} CVs y tu plan permite como mucho {burst} '
+            'seguidos. Divídela en peticiones más pequeñas.'
+        )
+
+    cache = _cache()
+    key = f'cv:ratelimit:{user.pk}'
+    with _user_lock(cache, key):
+        now = time.time()
+        full_at = max(cache.get(key) or now, now)
+        new_full_at = full_at + cost * interval
+        allowed_at = new_full_at - burst * interval
+        if now < allowed_at:
+            return allowed_at - now
+        cache.set(key, new_full_at, timeout=int(new_full_at - now) + 1)
+    return None
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def _quota_key(user_id, day):
+    return f'cv:tokens:{user_id}:{day.isoformat()}'
+
+
+def seconds_until_reset():
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    return (tomorrow - now).total_seconds()
+
+
+def tokens_used_today(user_id):
+    return _cache().get(_quota_key(user_id, _today()), 0)
+
+
+def record_token_usage(user, usage):
+    """Suma el usage de una respuesta del proveedor a la cuenta diaria del usuario."""
+    if user is None or usage is None:
+        return
+    tokens = int(usage.prompt_tokens or 0) + int(usage.completion_tokens or 0)
+    if not tokens:
+        return
+    cache = _cache()
+    key = _quota_key(user.pk, _today())
+    if cache.add(key, tokens, timeout=QUOTA_KEY_TTL):
+        return
+    try:
+        cache.incr(key, tokens)
+    except ValueError:
+        # Expulsado del caché entre el add y el incr
+        cache.add(key, tokens, timeout=QUOTA_KEY_TTL)
+
+
+def check_generation(user, cost=1):
+    """
+    Lanza QuotaExceeded o RateLimited (429 con Retry-After) si el usuario no puede
+    generar `cost` CVs ahora, o ExceedsBurst (400) si no podrá nunca en una sola petición.
+    La cuota va primero: si está agotada no gastamos fichas.
+    """
+    if not settings.CV_RATE_LIMIT_ENABLED:
+        return
+
+    quota = settings.CV_DAILY_TOKEN_QUOTAS.get(_plan(user), 0)
+    if quota and tokens_used_today(user.pk) >= quota:
+        _count('quota_exceeded')
+        raise QuotaExceeded(wait=seconds_until_reset())
+
+    try:
+        wait = take_tokens(user, cost)
+    except ExceedsBurst:
+        _count('exceeds_burst')
+        raise
+    if wait is not None:
+        _count('rate_limited')
+        raise RateLimited(wait=wait)
+    _count('allowed')
+
+
+def throttle_stats():
+    with _stats_lock:
+        return dict(_stats)
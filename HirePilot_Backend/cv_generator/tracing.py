@@ -0,0 +1,104 @@
+"""
+Instrumentación de cada generación de CV (una traza por CVGeneratorService).
+
+La traza mide cuánto tiempo pasa la petición en cada etapa (STAGES) y apunta los tokens
+del usage del proveedor, el modelo y, si el CV salió del motor local, por qué. Al terminar
+deja una línea en el log y lo acumula en metrics.py, de donde sale el endpoint de
+métricas en formato Prometheus (prometheus.py).
+
+Una etapa cuenta tiempo de reloj: si varias llamadas de la misma etapa se solapan (modo
+por secciones, hedging), el tiempo en que al menos una estaba en marcha cuenta una vez.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import openai
+
+from . import metrics, resilience
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('snapshot', 'prompt', 'llm', 'parse', 'validate', 'local', 'merge', 'history')
+
+
+def fallback_reason(error):
+    """Motivo (etiqueta de cardinalidad acotada) por el que la IA no dio el CV."""
+    if isinstance(error, resilience.DeadlineExceeded):
+        return 'deadline_exceeded'
+    if isinstance(error, resilience.CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, openai.APITimeoutError):
+        return 'timeout'
+    if isinstance(error, openai.APIConnectionError):
+        return 'connection_error'
+    if isinstance(error, openai.RateLimitError):
+        return 'rate_limited'
+    if isinstance(error, openai.APIStatusError):
+        return 'provider_error'
+    if isinstance(error, ValueError):
+        # json.JSONDecodeError o el JSON incompleto del streaming
+        return 'invalid_json'
+    return 'error'
+
+
+class GenerationTrace:
+    def __init__(self, model):
+        self.model = model or 'none'
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.tokens = {'prompt': 0, 'completion': 0, 'cached_prompt': 0}
+        self.fallback_reason = None
+        self.finished = False
+        self._lock = threading.Lock()
+        self._open = {}  # Etapa -> (llamadas en marcha, inicio de la más antigua)
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            running, since = self._open.get(name, (0, now))
+            self._open[name] = (running + 1, since)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            with self._lock:
+                running, since = self._open[name]
+                if running == 1:
+                    del self._open[name]
+                    self.stages[name] = self.stages.get(name, 0) + now - since
+                else:
+                    self._open[name] = (running - 1, since)
+
+    def add_usage(self, usage):
+        if usage is None:
+            return
+        with self._lock:
+            self.tokens['prompt'] += int(usage.prompt_tokens or 0)
+            self.tokens['completion'] += int(usage.completion_tokens or 0)
+            self.tokens['cached_prompt'] += metrics.cached_tokens(usage)
+
+    def fell_back(self, reason):
+        # Nos quedamos con el primer motivo: es el que provocó el respaldo
+        self.fallback_reason = self.fallback_reason or reason
+
+    def finish(self, outcome):
+        if self.finished:
+            return
+        self.finished = True
+        duration = time.perf_counter() - self.started
+        metrics.record_generation(
+            outcome, self.model, duration, self.stages, self.tokens, self.fallback_reason
+        )
+        stages = ' '.join(
+            f'{name}={self.stages[name] * 1000:.0f}ms' for name in STAGES if name in self.stages
+        )
+        logger.info(
+            f'Generación CV: resultado={outcome} modelo={self.model} '
+            f'total={duration * 1000:.0f}ms {stages} '
+            f'tokens={self.tokens["prompt"]}/{self.tokens["completion"]} '
+            f'(cacheados={self.tokens["cached_prompt"]}) respaldo={self.fallback_reason or "-"}'
+        )
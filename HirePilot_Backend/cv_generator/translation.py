@@ -0,0 +1,109 @@
+"""
+Textos libres de un CV ya generado: lo único que cambia de un idioma a otro.
+El resto (empresas, fechas, skills, enlaces, datos personales) se copia tal cual.
+"""
+
+import copy
+
+# Sección -> campos de texto libre de cada elemento (None: la sección es un texto)
+TRANSLATABLE_FIELDS = {
+    'job_title_target': None,
+    'profile_summary': None,
+    'experience': ('position', 'enhanced_description'),
+    'projects': ('role', 'description'),
+    'education': ('degree',),
+    'selected_languages': ('name', 'level'),
+}
+
+
+def extract_free_text(cv_data):
+    """Subconjunto del CV que hay que traducir, con la misma estructura."""
+    free_text = {}
+    for key, fields in TRANSLATABLE_FIELDS.items():
+        value = cv_data.get(key)
+        if fields is None:
+            if isinstance(value, str):
+                free_text[key] = value
+        elif isinstance(value, list):
+            free_text[key] = [
+                {field: item[field] for field in fields if field in item}
+                if isinstance(item, dict)
+                else {}
+                for item in value
+            ]
+    return free_text
+
+
+class IncompleteTranslation(ValueError):
+    """La traducción del LLM no trae todos los textos del original con la misma forma."""
+
+
+def _same_shape(original, translated):
+    if isinstance(original, str):
+        return isinstance(translated, str)
+    if isinstance(original, list):
+        return (
+            isinstance(translated, list)
+            and len(original) == len(translated)
+            and all(_same_shape(a, b) for a, b in zip(original, translated))
+        )
+    return False
+
+
+def missing_translations(free_text, translated):
+    """
+    Campos de free_text (extract_free_text) que la traducción no trae con la misma forma:
+    sección ausente, lista de otra longitud, campo que falta o texto vacío.
+    """
+    missing = []
+    for key, original in free_text.items():
+        value = translated.get(key) if isinstance(translated, dict) else None
+        if isinstance(original, str):
+            if not _same_shape(original, value) or (original.strip() and not value.strip()):
+                missing.append(key)
+            continue
+        if not isinstance(value, list) or len(value) != len(original):
+            missing.append(key)
+            continue
+        for index, (item, translated_item) in enumerate(zip(original, value)):
+            if not isinstance(translated_item, dict):
+                translated_item = {}
+            for field, text in item.items():
+                if not _same_shape(text, translated_item.get(field)) or (
+                    isinstance(text, str) and text.strip() and not translated_item[field].strip()
+                ):
+                    missing.append(f'{key}[{index}].{field}')
+    return missing
+
+
+def check_translation(free_text, translated):
+    """Lanza IncompleteTranslation si falta algún texto: un CV a medio traducir no sirve."""
+    missing = missing_translations(free_text, translated)
+    if missing:
+        raise IncompleteTranslation(f'Traducción incompleta: {", ".join(missing)}')
+
+
+def merge_translation(cv_data, translated):
+    """
+    Copia del CV con los textos traducidos. Lo que no encaje con el original
+    (claves inventadas, listas de otra longitud...) se queda sin traducir.
+    """
+    result = copy.deepcopy(cv_data)
+    for key, fields in TRANSLATABLE_FIELDS.items():
+        if key not in result or key not in translated:
+            continue
+        if fields is None:
+            if _same_shape(result[key], translated[key]):
+                result[key] = translated[key]
+            continue
+
+        items, translated_items = result[key], translated[key]
+        if not isinstance(translated_items, list) or len(items) != len(translated_items):
+            continue
+        for item, translated_item in zip(items, translated_items):
+            if not isinstance(item, dict) or not isinstance(translated_item, dict):
+                continue
+            for field in fields:
+                if field in item and _same_shape(item[field], translated_item.get(field)):
+                    item[field] = translated_item[field]
+    return result
@@ -1,7 +1,31 @@
 from django.urls import path
 
-from .views import GenerateCVView
+from .views import (
+    AsyncGenerateCVView,
+    CVHistoryDetailView,
+    CVHistoryListView,
+    CVHistoryPdfView,
+    CVPdfView,
+    GenerateCVBatchView,
+    GenerateCVStreamView,
+    GenerateCVView,
+    GenerationJobDetailView,
+    MetricsView,
+)
 
 urlpatterns = [
     path('generate/', GenerateCVView.as_view(), name='generate-cv'),
+    path('generate/batch/', GenerateCVBatchView.as_view(), name='generate-cv-batch'),
+    path('generate/stream/', GenerateCVStreamView.as_view(), name='generate-cv-stream'),
+    # Ruta nativa async: servir con un worker ASGI (ej: uvicorn server.asgi:application)
+    path('generate/asgi/', AsyncGenerateCVView.as_view(), name='generate-cv-asgi'),
+    path('jobs/<uuid:job_id>/', GenerationJobDetailView.as_view(), name='generation-job-detail'),
+    # CVs ya generados: listado paginado por cursor y descarga por id
+    path('history/', CVHistoryListView.as_view(), name='cv-history'),
+    path('history/<int:pk>/', CVHistoryDetailView.as_view(), name='cv-history-detail'),
+    # PDF renderizado en el servidor (mismas plantillas que el frontend)
+    path('pdf/', CVPdfView.as_view(), name='cv-pdf'),
+    path('history/<int:pk>/pdf/', CVHistoryPdfView.as_view(), name='cv-history-pdf'),
+    # Scrape de Prometheus (requiere METRICS_TOKEN)
+    path('metrics/', MetricsView.as_view(), name='cv-metrics'),
 ]
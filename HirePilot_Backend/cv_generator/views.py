@@ -1,20 +1,85 @@
-from rest_framework import status
+import hmac
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.text import slugify
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import generics, status
+from rest_framework.exceptions import APIException, AuthenticationFailed, Throttled
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import history, idempotency, prometheus, throttling
+from .batch import generate_batch
+from .jobs import enqueue_job
+from .models import CVGeneration, GenerationJob
+from .multilang import agenerate_languages, generate_languages
+from .pdf import FontError, cached_cv_pdf
+from .result_cache import CACHE_HEADER
+from .serializers import (
+    CVBatchGenerationRequestSerializer,
+    CVGenerationRequestSerializer,
+    CVHistoryDetailSerializer,
+    CVHistoryEntrySerializer,
+    CVPdfOptionsSerializer,
+    CVPdfRequestSerializer,
+    CVStreamRequestSerializer,
+    GenerationJobSerializer,
+)
+from .services import CVGeneratorService, format_cv_response
+
+logger = logging.getLogger(__name__)
 
-from .serializers import CVGenerationRequestSerializer
-from .services import CVGeneratorService
+
+def sse_event(event, data):
+    """Formatea un evento Server-Sent Events."""
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n'
 
 
 class GenerateCVView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotency.idempotent
     def post(self, request):
         serializer = CVGenerationRequestSerializer(data=request.data)
         if serializer.is_valid():
             job_desc = serializer.validated_data['job_description']
             language = serializer.validated_data.get('language', 'es')
+            languages = serializer.validated_data.get('languages')
+
+            # Límites del plan: 429 con Retry-After (cada idioma cuenta como un CV)
+            throttling.check_generation(request.user, cost=len(languages) if languages else 1)
+
+            # Modo asíncrono: encolamos y devolvemos el id para consultar después
+            if serializer.validated_data['mode'] == 'async':
+                job = enqueue_job(request.user, job_desc, language)
+                return Response(
+                    {'job_id': str(job.id), 'status': job.status},
+                    status=status.HTTP_202_ACCEPTED,
+                    headers={'Location': reverse('generation-job-detail', args=[job.id])},
+                )
+
+            # Varios idiomas: una variante por idioma en la misma respuesta
+            if languages:
+                try:
+                    return Response(generate_languages(request.user, job_desc, languages))
+                except Exception:
+                    logger.exception('Error generando CV en varios idiomas')
+                    return Response(
+                        {'error': 'Hubo un problema procesando la solicitud con la IA.'},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    )
 
             # Instanciamos el servicio
             generator = CVGeneratorService(
@@ -24,20 +89,295 @@ class GenerateCVView(APIView):
                 # Obtenemos el JSON estructurado (lógica de IA)
                 ai_result_json = generator.generate_cv()
                 # Devolvemos la respuesta al frontend
-                response_data = {
-                    'job_title_extracted': ai_result_json.get('job_title_target', 'N/A'),
-                    'structured_cv_data': ai_result_json,
-                }
+                response_data = format_cv_response(ai_result_json, generator.history_id)
 
                 # Cambiamos el status a 200 OK (ya que no estamos creando un recurso en BD)
-                return Response(response_data, status=status.HTTP_200_OK)
+                response = Response(response_data, status=status.HTTP_200_OK)
+                # Permite medir la tasa de aciertos del caché de CVs
+                response[CACHE_HEADER] = generator.cache_status
+                return response
 
-            except Exception as e:
+            except Exception:
                 # Aquí loggeamos el error real en servidor
-                print(f'Error generando CV: {str(e)}')
+                logger.exception('Error generando CV')
                 return Response(
                     {'error': 'Hubo un problema procesando la solicitud con la IA.'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class GenerateCVBatchView(APIView):
+    """
+    Un CV por cada oferta de la lista, en paralelo (hasta CV_BATCH_CONCURRENCY a la vez).
+    Siempre 200 si la petición es válida: cada elemento trae su propio status ('ok' o 'error').
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @idempotency.idempotent
+    def post(self, request):
+        serializer = CVBatchGenerationRequestSerializer(
+            data=request.data, context={'request': request}
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        items = serializer.validated_data['items']
+        throttling.check_generation(request.user, cost=len(items))
+        return Response(generate_batch(request.user, items))
+
+
+class GenerationJobDetailView(APIView):
+    """
+    Estado y resultado de una generación asíncrona.
+    Cada usuario solo ve sus propios trabajos; los caducados ya no existen (404).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(
+            GenerationJob, pk=job_id, user=request.user, expires_at__gt=timezone.now()
+        )
+        return Response(GenerationJobSerializer(job).data)
+
+
+class CVHistoryPagination(CursorPagination):
+    """
+    Paginación por keyset (WHERE id < cursor ORDER BY id DESC): cada página cuesta lo mismo
+    por muy atrás que esté, a diferencia de OFFSET, y no salta ni repite entradas si se
+    generan CVs nuevos mientras se pagina.
+    """
+
+    ordering = '-id'
+    page_size = settings.CV_HISTORY_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class CVHistoryListView(generics.ListAPIView):
+    """Historial de CVs generados del usuario, del más reciente al más antiguo."""
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = CVHistoryEntrySerializer
+    pagination_class = CVHistoryPagination
+
+    def get_queryset(self):
+        return CVGeneration.objects.filter(user=self.request.user)
+
+
+class CVHistoryDetailView(generics.RetrieveDestroyAPIView):
+    """
+    Un CV del historial para volver a descargarlo (una consulta por clave primaria, sin IA)
+    o borrarlo. El contenido compartido lo limpia después prune_cv_history.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = CVHistoryDetailSerializer
+
+    def get_queryset(self):
+        return CVGeneration.objects.filter(user=self.request.user).select_related('payload')
+
+
+def pdf_response(cv_data, template, language):
+    """El PDF del CV como descarga; CACHE_HEADER dice si salió del caché de PDFs."""
+    try:
+        document, hit = cached_cv_pdf(cv_data, template, language)
+    except FontError:
+        logger.exception('Error generando el PDF del CV')
+        return Response(
+            {'error': 'No se pudo generar el PDF.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    name = slugify(str(cv_data.get('job_title_target') or '')) or 'hirepilot'
+    response = HttpResponse(document, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="cv-{name}.pdf"'
+    response[CACHE_HEADER] = 'HIT' if hit else 'MISS'
+    return response
+
+
+class CVPdfView(APIView):
+    """
+    PDF de un structured_cv_data (el que devuelve la generación) con la plantilla e idioma
+    pedidos. Mismo diseño que el PDF del frontend, para clientes sin navegador.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CVPdfRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        return pdf_response(
+            data['structured_cv_data'], data['template'], data.get('language', 'es')
+        )
+
+
+class CVHistoryPdfView(APIView):
+    """PDF de un CV del historial (?template=&language=; por defecto el idioma del CV)."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        serializer = CVPdfOptionsSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        entry = get_object_or_404(
+            CVGeneration.objects.select_related('payload'), pk=pk, user=request.user
+        )
+        data = serializer.validated_data
+        return pdf_response(
+            history.load(entry), data['template'], data.get('language', entry.language)
+        )
+
+
+class GenerateCVStreamView(APIView):
+    """
+    Igual que GenerateCVView pero responde con Server-Sent Events:
+    cada elemento de una lista ('item') y cada sección del CV ('section') se envían
+    en cuanto la IA los termina, y al final llega la respuesta completa ('done').
+    Solo un idioma y en modo sync: languages o mode='async' son un 400.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CVStreamRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        throttling.check_generation(request.user)
+        generator = CVGeneratorService(
+            user=request.user,
+            job_description=serializer.validated_data['job_description'],
+            language=serializer.validated_data.get('language', 'es'),
+        )
+        response = StreamingHttpResponse(
+            self._event_stream(generator), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Evita que nginx acumule el stream
+        return response
+
+    def _event_stream(self, generator):
+        try:
+            for event, data in generator.stream_cv():
+                yield sse_event(event, data)
+        except Exception:
+            logger.exception('Error generando CV en streaming')
+            yield sse_event(
+                'error', {'error': 'Hubo un problema procesando la solicitud con la IA.'}
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGenerateCVView(View):
+    """
+    Generación nativa async para servidores ASGI (mismo contrato que GenerateCVView).
+    DRF no soporta vistas async, así que autenticamos el JWT a mano.
+    """
+
+    http_method_names = ['post']
+
+    async def post(self, request):
+        user = await self._authenticate(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Las credenciales de autenticación no se proveyeron.'},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'detail': 'JSON inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return await self._generate(request, user, data)
+
+    @idempotency.async_idempotent
+    async def _generate(self, request, user, data):
+        serializer = CVGenerationRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        job_description = serializer.validated_data['job_description']
+        language = serializer.validated_data.get('language', 'es')
+        languages = serializer.validated_data.get('languages')
+        try:
+            await sync_to_async(throttling.check_generation)(
+                user, cost=len(languages) if languages else 1
+            )
+        except Throttled as e:
+            return JsonResponse(
+                {'detail': e.detail},
+                status=e.status_code,
+                headers={'Retry-After': str(e.wait)},
+            )
+        except APIException as e:
+            return JsonResponse({'detail': e.detail}, status=e.status_code)
+
+        # Modo asíncrono: encolamos igual que la vista síncrona (lo recoge run_cv_workers)
+        if serializer.validated_data['mode'] == 'async':
+            job = await sync_to_async(enqueue_job)(user, job_description, language)
+            return JsonResponse(
+                {'job_id': str(job.id), 'status': job.status},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': reverse('generation-job-detail', args=[job.id])},
+            )
+
+        if languages:
+            try:
+                return JsonResponse(await agenerate_languages(user, job_description, languages))
+            except Exception:
+                logger.exception('Error generando CV en varios idiomas (async)')
+                return JsonResponse(
+                    {'error': 'Hubo un problema procesando la solicitud con la IA.'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        generator = CVGeneratorService(
+            user=user, job_description=job_description, language=language
+        )
+        try:
+            ai_result_json = await generator.agenerate_cv()
+        except Exception:
+            logger.exception('Error generando CV (async)')
+            return JsonResponse(
+                {'error': 'Hubo un problema procesando la solicitud con la IA.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        response = JsonResponse(format_cv_response(ai_result_json, generator.history_id))
+        response[CACHE_HEADER] = generator.cache_status
+        return response
+
+    async def _authenticate(self, request):
+        try:
+            result = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except AuthenticationFailed:
+            return None
+        if result is None or not result[0].is_active:
+            return None
+        return result[0]
+
+
+class MetricsView(View):
+    """
+    Métricas del generador en formato de texto de Prometheus (ver prometheus.py).
+    Se protege con METRICS_TOKEN (cabecera Authorization: Bearer <token>); sin token
+    configurado el endpoint no existe.
+    """
+
+    http_method_names = ['get']
+
+    def get(self, request):
+        if not settings.METRICS_TOKEN:
+            raise Http404
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(prometheus.render(), content_type=prometheus.CONTENT_TYPE)
@@ -122,6 +122,43 @@ DATABASES = {
 }
 
 
+# Caché
+# Por defecto memoria local (un caché por proceso). Con varios workers/nodos apunta
+# CACHE_BACKEND a un backend compartido (ej: django.core.cache.backends.redis.RedisCache).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'hirepilot'),
+    },
+    # CVs ya generados (direccionados por contenido). LocMemCache expulsa en orden LRU
+    # al superar MAX_ENTRIES; en Redis usa maxmemory-policy allkeys-lru.
+    'cv_results': {
+        'BACKEND': os.getenv(
+            'CV_RESULT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CV_RESULT_CACHE_LOCATION', 'hirepilot-cv-results'),
+        'TIMEOUT': int(os.getenv('CV_RESULT_CACHE_TTL', 60 * 60 * 24)),  # 1 día
+    },
+    # PDFs de los CVs (cv_generator/pdf.py): decenas de KB cada uno, aparte de los CVs
+    'cv_pdfs': {
+        'BACKEND': os.getenv(
+            'CV_PDF_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CV_PDF_CACHE_LOCATION', 'hirepilot-cv-pdfs'),
+        'TIMEOUT': int(os.getenv('CV_PDF_CACHE_TTL', 60 * 60 * 24)),  # 1 día
+    },
+}
+
+if CACHES['cv_results']['BACKEND'].endswith('LocMemCache'):
+    CACHES['cv_results']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CV_RESULT_CACHE_MAX_ENTRIES', 500)),
+    }
+if CACHES['cv_pdfs']['BACKEND'].endswith('LocMemCache'):
+    CACHES['cv_pdfs']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CV_PDF_CACHE_MAX_ENTRIES', 200)),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -184,3 +221,132 @@ PASSWORD_RESET_TIMEOUT = 86400
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 AI_MODEL = os.getenv('AI_MODEL')  # Puedes cambiar el modelo por defecto aquí
+# Con el servidor local (manage.py run_llm_stub): http://localhost:8765/v1 y cualquier API key
+AI_BASE_URL = os.getenv('AI_BASE_URL', 'https://openrouter.ai/api/v1')
+
+# Cliente HTTP de la IA (uno por proceso, compartido entre hilos)
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv('AI_HTTP_MAX_CONNECTIONS', 20))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv('AI_HTTP_MAX_KEEPALIVE', 10))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('AI_HTTP_KEEPALIVE_EXPIRY', 60))  # Segundos
+AI_CONNECT_TIMEOUT = float(os.getenv('AI_CONNECT_TIMEOUT', 5))  # Segundos
+AI_READ_TIMEOUT = float(os.getenv('AI_READ_TIMEOUT', 60))  # Segundos
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', 2))
+# Presupuesto total por petición (intentos + reintentos). Menor que el timeout de gunicorn
+AI_REQUEST_DEADLINE = float(os.getenv('AI_REQUEST_DEADLINE', 45))  # Segundos
+# Circuit breaker: se abre tras N llamadas seguidas fallidas o más lentas que SLOW_CALL
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('AI_BREAKER_FAILURE_THRESHOLD', 5))
+AI_BREAKER_SLOW_CALL = float(os.getenv('AI_BREAKER_SLOW_CALL', 30))  # Segundos
+AI_BREAKER_RESET_TIMEOUT = float(os.getenv('AI_BREAKER_RESET_TIMEOUT', 30))  # Segundos abierto
+# Hedging: segundo intento si el primero tarda más que el p95 reciente (y que MIN_DELAY)
+AI_HEDGE_ENABLED = os.getenv('AI_HEDGE_ENABLED') == 'True'
+AI_HEDGE_MIN_DELAY = float(os.getenv('AI_HEDGE_MIN_DELAY', 2))  # Segundos
+AI_HEDGE_MIN_SAMPLES = int(os.getenv('AI_HEDGE_MIN_SAMPLES', 20))  # Latencias antes de usar p95
+# Salida estructurada (json_schema estricto, ver cv_generator/schema.py) si el modelo la soporta
+AI_STRUCTURED_OUTPUT = os.getenv('AI_STRUCTURED_OUTPUT') == 'True'
+# Abrir la conexión con el proveedor al arrancar cada worker
+AI_WARMUP = os.getenv('AI_WARMUP') == 'True'
+# Precio de cada modelo en USD por millón de tokens, para el coste de las métricas (un modelo
+# sin precio no suma coste). Los tokens cacheados son parte del prompt con su propio precio
+AI_MODEL_PRICES = {
+    'openai/gpt-4o-mini': {'prompt': 0.15, 'cached_prompt': 0.075, 'completion': 0.60},
+    'openai/gpt-4o': {'prompt': 2.50, 'cached_prompt': 1.25, 'completion': 10.00},
+    'openai/gpt-4.1-mini': {'prompt': 0.40, 'cached_prompt': 0.10, 'completion': 1.60},
+    'openai/gpt-4.1': {'prompt': 2.00, 'cached_prompt': 0.50, 'completion': 8.00},
+}
+# Precio de AI_MODEL si no está en la tabla: "prompt,cacheado,respuesta" (ej: 0.15,0.075,0.6)
+if AI_MODEL and os.getenv('AI_MODEL_PRICE'):
+    _prices = map(float, os.getenv('AI_MODEL_PRICE').split(','))
+    AI_MODEL_PRICES[AI_MODEL] = dict(zip(('prompt', 'cached_prompt', 'completion'), _prices))
+
+# Límites de generación por plan (cv_generator/throttling.py). Un plan sin ritmo no tiene límite
+CV_RATE_LIMIT_ENABLED = os.getenv('CV_RATE_LIMIT_ENABLED', 'True') == 'True'
+# Los buckets deben vivir en un caché compartido entre procesos: con LocMemCache cada worker
+# lleva su propia cuenta (manage.py check avisa si DEBUG=False)
+CV_RATE_LIMIT_CACHE = os.getenv('CV_RATE_LIMIT_CACHE', 'default')
+CV_RATE_LIMITS = {  # Ritmo sostenido (formato DRF: N/second|minute|hour|day)
+    'FREE': os.getenv('CV_RATE_LIMIT_FREE', '20/hour'),
+    'PREMIUM': os.getenv('CV_RATE_LIMIT_PREMIUM', '120/hour'),
+    'PRO': os.getenv('CV_RATE_LIMIT_PRO', '600/hour'),
+}
+CV_RATE_LIMIT_BURST = {  # Generaciones seguidas permitidas con el bucket lleno
+    'FREE': int(os.getenv('CV_RATE_LIMIT_BURST_FREE', 5)),
+    'PREMIUM': int(os.getenv('CV_RATE_LIMIT_BURST_PREMIUM', 20)),
+    'PRO': int(os.getenv('CV_RATE_LIMIT_BURST_PRO', 60)),
+}
+CV_DAILY_TOKEN_QUOTAS = {  # Tokens del LLM (prompt + respuesta) al día, UTC. 0 = sin límite
+    'FREE': int(os.getenv('CV_DAILY_TOKENS_FREE', 100_000)),
+    'PREMIUM': int(os.getenv('CV_DAILY_TOKENS_PREMIUM', 1_000_000)),
+    'PRO': int(os.getenv('CV_DAILY_TOKENS_PRO', 5_000_000)),
+}
+
+# Peticiones idénticas en vuelo esperan a la primera en vez de llamar otra vez a la IA
+CV_SINGLE_FLIGHT_ENABLED = os.getenv('CV_SINGLE_FLIGHT_ENABLED', 'True') == 'True'
+# Los locks deben vivir en un caché compartido entre procesos: con LocMemCache solo se agrupan
+# las peticiones de un mismo worker (manage.py check avisa si DEBUG=False)
+CV_SINGLE_FLIGHT_CACHE = os.getenv('CV_SINGLE_FLIGHT_CACHE', 'default')
+CV_SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv('CV_SINGLE_FLIGHT_POLL_INTERVAL', 0.1))  # Segundos
+# Cabecera Idempotency-Key: respuestas guardadas para reintentos del cliente
+CV_IDEMPOTENCY_CACHE = os.getenv('CV_IDEMPOTENCY_CACHE', 'default')
+CV_IDEMPOTENCY_TTL = int(os.getenv('CV_IDEMPOTENCY_TTL', 60 * 60))  # Segundos
+
+# Caché del perfil maestro (snapshot) usado por el generador de CVs. Debe ser compartido
+# entre procesos: con LocMemCache cada worker ve los cambios tarde (manage.py check avisa si
+# DEBUG=False)
+PROFILE_SNAPSHOT_CACHE = os.getenv('PROFILE_SNAPSHOT_CACHE', 'default')
+PROFILE_SNAPSHOT_TTL = int(os.getenv('PROFILE_SNAPSHOT_TTL', 60 * 60 * 24))  # 1 día
+# Con LocMemCache (desarrollo) otro proceso no ve la invalidación: caducamos antes
+PROFILE_SNAPSHOT_LOCAL_TTL = int(os.getenv('PROFILE_SNAPSHOT_LOCAL_TTL', 60))  # Segundos
+
+# Caché de CVs generados (alias dentro de CACHES)
+CV_RESULT_CACHE = os.getenv('CV_RESULT_CACHE', 'cv_results')
+
+# Generación asíncrona (manage.py run_cv_workers)
+CV_WORKER_CONCURRENCY = int(os.getenv('CV_WORKER_CONCURRENCY', 4))  # Hilos por proceso
+CV_WORKER_POLL_INTERVAL = float(os.getenv('CV_WORKER_POLL_INTERVAL', 1.0))  # Segundos
+CV_JOB_TTL = int(os.getenv('CV_JOB_TTL', 60 * 60 * 24))  # Vida de un trabajo (segundos)
+CV_JOB_STALE_AFTER = int(os.getenv('CV_JOB_STALE_AFTER', 60 * 5))  # Reencolar si se cuelga
+
+# Historial de CVs generados (cv_generator/history.py), para volver a descargarlos sin la IA
+CV_HISTORY_ENABLED = os.getenv('CV_HISTORY_ENABLED', 'True') == 'True'
+CV_HISTORY_CODEC = os.getenv('CV_HISTORY_CODEC', 'zlib')  # zlib o zstd (requiere zstandard)
+CV_HISTORY_PAGE_SIZE = int(os.getenv('CV_HISTORY_PAGE_SIZE', 20))
+CV_HISTORY_RETENTION_DAYS = int(os.getenv('CV_HISTORY_RETENTION_DAYS', 365))  # 0 = para siempre
+
+# PDF en el servidor (cv_generator/pdf.py). Las fuentes son copia de las del frontend
+# (src/assets/fonts) para que el backend se despliegue solo; si se cambian allí, copiarlas aquí
+CV_PDF_FONT_DIR = os.getenv('CV_PDF_FONT_DIR', str(BASE_DIR / 'cv_generator' / 'fonts'))
+# Fuentes de reserva (rutas separadas por comas, relativas a CV_PDF_FONT_DIR o absolutas) para lo
+# que no traen las del frontend, que solo cubren latín: cirílico, griego, CJK... (ej:
+# NotoSans-Regular.ttf). Sin ellas esos caracteres no se dibujan
+CV_PDF_FALLBACK_FONTS = [
+    path.strip() for path in os.getenv('CV_PDF_FALLBACK_FONTS', '').split(',') if path.strip()
+]
+# Alias de CACHES para los PDFs: uno propio para que las descargas no expulsen CVs generados
+CV_PDF_CACHE = os.getenv('CV_PDF_CACHE', 'cv_pdfs')
+
+# Generación por lotes (una petición, muchas ofertas). Con los límites activos, cada plan
+# admite además como mucho su ráfaga (CV_RATE_LIMIT_BURST) por lote
+CV_BATCH_MAX_ITEMS = int(os.getenv('CV_BATCH_MAX_ITEMS', 30))
+CV_BATCH_CONCURRENCY = int(os.getenv('CV_BATCH_CONCURRENCY', 8))  # Llamadas a la IA en vuelo
+
+# Varios idiomas en una petición: auto (traduce si sale más barato), translate o parallel
+CV_MULTILANG_STRATEGY = os.getenv('CV_MULTILANG_STRATEGY', 'auto')
+
+# Genera el CV con una llamada por grupo de secciones en paralelo en vez de una sola larga
+CV_SECTION_PARALLEL = os.getenv('CV_SECTION_PARALLEL') == 'True'
+
+# Ranking local (BM25) del perfil antes de enviarlo a la IA: máximo de elementos por sección
+CV_RANKING_ENABLED = os.getenv('CV_RANKING_ENABLED', 'True') == 'True'
+CV_RANKING_MAX_EXPERIENCES = int(os.getenv('CV_RANKING_MAX_EXPERIENCES', 6))
+CV_RANKING_MAX_ACHIEVEMENTS = int(os.getenv('CV_RANKING_MAX_ACHIEVEMENTS', 4))  # Por experiencia
+CV_RANKING_MAX_PROJECTS = int(os.getenv('CV_RANKING_MAX_PROJECTS', 4))
+CV_RANKING_MAX_SKILLS = int(os.getenv('CV_RANKING_MAX_SKILLS', 25))
+
+# Oferta de trabajo: tamaño máximo que aceptamos y tokens que llegan al prompt tras limpiarla
+JOB_DESCRIPTION_MAX_CHARS = int(os.getenv('JOB_DESCRIPTION_MAX_CHARS', 20000))
+JOB_DESCRIPTION_MAX_TOKENS = int(os.getenv('JOB_DESCRIPTION_MAX_TOKENS', 2000))
+# Reutiliza el análisis de ofertas ya vistas (modelo JobPosting) y manda solo su resumen
+JOB_POSTING_STORE_ENABLED = os.getenv('JOB_POSTING_STORE_ENABLED', 'True') == 'True'
+
+# Endpoint de métricas Prometheus (/api/cv/metrics/): Authorization: Bearer <token>. Vacío = 404
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')